@@ -0,0 +1,59 @@
+import time
+import unittest
+
+import numpy as np
+
+import openmdao.api as om
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.chem_eq import ChemEq, nested_newton_solver
+
+from benchmark_hbtf_design import CFM56DesignTestCase
+
+
+class NestedChemEqModel(om.Group):
+    """ model that converges every ChemEq with the nested OpenMDAO newton solver. The solvers are
+    assigned in configure, once the cycle has built its ChemEq instances but before they are set up """
+
+    def configure(self):
+        for ceq in self.system_iter(recurse=True, typ=ChemEq):
+            newton = ceq.nonlinear_solver = nested_newton_solver()
+            newton.options['iprint'] = -1
+            newton.options['atol'] = ceq.options['atol']
+            newton.options['rtol'] = ceq.options['rtol']
+            ceq.linear_solver = om.DirectSolver(assemble_jac=True)
+
+
+class ChemEqSolverTestCase(CFM56DesignTestCase):
+    """ times the HBTF design point with the internal ChemEq newton iteration and with the
+    nested OpenMDAO newton solver it replaces, and checks both land on the same cycle """
+
+    def run_timed(self):
+        st = time.time()
+        self.prob.run_model()
+        run_time = time.time() - st
+
+        return run_time, self.prob['DESIGN.perf.TSFC'][0], self.prob['DESIGN.balance.FAR'][0]
+
+    def benchmark_internal_vs_nested(self):
+        np.seterr(divide='raise')
+
+        internal_time, internal_TSFC, internal_FAR = self.run_timed()
+
+        self.model_class = NestedChemEqModel
+        self.setUp()
+        nested_time, nested_TSFC, nested_FAR = self.run_timed()
+
+        print()
+        print('internal newton time:', internal_time)
+        print('nested newton time:  ', nested_time)
+        print('speedup:', nested_time/internal_time)
+        print('TSFC internal/nested:', internal_TSFC, nested_TSFC)
+        print('FAR internal/nested: ', internal_FAR, nested_FAR)
+
+        assert_rel_error(self, internal_TSFC, nested_TSFC, 1e-5)
+        assert_rel_error(self, internal_FAR, nested_FAR, 1e-5)
+
+
+if __name__ == "__main__":
+    unittest.main()
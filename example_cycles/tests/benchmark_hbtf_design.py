@@ -11,9 +11,12 @@ from example_cycles.high_bypass_turbofan import HBTF
 
 class CFM56DesignTestCase(unittest.TestCase):
 
+    # group used as the problem model, so benchmarks can set up the cycle in their own configure
+    model_class = om.Group
+
     def setUp(self):
 
-        self.prob = om.Problem()
+        self.prob = om.Problem(self.model_class())
 
         des_vars = self.prob.model.add_subsystem('des_vars', om.IndepVarComp(), promotes=['*'])
         des_vars.add_output('alt', 35000., units='ft'),
@@ -0,0 +1,53 @@
+import os
+import sys
+import time
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'N+3ref'))
+
+from N3_MDP import N3_MDP_model, initial_guesses
+
+
+class N3MDPComplexStepTestCase(unittest.TestCase):
+    """ times complex step total derivatives of the N3 multipoint design, which evaluate and
+    linearize every CEA component under complex step """
+
+    def setUp(self):
+        self.prob = prob = N3_MDP_model()
+
+        prob.model.add_design_var('fan:PRdes', lower=1.20, upper=1.4)
+        prob.model.add_design_var('lpc:PRdes', lower=2.0, upper=4.0)
+        prob.model.add_design_var('OPR', lower=40.0, upper=70.0, ref0=40.0, ref=70.0)
+        prob.model.add_design_var('RTO:T4max', lower=3000.0, upper=3600.0, ref0=3000.0, ref=3600.0)
+        prob.model.add_design_var('CRZ:VjetRatio', lower=1.35, upper=1.45, ref0=1.35, ref=1.45)
+        prob.model.add_design_var('TR', lower=0.5, upper=0.95, ref0=0.5, ref=0.95)
+
+        prob.model.add_objective('TOC.perf.TSFC')
+        prob.model.add_constraint('TOC.fan_dia.FanDia', upper=100.0, ref=100.0)
+
+        prob.model.approx_totals(method='cs')
+
+        prob.setup(check=False, force_alloc_complex=True)
+        initial_guesses(prob)
+
+        prob.set_solver_print(level=-1)
+        prob.run_model()
+
+    def benchmark_cs_totals(self):
+        np.seterr(divide='raise')
+
+        st = time.time()
+        totals = self.prob.compute_totals()
+        cs_time = time.time() - st
+
+        print()
+        print('complex step totals time:', cs_time)
+
+        for key, val in totals.items():
+            self.assertTrue(np.all(np.isfinite(val)), msg=key)
+
+
+if __name__ == "__main__":
+    unittest.main()
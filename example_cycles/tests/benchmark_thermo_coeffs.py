@@ -0,0 +1,86 @@
+import time
+import unittest
+
+import numpy as np
+
+from pycycle.cea import species_data
+
+
+def build_coeff_table_loop(thermo, Tt):
+    """the per-product loop build_coeff_table used before the coefficients were packed"""
+    a = np.zeros((thermo.num_prod, 10))
+    for i, p in enumerate(thermo.products):
+        tr = thermo.prod_data[p]['ranges']
+
+        j = int(np.searchsorted(tr, Tt))
+        if j == 0:
+            j = 1
+        elif j == len(tr):
+            j -= 1
+
+        data = thermo.prod_data[p]['coeffs'][j-1]
+        a[i][:len(data)] = data
+    return a
+
+
+def newton_temperatures(num_stations=40, num_iter=8):
+    """temperatures seen by the equilibrium newton iterations of a cycle: every flow station
+    starts from the same guess and converges onto its own temperature"""
+    T_final = np.linspace(250., 1900., num_stations)
+    k = np.arange(num_iter)[:, np.newaxis]
+    return (T_final + (400. - T_final)*.3**k).T.ravel()
+
+
+class ThermoCoeffTestCase(unittest.TestCase):
+
+    def benchmark_build_coeff_table(self):
+        thermo = species_data.Thermo(species_data.janaf)
+        T = np.tile(newton_temperatures(), 10)
+
+        st = time.time()
+        for Tt in T:
+            a_loop = build_coeff_table_loop(thermo, Tt)
+        loop_time = time.time() - st
+
+        st = time.time()
+        for Tt in T:
+            a_packed = thermo.coeff_table(Tt)
+        packed_time = time.time() - st
+
+        st = time.time()
+        a_table = thermo.coeff_table(T)
+        table_time = time.time() - st
+
+        print()
+        print('temperatures:', T.size)
+        print('per product loop time:', loop_time)
+        print('packed gather time:   ', packed_time)
+        print('one gather for all T: ', table_time)
+        print('speedup:', loop_time/packed_time)
+
+        np.testing.assert_array_equal(a_packed, a_loop)
+        np.testing.assert_array_equal(a_table[-1], a_loop)
+
+    def benchmark_thermo_spline(self):
+        thermo = species_data.Thermo(species_data.janaf)
+        spline = species_data.ThermoSpline(species_data.janaf)
+        T = newton_temperatures()
+
+        times = []
+        for th in (thermo, spline):
+            st = time.time()
+            for i in range(T.size):
+                th.H0(T[i:i+1])
+                th.S0(T[i:i+1])
+                th.H0_applyJ(T[i:i+1], 1.)
+            times.append(time.time() - st)
+
+        print()
+        print('Thermo time:      ', times[0])
+        print('ThermoSpline time:', times[1])
+
+        np.testing.assert_allclose(spline.H0_array(T), thermo.H0_array(T), rtol=1e-4)
+
+
+if __name__ == "__main__":
+    unittest.main()
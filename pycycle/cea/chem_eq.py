@@ -1,8 +1,11 @@
 import numpy as np
 
 import openmdao.api as om
+from openmdao.utils.om_warnings import issue_warning, SolverWarning
 
 from pycycle.constants import P_REF, R_UNIVERSAL_ENG, MIN_VALID_CONCENTRATION
+from pycycle.cea.utils import node_shape, block_diag_pattern
+from pycycle.cea.warm_start import get_warm_start_cache
 
 # P_REF = 1.01325 # 1 atm
 # R_UNIVERSAL_ENG = 1.9872035 # (Btu lbm)/(mol*degR)
@@ -14,6 +17,216 @@ def _resid_weighting(n):
     return (1 / (1 + np.exp(-1e5 * n)) - .5) * 2
 
 
+def _solve_bordered(e, u, v, B, C, D, r1, r2):
+    """ Solves [[diag(e) + u*v^T, B], [C, D]] * [x1, x2] = [r1, r2] for every node.
+
+    The species block is diagonal plus rank one, but it is singular on its own
+    (J_n_n * n = 0), so Sherman-Morrison cannot invert it directly. Instead
+    s = v^T*x1 is kept as an extra unknown and x1 = diag(e)^-1 * (r1 - u*s - B*x2)
+    is eliminated, which leaves a dense system the size of the element (+T)
+    system plus one. The transposed system is solved by swapping u with v and B with C^T. """
+
+    Einv_r = r1 / e
+    Einv_u = u / e
+    Einv_B = B / e[:, :, np.newaxis]
+
+    m = D.shape[-1]
+    M = np.empty((e.shape[0], m + 1, m + 1), dtype=np.result_type(Einv_B, Einv_r, D))
+    M[:, 0, 0] = 1. + np.sum(v * Einv_u, axis=1)
+    M[:, 0, 1:] = np.einsum('ij,ijk->ik', v, Einv_B)
+    M[:, 1:, 0] = -np.einsum('ijk,ik->ij', C, Einv_u)
+    M[:, 1:, 1:] = D - np.einsum('ijk,ikl->ijl', C, Einv_B)
+
+    rhs = np.empty((e.shape[0], m + 1, 1), dtype=M.dtype)
+    rhs[:, 0, 0] = np.sum(v * Einv_r, axis=1)
+    rhs[:, 1:, 0] = r2 - np.einsum('ijk,ik->ij', C, Einv_r)
+
+    sx2 = np.linalg.solve(M, rhs)[:, :, 0]
+    x2 = sx2[:, 1:]
+    x1 = Einv_r - Einv_u * sx2[:, :1] - np.einsum('ijk,ik->ij', Einv_B, x2)
+
+    return x1, x2
+
+
+# convergence and damping constants for the reduced (element potential) iteration.
+# See NASA RP-1311, Gordon and McBride, section 3
+REDUCED_TOL = 1e-12
+LN_TRACE_SIZE = 18.420681  # -ln(1e-8), trace threshold on ln(n_j/n_moles)
+LN_TRACE_TARGET = 9.2103404  # -ln(1e-4), amount trace species are allowed to grow to in one step
+
+# sufficient decrease factor of the line search in the full formulation's newton iteration
+ARMIJO_C = .1
+
+
+def nested_newton_solver():
+    """OpenMDAO Newton solver that converges a ChemEq instance when its nested_solver option is set"""
+    newton = om.NewtonSolver()
+    newton.options['maxiter'] = 100
+    newton.options['iprint'] = 2
+    newton.options['atol'] = 1e-10
+    newton.options['rtol'] = 1e-10
+    newton.options['solve_subsystems'] = True
+    newton.options['reraise_child_analysiserror'] = False
+
+    # ln_bt = newton.linesearch = om.BoundsEnforceLS()
+    ln_bt = newton.linesearch = om.ArmijoGoldsteinLS()
+    ln_bt.options['maxiter'] = 2
+    ln_bt.options['bound_enforcement'] = 'scalar'
+    ln_bt.options['iprint'] = -1
+    #ln_bt.options['maxiter'] = 1
+
+    return newton
+
+
+def solve_reduced_equilibrium(thermo, mode, P, b0, n, T, target=None, maxiter=100):
+    """ Reduced Gordon-McBride iteration (NASA RP-1311, eqs 2.24-2.28).
+
+    The only unknowns of the Newton step are the element potentials pi, dln(n_moles)
+    and (for h and S modes) dln(T). The species corrections follow in closed form from
+    dln(n_j) = -mu_j + sum_i(a_ij*pi_i) + dln(n_moles) + H0_j*dln(T),
+    so each step only factors a (num_element+1) or (num_element+2) matrix.
+
+    P (bar), b0 and the starting n and T are given per node; target is the enthalpy
+    (cal/g) or entropy (cal/(g*degK)) for the h and S modes. Returns n, pi and T and
+    whether each node converged within maxiter, see check_converged."""
+
+    nn, num_prod = n.shape
+    num_element = thermo.num_element
+    aij = thermo.aij
+
+    dtype = np.result_type(P, b0, n, T, target if target is not None else 0.)
+    ln_P = np.log(P / P_REF)[:, np.newaxis]
+
+    n = n.astype(dtype)
+    n_moles = np.sum(n, axis=1)
+
+    T = T.astype(dtype)
+    if mode == 'h':
+        h0_RT = target / R_UNIVERSAL_ENG
+    elif mode == 'S':
+        s0_R = target / R_UNIVERSAL_ENG
+
+    # one extra unknown for dln(n_moles), and one more for dln(T) when T is a state
+    size = num_element + (1 if mode == 'T' else 2)
+    A = np.zeros((nn, size, size), dtype=dtype)
+    rhs = np.zeros((nn, size), dtype=dtype)
+    idx_n = num_element
+    pi = np.zeros((nn, num_element), dtype=dtype)
+    converged = np.zeros(nn, dtype=bool)
+
+    # species sitting at the concentration floor are held fixed (removed from the
+    # potential equations) until the closed form correction wants them to grow
+    fixed = n.real <= MIN_VALID_CONCENTRATION
+
+    for _ in range(maxiter):
+        H0_T = thermo.H0_array(T)
+        S0_T = thermo.S0_array(T)
+
+        ln_nj_q_n = np.log(n / n_moles[:, np.newaxis])
+        mu = H0_T - S0_T + ln_nj_q_n + ln_P
+        n_act = np.where(fixed, 0., n)
+        n_mu = n_act * mu
+        b = n.dot(aij.T)
+        b_act = n_act.dot(aij.T)
+        sum_n = np.sum(n, axis=1)
+
+        # element rows, eq 2.24
+        A[:, :num_element, :num_element] = np.einsum('kj,ij,nj->nki', aij, aij, n_act)
+        A[:, :num_element, idx_n] = b_act
+        rhs[:, :num_element] = b0 - b + n_mu.dot(aij.T)
+
+        # total moles row, eq 2.26
+        A[:, idx_n, :num_element] = b_act
+        A[:, idx_n, idx_n] = np.sum(n_act, axis=1) - n_moles
+        rhs[:, idx_n] = n_moles - sum_n + np.sum(n_mu, axis=1)
+
+        if mode != 'T':
+            Cp0_T = thermo.Cp0_array(T)
+            n_H0 = n_act * H0_T
+            sum_n_H0 = np.sum(n_H0, axis=1)
+            A[:, :num_element, -1] = n_H0.dot(aij.T)
+            A[:, idx_n, -1] = sum_n_H0
+
+            if mode == 'h':  # eq 2.27
+                A[:, -1, :num_element] = n_H0.dot(aij.T)
+                A[:, -1, idx_n] = sum_n_H0
+                A[:, -1, -1] = np.sum(n*Cp0_T + n_H0*H0_T, axis=1)
+                rhs[:, -1] = h0_RT / T - np.sum(n*H0_T, axis=1) + np.sum(n_H0 * mu, axis=1)
+            else:  # eq 2.28
+                Sj = S0_T - ln_nj_q_n - ln_P
+                n_Sj = n_act * Sj
+                sum_n_Sj = np.sum(n_Sj, axis=1)
+                A[:, -1, :num_element] = n_Sj.dot(aij.T)
+                A[:, -1, idx_n] = sum_n_Sj
+                A[:, -1, -1] = np.sum(n*Cp0_T + n_H0*Sj, axis=1)
+                rhs[:, -1] = s0_R - np.sum(n*Sj, axis=1) + n_moles - sum_n + np.sum(n_Sj * mu, axis=1)
+
+        try:
+            x = np.linalg.solve(A, rhs)
+        except np.linalg.LinAlgError:
+            raise om.AnalysisError('Singular reduced equilibrium matrix')
+
+        pi = x[:, :num_element]
+        dln_n_moles = x[:, idx_n]
+        dln_nj = -mu + pi.dot(aij) + dln_n_moles[:, np.newaxis]
+        if mode != 'T':
+            dln_T = x[:, -1]
+            dln_nj += H0_T * dln_T[:, np.newaxis]
+        else:
+            dln_T = np.zeros(nn)
+
+        # fixed species that want to grow are released for the next step
+        dln_nj_r = dln_nj.real
+        released = fixed & (dln_nj_r > 0)
+        dln_nj = np.where(fixed, 0., dln_nj)
+        dln_nj_r = dln_nj.real
+
+        # damping, eqs 3.1-3.3
+        major = ln_nj_q_n.real > -LN_TRACE_SIZE
+        big_step = np.max(np.where(major & (dln_nj_r > 0), np.abs(dln_nj_r), 0.), axis=1)
+        big_step = np.maximum(big_step, 5 * np.maximum(np.abs(dln_n_moles.real), np.abs(dln_T.real)))
+        lam = np.ones(nn)
+        np.divide(2., big_step, out=lam, where=big_step > 2.)
+        growing_trace = ~major & ~fixed & (dln_nj_r >= 0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            lam_trace = np.abs((-ln_nj_q_n.real - LN_TRACE_TARGET) / (dln_nj_r - dln_n_moles.real[:, np.newaxis]))
+        lam_trace = np.min(np.where(growing_trace, lam_trace, 1.), axis=1)
+        lam = np.minimum(lam, lam_trace)[:, np.newaxis]
+
+        n = n * np.exp(lam * dln_nj)
+        n_moles = n_moles * np.exp(lam[:, 0] * dln_n_moles)
+        if mode != 'T':
+            T = T * np.exp(lam[:, 0] * dln_T)
+
+        if not np.all(np.isfinite(n)):
+            raise om.AnalysisError('Reduced equilibrium iteration diverged')
+
+        floored = n.real < MIN_VALID_CONCENTRATION
+        n = np.where(floored, MIN_VALID_CONCENTRATION, n)
+        fixed = (fixed & ~released) | floored
+
+        # convergence criteria, eq 3.5 tightened to the tolerance of the full formulation
+        n_change = n.real / n_moles.real[:, np.newaxis] * np.abs(dln_nj_r)
+        converged = (~np.any(released, axis=1) & (np.max(n_change, axis=1) < REDUCED_TOL) &
+                     (np.abs(dln_n_moles.real) < REDUCED_TOL) & (np.abs(dln_T.real) < REDUCED_TOL))
+        if np.all(converged):
+            break
+
+    return n, pi, T, converged
+
+
+def check_converged(converged, pathname, err_on_non_converge=False, iteration='Equilibrium'):
+    """raises an AnalysisError, or only warns, when some nodes of the iteration in pathname
+    did not converge"""
+    if np.all(converged):
+        return
+
+    msg = '{} iteration did not converge for nodes {}'.format(iteration, np.nonzero(~converged)[0].tolist())
+    if err_on_non_converge:
+        raise om.AnalysisError('{} in {}'.format(msg, pathname))
+    issue_warning(msg, prefix=pathname, category=SolverWarning)
+
+
 class ChemEq(om.ImplicitComponent):
     """ Find the equilibirum composition for a given gaseous mixture """
 
@@ -22,9 +235,13 @@ class ChemEq(om.ImplicitComponent):
         # print("testing", self.pathname)
         if norm > 1e-2 or norm==0.0 or np.any(outputs['n'] < 0):
             # print(self.pathname, ": resetting guess")
-            outputs['n'] = self.n_init
+            nn = self.options['num_nodes']
+            n, pi, T = self._restart_guess(inputs, np.ones(nn, dtype=bool))
+            outputs['n'] = n.reshape(outputs['n'].shape)
+            if pi is not None:
+                outputs['pi'] = pi.reshape(outputs['pi'].shape)
             if self.options['mode'] != 'T':
-                outputs['T'] = 1000.
+                outputs['T'] = T
 
     def initialize(self):
         self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
@@ -32,65 +249,88 @@ class ChemEq(om.ImplicitComponent):
                               desc='the input variable that defines the total properties',
                               default='T',
                               values=('T', 'S', 'h'))
+        self.options.declare('num_nodes', types=int, default=1,
+                              desc='number of independent mixtures to equilibrate at once')
+        self.options.declare('formulation', default='full', values=('full', 'reduced'),
+                              desc='"full" Newton iterates on n, pi (and T). '
+                                   '"reduced" solves the Gordon-McBride system in the element '
+                                   'potentials, ln(n_moles) and ln(T), recovering n in closed form')
+        self.options.declare('nested_solver', default=False, types=bool,
+                              desc='converge the full formulation with a nested OpenMDAO NewtonSolver '
+                                   'instead of the internal Newton iteration in solve_nonlinear')
+        self.options.declare('active_set', default=True, types=bool,
+                              desc='leave species at the concentration floor out of the Newton system of '
+                                   'the full formulation until their chemical potential says they should grow')
+        self.options.declare('warm_start_size', default=0, types=int,
+                              desc='number of converged states kept per thermo mixture and mode to restart '
+                                   'nodes from the nearest one instead of n_init, 0 to disable')
+        self.options.declare('maxiter', default=100, types=int,
+                              desc='maximum number of iterations of the internal equilibrium solve')
+        self.options.declare('atol', default=1e-10,
+                              desc='absolute tolerance on the scaled residual norm of each node')
+        self.options.declare('rtol', default=1e-10,
+                              desc='relative tolerance on the scaled residual norm of each node')
+        self.options.declare('err_on_non_converge', default=False, types=bool,
+                              desc='raise an AnalysisError instead of a warning when the internal '
+                                   'equilibrium solve does not converge within maxiter')
 
     def setup(self):
 
-        newton = self.nonlinear_solver = om.NewtonSolver()
-        newton.options['maxiter'] = 100
-        newton.options['iprint'] = 2
-        newton.options['atol'] = 1e-10
-        newton.options['rtol'] = 1e-10
-        newton.options['solve_subsystems'] = True
-        newton.options['reraise_child_analysiserror'] = False
-
         self.options['assembled_jac_type'] = 'dense'
-        self.linear_solver = om.DirectSolver(assemble_jac=True)
 
-        # ln_bt = newton.linesearch = om.BoundsEnforceLS()
-        ln_bt = newton.linesearch = om.ArmijoGoldsteinLS()
-        ln_bt.options['maxiter'] = 2
-        ln_bt.options['bound_enforcement'] = 'scalar'
-        ln_bt.options['iprint'] = -1
-        #ln_bt.options['maxiter'] = 1
+        if self.options['nested_solver']:
+            if self.options['formulation'] != 'full':
+                raise ValueError('nested_solver can only be used with the "full" formulation, '
+                                 'but "%s" was given' % self.options['formulation'])
+            self.nonlinear_solver = nested_newton_solver()
+            self.linear_solver = om.DirectSolver(assemble_jac=True)
 
         # Once the concentration of a species reaches its minimum, we
         # can essentially remove it from the problem. This switch controls
-        # whether to do this.
-        self.remove_trace_species = False
+        # whether to do this. Tracked per node, since each node converges independently.
+        self.remove_trace_species = np.zeros(self.options['num_nodes'], dtype=bool)
 
         # multiply a damping function that scales down the residual for trace species
         self.use_trace_damping = True
 
+        size = self.options['warm_start_size']
+        self._warm_start = get_warm_start_cache(self.options['thermo'], self.options['mode'], size) \
+            if size > 0 else None
+
         thermo = self.options['thermo']
         mode = self.options['mode']
+        nn = self.options['num_nodes']
 
         num_prod = thermo.num_prod
         num_element = thermo.num_element
 
+        n_shape = node_shape(nn, num_prod)
+        pi_shape = node_shape(nn, num_element)
+
         # Input vars
-        self.add_input('init_prod_amounts', val=thermo.init_prod_amounts, shape=(num_prod,),
+        self.add_input('init_prod_amounts', val=np.broadcast_to(thermo.init_prod_amounts, n_shape),
                        desc="initial mass fractions of products, before equilibrating")
 
-        self.add_input('P', val=1.0, units="bar", desc="Pressure")
+        self.add_input('P', val=1.0, shape=nn, units="bar", desc="Pressure")
 
         if mode == "T":  # T is an input
-            self.add_input('T', val=400., units="degK", desc="Temperature")
+            self.add_input('T', val=400., shape=nn, units="degK", desc="Temperature")
         elif mode == "h" or mode == "S":  # T becomes another state variable
             if mode == "h":  # hP solve
-                self.add_input('h', val=0., units="cal/g",
+                self.add_input('h', val=0., shape=nn, units="cal/g",
                                desc="Enthalpy")
             elif mode == "S":  # SP solve
-                self.add_input('S', val=0., units="cal/(g*degK)",
+                self.add_input('S', val=0., shape=nn, units="cal/(g*degK)",
                                desc="Entropy")
 
             self.T_idx = num_prod + num_element
-            self.add_output('T', val=400., units="degK", desc="Temperature",
+            self.add_output('T', val=400., shape=nn, units="degK", desc="Temperature",
                             lower=1.,
                             res_ref=100
                             )
 
         # State vars
-        self.n_init = np.ones(num_prod) / num_prod / 10  # initial guess for n
+        self.n_init = np.ones(n_shape) / num_prod / 10  # initial guess for n
 
         # for a known solution, these are the orders of magnitude of the variables.
         # We'll try setting scaling to +/1 1 order around thee values
@@ -100,21 +340,21 @@ class ChemEq(om.ImplicitComponent):
                         1.00000000e-10, 7.23198523e-03])
 
         #mag = np.ones(num_prod)
-        self.add_output('n', shape=num_prod,
+        self.add_output('n', shape=n_shape,
                         val=self.n_init,
                         desc="mole fractions of the mixture",
                         lower=1e-10,
                         res_ref=10000.
                         )
 
-        self.add_output('pi', val=np.ones(num_element),
+        self.add_output('pi', val=np.ones(pi_shape),
                         desc="modified lagrange multipliers from the Gibbs lagrangian")
 
         # Explicit Outputs
-        self.add_output('b0', shape=num_element,  # when converged, b0=b
+        self.add_output('b0', shape=pi_shape,  # when converged, b0=b
                         desc='assigned kg-atoms of element i per total kg of reactant '
                              'for the initial prod amounts')
-        self.add_output('n_moles', lower=1e-10, val=0.034, shape=1,
+        self.add_output('n_moles', lower=1e-10, val=0.034, shape=nn,
                         desc="1/molecular weight of gas")
 
         # allocate the newton Jacobian
@@ -122,8 +362,10 @@ class ChemEq(om.ImplicitComponent):
         if mode != "T":
             size += 1  # added T as a state variable
 
-        self._dRdy = np.zeros((size, size))
-        self._rhs = np.zeros(size)  # used for solve_linear
+        # real and complex newton jacobians, _calc_dRdy switches between them by reference
+        self._dRdy_real = self._dRdy = np.zeros((nn, size, size))
+        self._dRdy_complex = np.zeros((nn, size, size), dtype=complex)
+        self._rhs = np.zeros((nn, size))  # used for solve_linear
 
         # Cached stuff for speed
         self.H0_T = None
@@ -137,25 +379,50 @@ class ChemEq(om.ImplicitComponent):
         # self.deriv_options['type'] = 'fd'
         # self.deriv_options['step_size'] = 1e-5
 
-        self.declare_partials('n', ['n', 'pi', 'P', 'T'])
-        self.declare_partials('pi', ['n', 'init_prod_amounts'])
-        self.declare_partials('b0', ['b0', 'init_prod_amounts'])
-        self.declare_partials('n_moles', 'n')
-        self.declare_partials('n_moles', 'n_moles', val=-1)
+        # every node is independent, so all sub-jacobians are block diagonal
+        ar = np.arange(nn)
+        for wrt, size_wrt in (('n', num_prod), ('P', 1), ('T', 1)):
+            rows, cols = block_diag_pattern(nn, num_prod, size_wrt)
+            self.declare_partials('n', wrt, rows=rows, cols=cols)
+
+        # the mass balance blocks only have entries where an element appears in a species
+        aij = np.array(thermo.aij, dtype=float)
+        rows, cols = block_diag_pattern(nn, num_element, num_prod)
+        self._aij_nz = aij_nz = np.tile(aij.ravel() != 0, nn)
+        rows, cols, aij_vals = rows[aij_nz], cols[aij_nz], np.tile(aij.ravel(), nn)[aij_nz]
+        self.declare_partials('pi', 'n', val=aij_vals, rows=rows, cols=cols)
+        self.declare_partials('pi', 'init_prod_amounts', val=-aij_vals, rows=rows, cols=cols)
+        self.declare_partials('b0', 'init_prod_amounts', val=aij_vals, rows=rows, cols=cols)
+
+        rows, cols = block_diag_pattern(nn, num_prod, num_element)
+        self._aijT_nz = aijT_nz = np.tile(aij.T.ravel() != 0, nn)
+        self.declare_partials('n', 'pi', rows=rows[aijT_nz], cols=cols[aijT_nz])
+
+        ar_b0 = np.arange(nn*num_element)
+        self.declare_partials('b0', 'b0', val=-1, rows=ar_b0, cols=ar_b0)
+
+        rows, cols = block_diag_pattern(nn, 1, num_prod)
+        self.declare_partials('n_moles', 'n', val=1., rows=rows, cols=cols)
+        self.declare_partials('n_moles', 'n_moles', val=-1, rows=ar, cols=ar)
 
         if mode == 'h':
-            self.declare_partials('T', ['n', 'h', 'T'])
+            self.declare_partials('T', 'n', rows=rows, cols=cols)
+            self.declare_partials('T', ['h', 'T'], rows=ar, cols=ar)
         elif mode == 'S':
-            self.declare_partials('T', ['n', 'S', 'T', 'P'])
+            self.declare_partials('T', 'n', rows=rows, cols=cols)
+            self.declare_partials('T', ['S', 'T', 'P'], rows=ar, cols=ar)
 
     def apply_nonlinear(self, inputs, outputs, resids):
         thermo = self.options['thermo']
         mode = self.options['mode']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
 
-        P = inputs['P'] / P_REF
-        n = outputs['n']
-        n_moles = np.sum(n)
-        pi = outputs['pi']
+        P = inputs['P'].reshape((nn, 1)) / P_REF
+        n = outputs['n'].reshape((nn, num_prod))
+        n_moles = np.sum(n, axis=1, keepdims=True)
+        pi = outputs['pi'].reshape((nn, num_element))
         # MW = 1/n_moles
 
         if mode != "T":
@@ -169,17 +436,17 @@ class ChemEq(om.ImplicitComponent):
         #         print( n)
         #         print()
         # Output equation for n_moles
-        resids['n_moles'] = n_moles - outputs['n_moles']
+        resids['n_moles'] = n_moles[:, 0] - outputs['n_moles']
 
         # Output equation for b0
-        b0 = np.sum(thermo.aij * inputs['init_prod_amounts'], axis=1)
-        resids['b0'] = b0 - outputs['b0']
+        b0 = inputs['init_prod_amounts'].reshape((nn, num_prod)).dot(thermo.aij.T)
+        resids['b0'] = b0 - outputs['b0'].reshape((nn, num_element))
 
         try:
-            self.H0_T = H0_T = thermo.H0(T)
-            self.S0_T = S0_T = thermo.S0(T)
+            self.H0_T = H0_T = thermo.H0_array(T)
+            self.S0_T = S0_T = thermo.S0_array(T)
         except:
-            raise AnalysisError('Bad Temp')
+            raise om.AnalysisError('Bad Temp')
             # T[:] = 500.
             # self.H0_T = H0_T = thermo.H0(T)
             # self.S0_T = S0_T = thermo.S0(T)
@@ -198,44 +465,368 @@ class ChemEq(om.ImplicitComponent):
             self.mu = H0_T - S0_T + np.log(n) + np.log(1e-5) - np.log(n_moles)
             np.seterr(all='warn')
 
-        resids_n = (self.mu - np.sum(pi * thermo.aij.T, axis=1))
+        resids_n = self.mu - pi.dot(thermo.aij)
         if self.use_trace_damping:
             self.weights = _resid_weighting(n * n_moles)
             resids_n *= self.weights
 
         # Zero out resids when a concentration drops too low.
-        if self.remove_trace_species:
+        if np.any(self.remove_trace_species):
             # for j, composition in enumerate(n):
             #     if composition <= 1.0e-10:
             #         resids['n'][j] = 0.0
-            self._trace = np.where(n <= MIN_VALID_CONCENTRATION+1e-20)
+            self._trace = (n <= MIN_VALID_CONCENTRATION+1e-20) & self.remove_trace_species[:, np.newaxis]
             resids_n[self._trace] = 0.
 
         # this keeps our vector.__setitem__ calls to a minimum
         resids['n'] = resids_n
 
         # residuals from the conservation of mass
-        resids['pi'] = np.sum(thermo.aij * n, axis=1) - b0
+        resids['pi'] = n.dot(thermo.aij.T) - b0
 
         # residuals from temperature equation when T is a state
         if mode == "h":
-            self.sum_n_H0_T = np.sum(n * H0_T)
+            self.sum_n_H0_T = np.sum(n * H0_T, axis=1)
             h = inputs['h']
             resids['T'] = (h - self.sum_n_H0_T * R_UNIVERSAL_ENG * T)/h
         elif mode == "S":
             S = inputs['S']
 
-            resids['T'] = (S-R_UNIVERSAL_ENG*np.sum(n*(S0_T-np.log(n)+np.log(n_moles)-np.log(P))))/S
+            resids['T'] = (S-R_UNIVERSAL_ENG*np.sum(n*(S0_T-np.log(n)+np.log(n_moles)-np.log(P)), axis=1))/S
 
         # if 'DESIGN.burner.vitiated_flow.chem_eq' in self.pathname:
             # print(self.pathname, np.linalg.norm(resids['n']))
             # print("    ", outputs['T'], resids['T'])
             # print('foo', inputs['h'], inputs['P'], inputs['init_prod_amounts'])
 
-        if np.linalg.norm(resids['n']) < 1e-4:
-            self.remove_trace_species = True
+        self.remove_trace_species = np.linalg.norm(resids_n, axis=1) < 1e-4
+
+    def solve_nonlinear(self, inputs, outputs):
+        if self.options['formulation'] == 'reduced':
+            converged = self._solve_reduced(inputs, outputs)
         else:
-            self.remove_trace_species = False
+            converged = self._solve_full(inputs, outputs)
+        check_converged(converged, self.pathname, self.options['err_on_non_converge'])
+
+        if self._warm_start is not None and not outputs._under_complex_step and np.any(converged):
+            thermo = self.options['thermo']
+            nn = self.options['num_nodes']
+            states = [outputs['n'].reshape((nn, thermo.num_prod)),
+                      outputs['pi'].reshape((nn, thermo.num_element))]
+            if self.options['mode'] != 'T':
+                states.append(outputs['T'].reshape((nn, 1)))
+            self._warm_start.store(self._warm_start_features(inputs)[converged],
+                                   np.hstack(states)[converged])
+
+    def _warm_start_features(self, inputs):
+        """ per node position in the warm start cache: log(P), the mode input and the element
+        fractions of the reactants, scaled to roughly comparable ranges """
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        b0 = inputs['init_prod_amounts'].reshape((nn, thermo.num_prod)).dot(thermo.aij.T)
+        x = np.empty((nn, thermo.num_element + 2))
+        x[:, 0] = np.log(inputs['P'].real)
+        if mode == 'T':
+            x[:, 1] = np.log(inputs['T'].real)
+        elif mode == 'h':
+            x[:, 1] = inputs['h'].real / 100.
+        else:
+            x[:, 1] = inputs['S'].real * 10.
+        x[:, 2:] = 10. * b0.real / np.sum(b0.real, axis=1, keepdims=True)
+        return x
+
+    def _restart_guess(self, inputs, reset):
+        """ n, pi (None to keep the current values) and T to restart the nodes in reset from:
+        the nearest converged state in the warm start cache, or n_init and 1000 K """
+        thermo = self.options['thermo']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+
+        n = self.n_init.reshape((-1, num_prod))[reset]
+        pi = None
+        T = np.full(n.shape[0], 1000.)
+
+        if self._warm_start is not None:
+            states = self._warm_start.lookup(self._warm_start_features(inputs)[reset])
+            if states is not None:
+                n = states[:, :num_prod]
+                pi = states[:, num_prod:num_prod+num_element]
+                if self.options['mode'] != 'T':
+                    T = states[:, -1]
+
+        return n, pi, T
+
+    def _scaled_resid_norm(self, resids):
+        """ per node norm of the residuals, scaled by res_ref the same way the nested solver sees them """
+        nn = self.options['num_nodes']
+
+        norm2 = np.sum(np.abs(resids['n'].reshape((nn, -1)) / 1e4)**2, axis=1)
+        norm2 += np.sum(np.abs(resids['pi'].reshape((nn, -1)))**2, axis=1)
+        norm2 += np.sum(np.abs(resids['b0'].reshape((nn, -1)))**2, axis=1)
+        norm2 += np.abs(resids['n_moles'])**2
+        if self.options['mode'] != 'T':
+            norm2 += np.abs(resids['T'] / 100.)**2
+        return np.sqrt(norm2)
+
+    def _solve_full(self, inputs, outputs):
+        """ Newton iteration on n, pi (and T) for every node, using the same residuals
+        and dRdy as the outer solvers see. Each step mirrors the nested solver this replaces:
+        a full step with scalar bounds enforcement, followed by at most one halving of the
+        step when it does not satisfy the Armijo condition on the residual norm (including
+        the b0 and n_moles residuals). Each node is converged (and checked for convergence)
+        on its own. """
+
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+        end_element = num_prod + num_element
+        size = self._dRdy.shape[-1]
+
+        atol = self.options['atol']
+        rtol = self.options['rtol']
+        # under complex step the real part is already converged, but the imaginary
+        # part still needs one newton step
+        min_iter = 1 if outputs._under_complex_step else 0
+
+        # b0 and n_moles are linear in the inputs and n, so a newton step lands them
+        # on their exact values; they only enter the iteration through the residual norm
+        b0 = inputs['init_prod_amounts'].reshape((nn, num_prod)).dot(thermo.aij.T)
+
+        def get_states():
+            y = np.empty((nn, size + 1), dtype=outputs._data.dtype)
+            y[:, :num_prod] = outputs['n'].reshape((nn, num_prod))
+            y[:, num_prod:end_element] = outputs['pi'].reshape((nn, num_element))
+            if mode != 'T':
+                y[:, size-1] = outputs['T']
+            y[:, -1] = outputs['n_moles']
+            return y
+
+        def run_apply(y):
+            outputs['n'] = y[:, :num_prod].reshape(outputs['n'].shape)
+            outputs['pi'] = y[:, num_prod:end_element].reshape(outputs['pi'].shape)
+            if mode != 'T':
+                outputs['T'] = y[:, size-1]
+            outputs['n_moles'] = y[:, -1]
+
+            resids = {}
+            self.apply_nonlinear(inputs, outputs, resids)
+            return resids, self._scaled_resid_norm(resids)
+
+        # same reset rule as guess_nonlinear, applied to each node
+        y = get_states()
+        resids, norm = run_apply(y)
+        reset = (norm > 1e-2) | (norm == 0.) | np.any(y[:, :num_prod].real < 0, axis=1)
+        if np.any(reset):
+            n, pi, T = self._restart_guess(inputs, reset)
+            y[reset, :num_prod] = n
+            if pi is not None:
+                y[reset, num_prod:end_element] = pi
+            if mode != 'T':
+                y[reset, size-1] = T
+            resids, norm = run_apply(y)
+
+        # the residual of a far off state can still be below the reset threshold, so the
+        # other nodes start from the nearest stored state wherever it is the better guess
+        if self._warm_start is not None and not np.all(reset) and not outputs._under_complex_step:
+            n, pi, T = self._restart_guess(inputs, ~reset)
+            if pi is not None:
+                y_cache = y.copy()
+                y_cache[~reset, :num_prod] = n
+                y_cache[~reset, num_prod:end_element] = pi
+                if mode != 'T':
+                    y_cache[~reset, size-1] = T
+                y_cache[:, -1] = np.sum(y_cache[:, :num_prod], axis=1)
+                resids_cache, norm_cache = run_apply(y_cache)
+
+                better = norm_cache < norm
+                y = np.where(better[:, np.newaxis], y_cache, y)
+                resids, norm = run_apply(y)
+        norm0 = np.where(norm == 0., 1., norm)
+
+        lower = np.full(size + 1, -np.inf)
+        lower[:num_prod] = 1e-10
+        if mode != 'T':
+            lower[size-1] = 1.
+        lower[-1] = 1e-10
+
+        R = np.empty((nn, size), dtype=y.dtype)
+        for i in range(self.options['maxiter']):
+            active = (norm >= atol) & (norm >= rtol * norm0)
+            if i < min_iter:
+                active[:] = True
+            if not np.any(active):
+                break
+
+            R[:, :num_prod] = resids['n'].reshape((nn, num_prod))
+            R[:, num_prod:end_element] = resids['pi'].reshape((nn, num_element))
+            if mode != 'T':
+                R[:, -1] = resids['T']
+
+            dy = np.zeros_like(y)
+            try:
+                if self.options['active_set']:
+                    dy[:, :num_prod], dy[:, num_prod:size] = self._active_set_step(inputs, outputs, R)
+                else:
+                    self._calc_dRdy(inputs, outputs)
+                    dRdy = self._dRdy
+                    dy[:, :num_prod], dy[:, num_prod:size] = _solve_bordered(
+                        self._dRdy_e, self._dRdy_u, np.ones((nn, num_prod)),
+                        dRdy[:, :num_prod, num_prod:], dRdy[:, num_prod:, :num_prod],
+                        dRdy[:, num_prod:, num_prod:], -R[:, :num_prod], -R[:, num_prod:])
+            except np.linalg.LinAlgError:
+                raise om.AnalysisError('Singular equilibrium jacobian in {}'.format(self.pathname))
+            dy[:, -1] = resids['n_moles'] + np.sum(dy[:, :num_prod], axis=1)
+            dy[~active] = 0.
+
+            outputs['b0'] = b0.reshape(outputs['b0'].shape)
+
+            # scalar bounds enforcement: states that would cross their lower bound are clipped to it
+            trace = self.remove_trace_species.copy()
+            y_new = y + dy
+            y_new = np.where(y_new.real < lower, lower, y_new)
+            step = y_new - y
+            resids_new, norm_new = run_apply(y_new)
+
+            # one halving of the step where the armijo condition is not met
+            backtrack = active & (norm_new > (1. - ARMIJO_C) * norm)
+            if np.any(backtrack):
+                y_new = y + np.where(backtrack[:, np.newaxis], .5, 1.) * step
+                resids_new, norm_new = run_apply(y_new)
+
+            y, resids, norm = y_new, resids_new, norm_new
+
+            # trace species are only removed from the residuals by the evaluation after
+            # the one that switched them, so re-evaluate before the next linearization
+            if np.any(self.remove_trace_species != trace):
+                resids, norm = run_apply(y)
+
+            if not np.all(np.isfinite(norm)):
+                raise om.AnalysisError('Equilibrium iteration diverged in {}'.format(self.pathname))
+
+        return (norm < atol) | (norm < rtol * norm0)
+
+    def _active_set_step(self, inputs, outputs, R):
+        """ Newton step of the full formulation on the active species only.
+
+        Once a node is close to converged (remove_trace_species), a species at the concentration
+        floor whose chemical potential is above the element potentials (mu_j >= sum_i(a_ij*pi_i))
+        would only shrink further, so it is held fixed and left out of the system, the same way
+        CEA treats trace species (NASA RP-1311, section 3.3). It is re-admitted as soon as the
+        potentials say it should grow. Only the species that are active in some node enter the
+        bordered solve, and the species block is built directly in its diagonal plus rank one
+        form instead of through the dense dRdy. Returns the step in n (zero for the fixed
+        species) and in pi (and T). """
+
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+        num_element = thermo.num_element
+        aij = thermo.aij
+
+        n = outputs['n'].reshape((nn, thermo.num_prod))
+        pi = outputs['pi'].reshape((nn, num_element))
+        n_moles = np.sum(n, axis=1, keepdims=True)
+
+        # the residual before trace species were zeroed out of it
+        gibbs = self.mu - pi.dot(aij)
+        fixed = ((n.real <= MIN_VALID_CONCENTRATION+1e-20) & (gibbs.real >= 0.) &
+                 self.remove_trace_species[:, np.newaxis])
+        cols = np.nonzero(~np.all(fixed, axis=0))[0]
+
+        fixed = fixed[:, cols]
+        n_a = n[:, cols]
+        w = self.weights[:, cols] if self.use_trace_damping else np.ones_like(n_a)
+
+        # species rows, diag(e) + u*1^T in n and B in pi (and T). Fixed species keep an
+        # identity row with a zero right hand side, for the nodes where they are fixed
+        e = np.where(fixed, -1., w / n_a)
+        u = np.where(fixed, 0., -w / n_moles)
+        v = np.ones_like(u)
+
+        m = R.shape[1] - thermo.num_prod
+        dtype = np.result_type(n_a, w, R)
+        B = np.zeros((nn, cols.size, m), dtype=dtype)
+        B[:, :, :num_element] = -w[:, :, np.newaxis] * aij[:, cols].T
+        C = np.zeros((nn, m, cols.size), dtype=dtype)
+        C[:, :num_element] = aij[:, cols]
+        D = np.zeros((nn, m, m), dtype=dtype)
+
+        if mode != 'T':
+            T = outputs['T']
+            dH0_dT = thermo.dH0_dT_array(T)
+            B[:, :, -1] = w * (dH0_dT - thermo.dS0_dT_array(T))[:, cols]
+            if mode == 'h':
+                h = inputs['h']
+                C[:, -1] = -R_UNIVERSAL_ENG * T[:, np.newaxis] * self.H0_T[:, cols] / h[:, np.newaxis]
+                D[:, -1, -1] = -R_UNIVERSAL_ENG * (T * np.sum(n * dH0_dT, axis=1) + self.sum_n_H0_T) / h
+            else:
+                P = inputs['P'].reshape((nn, 1)) / P_REF
+                S = inputs['S']
+                C[:, -1] = -R_UNIVERSAL_ENG * (self.S0_T - np.log(n) + np.log(n_moles) -
+                                               np.log(P))[:, cols] / S[:, np.newaxis]
+                D[:, -1, -1] = -R_UNIVERSAL_ENG * np.sum(n * thermo.dS0_dT_array(T), axis=1) / S
+        B[fixed] = 0.
+
+        r1 = np.where(fixed, 0., -w * gibbs[:, cols])
+        x1, x2 = _solve_bordered(e, u, v, B, C, D, r1, -R[:, thermo.num_prod:])
+
+        dn = np.zeros((nn, thermo.num_prod), dtype=x1.dtype)
+        dn[:, cols] = x1
+        return dn, x2
+
+    def _solve_reduced(self, inputs, outputs):
+        """ converges the residuals of apply_nonlinear with solve_reduced_equilibrium. The residuals
+        are unchanged, so the converged point (including the trace weighting) is the same as for
+        the full formulation."""
+
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+
+        b0 = inputs['init_prod_amounts'].reshape((nn, num_prod)).dot(thermo.aij.T)
+
+        n = outputs['n'].reshape((nn, num_prod))
+        if mode == 'T':
+            T, target = inputs['T'], None
+        else:
+            T, target = outputs['T'], inputs[mode]
+
+        # the nodes without a valid composition restart from the warm start cache or n_init,
+        # and from its T either way
+        reset = np.any(n.real <= 0, axis=1) | ~np.all(np.isfinite(n), axis=1)
+        if np.any(reset):
+            n = n.copy()
+            n[reset], _, T_guess = self._restart_guess(inputs, reset)
+            if mode != 'T':
+                T = T.copy()
+                T[reset] = T_guess
+
+        try:
+            n, pi, T, converged = solve_reduced_equilibrium(thermo, mode, inputs['P'], b0, n, T, target,
+                                                            self.options['maxiter'])
+        except om.AnalysisError as err:
+            raise om.AnalysisError('{} in {}'.format(err, self.pathname))
+
+        # the trace residuals can be dropped just like the full formulation does
+        self.remove_trace_species[converged] = True
+
+        outputs['n'] = n.reshape(outputs['n'].shape)
+        outputs['pi'] = pi.reshape(outputs['pi'].shape)
+        outputs['n_moles'] = np.sum(n, axis=1)
+        outputs['b0'] = b0.reshape(outputs['b0'].shape)
+        if mode != 'T':
+            outputs['T'] = T
+
+        # linearize reads the weights, properties and trace flags apply_nonlinear sets at the
+        # converged point, the same way run_apply leaves them in _solve_full
+        self.apply_nonlinear(inputs, outputs, {})
+
+        return converged
 
     def linearize(self, inputs, outputs, J):
 
@@ -244,70 +835,56 @@ class ChemEq(om.ImplicitComponent):
 
         mode = self.options['mode']
         thermo = self.options['thermo']
+        nn = self.options['num_nodes']
 
         num_element = thermo.num_element
         num_prod = thermo.num_prod
 
-        P = inputs['P'] / P_REF
-        n = outputs['n']
-        n_moles = np.sum(n)
-
-        # TODO: Talk to John about this problem.
-        # hack to handle the fact that n_moles doesn't get set if you only call apply_linear
-        if n_moles < 1e-30:
-            n_moles = np.sum(n)
+        P = inputs['P'].reshape((nn, 1)) / P_REF
+        n = outputs['n'].reshape((nn, num_prod))
+        n_moles = np.sum(n, axis=1)
 
         qP = 1.0 / P_REF / P  # quotient_P or 1/P
 
         end_element = num_prod + num_element
 
-        J_n_n = dRdy[:num_prod, :num_prod]
+        J_n_n = dRdy[:, :num_prod, :num_prod]
 
-        J_n_pi = dRdy[:num_prod, num_prod: end_element]
-
-        J_n_n_moles = -n/n_moles
+        J_n_pi = dRdy[:, :num_prod, num_prod: end_element]
 
         if self.use_trace_damping:
-            J_n_P = (self.weights * qP).reshape((-1, 1))
+            J_n_P = self.weights * qP
         else:
-            J_n_P = qP*np.ones((num_prod, 1))
+            J_n_P = qP*np.ones((nn, num_prod))
 
         # can only use the dRdy vals when T is a state. Otherwise its not computed
         if mode != 'T':
-            J_n_T = dRdy[:num_prod, -1].reshape((num_prod, 1))
+            J_n_T = dRdy[:, :num_prod, -1].copy()
         else:
             T = inputs['T']
-            dH0_dT = thermo.H0_applyJ(T, 1)
-            dS0_dT = thermo.S0_applyJ(T, 1)
+            dH0_dT = thermo.dH0_dT_array(T)
+            dS0_dT = thermo.dS0_dT_array(T)
             if self.use_trace_damping:
-                J_n_T = ((dH0_dT - dS0_dT) * self.weights).reshape((num_prod, 1))
+                J_n_T = (dH0_dT - dS0_dT) * self.weights
             else:
-                J_n_T = ((dH0_dT - dS0_dT)).reshape((num_prod, 1))
-
-        J['pi', 'n'] = dRdy[num_prod:end_element, :num_prod]
-
-        J['pi', 'init_prod_amounts'] = -np.array(thermo.aij, dtype=float)
-        J['b0', 'init_prod_amounts'] = np.array(thermo.aij, dtype=float)
-        J['b0', 'b0'] = -np.eye(num_element)
+                J_n_T = (dH0_dT - dS0_dT)
 
         if mode == 'h':
-            J['T', 'n'] = dRdy[-1, :num_prod].reshape(1, num_prod)
+            J['T', 'n'] = dRdy[:, -1, :num_prod].ravel()
             J['T', 'h'] = (self.sum_n_H0_T * R_UNIVERSAL_ENG * outputs['T'])/inputs['h']**2
-            J['T', 'T'] = dRdy[-1, -1]
+            J['T', 'T'] = dRdy[:, -1, -1]
 
         elif mode == 'S':
             S = inputs['S']
-            J['T', 'n'] = dRdy[-1, :num_prod].reshape(1, num_prod)
+            J['T', 'n'] = dRdy[:, -1, :num_prod].ravel()
 
-            tmp = np.sum(n*(self.S0_T - np.log(n) + np.log(n_moles) - np.log(P)))
+            tmp = np.sum(n*(self.S0_T - np.log(n) + np.log(n_moles[:, np.newaxis]) - np.log(P)), axis=1)
             J['T', 'S'] = (R_UNIVERSAL_ENG*tmp)/S**2
 
-            J['T', 'T'] = dRdy[-1, -1]
-            J['T', 'P'] = R_UNIVERSAL_ENG * n_moles / (P * S * P_REF)
-
-        J['n_moles', 'n'] = np.ones((1, num_prod))
+            J['T', 'T'] = dRdy[:, -1, -1]
+            J['T', 'P'] = R_UNIVERSAL_ENG * n_moles / (P[:, 0] * S * P_REF)
 
-        if self.remove_trace_species:
+        if np.any(self.remove_trace_species):
             # non-vectorized loop; left here for code clarity
             # for j, is_trace in enumerate(self._trace):
             #     if is_trace:
@@ -324,23 +901,77 @@ class ChemEq(om.ImplicitComponent):
             #             J['T', 'n'][:, j] = 0.
 
             mask = self._trace
-            J_n_n[:, mask] = 0.
-            J_n_n[mask, :] = 0.
-            J_n_n[mask, mask] = 1.
+            node_idx, prod_idx = np.nonzero(mask)
+            J_n_n[mask] = 0.
+            J_n_n.transpose((0, 2, 1))[mask] = 0.
+            J_n_n[node_idx, prod_idx, prod_idx] = 1.
 
-            J_n_P[mask, :] = 0
-            J_n_T[mask, :] = 0
-            J_n_pi[mask, :] = 0
-            J_n_n_moles[mask] = 0
+            J_n_P[mask] = 0
+            J_n_T[mask] = 0
+            J_n_pi[mask] = 0
 
             # J['pi', 'n'][:, mask] = 0.
             # if self.mode == "h" or self.mode == "S":
                 # J['T', 'n'][:, mask] = 0.
 
-        J['n', 'n'] = J_n_n
-        J['n', 'P'] = J_n_P
-        J['n', 'T'] = J_n_T
-        J['n', 'pi'] = J_n_pi
+        J['n', 'n'] = J_n_n.ravel()
+        J['n', 'P'] = J_n_P.ravel()
+        J['n', 'T'] = J_n_T.ravel()
+        J['n', 'pi'] = J_n_pi.ravel()[self._aijT_nz]
+
+        # J_n_n as diag(e) + u*v^T, plus the border blocks, for solve_linear
+        e = self._dRdy_e.copy()
+        u = self._dRdy_u.copy()
+        v = np.ones_like(u)
+        if np.any(self.remove_trace_species):
+            e[mask] = 1.
+            u[mask] = 0.
+            v[mask] = 0.
+
+        states = slice(num_prod, None)
+        B = dRdy[:, :num_prod, states].copy()
+        B[:, :, :num_element] = J_n_pi
+        if mode != 'T':
+            B[:, :, -1] = J_n_T
+        self._lin = (e, u, v, B, dRdy[:, states, :num_prod].copy(), dRdy[:, states, states].copy())
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+        T_state = self.options['mode'] != 'T'
+
+        e, u, v, B, C, D = self._lin
+
+        if mode == 'fwd':
+            r2 = d_residuals['pi'].reshape((nn, num_element))
+            if T_state:
+                r2 = np.hstack((r2, d_residuals['T'].reshape((nn, 1))))
+            x_n, x2 = _solve_bordered(e, u, v, B, C, D, d_residuals['n'].reshape((nn, num_prod)), r2)
+
+            d_outputs['n'] = x_n.reshape(d_outputs['n'].shape)
+            d_outputs['pi'] = x2[:, :num_element].reshape(d_outputs['pi'].shape)
+            if T_state:
+                d_outputs['T'] = x2[:, -1]
+            d_outputs['b0'] = -d_residuals['b0']
+            d_outputs['n_moles'] = np.sum(x_n, axis=1) - d_residuals['n_moles']
+
+        else:  # rev
+            d_residuals['b0'] = -d_outputs['b0']
+            d_residuals['n_moles'] = -d_outputs['n_moles']
+
+            r1 = d_outputs['n'].reshape((nn, num_prod)) + d_outputs['n_moles'].reshape((nn, 1))
+            r2 = d_outputs['pi'].reshape((nn, num_element))
+            if T_state:
+                r2 = np.hstack((r2, d_outputs['T'].reshape((nn, 1))))
+            y_n, y2 = _solve_bordered(e, v, u, C.transpose((0, 2, 1)), B.transpose((0, 2, 1)),
+                                      D.transpose((0, 2, 1)), r1, r2)
+
+            d_residuals['n'] = y_n.reshape(d_residuals['n'].shape)
+            d_residuals['pi'] = y2[:, :num_element].reshape(d_residuals['pi'].shape)
+            if T_state:
+                d_residuals['T'] = y2[:, -1]
 
     def _calc_dRdy(self, inputs, outputs):
         """ Computes the Jacobian for the newton solver. This Jacobian
@@ -352,76 +983,83 @@ class ChemEq(om.ImplicitComponent):
         num_prod = thermo.num_prod
         num_element = thermo.num_element
         mode = self.options['mode']
+        nn = self.options['num_nodes']
 
-        n = outputs['n']
-        n_moles = np.sum(n)
+        n = outputs['n'].reshape((nn, num_prod))
+        n_moles = np.sum(n, axis=1, keepdims=True)
         # pi = outputs['pi']
 
+        # the weights are computed from n in apply_nonlinear, so they already have its dtype
         if outputs._under_complex_step:
-            dRdy = self._dRdy = self._dRdy.astype(np.complex)
-            if self.use_trace_damping:
-                self.weights = self.weights.astype(np.complex)
+            dRdy = self._dRdy = self._dRdy_complex
         else:
-            dRdy = self._dRdy = self._dRdy.real
+            dRdy = self._dRdy = self._dRdy_real
             if self.use_trace_damping:
                 self.weights = self.weights.real
 
         # dRgibbs_dn
 
         MW = 1 / n_moles
-        dRdy[:num_prod, :num_prod] = (-MW)
+        dRdy[:, :num_prod, :num_prod] = (-MW[:, :, np.newaxis])
         diag = (1 / n - MW)
-        np.fill_diagonal(dRdy[:num_prod, :num_prod], diag)
+        prod_idx = np.arange(num_prod)
+        dRdy[:, prod_idx, prod_idx] = diag
         # multiples each row by one element of the vector
         if self.use_trace_damping:
-            dRdy[:num_prod, :num_prod] *= self.weights[:, np.newaxis]
+            dRdy[:, :num_prod, :num_prod] *= self.weights[:, :, np.newaxis]
+
+        # the same block as diag(e) + u*1^T, for the structured newton step
+        e = self._dRdy_e = 1 / n
+        u = self._dRdy_u = -MW * np.ones_like(n)
+        if self.use_trace_damping:
+            e *= self.weights
+            u *= self.weights
 
         end_element = num_prod + num_element
         # dRgibbs_dpi
-        dRdy[:num_prod, num_prod:end_element] = (-aij.T)
+        dRdy[:, :num_prod, num_prod:end_element] = (-aij.T)
         if self.use_trace_damping:
-            dRdy[:num_prod, num_prod:end_element] *= self.weights[:, np.newaxis]
+            dRdy[:, :num_prod, num_prod:end_element] *= self.weights[:, :, np.newaxis]
 
         if mode != "T":
             # dRgibbs_dT
             T = outputs['T']
-            self.dH0_dT = thermo.H0_applyJ(T, 1)
-            self.dS0_dT = thermo.S0_applyJ(T, 1)
-            dRdy[:num_prod, -1] = (self.dH0_dT - self.dS0_dT)
+            self.dH0_dT = thermo.dH0_dT_array(T)
+            self.dS0_dT = thermo.dS0_dT_array(T)
+            dRdy[:, :num_prod, -1] = (self.dH0_dT - self.dS0_dT)
             if self.use_trace_damping:
-                dRdy[:num_prod, -1] *= self.weights
+                dRdy[:, :num_prod, -1] *= self.weights
             # dRmass_dT = 0
 
         if mode == "h":
             h = inputs['h']
             # dRT_dn
-            dRdy[-1, :num_prod] = (- R_UNIVERSAL_ENG * T * self.H0_T)/h
+            dRdy[:, -1, :num_prod] = (- R_UNIVERSAL_ENG * T[:, np.newaxis] * self.H0_T)/h[:, np.newaxis]
             # dRT_dT
-            dRdy[-1, -1] = (-R_UNIVERSAL_ENG *
-                            (T * np.sum(n * self.dH0_dT) + self.sum_n_H0_T))/h
+            dRdy[:, -1, -1] = (-R_UNIVERSAL_ENG *
+                               (T * np.sum(n * self.dH0_dT, axis=1) + self.sum_n_H0_T))/h
 
         elif mode == "S":
-            P = inputs['P'] / P_REF
-            n_moles = np.sum(n)  # outputs['n_moles']
+            P = inputs['P'].reshape((nn, 1)) / P_REF
             S = inputs['S']
             # dRT_dn
-            dRdy[-1, :num_prod] = -R_UNIVERSAL_ENG * \
-                (self.S0_T - np.log(n) + np.log(n_moles)-np.log(P))/S
+            dRdy[:, -1, :num_prod] = -R_UNIVERSAL_ENG * \
+                (self.S0_T - np.log(n) + np.log(n_moles)-np.log(P))/S[:, np.newaxis]
             # dRT_dT
             # uc*(S0_T + np.log(sum_nj) - np.log(P) - np.log(nj))
             # valid_products = n > MIN_VALID_CONCENTRATION
-            dRdy[-1, -1] = -R_UNIVERSAL_ENG * np.sum(n * self.dS0_dT) / S
+            dRdy[:, -1, -1] = -R_UNIVERSAL_ENG * np.sum(n * self.dS0_dT, axis=1) / S
 
         # dRmass_dn
-        dRdy[num_prod:end_element, :num_prod] = aij
+        dRdy[:, num_prod:end_element, :num_prod] = aij
 
         # Replace J for tiny values of n with identity
-        if self.remove_trace_species:
-            n = outputs['n']
-            for j in range(num_prod):
-                if n[j] <= 1.0e-10:
-                    dRdy[j, :] = 0.0
-                    dRdy[j, j] = -1.0
+        if np.any(self.remove_trace_species):
+            node_idx, prod_idx = np.nonzero((n <= 1.0e-10) & self.remove_trace_species[:, np.newaxis])
+            dRdy[node_idx, prod_idx, :] = 0.0
+            dRdy[node_idx, prod_idx, prod_idx] = -1.0
+            e[node_idx, prod_idx] = -1.0
+            u[node_idx, prod_idx] = 0.0
 
 
 if __name__ == "__main__":
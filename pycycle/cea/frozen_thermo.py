@@ -0,0 +1,235 @@
+import numpy as np
+
+from openmdao.api import ExplicitComponent, AnalysisError
+
+from pycycle.constants import P_REF, R_UNIVERSAL_ENG, R_UNIVERSAL_SI, MIN_VALID_CONCENTRATION
+from pycycle.cea.utils import node_shape, block_diag_pattern
+from pycycle.cea.unit_comps import EngUnitOutputs, FLOW_UNITS
+
+
+class FrozenThermo(ExplicitComponent):
+    """properties of a mixture whose composition is frozen at init_prod_amounts,
+    replaces ChemEq and Properties in SetTotal(thermo_method='FROZEN').
+
+    Below roughly 1500 K dissociation is negligible, so the equilibrium solve can be skipped
+    for cold section flows. T is found from h or S with a scalar newton iteration on the
+    NASA polynomials, and Cp, Cv and gamma are the frozen (non-reacting) values."""
+
+    def initialize(self):
+        self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('mode', desc='the input variable that defines the total properties',
+                             default='T', values=('T', 'S', 'h'))
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
+        self.options.declare('fl_name', default=None, allow_none=True,
+                             desc='flowstation name, when given the flow station variables are also output '
+                                  'in english units, see EngUnitOutputs')
+        self.options.declare('maxiter', default=50, types=int,
+                             desc='maximum newton iterations when inverting h or S for T')
+        self.options.declare('tol', default=1e-12,
+                             desc='relative tolerance when inverting h or S for T')
+
+    def setup(self):
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+
+        n_shape = node_shape(nn, num_prod)
+
+        self.add_input('init_prod_amounts', val=np.broadcast_to(thermo.init_prod_amounts, n_shape),
+                       desc="initial mass fractions of products, carried through unchanged")
+        self.add_input('P', val=1.0, shape=nn, units="bar", desc="Pressure")
+
+        if mode == 'T':
+            self.add_input('T', val=400., shape=nn, units="degK", desc="Temperature")
+        else:
+            if mode == 'h':
+                self.add_input('h', val=0., shape=nn, units="cal/g", desc="Enthalpy")
+            else:
+                self.add_input('S', val=0., shape=nn, units="cal/(g*degK)", desc="Entropy")
+            self.add_output('T', val=400., shape=nn, units="degK", desc="Temperature", lower=1.)
+
+        self.add_output('n', val=np.ones(n_shape)/num_prod/10, desc="mole fractions of the mixture")
+        self.add_output('n_moles', val=0.034, shape=nn, desc="1/molecular weight of gas")
+        self.add_output('b0', shape=node_shape(nn, num_element),
+                        desc='assigned kg-atoms of element i per total kg of reactant '
+                             'for the initial prod amounts')
+
+        if mode != 'h':
+            self.add_output('h', val=1., shape=nn, units="cal/g", desc="enthalpy")
+        if mode != 'S':
+            self.add_output('S', val=1., shape=nn, units="cal/(g*degK)", desc="entropy")
+        self.add_output('gamma', val=1.4, shape=nn, lower=1.0, upper=2.0, desc="ratio of specific heats")
+        self.add_output('Cp', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant pressure")
+        self.add_output('Cv', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant volume")
+        self.add_output('rho', val=0.0004, shape=nn, units="g/cm**3", desc="density")
+        self.add_output('R', val=1., shape=nn, units='(N*m)/(kg*degK)', desc='Specific gas constant')
+
+        # outputs that depend on T, everything besides n, n_moles, b0 and R
+        self._props = [name for name in ('T', 'h', 'S', 'Cp', 'Cv', 'gamma', 'rho') if name != mode]
+
+        # every node is independent, so all sub-jacobians are block diagonal
+        ar = np.arange(nn)
+        ar_n = np.arange(nn*num_prod)
+        rows, cols = block_diag_pattern(nn, 1, num_prod)
+
+        self.declare_partials('n', 'init_prod_amounts', rows=ar_n, cols=ar_n)
+        self.declare_partials(['n_moles', 'R'] + self._props, 'init_prod_amounts', rows=rows, cols=cols)
+        self.declare_partials(self._props, mode, rows=ar, cols=ar)
+
+        # at fixed T only S and rho depend on P, so the rest only do through T in S mode
+        if mode == 'S':
+            self._props_P = self._props
+        else:
+            self._props_P = [name for name in ('S', 'rho') if name != mode]
+        self.declare_partials(self._props_P, 'P', rows=ar, cols=ar)
+
+        rows, cols = block_diag_pattern(nn, num_element, num_prod)
+        self.declare_partials('b0', 'init_prod_amounts', val=np.tile(np.ravel(thermo.aij), nn),
+                              rows=rows, cols=cols)
+
+        if self.options['fl_name'] is None:
+            self._eng_units = None
+        else:
+            self._eng_units = EngUnitOutputs(self, self.options['fl_name'], FLOW_UNITS)
+            self._eng_units.setup()
+
+    def _composition(self, inputs):
+        """n floored at the minimum concentration like ChemEq, and the nodes/species where n follows
+        init_prod_amounts"""
+        thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+
+        init = inputs['init_prod_amounts'].reshape((nn, thermo.num_prod))
+        free = init.real > MIN_VALID_CONCENTRATION
+        return np.where(free, init, MIN_VALID_CONCENTRATION), free
+
+    def _h_S(self, n, P, T):
+        """enthalpy and entropy of the frozen mixture, and their derivatives w.r.t. T"""
+        thermo = self.options['thermo']
+
+        n_moles = np.sum(n, axis=1)
+        h = R_UNIVERSAL_ENG*T*np.sum(n*thermo.H0_array(T), axis=1)
+        dh_dT = R_UNIVERSAL_ENG*np.sum(n*thermo.Cp0_array(T), axis=1)
+        S = R_UNIVERSAL_ENG*np.sum(n*(thermo.S0_array(T) - np.log(n/n_moles[:, np.newaxis]) -
+                                      np.log(P/P_REF)[:, np.newaxis]), axis=1)
+        return h, dh_dT, S, dh_dT/T
+
+    def _solve_T(self, n, P, target, T_guess):
+        """invert h(T) or S(P, T) for T with a newton iteration per node, both are monotonic in T"""
+        mode = self.options['mode']
+
+        T = np.where(T_guess.real > 1., T_guess, 400.)
+        for i in range(self.options['maxiter']):
+            h, dh_dT, S, dS_dT = self._h_S(n, P, T)
+            if mode == 'h':
+                dT = (target - h)/dh_dT
+            else:
+                dT = (target - S)/dS_dT
+            # limit the step to a factor of 2 in T
+            T = T + np.where(np.abs(dT) > .5*np.abs(T), .5*np.abs(T)*np.sign(dT.real), dT)
+            converged = np.abs(dT) <= self.options['tol']*np.abs(T)
+            if np.all(converged):
+                break
+        else:
+            raise AnalysisError('{}: T iteration from {} did not converge for nodes {}'
+                                .format(self.pathname, mode, np.nonzero(~converged)[0].tolist()))
+
+        if not np.all(np.isfinite(T)) or np.any(T.real <= 0):
+            raise AnalysisError('{}: T could not be found from {}'.format(self.pathname, mode))
+
+        return T
+
+    def compute(self, inputs, outputs):
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        n, free = self._composition(inputs)
+        n_moles = np.sum(n, axis=1)
+        P = inputs['P']
+
+        if mode == 'T':
+            T = inputs['T']
+        else:
+            T = outputs['T'] = self._solve_T(n, P, inputs[mode], outputs['T'])
+
+        outputs['n'] = n.reshape(outputs['n'].shape)
+        outputs['n_moles'] = n_moles
+        outputs['b0'] = inputs['init_prod_amounts'].reshape((nn, thermo.num_prod)).dot(thermo.aij.T)\
+            .reshape(outputs['b0'].shape)
+
+        h, Cp, S, dS_dT = self._h_S(n, P, T)
+        if mode != 'h':
+            outputs['h'] = h
+        if mode != 'S':
+            outputs['S'] = S
+        outputs['Cp'] = Cp
+        outputs['Cv'] = Cv = Cp - R_UNIVERSAL_ENG*n_moles
+        outputs['gamma'] = Cp/Cv
+        outputs['rho'] = P/(n_moles*R_UNIVERSAL_SI*T)*100  # 1 Bar is 100 Kpa
+        outputs['R'] = R_UNIVERSAL_SI*n_moles
+
+        if self._eng_units is not None:
+            self._eng_units.compute(inputs, outputs)
+
+    def compute_partials(self, inputs, J):
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+
+        n, free = self._composition(inputs)
+        n_moles = np.sum(n, axis=1)
+        P = inputs['P']
+        T = inputs['T'] if mode == 'T' else self._outputs['T']
+
+        H0_T = thermo.H0_array(T)
+        Cp0_T = thermo.Cp0_array(T)
+        S_n = R_UNIVERSAL_ENG*(thermo.S0_array(T) - np.log(n/n_moles[:, np.newaxis]) -
+                               np.log(P/P_REF)[:, np.newaxis])
+        Cp = R_UNIVERSAL_ENG*np.sum(n*Cp0_T, axis=1)
+        Cv = Cp - R_UNIVERSAL_ENG*n_moles
+        rho = P/(n_moles*R_UNIVERSAL_SI*T)*100
+
+        # partials at fixed T, w.r.t. n (per species), P and T
+        partials = {
+            'h': (R_UNIVERSAL_ENG*T[:, np.newaxis]*H0_T, 0., Cp),
+            'S': (S_n, -R_UNIVERSAL_ENG*n_moles/P, Cp/T),
+            'Cp': (R_UNIVERSAL_ENG*Cp0_T, 0., R_UNIVERSAL_ENG*np.sum(n*thermo.dCp0_dT_array(T), axis=1)),
+            'rho': (-(rho/n_moles)[:, np.newaxis]*np.ones_like(n), rho/P, -rho/T),
+        }
+        Cp_n, _, Cp_T = partials['Cp']
+        partials['Cv'] = (Cp_n - R_UNIVERSAL_ENG, 0., Cp_T)
+        partials['gamma'] = ((Cp_n*Cv[:, np.newaxis] - Cp[:, np.newaxis]*(Cp_n - R_UNIVERSAL_ENG)) /
+                             Cv[:, np.newaxis]**2, 0., (Cp_T*Cv - Cp*Cp_T)/Cv**2)
+
+        # T at fixed h or S, from the implicit function theorem
+        if mode == 'T':
+            dT_dn, dT_dP, dT_dx = 0., 0., 1.
+        else:
+            x_n, x_P, x_T = partials[mode]
+            dT_dn = -x_n/x_T[:, np.newaxis]
+            dT_dP = -x_P/x_T
+            dT_dx = 1./x_T
+
+        for name in self._props:
+            if name == 'T':
+                dq_dn, dq_dP, dq_dx = dT_dn, dT_dP, dT_dx
+            else:
+                q_n, q_P, q_T = partials[name]
+                dq_dn = q_n + q_T[:, np.newaxis]*dT_dn
+                dq_dP = q_P + q_T*dT_dP
+                dq_dx = q_T*dT_dx
+            J[name, 'init_prod_amounts'] = np.where(free, dq_dn, 0.).ravel()
+            J[name, mode] = dq_dx
+            if name in self._props_P:
+                J[name, 'P'] = dq_dP
+
+        J['n', 'init_prod_amounts'] = free.astype(float).ravel()
+        J['n_moles', 'init_prod_amounts'] = free.ravel()
+        J['R', 'init_prod_amounts'] = R_UNIVERSAL_SI*free.ravel()
+
+        if self._eng_units is not None:
+            self._eng_units.compute_partials(inputs, J)
@@ -3,6 +3,7 @@ import numpy as np
 from openmdao.api import ExplicitComponent
 
 from pycycle.constants import P_REF, R_UNIVERSAL_ENG, R_UNIVERSAL_SI, MIN_VALID_CONCENTRATION
+from pycycle.cea.utils import node_shape, block_diag_pattern
 
 
 class PropsCalcs(ExplicitComponent):
@@ -10,66 +11,82 @@ class PropsCalcs(ExplicitComponent):
 
     def initialize(self):
         self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
 
     def setup(self):
 
         thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
 
-        self.add_input('T', val=284., units="degK", desc="Temperature")
-        self.add_input('P', val=1., units='bar', desc="Pressure")
-        self.add_input('n', val=np.ones(thermo.num_prod),
+        self.add_input('T', val=284., shape=nn, units="degK", desc="Temperature")
+        self.add_input('P', val=1., shape=nn, units='bar', desc="Pressure")
+        self.add_input('n', val=np.ones(node_shape(nn, num_prod)),
                        desc="molar concentration of the mixtures, last element is the total molar concentration")
-        self.add_input('n_moles', val=1., desc="1/molar_mass for gaseous mixture")
+        self.add_input('n_moles', val=1., shape=nn, desc="1/molar_mass for gaseous mixture")
 
         ne1 = thermo.num_element + 1
-        self.add_input('result_T', val=np.ones(ne1),
-                       desc="result of the linear solve for T", shape=ne1)
-        self.add_input('result_P', val=np.ones(ne1),
-                       desc="result of the linear solve for T", shape=ne1)
-
-        self.add_output('h', val=1., units="cal/g", desc="enthalpy")
-        self.add_output('S', val=1., units="cal/(g*degK)", desc="entropy")
-        self.add_output('gamma', val=1.4, lower=1.0, upper=2.0, desc="ratio of specific heats")
-        self.add_output('Cp', val=1., units="cal/(g*degK)", desc="Specific heat at constant pressure")
-        self.add_output('Cv', val=1., units="cal/(g*degK)", desc="Specific heat at constant volume")
-        self.add_output('rho', val=0.0004, units="g/cm**3", desc="density")
-
-        self.add_output('R', val=1., units='(N*m)/(kg*degK)', desc='Specific gas constant')
+        self.add_input('result_T', val=np.ones(node_shape(nn, ne1)),
+                       desc="result of the linear solve for T")
+        self.add_input('result_P', val=np.ones(node_shape(nn, ne1)),
+                       desc="result of the linear solve for T")
+
+        self.add_output('h', val=1., shape=nn, units="cal/g", desc="enthalpy")
+        self.add_output('S', val=1., shape=nn, units="cal/(g*degK)", desc="entropy")
+        self.add_output('gamma', val=1.4, shape=nn, lower=1.0, upper=2.0, desc="ratio of specific heats")
+        self.add_output('Cp', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant pressure")
+        self.add_output('Cv', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant volume")
+        self.add_output('rho', val=0.0004, shape=nn, units="g/cm**3", desc="density")
+
+        self.add_output('R', val=1., shape=nn, units='(N*m)/(kg*degK)', desc='Specific gas constant')
         # self.deriv_options['check_type'] = "cs"
 
-        # partial derivs setup
-        self.declare_partials('h', ['n', 'T'])
-        self.declare_partials('S', ['n', 'T', 'P'])
-        self.declare_partials('S', 'n_moles', val=R_UNIVERSAL_ENG)
-        self.declare_partials('Cp', ['n', 'T', 'result_T'])
-        self.declare_partials('rho', ['T', 'P', 'n_moles'])
-        self.declare_partials('gamma', ['n', 'n_moles', 'T', 'result_T', 'result_P'])
-        self.declare_partials('Cv', ['n', 'n_moles', 'T', 'result_T', 'result_P'])
-
-        self.declare_partials('R', 'n_moles', val=R_UNIVERSAL_SI)
-
+        # partial derivs setup, every node only depends on its own inputs
+        ar = np.arange(nn)
+        n_rows, n_cols = block_diag_pattern(nn, 1, num_prod)
+        r_rows, r_cols = block_diag_pattern(nn, 1, ne1)
+
+        self.declare_partials('h', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('h', 'T', rows=ar, cols=ar)
+        self.declare_partials('S', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('S', ['T', 'P'], rows=ar, cols=ar)
+        self.declare_partials('S', 'n_moles', val=R_UNIVERSAL_ENG, rows=ar, cols=ar)
+        self.declare_partials('Cp', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('Cp', 'T', rows=ar, cols=ar)
+        self.declare_partials('Cp', 'result_T', rows=r_rows, cols=r_cols)
+        self.declare_partials('rho', ['T', 'P', 'n_moles'], rows=ar, cols=ar)
+        for out in ('gamma', 'Cv'):
+            self.declare_partials(out, 'n', rows=n_rows, cols=n_cols)
+            self.declare_partials(out, ['n_moles', 'T'], rows=ar, cols=ar)
+            self.declare_partials(out, 'result_T', rows=r_rows, cols=r_cols)
+            # only the last entry of result_P (dlnV/dlnP) is used
+            self.declare_partials(out, 'result_P', rows=ar, cols=ar*ne1+thermo.num_element)
+
+        self.declare_partials('R', 'n_moles', val=R_UNIVERSAL_SI, rows=ar, cols=ar)
 
     def compute(self, inputs, outputs):
         thermo = self.options['thermo']
+        nn = self.options['num_nodes']
         num_prod = thermo.num_prod
         num_element = thermo.num_element
 
         T = inputs['T']
         P = inputs['P']
-        result_T = inputs['result_T']
+        result_T = inputs['result_T'].reshape((nn, num_element+1))
 
-        nj = inputs['n'][:num_prod]
+        nj = inputs['n'].reshape((nn, num_prod))
         # nj[nj<0] = 1e-10 # ensure all concentrations stay non-zero
         n_moles = inputs['n_moles']
 
-        self.dlnVqdlnP = dlnVqdlnP = -1 + inputs['result_P'][num_element]
-        self.dlnVqdlnT = dlnVqdlnT = 1 - result_T[num_element]
+        self.dlnVqdlnP = dlnVqdlnP = -1 + inputs['result_P'].reshape((nn, num_element+1))[:, num_element]
+        self.dlnVqdlnT = dlnVqdlnT = 1 - result_T[:, num_element]
 
-        self.Cp0_T = Cp0_T = thermo.Cp0(T)
-        Cpf = np.sum(nj*Cp0_T)
+        self.Cp0_T = Cp0_T = thermo.Cp0_array(T)
+        Cpf = np.sum(nj*Cp0_T, axis=1)
 
-        self.H0_T = H0_T = thermo.H0(T)
-        self.S0_T = S0_T = thermo.S0(T)
+        self.H0_T = H0_T = thermo.H0_array(T)
+        self.S0_T = S0_T = thermo.S0_array(T)
         self.nj_H0 = nj_H0 = nj*H0_T
 
         # Cpe = 0
@@ -77,20 +94,20 @@ class PropsCalcs(ExplicitComponent):
         #     for j in range(0, num_prod):
         #         Cpe -= thermo.aij[i][j]*nj[j]*H0_T[j]*self.result_T[i]
         # vectorization of this for loop for speed
-        Cpe = -np.sum(np.sum(thermo.aij*nj_H0, axis=1)*result_T[:num_element])
-        Cpe += np.sum(nj_H0*H0_T)  # nj*H0_T**2
-        Cpe -= np.sum(nj_H0)*result_T[num_element]
+        Cpe = -np.sum(nj_H0.dot(thermo.aij.T)*result_T[:, :num_element], axis=1)
+        Cpe += np.sum(nj_H0*H0_T, axis=1)  # nj*H0_T**2
+        Cpe -= np.sum(nj_H0, axis=1)*result_T[:, num_element]
 
-        outputs['h'] = np.sum(nj_H0)*R_UNIVERSAL_ENG*T
+        outputs['h'] = np.sum(nj_H0, axis=1)*R_UNIVERSAL_ENG*T
 
         try:
-            val = (S0_T+np.log(n_moles/nj/(P/P_REF)))
+            val = (S0_T+np.log(n_moles[:, np.newaxis]/nj/(P[:, np.newaxis]/P_REF)))
         except FloatingPointError:
-            P = 1e-5
-            val = (S0_T+np.log(n_moles/nj/(P/P_REF)))
+            P = 1e-5*np.ones(nn)
+            val = (S0_T+np.log(n_moles[:, np.newaxis]/nj/(P[:, np.newaxis]/P_REF)))
 
 
-        outputs['S'] = R_UNIVERSAL_ENG * np.sum(nj*val)
+        outputs['S'] = R_UNIVERSAL_ENG * np.sum(nj*val, axis=1)
         outputs['Cp'] = Cp = (Cpe+Cpf)*R_UNIVERSAL_ENG
         outputs['Cv'] = Cv = Cp + n_moles*R_UNIVERSAL_ENG*dlnVqdlnT**2/dlnVqdlnP
 
@@ -103,25 +120,26 @@ class PropsCalcs(ExplicitComponent):
     def compute_partials(self, inputs, J):
 
         thermo = self.options['thermo']
+        nn = self.options['num_nodes']
         num_prod = thermo.num_prod
         num_element = thermo.num_element
 
         T = inputs['T']
         P = inputs['P']
-        nj = inputs['n']
+        nj = inputs['n'].reshape((nn, num_prod))
         n_moles = inputs['n_moles']
-        result_T = inputs['result_T']
-        result_T_last = result_T[num_element]
-        result_T_rest = result_T[:num_element]
+        result_T = inputs['result_T'].reshape((nn, num_element+1))
+        result_T_last = result_T[:, num_element]
+        result_T_rest = result_T[:, :num_element]
 
-        dlnVqdlnP = -1 + inputs['result_P'][num_element]
+        dlnVqdlnP = -1 + inputs['result_P'].reshape((nn, num_element+1))[:, num_element]
         dlnVqdlnT = 1 - result_T_last
 
-        Cp0_T = thermo.Cp0(T)
-        Cpf = np.sum(nj * Cp0_T)
+        Cp0_T = thermo.Cp0_array(T)
+        Cpf = np.sum(nj * Cp0_T, axis=1)
 
-        H0_T = thermo.H0(T)
-        S0_T = thermo.S0(T)
+        H0_T = thermo.H0_array(T)
+        S0_T = thermo.S0_array(T)
         nj_H0 = nj * H0_T
 
         # Cpe = 0
@@ -129,87 +147,82 @@ class PropsCalcs(ExplicitComponent):
         #     for j in range(0, num_prod):
         #         Cpe -= thermo.aij[i][j]*nj[j]*H0_T[j]*self.result_T[i]
         # vectorization of this for loop for speed
-        Cpe = -np.sum(np.sum(thermo.aij * nj_H0, axis=1) * result_T_rest)
-        Cpe += np.sum(nj_H0 * H0_T)  # nj*H0_T**2
-        Cpe -= np.sum(nj_H0) * result_T_last
+        Cpe = -np.sum(nj_H0.dot(thermo.aij.T) * result_T_rest, axis=1)
+        Cpe += np.sum(nj_H0 * H0_T, axis=1)  # nj*H0_T**2
+        Cpe -= np.sum(nj_H0, axis=1) * result_T_last
 
         Cp = (Cpe + Cpf) * R_UNIVERSAL_ENG
         Cv = Cp + n_moles * R_UNIVERSAL_ENG * dlnVqdlnT ** 2 / dlnVqdlnP
 
-        dH0_dT = thermo.H0_applyJ(T, 1.)
-        dS0_dT = thermo.S0_applyJ(T, 1.)
-        dCp0_dT = thermo.Cp0_applyJ(T, 1.)
+        dH0_dT = thermo.dH0_dT_array(T)
+        dS0_dT = thermo.dS0_dT_array(T)
+        dCp0_dT = thermo.dCp0_dT_array(T)
         sum_nj_R = n_moles*R_UNIVERSAL_SI
 
-        drho_dT = P/(sum_nj_R*T**2)*100
-        drho_dnmoles = -P/(n_moles**2*R_UNIVERSAL_SI*T)*100
-
-        dCpe_dT = 2*np.sum(nj*H0_T*dH0_dT)
+        dCpe_dT = 2*np.sum(nj*H0_T*dH0_dT, axis=1)
         # for i in range(num_element):
         #     self.dCpe_dT -= np.sum(aij[i]*nj*self.dH0_dT)*self.result_T[i]
-        dCpe_dT -= np.sum(np.sum(thermo.aij*nj*dH0_dT, axis=1)*result_T_rest)
-        dCpe_dT -= np.sum(nj*dH0_dT)*result_T_last
+        dCpe_dT -= np.sum((nj*dH0_dT).dot(thermo.aij.T)*result_T_rest, axis=1)
+        dCpe_dT -= np.sum(nj*dH0_dT, axis=1)*result_T_last
 
-        dCpf_dT = np.sum(nj*dCp0_dT)
+        dCpf_dT = np.sum(nj*dCp0_dT, axis=1)
 
-        J['h', 'T'] = R_UNIVERSAL_ENG*(np.sum(nj*dH0_dT)*T + np.sum(nj*H0_T))
-        J['h', 'n'] = R_UNIVERSAL_ENG*T*H0_T
+        J['h', 'T'] = R_UNIVERSAL_ENG*(np.sum(nj*dH0_dT, axis=1)*T + np.sum(nj*H0_T, axis=1))
+        J['h', 'n'] = (R_UNIVERSAL_ENG*T[:, np.newaxis]*H0_T).ravel()
 
-        J['S', 'n'] = R_UNIVERSAL_ENG*(S0_T + np.log(n_moles) - np.log(P/P_REF) - np.log(nj) - 1)
+        dS_dn = R_UNIVERSAL_ENG*(S0_T + np.log(n_moles/(P/P_REF))[:, np.newaxis] - np.log(nj) - 1)
         # zero out any derivs w.r.t trace species
-        _trace = np.where(nj <= MIN_VALID_CONCENTRATION+1e-20)
-        J['S', 'n'][0, _trace] = 0
-        J['S', 'T'] = R_UNIVERSAL_ENG*np.sum(nj*dS0_dT)
-        J['S', 'P'] = -R_UNIVERSAL_ENG*np.sum(nj/P)
+        dS_dn[nj <= MIN_VALID_CONCENTRATION+1e-20] = 0
+        J['S', 'n'] = dS_dn.ravel()
+        J['S', 'T'] = R_UNIVERSAL_ENG*np.sum(nj*dS0_dT, axis=1)
+        J['S', 'P'] = -R_UNIVERSAL_ENG*np.sum(nj, axis=1)/P
 
         J['rho', 'T'] = -P/(sum_nj_R*T**2)*100
         J['rho', 'n_moles'] = -P/(n_moles**2*R_UNIVERSAL_SI*T)*100
         J['rho', 'P'] = 1/(sum_nj_R*T)*100
 
+        # for j in range(num_prod):
+        #     for i in range(num_element):
+        #         dCp_dnj[j] -= R_UNIVERSAL_ENG*thermo.aij[i][j]*H0_T[j]*result_T[i]
         dCp_dnj = R_UNIVERSAL_ENG*(Cp0_T + H0_T**2)
-        for j in range(num_prod):
-            for i in range(num_element):
-                dCp_dnj[j] -= R_UNIVERSAL_ENG*thermo.aij[i][j]*H0_T[j]*result_T[i]
-        dCp_dnj -= R_UNIVERSAL_ENG * H0_T * result_T_last
-        J['Cp', 'n'] = dCp_dnj
+        dCp_dnj -= R_UNIVERSAL_ENG*result_T_rest.dot(thermo.aij)*H0_T
+        dCp_dnj -= R_UNIVERSAL_ENG * H0_T * result_T_last[:, np.newaxis]
+        J['Cp', 'n'] = dCp_dnj.ravel()
 
-        dCp_dresultT = np.zeros(num_element+1, dtype=inputs._data.dtype)
+        dCp_dresultT = np.zeros((nn, num_element+1), dtype=inputs._data.dtype)
         # for i in range(num_element):
         #     self.dCp_dresultT[i] = -R_UNIVERSAL_ENG*np.sum(aij[i]*nj_H0)
-        dCp_dresultT[:num_element] = -R_UNIVERSAL_ENG*np.sum(thermo.aij*nj_H0, axis=1)
-        dCp_dresultT[num_element] = - R_UNIVERSAL_ENG*np.sum(nj_H0)
-        J['Cp', 'result_T'] = dCp_dresultT
+        dCp_dresultT[:, :num_element] = -R_UNIVERSAL_ENG*nj_H0.dot(thermo.aij.T)
+        dCp_dresultT[:, num_element] = - R_UNIVERSAL_ENG*np.sum(nj_H0, axis=1)
+        J['Cp', 'result_T'] = dCp_dresultT.ravel()
 
         dCp_dT = (dCpe_dT + dCpf_dT)*R_UNIVERSAL_ENG
         J['Cp', 'T'] = dCp_dT
 
-        J['Cv', 'n'] = dCp_dnj
+        J['Cv', 'n'] = dCp_dnj.ravel()
 
         dCv_dnmoles = R_UNIVERSAL_ENG*dlnVqdlnT**2/dlnVqdlnP
         J['Cv', 'n_moles'] = dCv_dnmoles
         J['Cv', 'T'] = dCp_dT
 
-        dCv_dresultP = np.zeros((1, num_element+1), dtype=inputs._data.dtype)
-        dCv_dresultP[0, -1] = -R_UNIVERSAL_ENG*n_moles*(dlnVqdlnT/dlnVqdlnP)**2
+        dCv_dresultP = -R_UNIVERSAL_ENG*n_moles*(dlnVqdlnT/dlnVqdlnP)**2
         J['Cv', 'result_P'] = dCv_dresultP
 
         dCv_dresultT = dCp_dresultT.copy()
-        dCv_dresultT[-1] -= n_moles*R_UNIVERSAL_ENG/dlnVqdlnP*(2*dlnVqdlnT)
-        dCv_dresultT_last = dCv_dresultT[-1]
-        J['Cv', 'result_T'] = dCv_dresultT
+        dCv_dresultT[:, -1] -= n_moles*R_UNIVERSAL_ENG/dlnVqdlnP*(2*dlnVqdlnT)
+        dCv_dresultT_last = dCv_dresultT[:, -1]
+        J['Cv', 'result_T'] = dCv_dresultT.ravel()
 
-        J['gamma', 'n'] = dCp_dnj*(Cp/Cv-1)/(dlnVqdlnP*Cv)
+        J['gamma', 'n'] = (dCp_dnj*((Cp/Cv-1)/(dlnVqdlnP*Cv))[:, np.newaxis]).ravel()
         J['gamma', 'n_moles'] = Cp/dlnVqdlnP/Cv**2*dCv_dnmoles
         J['gamma', 'T'] = dCp_dT/dlnVqdlnP/Cv*(Cp/Cv-1)
 
-        dgamma_dresultT = np.zeros((1, num_element+1), dtype=inputs._data.dtype)
-        dgamma_dresultT[0, :num_element] = 1/Cv/dlnVqdlnP*dCp_dresultT[:num_element]*(Cp/Cv-1)
-        dgamma_dresultT[0, -1] = (-dCp_dresultT[-1]/Cv+Cp/Cv**2*dCv_dresultT_last)/dlnVqdlnP
-        J['gamma', 'result_T'] = dgamma_dresultT
+        dgamma_dresultT = np.zeros((nn, num_element+1), dtype=inputs._data.dtype)
+        dgamma_dresultT[:, :num_element] = (1/Cv/dlnVqdlnP*(Cp/Cv-1))[:, np.newaxis]*dCp_dresultT[:, :num_element]
+        dgamma_dresultT[:, -1] = (-dCp_dresultT[:, -1]/Cv+Cp/Cv**2*dCv_dresultT_last)/dlnVqdlnP
+        J['gamma', 'result_T'] = dgamma_dresultT.ravel()
 
-        gamma_dresultP = np.zeros((1, num_element+1), dtype=inputs._data.dtype)
-        gamma_dresultP[0, num_element] = Cp/Cv/dlnVqdlnP*(dCv_dresultP[0, -1]/Cv + 1/dlnVqdlnP)
-        J['gamma', 'result_P'] = gamma_dresultP
+        J['gamma', 'result_P'] = Cp/Cv/dlnVqdlnP*(dCv_dresultP/Cv + 1/dlnVqdlnP)
 
 
 if __name__ == "__main__":
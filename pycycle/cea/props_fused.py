@@ -0,0 +1,309 @@
+import numpy as np
+
+from openmdao.api import ExplicitComponent
+
+from pycycle.constants import P_REF, R_UNIVERSAL_ENG, R_UNIVERSAL_SI, MIN_VALID_CONCENTRATION
+from pycycle.cea.utils import node_shape, block_diag_pattern
+from pycycle.cea.unit_comps import EngUnitOutputs, FLOW_UNITS
+
+
+def _lhs_TP(thermo, nj, b0):
+    """the (nn, ne1, ne1) matrix shared by the T and P linear solves"""
+    num_element = thermo.num_element
+
+    lhs_TP = np.zeros((nj.shape[0], num_element+1, num_element+1), dtype=np.result_type(nj, b0))
+    lhs_TP[:, :num_element, :num_element] = np.einsum('nk,ijk->nij', nj, thermo.aij_prod)
+    lhs_TP[:, num_element, :num_element] = b0
+    lhs_TP[:, :num_element, num_element] = b0
+
+    return lhs_TP
+
+
+def _props_state(thermo, T, P, nj, n_moles, b0):
+    """equilibrium_props, and the intermediate values its partials are built from"""
+    nn = nj.shape[0]
+    num_element = thermo.num_element
+    ne1 = num_element + 1
+    props = {}
+
+    Cp0_T = thermo.Cp0_array(T)
+    H0_T = thermo.H0_array(T)
+    S0_T = thermo.S0_array(T)
+    nj_H0 = nj*H0_T
+
+    # lhs_TP is factored once: the T and P right hand sides are solved together with the identity,
+    # so the partials reuse the inverse instead of solving against lhs_TP again
+    lhs_TP = _lhs_TP(thermo, nj, b0)
+    rhs = np.zeros((nn, ne1, 2 + ne1), dtype=np.result_type(nj_H0, b0, n_moles))
+    rhs[:, :num_element, 0] = nj_H0.dot(thermo.aij.T)
+    rhs[:, num_element, 0] = np.sum(nj_H0, axis=1)
+    rhs[:, :num_element, 1] = b0
+    rhs[:, num_element, 1] = n_moles
+    rhs[:, np.arange(ne1), 2 + np.arange(ne1)] = 1.
+    result = np.linalg.solve(lhs_TP, rhs)
+    rhs_T = rhs[:, :, 0]
+    x_T, x_P = result[:, :, 0], result[:, :, 1]
+
+    dlnVqdlnP = -1 + x_P[:, num_element]
+    dlnVqdlnT = 1 - x_T[:, num_element]
+
+    Cpf = np.sum(nj*Cp0_T, axis=1)
+    Cpe = -np.sum(rhs_T[:, :num_element]*x_T[:, :num_element], axis=1)
+    Cpe += np.sum(nj_H0*H0_T, axis=1)  # nj*H0_T**2
+    Cpe -= rhs_T[:, num_element]*x_T[:, num_element]
+
+    props['h'] = np.sum(nj_H0, axis=1)*R_UNIVERSAL_ENG*T
+
+    try:
+        val = (S0_T+np.log(n_moles[:, np.newaxis]/nj/(P[:, np.newaxis]/P_REF)))
+    except FloatingPointError:
+        P = 1e-5*np.ones(nn)
+        val = (S0_T+np.log(n_moles[:, np.newaxis]/nj/(P[:, np.newaxis]/P_REF)))
+
+    props['S'] = R_UNIVERSAL_ENG * np.sum(nj*val, axis=1)
+    props['Cp'] = Cp = (Cpe+Cpf)*R_UNIVERSAL_ENG
+    props['Cv'] = Cv = Cp + n_moles*R_UNIVERSAL_ENG*dlnVqdlnT**2/dlnVqdlnP
+
+    props['gamma'] = -1*Cp/Cv/dlnVqdlnP
+
+    props['rho'] = P/(n_moles*R_UNIVERSAL_SI*T)*100  # 1 Bar is 100 Kpa
+
+    props['R'] = R_UNIVERSAL_SI*n_moles  #(m**3 * Pa)/(mol*degK)
+
+    state = {'Cp0_T': Cp0_T, 'H0_T': H0_T, 'S0_T': S0_T, 'nj_H0': nj_H0, 'rhs_T': rhs_T,
+             'x_T': x_T, 'x_P': x_P, 'lhs_inv': result[:, :, 2:],
+             'dlnVqdlnP': dlnVqdlnP, 'dlnVqdlnT': dlnVqdlnT, 'Cp': Cp, 'Cv': Cv}
+    return props, state
+
+
+def equilibrium_props(thermo, T, P, nj, n_moles, b0):
+    """h, S, Cp, Cv, gamma, rho and R of the equilibrium mixture nj (num_nodes, num_prod) at T and P"""
+    return _props_state(thermo, T, P, nj, n_moles, b0)[0]
+
+
+def equilibrium_props_partials(thermo, T, P, nj, n_moles, b0, state=None):
+    """partials of equilibrium_props w.r.t. T, P, n, n_moles and b0, keyed like a Jacobian.
+    Every node only depends on its own inputs, so each entry has the shape (num_nodes,) or
+    (num_nodes, size of the input). state is the second return value of _props_state at the
+    same inputs, when it is already known"""
+    nn, num_prod = nj.shape
+    num_element = thermo.num_element
+    ne1 = num_element + 1
+    aij = thermo.aij
+    J = {}
+
+    if state is None:
+        state = _props_state(thermo, T, P, nj, n_moles, b0)[1]
+    Cp0_T = state['Cp0_T']
+    H0_T = state['H0_T']
+    S0_T = state['S0_T']
+    nj_H0 = state['nj_H0']
+    rhs_T = state['rhs_T']
+    x_T, x_P = state['x_T'], state['x_P']
+    dlnVqdlnP = state['dlnVqdlnP']
+    dlnVqdlnT = state['dlnVqdlnT']
+    Cp, Cv = state['Cp'], state['Cv']
+
+    dH0_dT = thermo.dH0_dT_array(T)
+    dS0_dT = thermo.dS0_dT_array(T)
+    dCp0_dT = thermo.dCp0_dT_array(T)
+    nj_dH0dT = nj*dH0_dT
+
+    # the derivatives of x = A^-1 b follow from dx = A^-1 (db - dA x), with one column per
+    # input entry: dx_T/dT, dx_T/dn, dx_T/db0, dx_P/dn, dx_P/db0, dx_P/dn_moles
+    c_n = 1
+    c_b0 = c_n + num_prod
+    c_Pn = c_b0 + num_element
+    c_Pb0 = c_Pn + num_prod
+    c_Pnm = c_Pb0 + num_element
+    drhs = np.zeros((nn, ne1, c_Pnm + 1), dtype=np.result_type(x_T, nj_dH0dT))
+
+    drhs[:, :num_element, 0] = nj_dH0dT.dot(aij.T)
+    drhs[:, num_element, 0] = np.sum(nj_dH0dT, axis=1)
+
+    drhs[:, :num_element, c_n:c_b0] = aij*H0_T[:, np.newaxis, :]
+    drhs[:, num_element, c_n:c_b0] = H0_T
+
+    e = np.arange(num_element)
+    drhs[:, e, c_Pb0 + e] = 1.
+    drhs[:, num_element, c_Pnm] = 1.
+
+    for x_r, c_dn, c_db0 in ((x_T, c_n, c_b0), (x_P, c_Pn, c_Pb0)):
+        # dA/dn_k x = aij[:, k] (aij[:, k] . x), dA/db0_j x has x_ne in row j and x_j in the last row
+        drhs[:, :num_element, c_dn:c_dn+num_prod] -= aij*x_r[:, :num_element].dot(aij)[:, np.newaxis, :]
+        drhs[:, e, c_db0 + e] -= x_r[:, num_element, np.newaxis]
+        drhs[:, num_element, c_db0:c_db0+num_element] -= x_r[:, :num_element]
+
+    dx = np.matmul(state['lhs_inv'], drhs)
+    dxT_dT = dx[:, :, 0]
+    dxT_dn = dx[:, :, c_n:c_b0]
+    dxT_db0 = dx[:, :, c_b0:c_Pn]
+    dxP_dn = dx[:, :, c_Pn:c_Pb0]
+    dxP_db0 = dx[:, :, c_Pb0:c_Pnm]
+    dxP_dnm = dx[:, :, c_Pnm]
+
+    result_T_last = x_T[:, num_element]
+    result_T_rest = x_T[:, :num_element]
+    sum_nj_R = n_moles*R_UNIVERSAL_SI
+
+    J['h', 'T'] = R_UNIVERSAL_ENG*(np.sum(nj_dH0dT, axis=1)*T + np.sum(nj_H0, axis=1))
+    J['h', 'n'] = R_UNIVERSAL_ENG*T[:, np.newaxis]*H0_T
+
+    dS_dn = R_UNIVERSAL_ENG*(S0_T + np.log(n_moles/(P/P_REF))[:, np.newaxis] - np.log(nj) - 1)
+    # zero out any derivs w.r.t trace species
+    dS_dn[nj <= MIN_VALID_CONCENTRATION+1e-20] = 0
+    J['S', 'n'] = dS_dn
+    J['S', 'T'] = R_UNIVERSAL_ENG*np.sum(nj*dS0_dT, axis=1)
+    J['S', 'P'] = -R_UNIVERSAL_ENG*np.sum(nj, axis=1)/P
+
+    J['rho', 'T'] = -P/(sum_nj_R*T**2)*100
+    J['rho', 'n_moles'] = -P/(n_moles**2*R_UNIVERSAL_SI*T)*100
+    J['rho', 'P'] = 1/(sum_nj_R*T)*100
+
+    # Cp only depends on result_T, Cv and gamma also depend on result_P through dlnVqdlnP
+    dCp_dresultT = np.empty((nn, ne1), dtype=nj_H0.dtype)
+    dCp_dresultT[:, :num_element] = -R_UNIVERSAL_ENG*rhs_T[:, :num_element]
+    dCp_dresultT[:, num_element] = -R_UNIVERSAL_ENG*rhs_T[:, num_element]
+
+    dCpe_dT = 2*np.sum(nj_H0*dH0_dT, axis=1)
+    dCpe_dT -= np.sum(nj_dH0dT.dot(aij.T)*result_T_rest, axis=1)
+    dCpe_dT -= np.sum(nj_dH0dT, axis=1)*result_T_last
+    dCp_dT = (dCpe_dT + np.sum(nj*dCp0_dT, axis=1))*R_UNIVERSAL_ENG
+    dCp_dT += np.sum(dCp_dresultT*dxT_dT, axis=1)
+
+    dCp_dn = R_UNIVERSAL_ENG*(Cp0_T + H0_T**2)
+    dCp_dn -= R_UNIVERSAL_ENG*result_T_rest.dot(aij)*H0_T
+    dCp_dn -= R_UNIVERSAL_ENG*H0_T*result_T_last[:, np.newaxis]
+    dCp_dn += np.einsum('ni,nik->nk', dCp_dresultT, dxT_dn)
+
+    dCp_db0 = np.einsum('ni,nik->nk', dCp_dresultT, dxT_db0)
+
+    J['Cp', 'T'] = dCp_dT
+    J['Cp', 'n'] = dCp_dn
+    J['Cp', 'b0'] = dCp_db0
+
+    # Cv = Cp + n_moles*R*dlnVqdlnT**2/dlnVqdlnP
+    dCv_dlnVqdlnT = 2*n_moles*R_UNIVERSAL_ENG*dlnVqdlnT/dlnVqdlnP
+    dCv_dlnVqdlnP = -n_moles*R_UNIVERSAL_ENG*(dlnVqdlnT/dlnVqdlnP)**2
+    dCv_dnmoles = R_UNIVERSAL_ENG*dlnVqdlnT**2/dlnVqdlnP
+
+    # gamma = -Cp/(Cv*dlnVqdlnP)
+    dgamma_dCp = -1/(Cv*dlnVqdlnP)
+    dgamma_dCv = Cp/(Cv**2*dlnVqdlnP)
+    dgamma_dlnVqdlnP = Cp/(Cv*dlnVqdlnP**2)
+
+    derivs = {'T': (dCp_dT, -dxT_dT[:, num_element], 0., 0.),
+              'n': (dCp_dn, -dxT_dn[:, num_element], dxP_dn[:, num_element], 0.),
+              'b0': (dCp_db0, -dxT_db0[:, num_element], dxP_db0[:, num_element], 0.),
+              'n_moles': (0., 0., dxP_dnm[:, num_element], dCv_dnmoles)}
+    for name, (dCp, dlnVqdlnT_d, dlnVqdlnP_d, dCv_direct) in derivs.items():
+        if np.ndim(dlnVqdlnT_d) == 2 or np.ndim(dlnVqdlnP_d) == 2:
+            col = (slice(None), np.newaxis)
+        else:
+            col = slice(None)
+        dCv = dCp + dCv_dlnVqdlnT[col]*dlnVqdlnT_d + dCv_dlnVqdlnP[col]*dlnVqdlnP_d + dCv_direct
+        dgamma = dgamma_dCp[col]*dCp + dgamma_dCv[col]*dCv + dgamma_dlnVqdlnP[col]*dlnVqdlnP_d
+
+        J['Cv', name] = dCv
+        J['gamma', name] = dgamma
+
+    return J
+
+
+class PropsFused(ExplicitComponent):
+    """computes S, H, Cp, Cv, gamma, rho and R of a converged equilibrium mixture, doing the
+    work of PropsRHS, the two linear systems and PropsCalcs in one component so lhs_TP is
+    factored only once per node for both the T and P solves"""
+
+    def initialize(self):
+        self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
+        self.options.declare('fl_name', default=None, allow_none=True,
+                             desc='flowstation name, when given the flow station variables are also output '
+                                  'in english units, see EngUnitOutputs')
+
+    def setup(self):
+
+        thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+
+        self.add_input('T', val=284., shape=nn, units="degK", desc="Temperature")
+        self.add_input('P', val=1., shape=nn, units='bar', desc="Pressure")
+        self.add_input('n', val=np.ones(node_shape(nn, num_prod)),
+                       desc="molar concentration of the mixtures, last element is the total molar concentration")
+        self.add_input('n_moles', val=1., shape=nn, desc="1/molar_mass for gaseous mixture")
+        self.add_input('b0', val=np.ones(node_shape(nn, num_element)),
+                       desc="assigned kg-atoms of element i per total kg of reactant")  # kg-atom/kg
+
+        self.add_output('h', val=1., shape=nn, units="cal/g", desc="enthalpy")
+        self.add_output('S', val=1., shape=nn, units="cal/(g*degK)", desc="entropy")
+        self.add_output('gamma', val=1.4, shape=nn, lower=1.0, upper=2.0, desc="ratio of specific heats")
+        self.add_output('Cp', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant pressure")
+        self.add_output('Cv', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant volume")
+        self.add_output('rho', val=0.0004, shape=nn, units="g/cm**3", desc="density")
+
+        self.add_output('R', val=1., shape=nn, units='(N*m)/(kg*degK)', desc='Specific gas constant')
+
+        # partial derivs setup, every node only depends on its own inputs
+        ar = np.arange(nn)
+        n_rows, n_cols = block_diag_pattern(nn, 1, num_prod)
+        b_rows, b_cols = block_diag_pattern(nn, 1, num_element)
+
+        self.declare_partials('h', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('h', 'T', rows=ar, cols=ar)
+        self.declare_partials('S', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('S', ['T', 'P'], rows=ar, cols=ar)
+        self.declare_partials('S', 'n_moles', val=R_UNIVERSAL_ENG, rows=ar, cols=ar)
+        self.declare_partials('Cp', 'n', rows=n_rows, cols=n_cols)
+        self.declare_partials('Cp', 'T', rows=ar, cols=ar)
+        self.declare_partials('Cp', 'b0', rows=b_rows, cols=b_cols)
+        self.declare_partials('rho', ['T', 'P', 'n_moles'], rows=ar, cols=ar)
+        for out in ('gamma', 'Cv'):
+            self.declare_partials(out, 'n', rows=n_rows, cols=n_cols)
+            self.declare_partials(out, ['n_moles', 'T'], rows=ar, cols=ar)
+            self.declare_partials(out, 'b0', rows=b_rows, cols=b_cols)
+
+        self.declare_partials('R', 'n_moles', val=R_UNIVERSAL_SI, rows=ar, cols=ar)
+
+        self._state = (), None
+
+        if self.options['fl_name'] is None:
+            self._eng_units = None
+        else:
+            self._eng_units = EngUnitOutputs(self, self.options['fl_name'], FLOW_UNITS)
+            self._eng_units.setup()
+
+    def _args(self, inputs):
+        thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+
+        return (thermo, inputs['T'], inputs['P'], inputs['n'].reshape((nn, thermo.num_prod)),
+                inputs['n_moles'], inputs['b0'].reshape((nn, thermo.num_element)))
+
+    def compute(self, inputs, outputs):
+        args = self._args(inputs)
+        props, state = _props_state(*args)
+        for name, val in props.items():
+            outputs[name] = val
+
+        # compute_partials normally follows at the same point, and then reuses the solve
+        self._state = [np.copy(arg) for arg in args[1:]], state
+
+        if self._eng_units is not None:
+            self._eng_units.compute(inputs, outputs)
+
+    def compute_partials(self, inputs, J):
+        args = self._args(inputs)
+        state_args, state = self._state
+        if not all(np.array_equal(a, b) for a, b in zip(args[1:], state_args)):
+            state = None
+
+        partials = equilibrium_props_partials(*args, state=state)
+        for key, val in partials.items():
+            J[key] = np.ravel(val)
+
+        if self._eng_units is not None:
+            self._eng_units.compute_partials(inputs, J)
@@ -3,134 +3,145 @@ import numpy as np
 from openmdao.api import ExplicitComponent
 
 from pycycle.cea import species_data
+from pycycle.cea.utils import node_shape, block_diag_pattern
 from pycycle.constants import R_UNIVERSAL_ENG, R_UNIVERSAL_SI, MIN_VALID_CONCENTRATION
 
 
 class PropsRHS(ExplicitComponent):
 
-    def __init__(self, thermo):
+    def __init__(self, thermo, num_nodes=1):
         super(PropsRHS, self).__init__()
         self.thermo = thermo
+        self.num_nodes = num_nodes
 
     def setup(self):
 
         thermo = self.thermo
+        nn = self.num_nodes
         num_prod = thermo.num_prod
         num_element = thermo.num_element
+        ne1 = num_element+1
 
-        self.add_input('T', val=284., units="degK", desc="Total Temperature")
-        self.add_input('n', val=np.zeros(num_prod),
+        self.add_input('T', val=284., shape=nn, units="degK", desc="Total Temperature")
+        self.add_input('n', val=np.zeros(node_shape(nn, num_prod)),
                        desc="molar concentration of the mixtures, last element is "
                        "the total molar concentration")  # kg-mol/kg
-        self.add_input('n_moles', val=1., desc="1/molar_mass for gaseous mixture")
-        self.add_input('b0', val=np.zeros(num_element),
+        self.add_input('n_moles', val=1., shape=nn, desc="1/molar_mass for gaseous mixture")
+        self.add_input('b0', val=np.zeros(node_shape(nn, num_element)),
                        desc="assigned kg-atoms of element i per total kg of reactant")  # kg-atom/kg
 
-        self.add_output('rhs_T', val=np.zeros(num_element+1),
+        self.add_output('rhs_T', val=np.zeros(node_shape(nn, ne1)),
                         desc="rhs for the T solve")
-        self.add_output('rhs_P', val=np.zeros(num_element+1),
+        self.add_output('rhs_P', val=np.zeros(node_shape(nn, ne1)),
                         desc="rhs for the P solve")
-        self.add_output('lhs_TP', val=np.eye(num_element+1),
+        lhs_shape = (nn, ne1, ne1) if nn > 1 else (ne1, ne1)
+        self.add_output('lhs_TP', val=np.broadcast_to(np.eye(ne1), lhs_shape),
                         desc="A matrix for the totals linear solve")
 
-        thermo = self.thermo
-        num_prod = thermo.num_prod
-        num_element = thermo.num_element
-
-        self.drhsT_dT = np.empty(num_element+1)
-        self.drhsT_dn = np.empty((num_element+1, num_prod))
+        # real and complex workspaces, compute_partials switches between them by reference
+        self._drhsT_real = (np.empty((nn, ne1)), np.empty((nn, ne1, num_prod)))
+        self._drhsT_complex = (np.empty((nn, ne1), dtype=complex), np.empty((nn, ne1, num_prod), dtype=complex))
+        self.drhsT_dT, self.drhsT_dn = self._drhsT_real
 
-        drhsP_dnmoles = np.zeros(num_element+1)
-        drhsP_dnmoles[-1] = 1.
+        ar = np.arange(nn)
         # self.declare_partials('rhs_P', 'n_moles',
         #                       val=1, rows=(num_element,), cols=(0,))
-        self.declare_partials('rhs_P', 'n_moles', val=drhsP_dnmoles)
-
-        drhsP_db0 = np.zeros((num_element+1, num_element))
-        np.fill_diagonal(drhsP_db0[:num_element, :num_element], 1)
-        self.declare_partials('rhs_P', 'b0', val=drhsP_db0)
-
-        # JSG: The for loops are slow, but its ok because we only do them one time
-        ne1 = num_element+1
-        dlhs_dn = np.zeros((ne1**2, num_prod))
-        # val, idx_row, idx_col = [], [], []
-        for i in range(num_element):
-            for j in range(num_element):
-                for k in range(num_prod):
-                    dlhs_dn[ne1*i+j, k] = thermo.aij_prod[i][j, k]
-                    # val.append(thermo.aij_prod[i][j, k])
-                    # idx_row.append(3*i+j)
-                    # idx_col.append(k)
-        self.declare_partials('lhs_TP', 'n', val=dlhs_dn)
-
-        dlhs_db0 = np.zeros((ne1**2, num_element))
-        for i in range(num_element):
-            for j in range(num_element):
-                    dlhs_db0[ne1*num_element+j, j] = 1
-                    dlhs_db0[ne1*j+num_element, j] = 1
-        self.declare_partials('lhs_TP', 'b0', val=dlhs_db0)
-
-        self.declare_partials('rhs_T', 'T')
-        self.declare_partials('rhs_T', 'n')
+        self.declare_partials('rhs_P', 'n_moles', val=1., rows=ar*ne1+num_element, cols=ar)
+
+        node, elem = np.indices((nn, num_element))
+        self.declare_partials('rhs_P', 'b0', val=1.,
+                              rows=(node*ne1 + elem).ravel(),
+                              cols=(node*num_element + elem).ravel())
+
+        # lhs_TP[i, j] = sum_k aij[i, k]*aij[j, k]*n[k] for the element rows and columns, so its
+        # derivative w.r.t. n is aij_prod. Only the entries where both elements appear in a species are nonzero
+        e = np.arange(num_element)
+        dlhs_dn = np.zeros((ne1, ne1, num_prod))
+        dlhs_dn[:num_element, :num_element] = thermo.aij_prod
+        rows, cols = block_diag_pattern(nn, ne1**2, num_prod)
+        nz = np.tile(dlhs_dn.ravel() != 0, nn)
+        self.declare_partials('lhs_TP', 'n', val=np.tile(dlhs_dn.ravel(), nn)[nz], rows=rows[nz], cols=cols[nz])
+
+        # b0 only appears in the last row and column
+        dlhs_db0 = np.zeros((ne1, ne1, num_element))
+        dlhs_db0[num_element, e, e] = 1.
+        dlhs_db0[e, num_element, e] = 1.
+        rows, cols = block_diag_pattern(nn, ne1**2, num_element)
+        nz = np.tile(dlhs_db0.ravel() != 0, nn)
+        self.declare_partials('lhs_TP', 'b0', val=1., rows=rows[nz], cols=cols[nz])
+
+        rows, cols = block_diag_pattern(nn, ne1, 1)
+        self.declare_partials('rhs_T', 'T', rows=rows, cols=cols)
+
+        # the element rows of rhs_T follow aij, the last row depends on every species
+        rows, cols = block_diag_pattern(nn, ne1, num_prod)
+        drhsT_dn_nz = np.vstack((np.array(thermo.aij) != 0, np.ones((1, num_prod), dtype=bool)))
+        self._rhsT_n_nz = nz = np.tile(drhsT_dn_nz.ravel(), nn)
+        self.declare_partials('rhs_T', 'n', rows=rows[nz], cols=cols[nz])
         # self.approx_partials('*', '*')
 
     def compute(self, inputs, outputs):
 
         thermo = self.thermo
+        nn = self.num_nodes
         num_element = thermo.num_element
+        ne1 = num_element + 1
         T = inputs['T']
-        n = inputs['n']
-        b0 = inputs['b0']
+        n = inputs['n'].reshape((nn, thermo.num_prod))
+        b0 = inputs['b0'].reshape((nn, num_element))
 
-        for i in range(num_element):
-            # outputs['lhs_TP'][i][:num_element] = np.sum(thermo.aij_prod[i] * n, axis=1)
-            outputs['lhs_TP'][i][:num_element] = np.dot(thermo.aij_prod[i], n)
+        lhs_TP = np.zeros((nn, ne1, ne1), dtype=n.dtype)
+        lhs_TP[:, :num_element, :num_element] = np.einsum('nk,ijk->nij', n, thermo.aij_prod)
 
         # determine the delta coeff for 2.24 and pi coef for 2.26\
         # at the converged state, b = b0 by definition
 
-        outputs['lhs_TP'][num_element, :num_element] = b0
-        outputs['lhs_TP'][:num_element, num_element] = b0
+        lhs_TP[:, num_element, :num_element] = b0
+        lhs_TP[:, :num_element, num_element] = b0
 
-        outputs['lhs_TP'][num_element, num_element] = 0
+        lhs_TP[:, num_element, num_element] = 0
+        outputs['lhs_TP'] = lhs_TP.reshape(outputs['lhs_TP'].shape)
 
         # rhs for P
-        outputs['rhs_P'][:num_element] = b0
-        outputs['rhs_P'][num_element] = inputs['n_moles']
+        rhs_P = np.empty((nn, ne1), dtype=n.dtype)
+        rhs_P[:, :num_element] = b0
+        rhs_P[:, num_element] = inputs['n_moles']
+        outputs['rhs_P'] = rhs_P.reshape(outputs['rhs_P'].shape)
 
         # rhs for T
-        self.H0_T = H0_T = thermo.H0(T)
+        self.H0_T = H0_T = thermo.H0_array(T)
         n_H0 = n*H0_T
-        outputs['rhs_T'][:num_element] = np.sum(thermo.aij*n_H0, axis=1)
-        outputs['rhs_T'][num_element] = np.sum(n_H0)
+        rhs_T = np.empty((nn, ne1), dtype=n_H0.dtype)
+        rhs_T[:, :num_element] = n_H0.dot(thermo.aij.T)
+        rhs_T[:, num_element] = np.sum(n_H0, axis=1)
+        outputs['rhs_T'] = rhs_T.reshape(outputs['rhs_T'].shape)
 
     def compute_partials(self, inputs, J):
 
         thermo = self.thermo
+        nn = self.num_nodes
         num_element = thermo.num_element
         aij = thermo.aij
 
         if inputs._under_complex_step:
-            self.drhsT_dT = self.drhsT_dT.astype(np.complex)
-            self.drhsT_dn = self.drhsT_dn.astype(np.complex)
+            self.drhsT_dT, self.drhsT_dn = self._drhsT_complex
         else:
-            self.drhsT_dT = self.drhsT_dT.real
-            self.drhsT_dn = self.drhsT_dn.real
+            self.drhsT_dT, self.drhsT_dn = self._drhsT_real
 
         T = inputs['T']
-        nj = inputs['n']
+        nj = inputs['n'].reshape((nn, thermo.num_prod))
 
         H0_T = self.H0_T
-        nj_dH0dT = thermo.H0_applyJ(T, nj)
+        nj_dH0dT = nj * thermo.dH0_dT_array(T)
 
-        self.drhsT_dT[:num_element] = np.sum(aij*nj_dH0dT, axis=1)
-        self.drhsT_dT[num_element] = np.sum(nj_dH0dT)
+        self.drhsT_dT[:, :num_element] = nj_dH0dT.dot(aij.T)
+        self.drhsT_dT[:, num_element] = np.sum(nj_dH0dT, axis=1)
 
-        self.drhsT_dn[:num_element] = aij*H0_T
-        self.drhsT_dn[num_element] = H0_T
+        self.drhsT_dn[:, :num_element] = aij*H0_T[:, np.newaxis, :]
+        self.drhsT_dn[:, num_element] = H0_T
 
-        J['rhs_T', 'T'] = self.drhsT_dT.reshape((-1, 1))
-        J['rhs_T', 'n'] = self.drhsT_dn
+        J['rhs_T', 'T'] = self.drhsT_dT.ravel()
+        J['rhs_T', 'n'] = self.drhsT_dn.ravel()[self._rhsT_n_nz]
 
         # derivs of rhsP are constants, specified in setup
 
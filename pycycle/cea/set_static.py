@@ -1,7 +1,10 @@
+import numpy as np
+
 import openmdao.api as om
 
 from pycycle.constants import AIR_MIX
 from pycycle.cea.set_total import SetTotal
+from pycycle.cea.static_flow_station import StaticFlowStation
 from pycycle.cea.unit_comps import EngUnitStaticProps, EngUnitProps
 from pycycle.cea import species_data
 
@@ -16,6 +19,21 @@ class SetStatic(om.Group):
         self.options.declare('init_reacts',
                               default=AIR_MIX,
                               desc='initial amounts of each species in the flow')
+        self.options.declare('num_nodes', default=1, types=int,
+                              desc='number of independent flow conditions evaluated at once')
+        self.options.declare('formulation', default='full', values=('full', 'reduced'),
+                              desc='formulation of the chemical equilibrium solve, see ChemEq')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('thermo_table', default=None, recordable=False, allow_none=True,
+                              desc='ThermoTable used by the TABULAR method, see SetTotal')
+        self.options.declare('statics_method', default='STATION', values=('STATION', 'GROUP'),
+                              desc='STATION solves the CEA static conditions in a single StaticFlowStation, '
+                                   'GROUP uses a SetTotal in S mode with the Ps residual')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='DIRECT outputs the flow station variables in english units from the '
+                                   'StaticFlowStation, COMP converts them in separate EngUnitProps and '
+                                   'EngUnitStaticProps components (always used with statics_method GROUP)')
 
     def setup(self):
 
@@ -24,49 +42,69 @@ class SetStatic(om.Group):
         thermo_data = self.options['thermo_data']
         init_reacts = self.options['init_reacts']
         fl_name = self.options['fl_name']
+        nn = self.options['num_nodes']
 
-        thermo = species_data.Thermo(thermo_data, init_reacts)
+        thermo = species_data.get_thermo(thermo_data, init_reacts)
 
-        statics = SetTotal(mode='S',
-                           fl_name=fl_name,
-                           thermo_data=thermo_data,
-                           init_reacts=init_reacts,
-                           for_statics=mode)
+        station = self.options['thermo_method'] == 'CEA' and self.options['statics_method'] == 'STATION'
+        direct_units = station and self.options['units_method'] == 'DIRECT'
+        fl_vars = ['{}:*'.format(fl_name)] if direct_units else []
+        if station:
+            statics = StaticFlowStation(thermo=thermo, mode=mode, num_nodes=nn,
+                                        fl_name=fl_name if direct_units else None)
+        else:
+            statics = SetTotal(mode='S',
+                               fl_name=fl_name,
+                               thermo_data=thermo_data,
+                               init_reacts=init_reacts,
+                               for_statics=mode,
+                               num_nodes=nn,
+                               formulation=self.options['formulation'],
+                               thermo_method=self.options['thermo_method'],
+                               thermo_table=self.options['thermo_table'])
 
         # have to promote things differently depending on which mode we are
         if mode == 'Ps':
+            # the station takes Ps directly, SetTotal calls it P
             self.add_subsystem('statics', statics,
-                               promotes_inputs=[('P', 'Ps'), 'S', 'ht', 'W', 'init_prod_amounts'],
+                               promotes_inputs=['Ps' if station else ('P', 'Ps'), 'S', 'ht', 'W', 'init_prod_amounts'],
                                promotes_outputs=['MN', 'V', 'Vsonic', 'area',
-                                                 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'])
+                                                 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'] + fl_vars)
         elif mode == 'MN':
             self.add_subsystem('statics', statics,
                                promotes_inputs=['MN', 'S', 'ht', 'W', 'guess:*', 'init_prod_amounts'],
                                promotes_outputs=['V', 'Vsonic', 'area',
-                                                 'Ps', 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'])
+                                                 'Ps', 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'] + fl_vars)
 
         else:
             self.add_subsystem('statics', statics,
                                promotes_inputs=['area', 'S', 'ht', 'W', 'guess:*', 'init_prod_amounts'],
                                promotes_outputs=['V', 'Vsonic', 'MN',
-                                                 'Ps', 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'])
+                                                 'Ps', 'T', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles'] + fl_vars)
+
+        if direct_units:
+            return
 
         p_inputs = ('T', 'P', 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles')
         p_outputs = tuple(['{0}:{1}'.format(fl_name, in_name) for in_name in p_inputs])
         # need to redefine this so that P gets promoted as P. Needed the first definition for the list comprehension
         p_inputs = ('T', ('P', 'Ps'), 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles')
 
-        self.add_subsystem('flow', EngUnitProps(thermo=thermo, fl_name=fl_name),
+        self.add_subsystem('flow', EngUnitProps(thermo=thermo, fl_name=fl_name, num_nodes=nn),
                            promotes_inputs=p_inputs,
                            promotes_outputs=p_outputs)
 
         p_inputs = ('area', 'W', 'V', 'Vsonic', 'MN')
         p_outputs = tuple(['{0}:{1}'.format(fl_name, in_name) for in_name in p_inputs])
-        eng_units_statics = EngUnitStaticProps(thermo, fl_name)
+        eng_units_statics = EngUnitStaticProps(thermo, fl_name, num_nodes=nn)
         self.add_subsystem('flow_static', eng_units_statics,
                            promotes_inputs=p_inputs,
                            promotes_outputs=p_outputs)
 
+        if mode == 'area':
+            # statics and flow_static both take the promoted area, with different units and defaults
+            self.set_input_defaults('area', val=np.full(nn, np.inf), units='m**2')
+
         # self.set_order(['statics', 'flow', 'flow_static'])
 
 if __name__ == "__main__":
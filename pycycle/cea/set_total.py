@@ -4,29 +4,36 @@ from pycycle.constants import AIR_MIX
 from pycycle.cea.chem_eq import ChemEq
 from pycycle.cea.props_rhs import PropsRHS
 from pycycle.cea.props_calcs import PropsCalcs
+from pycycle.cea.props_fused import PropsFused
+from pycycle.cea.tabular_thermo import TabularThermo
+from pycycle.cea.frozen_thermo import FrozenThermo
+from pycycle.cea.thermo_table import get_thermo_table
 from pycycle.cea.static_ps_resid import PsResid
 from pycycle.cea.static_ps_calc import PsCalc
 from pycycle.cea.unit_comps import EngUnitProps
-from pycycle.cea.species_data import Thermo
+from pycycle.cea.species_data import get_thermo
 
 
 class Properties(om.Group):
 
     def initialize(self):
         self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
 
     def setup(self):
         thermo = self.options['thermo']
+        nn = self.options['num_nodes']
 
         num_element = thermo.num_element
 
-        self.add_subsystem('TP2ls', PropsRHS(thermo), promotes_inputs=('T', 'n', 'n_moles', 'b0'))
+        self.add_subsystem('TP2ls', PropsRHS(thermo, num_nodes=nn), promotes_inputs=('T', 'n', 'n_moles', 'b0'))
 
         ne1 = num_element+1
-        self.add_subsystem('ls2t', om.LinearSystemComp(size=ne1))
-        self.add_subsystem('ls2p', om.LinearSystemComp(size=ne1))
+        self.add_subsystem('ls2t', om.LinearSystemComp(size=ne1, vec_size=nn, vectorize_A=nn > 1))
+        self.add_subsystem('ls2p', om.LinearSystemComp(size=ne1, vec_size=nn, vectorize_A=nn > 1))
 
-        self.add_subsystem('tp2props', PropsCalcs(thermo=thermo),
+        self.add_subsystem('tp2props', PropsCalcs(thermo=thermo, num_nodes=nn),
                            promotes_inputs=['n', 'n_moles', 'T', 'P'],
                            promotes_outputs=['h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'R']
                            )
@@ -55,7 +62,26 @@ class SetTotal(om.Group):
                               default=False,
                               values=(False, 'Ps', 'MN', 'area'),
                               desc='flag that alters configuration if being used for a static calculation')
-
+        self.options.declare('num_nodes', default=1, types=int,
+                              desc='number of independent flow conditions evaluated at once')
+        self.options.declare('formulation', default='full', values=('full', 'reduced'),
+                              desc='formulation of the chemical equilibrium solve, see ChemEq')
+        self.options.declare('warm_start_size', default=0, types=int,
+                              desc='size of the warm start cache of the chemical equilibrium solve, see ChemEq')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='CEA solves the chemical equilibrium, TABULAR interpolates '
+                                   'pre-computed equilibrium properties of the init_reacts mixture, '
+                                   'FROZEN keeps the composition at init_prod_amounts (for cold flows)')
+        self.options.declare('thermo_table', default=None, recordable=False, allow_none=True,
+                              desc='ThermoTable used by the TABULAR method, generated from '
+                                   'thermo_data and init_reacts when not given')
+        self.options.declare('props_method', default='FUSED', values=('FUSED', 'GROUP'),
+                              desc='FUSED computes the CEA properties in a single PropsFused component, '
+                                   'GROUP uses the Properties group of PropsRHS, two LinearSystemComps and PropsCalcs')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='DIRECT outputs the flow station variables in english units from the property '
+                                   'component, COMP converts them in a separate EngUnitProps component '
+                                   '(always used with props_method GROUP)')
 
     def setup(self):
         #, thermo_data, mode='T', fl_name='flow', init_reacts=AIR_MIX):
@@ -65,8 +91,9 @@ class SetTotal(om.Group):
         fl_name = self.options['fl_name']
         mode = self.options['mode']
         for_statics = self.options['for_statics']
+        nn = self.options['num_nodes']
 
-        thermo = Thermo(thermo_data, init_reacts)
+        thermo = get_thermo(thermo_data, init_reacts)
 
         # chem_eq calculations
         in_vars = ('init_prod_amounts', 'P')
@@ -80,47 +107,79 @@ class SetTotal(om.Group):
             in_vars += ('S', )
             out_vars += ('T', )
 
-        self.ceq = self.add_subsystem('chem_eq', ChemEq(thermo=thermo, mode=mode),
-                           promotes_inputs=in_vars,
-                           promotes_outputs=out_vars,
-                           )
-
-        out_vars = ('gamma', 'Cp', 'Cv', 'rho', 'R')
+        props_vars = ('gamma', 'Cp', 'Cv', 'rho', 'R')
         if mode == 'h':
-            out_vars += ('S',)
+            props_vars += ('S',)
         elif mode == 'S':
-            out_vars += ('h',)
+            props_vars += ('h',)
         else:
-            out_vars += ('S', 'h')
-
-        self.add_subsystem('props', Properties(thermo=thermo),
-                           promotes_inputs=('T', 'P', 'n', 'n_moles', 'b0'),
-                           promotes_outputs=out_vars)
+            props_vars += ('S', 'h')
+
+        # the flow station variables are published by the property component itself, unless they
+        # come from a group or the flow is used for statics
+        direct_units = not for_statics and self.options['units_method'] == 'DIRECT' and \
+            (self.options['thermo_method'] != 'CEA' or self.options['props_method'] == 'FUSED')
+        if direct_units:
+            fl_vars = ('{}:*'.format(fl_name),)
+            props_fl_name = fl_name
+        else:
+            fl_vars = ()
+            props_fl_name = None
+
+        if self.options['thermo_method'] == 'TABULAR':
+            table = self.options['thermo_table']
+            if table is None:
+                table = get_thermo_table(thermo_data, init_reacts)
+
+            self.add_subsystem('tab_thermo', TabularThermo(table=table, thermo=thermo, mode=mode, num_nodes=nn,
+                                                           fl_name=props_fl_name),
+                               promotes_inputs=in_vars,
+                               promotes_outputs=out_vars + props_vars + fl_vars)
+        elif self.options['thermo_method'] == 'FROZEN':
+            self.add_subsystem('frozen_thermo', FrozenThermo(thermo=thermo, mode=mode, num_nodes=nn,
+                                                             fl_name=props_fl_name),
+                               promotes_inputs=in_vars,
+                               promotes_outputs=out_vars + props_vars + fl_vars)
+        else:
+            self.ceq = self.add_subsystem('chem_eq', ChemEq(thermo=thermo, mode=mode, num_nodes=nn,
+                                                              formulation=self.options['formulation'],
+                                                              warm_start_size=self.options['warm_start_size']),
+                               promotes_inputs=in_vars,
+                               promotes_outputs=out_vars,
+                               )
+
+            if self.options['props_method'] == 'FUSED':
+                props = PropsFused(thermo=thermo, num_nodes=nn, fl_name=props_fl_name)
+            else:
+                props = Properties(thermo=thermo, num_nodes=nn)
+            self.add_subsystem('props', props,
+                               promotes_inputs=('T', 'P', 'n', 'n_moles', 'b0'),
+                               promotes_outputs=props_vars + fl_vars)
 
         if for_statics:  # created after props to keep the execution order
             if for_statics == 'MN':
-                self.add_subsystem('ps_resid', PsResid(mode=for_statics),
+                self.add_subsystem('ps_resid', PsResid(mode=for_statics, num_nodes=nn),
                                    promotes_inputs=['ht', 'n_moles', 'gamma', 'W',
                                                     'rho', 'MN', 'guess:*', ('Ts', 'T'), ('hs', 'h')],
                                    promotes_outputs=['V', 'Vsonic', 'area', 'Ps'])
 
                 self.connect('Ps', 'P')  # create the cyclic data connection for the static solve
             elif for_statics == 'area':
-                self.add_subsystem('ps_resid', PsResid(mode=for_statics),
+                self.add_subsystem('ps_resid', PsResid(mode=for_statics, num_nodes=nn),
                                    promotes_inputs=['ht', 'n_moles', 'gamma', 'W',
                                                     'rho', 'area', 'guess:*', ('Ts', 'T'), ('hs', 'h')],
                                    promotes_outputs=['V', 'Vsonic', 'MN', 'Ps'])
 
                 self.connect('Ps', 'P') # create the cyclic data connection for the static solve
             else:
-                self.add_subsystem('ps_calc', PsCalc(thermo=thermo),
+                self.add_subsystem('ps_calc', PsCalc(thermo=thermo, num_nodes=nn),
                                    promotes_inputs=['P', 'gamma', 'n_moles', 'ht', 'W', 'rho',
                                                     ('Ts', 'T'), ('hs', 'h')],
                                    promotes_outputs=['MN', 'V', 'Vsonic', 'area']
                                    )
 
-        else:
-            self.add_subsystem('flow', EngUnitProps(thermo=thermo, fl_name=fl_name),
+        elif not direct_units:
+            self.add_subsystem('flow', EngUnitProps(thermo=thermo, fl_name=fl_name, num_nodes=nn),
                                promotes_inputs=('T', 'P', 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'n', 'n_moles', 'R'),
                                promotes_outputs=('{}:*'.format(fl_name),))
 
@@ -133,8 +192,13 @@ class SetTotal(om.Group):
         for_statics = self.options['for_statics']
         if for_statics and for_statics != 'Ps':
 
-            self.ceq.nonlinear_solver.options['atol'] = 1e-10
-            self.ceq.nonlinear_solver.options['rtol'] = 1e-6
+            if self.options['thermo_method'] == 'CEA':
+                if self.ceq.options['nested_solver']:
+                    self.ceq.nonlinear_solver.options['atol'] = 1e-10
+                    self.ceq.nonlinear_solver.options['rtol'] = 1e-6
+                else:
+                    self.ceq.options['atol'] = 1e-10
+                    self.ceq.options['rtol'] = 1e-6
 
             # statics need an newton solver to converge the outer loop with Ps
             newton = self.nonlinear_solver = om.NewtonSolver()
@@ -160,8 +224,8 @@ if __name__ == "__main__":
 
     from pycycle.cea import species_data
 
-    thermo = species_data.Thermo(species_data.co2_co_o2)
-    # thermo = species_data.Thermo(species_data.janaf)
+    thermo = species_data.get_thermo(species_data.co2_co_o2)
+    # thermo = species_data.get_thermo(species_data.janaf)
 
     prob = om.Problem()
     prob.model = om.Group()
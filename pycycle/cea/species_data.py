@@ -8,78 +8,132 @@ from pycycle.cea.thermo_data import janaf
 
 #from ad.admath import log
 from numpy import log
+
+
+def pack_coeffs(prod_data, products):
+    """pack the temperature ranges and fit coefficients of the products into padded arrays:
+    range bounds (num_prod x max_ranges+1, padded with inf), number of ranges per product and
+    coefficients (num_prod x max_ranges x 10, padded with zeros)"""
+
+    num_ranges = np.array([len(prod_data[p]['ranges']) - 1 for p in products])
+    bounds = np.full((len(products), np.max(num_ranges) + 1), np.inf)
+    coeffs = np.zeros((len(products), np.max(num_ranges), 10))
+    for i, p in enumerate(products):
+        tr = prod_data[p]['ranges']
+        bounds[i, :len(tr)] = tr
+        for j, data in enumerate(prod_data[p]['coeffs']):
+            coeffs[i, j, :len(data)] = data  # some rows are 9 long and others 10
+
+    return bounds, num_ranges, coeffs
+
+
+def coeff_index(bounds, num_ranges, Tt):
+    """index of the fit range used by each product at temperature(s) Tt, same as a
+    np.searchsorted per product, but clamped to the first and last range.
+    Returns an array of shape Tt.shape + (num_prod,)"""
+
+    Tt = np.real(np.asarray(Tt))[..., np.newaxis, np.newaxis]
+    j = np.sum(bounds < Tt, axis=-1)
+    return np.clip(j, 1, num_ranges) - 1
+
+
+def interval_coeffs(bounds, num_ranges, coeffs):
+    """the range bounds of all products split the temperature axis into intervals with the same
+    fit range for every product. Returns the sorted breakpoints, the coefficients of all products
+    in each interval (num_interval x num_prod x 10) and the valid range of each interval,
+    so finding the coefficients at a temperature is one searchsorted on the breakpoints"""
+
+    breaks = np.unique(bounds[np.isfinite(bounds)])
+    # a temperature T is in interval k = np.searchsorted(breaks, T), i.e. breaks[k-1] < T <= breaks[k]
+    T_rep = np.append(breaks, breaks[-1] + 1.)
+    idx = coeff_index(bounds, num_ranges, T_rep)
+
+    prod_idx = np.arange(bounds.shape[0])
+    valid_range = np.array([np.max(bounds[prod_idx, idx], axis=-1),
+                            np.min(bounds[prod_idx, idx+1], axis=-1)]).T
+
+    return breaks, coeffs[prod_idx, idx], valid_range
+
+
 class Thermo(object):
     """Compute H, S, Cp given a species and temperature"""
     def __init__(self, thermo_data_module, init_reacts=None):
 
-        self.a = None
-        self.a_T = None
         self.element_wt = None
         self.aij = None
         self.products = None
         self.elements = None
         self.temp_ranges = None
-        self.valid_temp_range = None
         self.wt_mole = None # array of mole weights
         self.init_prod_amounts = None # concentrations (sum to 1)
         self.thermo_data_module = thermo_data_module
         self.init_reacts = init_reacts
         self.set_data(thermo_data_module, init_reacts)
-        self._lastT = None
 
     def H0(self, Tt): # standard-state molar enthalpy for species j at temp T
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return (-a_T[0]/Tt**2 + a_T[1]/Tt*log(Tt) + a_T[2] + a_T[3]*Tt/2. + a_T[4]*Tt**2/3. + a_T[5]*Tt**3/4. + a_T[6]*Tt**4/5.+a_T[7]/Tt)
 
     def S0(self, Tt): # standard-state molar entropy for species j at temp T
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return (-a_T[0]/(2*Tt**2) - a_T[1]/Tt + a_T[2]*log(Tt) + a_T[3]*Tt + a_T[4]*Tt**2/2. + a_T[5]*Tt**3/3. + a_T[6]*Tt**4/4.+a_T[8])
 
     def Cp0(self, Tt): #molar heat capacity at constant pressure for
                     #standard state for species or reactant j, J/(kg-mole)_j(K)
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return a_T[0]/Tt**2 + a_T[1]/Tt + a_T[2] + a_T[3]*Tt + a_T[4]*Tt**2 + a_T[5]*Tt**3 + a_T[6]*Tt**4
 
     def H0_applyJ(self, Tt, vec):
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return vec*(2*a_T[0]/Tt**3 + a_T[1]*(1-log(Tt))/Tt**2 + a_T[3]/2. + 2*a_T[4]/3.*Tt + 3*a_T[5]/4.*Tt**2 + 4*a_T[6]/5.*Tt**3 - a_T[7]/Tt**2)
 
     def S0_applyJ(self, Tt, vec):
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return vec*(a_T[0]/(Tt**3) + a_T[1]/Tt**2 + a_T[2]/Tt + a_T[3] + a_T[4]*Tt + a_T[5]*Tt**2 + 4*a_T[6]/4.*Tt**3)
 
     def Cp0_applyJ(self, Tt, vec):
         Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        a_T = self.a_T
+        a_T = self.coeff_table(Tt).T
         return vec*(-2*a_T[0]/Tt**3 - a_T[1]/Tt**2 + a_T[3] + 2.*a_T[4]*Tt + 3.*a_T[5]*Tt**2 + 4.*a_T[6]*Tt**3)
 
+    # batch variants, for an array of temperatures Tt they return (num_T x num_prod) arrays
+
+    def _coeffs_T(self, Tt):
+        Tt = np.asarray(Tt)
+        return np.moveaxis(self.coeff_table(Tt), -1, 0), Tt[..., np.newaxis]
+
+    def H0_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return (-a_T[0]/Tt**2 + a_T[1]/Tt*log(Tt) + a_T[2] + a_T[3]*Tt/2. + a_T[4]*Tt**2/3. + a_T[5]*Tt**3/4. + a_T[6]*Tt**4/5.+a_T[7]/Tt)
+
+    def S0_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return (-a_T[0]/(2*Tt**2) - a_T[1]/Tt + a_T[2]*log(Tt) + a_T[3]*Tt + a_T[4]*Tt**2/2. + a_T[5]*Tt**3/3. + a_T[6]*Tt**4/4.+a_T[8])
+
+    def Cp0_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return a_T[0]/Tt**2 + a_T[1]/Tt + a_T[2] + a_T[3]*Tt + a_T[4]*Tt**2 + a_T[5]*Tt**3 + a_T[6]*Tt**4
+
+    def dH0_dT_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return (2*a_T[0]/Tt**3 + a_T[1]*(1-log(Tt))/Tt**2 + a_T[3]/2. + 2*a_T[4]/3.*Tt + 3*a_T[5]/4.*Tt**2 + 4*a_T[6]/5.*Tt**3 - a_T[7]/Tt**2)
+
+    def dS0_dT_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return (a_T[0]/(Tt**3) + a_T[1]/Tt**2 + a_T[2]/Tt + a_T[3] + a_T[4]*Tt + a_T[5]*Tt**2 + 4*a_T[6]/4.*Tt**3)
+
+    def dCp0_dT_array(self, Tt):
+        a_T, Tt = self._coeffs_T(Tt)
+        return (-2*a_T[0]/Tt**3 - a_T[1]/Tt**2 + a_T[3] + 2.*a_T[4]*Tt + 3.*a_T[5]*Tt**2 + 4.*a_T[6]*Tt**3)
+
     def set_data(self, thermo_data_module, init_reacts=None):
         """computes the relevant quantities, given the recatant data"""
 
-        self._lastT = None
         self.thermo_data = thermo_data_module
         self.prod_data = thermo_data_module.products
 
@@ -88,36 +142,29 @@ class Thermo(object):
         if init_reacts is None:
             init_reacts = thermo_data_module.init_prod_amounts
 
-        #expand the init_reacts out to include all products, not just those provided
-        full_init_react = OrderedDict()
-        for p in self.prod_data:
-            # initial amounts need to be given in mass ratios
-            if p in init_reacts:
-                full_init_react[p] = init_reacts[p] * self.prod_data[p]['wt']
-            else:
-                full_init_react[p] = 0.
-
-        init_reacts = full_init_react
-
         for name in init_reacts: # figure out which elements are present
-            if init_reacts[name] > 0:
+            if name in self.prod_data and init_reacts[name] > 0:
                 elements.update(self.prod_data[name]['elements'])
 
-        init_prod_amounts = [init_reacts[name] for name in init_reacts
-                             if elements.issuperset(self.prod_data[name]['elements'])]
+        if hasattr(self.prod_data, 'with_elements'):
+            # binary databases (see thermo_db) select products without building every species
+            self.products = self.prod_data.with_elements(elements)
+        else:
+            self.products = [name for name, prod_data in self.prod_data.items()
+                             if elements.issuperset(prod_data['elements'])]
+
+        # initial amounts need to be given in mass ratios
+        init_prod_amounts = [init_reacts.get(name, 0.) * self.prod_data[name]['wt'] for name in self.products]
 
         self.elements = sorted(elements)
         self.init_prod_amounts = np.array(init_prod_amounts)
         self.init_prod_amounts = self.init_prod_amounts/np.sum(self.init_prod_amounts) # normalize to 1
 
-        self.products = [name for name, prod_data in self.prod_data.items()
-                         if elements.issuperset(prod_data['elements'])]
-
         self.num_element = len(self.elements)
         self.num_prod = len(self.products)
 
-        self.a = np.zeros((self.num_prod, 10))
-        self.a_T = self.a.T
+        self._breaks, self._interval_coeffs, self._valid_ranges = interval_coeffs(
+            *pack_coeffs(self.prod_data, self.products))
 
         element_wt = []
         aij = []
@@ -137,298 +184,134 @@ class Thermo(object):
         self.element_wt = np.array(element_wt)
         self.aij = np.array(aij)
 
-        # pre-computed constants used in calculations
-        aij_prod = np.empty((self.num_element,self.num_element, self.num_prod))
-        for i in range(self.num_element):
-            for j in range(self.num_element):
-                aij_prod[i][j] = self.aij[i]*self.aij[j]
-
-        self.aij_prod = aij_prod
-
-        self.aij_prod_deriv = np.zeros((self.num_element**2,self.num_prod))
-        for k in range(self.num_element**2):
-            for l in range(self.num_prod):
-                i = k//self.num_element
-                j = np.mod(k,self.num_element)
-                self.aij_prod_deriv[k][l] = self.aij_prod[i][j][l]
-
-        self.build_coeff_table(1000) # just pick arbitrary default temperature so there is something there right away
-
-    def build_coeff_table(self, Tt):
-        """Build the temperature specific coeff array and find the highest-low value and
-        the lowest-high value of temperatures from all the reactants to give the
-        valid range for the data fits."""
+        # pre-computed constants used in calculations, aij_prod[i, j, k] = aij[i, k]*aij[j, k]
+        self.aij_prod = np.einsum('ik,jk->ijk', self.aij, self.aij)
+        self.aij_prod_deriv = self.aij_prod.reshape((self.num_element**2, self.num_prod)).copy()
 
-        max_low, min_high = -1e50, 1e50
-        for i,p in enumerate(self.products):
-            tr = self.prod_data[p]['ranges']
+        # instances are shared through get_thermo, so nothing may change them after this
+        for arr in (self.init_prod_amounts, self.wt_mole, self.element_wt, self.aij, self.aij_prod,
+                    self.aij_prod_deriv, self._breaks, self._interval_coeffs, self._valid_ranges):
+            arr.flags.writeable = False
 
-            j = int(np.searchsorted(tr, Tt))
-            if j == 0: # dont run off the start
-                j = 1
-            elif j == len(tr): # don't run off the end
-                j -= 1
+    def valid_temp_range(self, Tt):
+        """the highest-low value and the lowest-high value of the fit ranges used by all the
+        products at the temperature(s) Tt"""
 
-            # find valid range
-            low, high = tr[j-1], tr[j]
-            max_low = max(low, max_low)
-            min_high = min(high, min_high)
+        ranges = self._valid_ranges[np.searchsorted(self._breaks, np.real(Tt))].reshape((-1, 2))
+        return float(np.max(ranges[:, 0])), float(np.min(ranges[:, 1]))
 
-            # built a data
-            data = self.prod_data[p]['coeffs'][j-1]
+    def coeff_table(self, Tt):
+        """coefficients of every product at each of the temperatures in Tt,
+        an array of shape Tt.shape + (num_prod, 10)"""
 
-            # have to slice because some rows are 9 long and others 10
-            self.a[i][:len(data)] = data
+        return self._interval_coeffs[np.searchsorted(self._breaks, np.real(Tt))]
 
-        self.valid_temp_range = (max_low, min_high)
 
-
-class ThermoSpline(object):
+class ThermoSpline(Thermo):
     """Drop-in replacement for Thermo using a spline fit to ensure smooth transitions of derivatives for all temperatures"""
-    def __init__(self, thermo_data_module, init_reacts=None):
-
-        self.a = None
-        self.a_T = None
-        self.element_wt = None
-        self.aij = None
-        self.products = None
-        self.elements = None
-        self.temp_ranges = None
-        self.valid_temp_range = None
-        self.wt_mole = None # array of mole weights
-        self.init_prod_amounts = None # concentrations (sum to 1)
-        self.S_spline = None # B-spline fit
-        self.dS_spline = None # B-spline fit
-        self.H_spline = None # B-spline fit
-        self.dH_spline = None # B-spline fit
-        self.Cp_spline = None # B-spline fit
-        self.dCp_spline = None # B-spline fit
-        self.Tt_fit = np.array([200.,300.,400.,700.,1100.,1500.,2000.,2500.,4000.,5000.,7000.,8500.,10000.,12500.,15000.,17500.,19000.,20000.])
-        self.Tt_test = np.arange(200.,20000.,50.)
-        self._lastT = None
-
-        self.set_data(thermo_data_module, init_reacts)
+    def __init__(self, thermo_data_module, init_reacts=None, Tt_fit=None):
+
+        self.S_spline = None # cubic spline fits of all products, fit once in set_data
+        self.dS_spline = None
+        self.H_spline = None
+        self.dH_spline = None
+        self.Cp_spline = None
+        self.dCp_spline = None
+        if Tt_fit is None:
+            # fine enough that the fit matches the polynomials away from the range bounds
+            Tt_fit = np.concatenate((np.arange(200., 1000., 10.), np.arange(1000., 6000., 25.),
+                                     np.arange(6000., 20000.1, 250.)))
+        self.Tt_fit = Tt_fit
+
+        super(ThermoSpline, self).__init__(thermo_data_module, init_reacts)
 
+    def set_data(self, thermo_data_module, init_reacts=None):
+        """computes the relevant quantities, given the recatant data, and fits the splines"""
+
+        super(ThermoSpline, self).set_data(thermo_data_module, init_reacts)
+
+        Tt = self.Tt_fit
+        # H0 is H/RT, fit H/R instead since it is much closer to a polynomial at low temperatures
+        self.H_spline = interpolate.CubicSpline(Tt, Thermo.H0_array(self, Tt)*Tt[:, np.newaxis])
+        self.S_spline = interpolate.CubicSpline(Tt, Thermo.S0_array(self, Tt))
+        self.Cp_spline = interpolate.CubicSpline(Tt, Thermo.Cp0_array(self, Tt))
+        self.dH_spline = self.H_spline.derivative()
+        self.dS_spline = self.S_spline.derivative()
+        self.dCp_spline = self.Cp_spline.derivative()
+
+        # second derivatives, only needed to complex step through the first derivatives
+        self._d2_splines = {id(self.dH_spline): self.H_spline.derivative(2),
+                            id(self.dS_spline): self.S_spline.derivative(2),
+                            id(self.dCp_spline): self.Cp_spline.derivative(2)}
+
+    def _evaluate(self, spline, Tt):
+        """all products at Tt, the spline polynomials are real so complex Tt is taken to first order"""
+        if np.iscomplexobj(Tt):
+            if id(spline) in self._d2_splines:
+                dspline = self._d2_splines[id(spline)]
+            else:
+                dspline = spline.derivative()
+            Tt = np.asarray(Tt)
+            return spline(Tt.real) + 1j*Tt.imag[..., np.newaxis]*dspline(Tt.real)
+        return spline(Tt)
 
     def H0(self, Tt):
-        Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        H_fit, dH_fit = self.calc_H(self.Tt_fit,self.a)
-        H_params = interpolate.splrep(self.Tt_fit,H_fit)
-        H_predict = interpolate.splev(Tt,H_params)
-        return float(H_predict)
+        return self._evaluate(self.H_spline, Tt[0])/Tt[0]
 
     def S0(self, Tt): # standard-state molar entropy for species j at temp T
-        Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        S_fit, dS_fit = self.calc_S(self.Tt_fit,self.a)
-        S_params = interpolate.splrep(self.Tt_fit,S_fit)
-        S_predict = interpolate.splev(Tt,S_params)
-        return S_predict
+        return self._evaluate(self.S_spline, Tt[0])
 
     def Cp0(self, Tt): #molar heat capacity at constant pressure for
                     #standard state for species or reactant j, J/(kg-mole)_j(K)
-        Tt = Tt[0]
-        if Tt != self._lastT:
-            self.build_coeff_table(Tt)
-            self._lastT = Tt
-        Cp_fit, dCp_fit = self.calc_Cp(self.Tt_fit,self.a)
-        Cp_params = interpolate.splrep(self.Tt_fit,Cp_fit)
-        Cp_predict = interpolate.splev(Tt,Cp_params)
-        return Cp_predict
+        return self._evaluate(self.Cp_spline, Tt[0])
 
     def H0_applyJ(self, Tt, vec):
-        H_fit, dH_fit = self.calc_H(self.Tt_fit,self.a)
-        dH_params = interpolate.splrep(self.Tt_fit,dH_fit)
-        dH_predict = interpolate.splev(Tt,dH_params)
-        return dH_predict
+        return vec*(self._evaluate(self.dH_spline, Tt[0]) - self.H0(Tt))/Tt[0]
 
     def S0_applyJ(self, Tt, vec):
-        S_fit, dS_fit = self.calc_S(self.Tt_fit,self.a)
-        dS_params = interpolate.splrep(self.Tt_fit,dS_fit)
-        dS_predict = interpolate.splev(Tt,dS_params)
-        return dS_predict
+        return vec*self._evaluate(self.dS_spline, Tt[0])
 
     def Cp0_applyJ(self, Tt, vec):
-        Cp_fit, dCp_fit = self.calc_Cp(self.Tt_fit,self.a)
-        dCp_params = interpolate.splrep(self.Tt_fit,dCp_fit)
-        dCp_predict = interpolate.splev(Tt,dCp_params)
-        return dCp_predict
-
-    def calc_S(self,Tt, inputs):
-
-        Tt_low = Tt[Tt<=1000]
-        Tt_mid = Tt[Tt[Tt<=6000]>1000]
-        Tt_high = Tt[Tt>6000]
+        return vec*self._evaluate(self.dCp_spline, Tt[0])
 
-        a = inputs[0]
-        S_low = (-a[0]/(2*Tt_low**2) - a[1]/Tt_low + a[2]*log(Tt_low) + a[3]*Tt_low + a[4]*Tt_low**2/2. + a[5]*Tt_low**3/3. + a[6]*(Tt_low**4)/5. +a[8])
-        dS_low = a[0]/(Tt_low**3)+a[1]/(Tt_low**2)+a[2]/Tt_low+a[3]+a[4]*Tt_low+a[5]*Tt_low**2+0.8*a[6]*Tt_low**3
+    def H0_array(self, Tt):
+        return self._evaluate(self.H_spline, Tt)/np.asarray(Tt)[..., np.newaxis]
 
-        a = inputs[1]
-        S_mid = (-a[0]/(2*Tt_mid**2) - a[1]/Tt_mid + a[2]*log(Tt_mid) + a[3]*Tt_mid + a[4]*Tt_mid**2/2. + a[5]*Tt_mid**3/3. + a[6]*(Tt_mid**4)/5. +a[8])
-        dS_mid = a[0]/(Tt_mid**3)+a[1]/(Tt_mid**2)+a[2]/Tt_mid+a[3]+a[4]*Tt_mid+a[5]*Tt_mid**2+0.8*a[6]*Tt_mid**3
+    def S0_array(self, Tt):
+        return self._evaluate(self.S_spline, Tt)
 
-        a = inputs[2]
-        S_high = (-a[0]/(2*Tt_high**2) - a[1]/Tt_high + a[2]*log(Tt_high) + a[3]*Tt_high + a[4]*Tt_high**2/2. + a[5]*Tt_high**3/3. + a[6]*(Tt_high**4)/5. +a[8])
-        dS_high = a[0]/(Tt_high**3)+a[1]/(Tt_high**2)+a[2]/Tt_high+a[3]+a[4]*Tt_high+a[5]*Tt_high**2+0.8*a[6]*Tt_high**3
+    def Cp0_array(self, Tt):
+        return self._evaluate(self.Cp_spline, Tt)
 
-        S = np.concatenate((S_low,S_mid,S_high),0)
-        dS = np.concatenate((dS_low,dS_mid,dS_high),0)
-        return S, dS
-
-    def calc_H(self,Tt, inputs):
-
-        Tt_low = Tt[Tt<=1000]
-        Tt_mid = Tt[Tt[Tt<=6000]>1000]
-        Tt_high = Tt[Tt>6000]
-
-        a = inputs[0]
-        H_low = (-a[0]/Tt_low**2 + a[1]/Tt_low*log(Tt_low) + a[2] + a[3]*Tt_low/2. + a[4]*Tt_low**2/3. + a[5]*Tt_low**3/4. + a[6]*Tt_low**4/5.+a[7]/Tt_low)
-        dH_low = (2*a[0]/Tt_low**3 + a[1]*(1-log(Tt_low))/Tt_low**2 + a[3]/2. + 2*a[4]/3.*Tt_low + 3*a[5]/4.*Tt_low**2 + 4*a[6]/5.*Tt_low**3 - a[7]/Tt_low**2)
-
-        a = inputs[1]
-        H_mid = (-a[0]/Tt_mid**2 + a[1]/Tt_mid*log(Tt_mid) + a[2] + a[3]*Tt_mid/2. + a[4]*Tt_mid**2/3. + a[5]*Tt_mid**3/4. + a[6]*Tt_mid**4/5.+a[7]/Tt_mid)
-        dH_mid = (2*a[0]/Tt_mid**3 + a[1]*(1-log(Tt_mid))/Tt_mid**2 + a[3]/2. + 2*a[4]/3.*Tt_mid + 3*a[5]/4.*Tt_mid**2 + 4*a[6]/5.*Tt_mid**3 - a[7]/Tt_mid**2)
-
-        a = inputs[2]
-        H_high = (-a[0]/Tt_high**2 + a[1]/Tt_high*log(Tt_high) + a[2] + a[3]*Tt_high/2. + a[4]*Tt_high**2/3. + a[5]*Tt_high**3/4. + a[6]*Tt_high**4/5.+a[7]/Tt_high)
-        dH_high = (2*a[0]/Tt_high**3 + a[1]*(1-log(Tt_high))/Tt_high**2 + a[3]/2. + 2*a[4]/3.*Tt_high + 3*a[5]/4.*Tt_high**2 + 4*a[6]/5.*Tt_high**3 - a[7]/Tt_high**2)
-
-        H = np.concatenate((H_low,H_mid,H_high),0)
-        dH = np.concatenate((dH_low,dH_mid,dH_high),0)
-        return H, dH
-
-    def calc_Cp(self,Tt, inputs):
-
-        Tt_low = Tt[Tt<=1000]
-        Tt_mid = Tt[Tt[Tt<=6000]>1000]
-        Tt_high = Tt[Tt>6000]
-
-        a = inputs[0]
-        Cp_low = a[0]/Tt_low**2 + a[1]/Tt_low + a[2] + a[3]*Tt_low + a[4]*Tt_low**2 + a[5]*Tt_low**3 + a[6]*Tt_low**4
-        dCp_low = (-2*a[0]/Tt_low**3 - a[1]/Tt_low**2 + a[3] + 2.*a[4]*Tt_low + 3.*a[5]*Tt_low**2 + 4.*a[6]*Tt_low**3)
-
-        a = inputs[1]
-        Cp_mid = a[0]/Tt_mid**2 + a[1]/Tt_mid + a[2] + a[3]*Tt_mid + a[4]*Tt_mid**2 + a[5]*Tt_mid**3 + a[6]*Tt_mid**4
-        dCp_mid = (-2*a[0]/Tt_mid**3 - a[1]/Tt_mid**2 + a[3] + 2.*a[4]*Tt_mid + 3.*a[5]*Tt_mid**2 + 4.*a[6]*Tt_mid**3)
-
-        a = inputs[2]
-        Cp_high = a[0]/Tt_high**2 + a[1]/Tt_high + a[2] + a[3]*Tt_high + a[4]*Tt_high**2 + a[5]*Tt_high**3 + a[6]*Tt_high**4
-        dCp_high = (-2*a[0]/Tt_high**3 - a[1]/Tt_high**2 + a[3] + 2.*a[4]*Tt_high + 3.*a[5]*Tt_high**2 + 4.*a[6]*Tt_high**3)
-
-        Cp = np.concatenate((Cp_low,Cp_mid,Cp_high),0)
-        dCp = np.concatenate((dCp_low,dCp_mid,dCp_high),0)
-        return Cp, dCp
-
-    def set_data(self, thermo_data_module, init_reacts=None):
-        """computes the relevant quantities, given the recatant data"""
-
-        self._lastT = None
-        self.thermo_data = thermo_data_module
-        self.prod_data = thermo_data_module.products
-
-        elements = set()
-
-        if init_reacts is None:
-            init_reacts = thermo_data_module.init_prod_amounts
-
-        #expand the init_reacts out to include all products, not just those provided
-        full_init_react = OrderedDict()
-        for p in self.prod_data.keys():
-            r_amount = init_reacts.get(p,0) * self.prod_data[p]['wt'] # initial amounts need to be given in mass ratios
-            full_init_react[p] = r_amount
-
-        init_reacts = full_init_react
-
-        for name, amount in init_reacts.items(): # figure out which elements are present
-            if amount > 0:
-                elements = elements.union(elements, self.prod_data[name]['elements'].keys())
-
-        init_prod_amounts = []
-        for name, amount in init_reacts.items(): # only include products with all elements present
-            prod_elements = set(self.prod_data[name]['elements'].keys())
-            if prod_elements.issubset(elements):
-                init_prod_amounts.append(init_reacts[name])
-
-        self.elements = list(elements)
-        self.init_prod_amounts = np.array(init_prod_amounts)
-        self.init_prod_amounts = self.init_prod_amounts/np.sum(self.init_prod_amounts) # normalize to 1
-
-        reduced_products = []
-        for name, prod_data in self.prod_data.items():
-            prod_elements = set(prod_data['elements'].keys())
-
-            if prod_elements.issubset(elements):
-                reduced_products.append(name)
-        self.products = reduced_products
-
-        self.num_element = len(self.elements)
-        self.num_prod = len(self.products)
-
-        self.a = np.zeros((self.num_prod, 10))
-        self.a_T = self.a.T
-
-        element_wt = []
-        aij = []
-        for e in self.elements:
-            element_wt.append(thermo_data_module.element_wts[e])
-
-            row = [self.prod_data[r]['elements'].get(e,0) for r in self.products]
-            aij.append(row)
-
-        self.wt_mole = np.empty(self.num_prod)
-        for i,r in enumerate(self.products):
-            self.wt_mole[i] = self.prod_data[r]['wt']
-
-        self.init_prod_amounts = self.init_prod_amounts / self.wt_mole
-
-        self.element_wt = np.array(element_wt)
-        self.aij = np.array(aij)
+    def dH0_dT_array(self, Tt):
+        return (self._evaluate(self.dH_spline, Tt) - self.H0_array(Tt))/np.asarray(Tt)[..., np.newaxis]
 
-        # pre-computed constants used in calculations
-        aij_prod = np.empty((self.num_element,self.num_element, self.num_prod))
-        for i in range(self.num_element):
-            for j in range(self.num_element):
-                aij_prod[i][j] = self.aij[i]*self.aij[j]
+    def dS0_dT_array(self, Tt):
+        return self._evaluate(self.dS_spline, Tt)
 
-        self.aij_prod = aij_prod
+    def dCp0_dT_array(self, Tt):
+        return self._evaluate(self.dCp_spline, Tt)
 
-        self.aij_prod_deriv = np.zeros((self.num_element**2,self.num_prod))
-        for k in range(self.num_element**2):
-            for l in range(self.num_prod):
-                i = k//self.num_element
-                j = np.mod(k,self.num_element)
-                self.aij_prod_deriv[k][l] = self.aij_prod[i][j][l]
 
-        self.build_coeff_table(1000) # just pick arbitrary default temperature so there is something there right away
+_thermo_registry = {}
 
-    def build_coeff_table(self, Tt):
-        """Build the temperature specific coeff array and find the highest-low value and
-        the lowest-high value of temperatures from all the reactants to give the
-        valid range for the data fits."""
 
-        max_low, min_high = -1e50, 1e50
-        for i,p in enumerate(self.products):
-            tr = self.prod_data[p]['ranges']
+def get_thermo(thermo_data_module, init_reacts=None, thermo_class=Thermo):
+    """Thermo object for a thermo data set and mixture, shared by every caller in the process.
+    The shared objects are read-only, so they hold no per-evaluation state.
 
-            j = np.searchsorted(tr, Tt)
-            if j == 0: # dont run off the start
-                j = 1
-            elif j == len(tr): # don't run off the end
-                j -= 1
+    The mixture is keyed by the fractions of its nonzero amounts, so proportional init_reacts
+    (e.g. AIR_MIX scaled by 2) share one instance, whose init_reacts are those of the first caller."""
 
-            # find valid range
-            low, high = tr[j-1], tr[j]
-            max_low = max(low, max_low)
-            min_high = min(high, min_high)
+    if init_reacts is None:
+        init_reacts = thermo_data_module.init_prod_amounts
 
-            # built a data
-            data = self.prod_data[p]['coeffs'][j-1]
-            self.a[i][:len(data)] = data # have to slice because some rows are 9 long and others 10g
+    # rounded, so the same mixture scaled by any factor gets the same key
+    total = float(sum(init_reacts.values()))
+    key = (thermo_class, thermo_data_module,
+           tuple(sorted((name, float('{:.12g}'.format(amount/total)))
+                        for name, amount in init_reacts.items() if amount != 0)))
+    if key not in _thermo_registry:
+        _thermo_registry[key] = thermo_class(thermo_data_module, init_reacts)
 
-        self.valid_temp_range = (max_low, min_high)
+    return _thermo_registry[key]
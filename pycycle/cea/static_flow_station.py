@@ -0,0 +1,504 @@
+import numpy as np
+
+import openmdao.api as om
+
+from pycycle.constants import P_REF, R_UNIVERSAL_ENG, R_UNIVERSAL_SI, MIN_VALID_CONCENTRATION
+from pycycle.cea.chem_eq import solve_reduced_equilibrium, check_converged
+from pycycle.cea.props_fused import equilibrium_props, equilibrium_props_partials
+from pycycle.cea.utils import node_shape, block_diag_pattern
+from pycycle.cea.unit_comps import FLOW_UNITS, STATIC_FLOW_UNITS, unit_scale
+
+H_SI = 4184.  # J/kg per cal/g
+RHO_SI = 1000.  # kg/m**3 per g/cm**3
+
+# convergence of the internal newton iteration on ln(Ps)
+STATIC_TOL = 1e-12
+MAX_DLN_PS = .5
+
+
+def isentropic_sensitivities(thermo, T, P, n, b0):
+    """ Derivatives of an equilibrium state at fixed entropy w.r.t. z = (P, S, b0).
+
+    The composition derivatives at fixed T and P follow from differentiating the
+    equilibrium conditions mu_j = sum_i(a_ij*pi_i) and the element balances, with
+    the species at the concentration floor held fixed the same way the equilibrium
+    solve holds them. The entropy constraint then gives T(P, S, b0).
+
+    Returns the derivatives of T, n, n_moles and the equilibrium_props outputs, each of
+    shape (num_nodes, ..., 2+num_element). """
+
+    nn, num_prod = n.shape
+    num_element = thermo.num_element
+    aij = thermo.aij
+    e = np.arange(num_element)
+
+    n_moles = np.sum(n, axis=1)
+    active = n.real > MIN_VALID_CONCENTRATION + 1e-20
+    n_act = np.where(active, n, 0.)
+    b_act = n_act.dot(aij.T)
+
+    dS0_dT = thermo.dS0_dT_array(T)
+    D = thermo.dH0_dT_array(T) - dS0_dT
+
+    M = np.zeros((nn, num_element+1, num_element+1), dtype=np.result_type(n, D))
+    M[:, :num_element, :num_element] = np.einsum('kj,ij,nj->nki', aij, aij, n_act)
+    M[:, :num_element, num_element] = b_act
+    M[:, num_element, :num_element] = b_act
+    M[:, num_element, num_element] = np.sum(n_act, axis=1) - n_moles
+
+    # columns: T, P, b0
+    rhs = np.zeros((nn, num_element+1, 2+num_element), dtype=np.result_type(M, P))
+    n_D = n_act*D
+    rhs[:, :num_element, 0] = n_D.dot(aij.T)
+    rhs[:, num_element, 0] = np.sum(n_D, axis=1)
+    rhs[:, :num_element, 1] = b_act/P[:, np.newaxis]
+    rhs[:, num_element, 1] = np.sum(n_act, axis=1)/P
+    rhs[:, e, 2+e] = 1.
+
+    x = np.linalg.solve(M, rhs)
+    dln_n = np.einsum('ij,nik->njk', aij, x[:, :num_element]) + x[:, num_element:, :]
+    dln_n[:, :, 0] -= D
+    dln_n[:, :, 1] -= 1/P[:, np.newaxis]
+    dn = np.where(active[:, :, np.newaxis], n[:, :, np.newaxis]*dln_n, 0.)
+    dn_moles = n_moles[:, np.newaxis]*x[:, num_element]
+
+    # entropy along the TP equilibrium, dS/dn_moles = R*sum(n)/n_moles = R
+    dS_dn = R_UNIVERSAL_ENG*(thermo.S0_array(T) - np.log(n) + np.log(n_moles/(P/P_REF))[:, np.newaxis] - 1)
+    dS = np.einsum('nj,njk->nk', dS_dn, dn) + R_UNIVERSAL_ENG*dn_moles
+    dS[:, 0] += R_UNIVERSAL_ENG*np.sum(n*dS0_dT, axis=1)
+    dS[:, 1] -= R_UNIVERSAL_ENG*np.sum(n, axis=1)/P
+
+    dT_dz = np.empty_like(dS)
+    dT_dz[:, 0] = -dS[:, 1]/dS[:, 0]
+    dT_dz[:, 1] = 1/dS[:, 0]
+    dT_dz[:, 2:] = -dS[:, 2:]/dS[:, 0, np.newaxis]
+
+    def to_z(d_TPb):
+        """moves the derivatives at fixed T and P onto the isentrope"""
+        d_z = d_TPb[..., :1]*dT_dz.reshape((nn,) + (1,)*(d_TPb.ndim-2) + (-1,))
+        d_z[..., 0] += d_TPb[..., 1]
+        d_z[..., 2:] += d_TPb[..., 2:]
+        return d_z
+
+    derivs = {'T': dT_dz, 'n': to_z(dn), 'n_moles': to_z(dn_moles)}
+
+    J = equilibrium_props_partials(thermo, T, P, n, n_moles, b0)
+    for name in ('h', 'gamma', 'Cp', 'Cv', 'rho'):
+        d_TPb = np.zeros_like(dn_moles)
+        if (name, 'n') in J:
+            d_TPb += np.einsum('nj,njk->nk', J[name, 'n'], dn)
+        if (name, 'n_moles') in J:
+            d_TPb += J[name, 'n_moles'][:, np.newaxis]*dn_moles
+        if (name, 'T') in J:
+            d_TPb[:, 0] += J[name, 'T']
+        if (name, 'P') in J:
+            d_TPb[:, 1] += J[name, 'P']
+        if (name, 'b0') in J:
+            d_TPb[:, 2:] += J[name, 'b0']
+        derivs[name] = to_z(d_TPb)
+
+    return derivs
+
+
+class StaticFlowStation(om.ImplicitComponent):
+    """ Static conditions of a flow station, found by an isentropic equilibrium expansion
+    from the total conditions to a target MN, area or Ps.
+
+    Ps is the only state (none in Ps mode). The equilibrium composition at the entropy S and
+    Ps is found with the reduced equilibrium iteration and every other output is an explicit
+    function of Ps and the inputs, so the linear solve reduces to one scalar per node. """
+
+    def initialize(self):
+        self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('mode', values=('MN', 'area', 'Ps'),
+                             desc='the input variable that defines the static conditions')
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
+        self.options.declare('maxiter', default=50, types=int,
+                             desc='maximum number of newton iterations on Ps')
+        self.options.declare('err_on_non_converge', default=False, types=bool,
+                             desc='raise an AnalysisError instead of a warning when the equilibrium '
+                                  'or Ps iteration does not converge within maxiter')
+        self.options.declare('fl_name', default=None, allow_none=True,
+                             desc='flowstation name, when given the flow station variables are also output '
+                                  'in english units, replacing EngUnitProps and EngUnitStaticProps')
+
+    def setup(self):
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+
+        n_shape = node_shape(nn, num_prod)
+        self.n_init = np.ones((nn, num_prod)) / num_prod / 10  # same initial guess as ChemEq
+
+        self.add_input('init_prod_amounts', val=np.broadcast_to(thermo.init_prod_amounts, n_shape),
+                       desc="initial mass fractions of products, before equilibrating")
+        self.add_input('S', val=1.6, shape=nn, units="cal/(g*degK)", desc="entropy")
+        self.add_input('ht', val=1., shape=nn, units="J/kg", desc="Total enthalpy reference condition")
+        self.add_input('W', val=1., shape=nn, units="kg/s", desc="mass flow rate")
+
+        if mode == 'Ps':
+            self.add_input('Ps', val=1., shape=nn, units="bar", desc="static pressure")
+        else:
+            # used for computing initial guess
+            self.add_input('guess:gamt', val=1.4, shape=nn, desc="gamma computed from set total")
+            self.add_input('guess:Pt', val=1.0, shape=nn, units="bar", desc="total pressure")
+
+            self.add_output('Ps', lower=1e-4, upper=5e4, val=.001, shape=nn, units="bar",
+                            desc="static pressure state variable")
+
+        if mode == 'MN':
+            self.add_input('MN', val=.5, shape=nn, desc="target mach number")
+        elif mode == 'area':
+            self.add_input('area', val=np.inf, shape=nn, units="m**2", desc="flow area")
+            self.add_input('guess:MN', val=0.5, shape=nn, desc="Guess for Mach number.")
+
+        self.add_output('T', val=400., shape=nn, units="degK", desc="Static temperature", lower=1.)
+        self.add_output('n', val=self.n_init.reshape(n_shape), desc="mole fractions of the mixture", lower=1e-10)
+        self.add_output('n_moles', val=0.034, shape=nn, lower=1e-10, desc="1/molecular weight of gas")
+        self.add_output('b0', shape=node_shape(nn, num_element),
+                        desc='assigned kg-atoms of element i per total kg of reactant')
+        self.add_output('h', val=1., shape=nn, units="cal/g", desc="Static enthalpy")
+        self.add_output('gamma', val=1.4, shape=nn, lower=1.0, upper=2.0, desc="ratio of specific heats")
+        self.add_output('Cp', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant pressure")
+        self.add_output('Cv', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant volume")
+        self.add_output('rho', val=0.0004, shape=nn, units="g/cm**3", desc="density")
+        self.add_output('Vsonic', val=330.0, shape=nn, units="m/s", desc="computed speed of sound", res_ref=1e3)
+        self.add_output('V', val=100.0, shape=nn, units="m/s", desc="velocity", res_ref=1e3)
+        if mode != 'MN':
+            self.add_output('MN', val=.5, shape=nn, desc="computed mach number")
+        if mode != 'area':
+            self.add_output('area', val=1., shape=nn, units="m**2", desc="flow area", lower=1e-5)
+
+        # the inputs each output depends on besides Ps, S and init_prod_amounts
+        self._direct_wrt = {'MN': {'V': ('MN',), 'area': ('W', 'MN'), 'Ps': ('ht', 'MN')},
+                            'area': {'V': ('W', 'area'), 'MN': ('W', 'area'), 'Ps': ('ht', 'W', 'area')},
+                            'Ps': {'V': ('ht',), 'MN': ('ht',), 'area': ('W', 'ht')}}[mode]
+        self._explicit = ['T', 'n', 'n_moles', 'h', 'gamma', 'Cp', 'Cv', 'rho', 'Vsonic', 'V', 'MN', 'area']
+        if mode != 'Ps':
+            self._explicit.remove(mode)
+
+        # flow station variables in english units, explicit outputs scaled from their source
+        self._eng_units = {}
+        fl_name = self.options['fl_name']
+        if fl_name is not None:
+            meta = self._var_rel2meta
+            for name, eng_units in list(FLOW_UNITS.items()) + list(STATIC_FLOW_UNITS.items()):
+                if name == 'R':  # not part of the static flow station
+                    continue
+                src = 'Ps' if name == 'P' else name
+                factor, offset = unit_scale(meta[src]['units'], eng_units)
+                out_name = '{0}:{1}'.format(fl_name, name)
+                self.add_output(out_name, val=(meta[src]['val'] + offset)*factor, shape=meta[src]['shape'],
+                                units=eng_units, desc=meta[src]['desc'])
+                self._eng_units[out_name] = (src, factor, offset)
+                self._explicit.append(out_name)
+
+                # the Ps entries are for its residual, Ps itself only depends on the Ps column of z
+                direct_wrt = () if src == 'Ps' else self._direct_wrt.get(src, ())
+                if src in ('W', 'MN', 'area') and src in self._var_rel_names['input']:
+                    direct_wrt += (src,)
+                if direct_wrt:
+                    self._direct_wrt[out_name] = direct_wrt
+
+        self._converged = False
+        # starting point of the equilibrium solves. It only changes in solve_nonlinear, so the
+        # residuals do not depend on the n and T outputs
+        self._n_guess = self.n_init.copy()
+        self._T_guess = np.full(nn, 1000.)
+
+        # every node only depends on its own inputs, so all partials are block diagonal
+        ar = np.arange(nn)
+        for name in self._explicit + ([] if mode == 'Ps' else ['Ps']):
+            size = np.prod(self._var_rel2meta[name]['shape']) // nn
+            rows, cols = block_diag_pattern(nn, size, 1)
+            self.declare_partials(name, ['Ps', 'S'], rows=rows, cols=cols)
+            rows, cols = block_diag_pattern(nn, size, num_prod)
+            self.declare_partials(name, 'init_prod_amounts', rows=rows, cols=cols)
+            if name in self._direct_wrt:
+                self.declare_partials(name, self._direct_wrt[name], rows=ar, cols=ar)
+            if name != 'Ps':
+                self.declare_partials(name, name, val=-1., rows=np.arange(nn*size), cols=np.arange(nn*size))
+
+        aij = np.array(thermo.aij, dtype=float)
+        rows, cols = block_diag_pattern(nn, num_element, num_prod)
+        self.declare_partials('b0', 'init_prod_amounts', val=np.tile(aij.ravel(), nn), rows=rows, cols=cols)
+        ar_b0 = np.arange(nn*num_element)
+        self.declare_partials('b0', 'b0', val=-1., rows=ar_b0, cols=ar_b0)
+
+    def _equilibrate(self, inputs, Ps, n, T):
+        """equilibrium composition and temperature at the entropy S and pressure Ps"""
+        thermo = self.options['thermo']
+        nn = self.options['num_nodes']
+
+        b0 = inputs['init_prod_amounts'].reshape((nn, thermo.num_prod)).dot(thermo.aij.T)
+        if np.any(n.real <= 0) or not np.all(np.isfinite(n)):
+            n, T = self.n_init, np.full(nn, 1000.)
+
+        try:
+            n, _, T, converged = solve_reduced_equilibrium(thermo, 'S', Ps, b0, n, T, inputs['S'])
+        except om.AnalysisError as err:
+            raise om.AnalysisError('{} in {}'.format(err, self.pathname))
+        check_converged(converged, self.pathname, self.options['err_on_non_converge'])
+
+        return n, T, b0
+
+    def _station(self, inputs, Ps, n, T, b0, partials=False):
+        """every explicit output, and the Ps residual, at the equilibrium state n, T at Ps.
+        With partials, also their derivatives w.r.t. z = (Ps, S, b0) and the direct
+        derivatives w.r.t. W, ht and the MN or area input"""
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+
+        n_moles = np.sum(n, axis=1)
+        props = equilibrium_props(thermo, T, Ps, n, n_moles, b0)
+
+        vals = {'T': T, 'n': n, 'n_moles': n_moles}
+        for name in ('h', 'gamma', 'Cp', 'Cv', 'rho'):
+            vals[name] = props[name]
+
+        gamma = props['gamma']
+        rho = props['rho']*RHO_SI
+        h = props['h']*H_SI
+        W = inputs['W']
+        ht = inputs['ht']
+
+        vals['Vsonic'] = Vsonic = np.sqrt(gamma*R_UNIVERSAL_SI*n_moles*T)
+
+        # no flow area is defined without flow, and no velocity without a finite area
+        if mode == 'MN':
+            MN = inputs['MN']
+            flowing = MN.real >= 1e-16
+            vals['V'] = V = MN*Vsonic
+            V_flow = np.where(flowing, V, 1.)
+            vals['area'] = np.where(flowing, W/(rho*V_flow), np.inf)
+        elif mode == 'area':
+            area = inputs['area']
+            flowing = np.isfinite(area)
+            area_flow = np.where(flowing, area, 1.)
+            vals['V'] = V = np.where(flowing, W/(rho*area_flow), 0.)
+            vals['MN'] = V/Vsonic
+        else:
+            # If ht < hs then V will be imaginary, so use an inverse relationship to allow solution process to continue
+            sign = np.where(ht.real >= h.real, 1., -1.)
+            vals['V'] = V = np.sqrt(2.*sign*(ht - h))
+            vals['MN'] = V/Vsonic
+            vals['area'] = W/(rho*V)
+
+        if mode != 'Ps':
+            # TN_D-132 Equation (85) for h*
+            vals['Ps'] = (h + V**2/2. - ht)/ht
+
+        if not partials:
+            self._eng_unit_vals(inputs, Ps, vals)
+            return vals
+
+        z = isentropic_sensitivities(thermo, T, Ps, n, b0)
+        # h and rho are output in cal/g and g/cm**3, the velocity terms need them in SI
+        z_rho = z['rho']*RHO_SI
+        z_h = z['h']*H_SI
+
+        z['Vsonic'] = Vsonic[:, np.newaxis]/2*(z['gamma']/gamma[:, np.newaxis] + z['n_moles']/n_moles[:, np.newaxis]
+                                                 + z['T']/T[:, np.newaxis])
+        direct = {}
+        if mode == 'MN':
+            z['V'] = MN[:, np.newaxis]*z['Vsonic']
+            direct['V', 'MN'] = Vsonic
+
+            area = vals['area']
+            area_flow = np.where(flowing, area, 0.)
+            z['area'] = -area_flow[:, np.newaxis]*(z_rho/rho[:, np.newaxis] + z['V']/V_flow[:, np.newaxis])
+            direct['area', 'W'] = area_flow/W
+            direct['area', 'MN'] = -area_flow*Vsonic/V_flow
+        elif mode == 'area':
+            z['V'] = -(V/rho)[:, np.newaxis]*z_rho
+            direct['V', 'W'] = np.where(flowing, 1/(rho*area_flow), 0.)
+            direct['V', 'area'] = -V/area_flow
+
+            z['MN'] = z['V']/Vsonic[:, np.newaxis] - (V/Vsonic**2)[:, np.newaxis]*z['Vsonic']
+            direct['MN', 'W'] = direct['V', 'W']/Vsonic
+            direct['MN', 'area'] = direct['V', 'area']/Vsonic
+        else:
+            z['V'] = -(sign/V)[:, np.newaxis]*z_h
+            direct['V', 'ht'] = sign/V
+
+            z['MN'] = z['V']/Vsonic[:, np.newaxis] - (V/Vsonic**2)[:, np.newaxis]*z['Vsonic']
+            direct['MN', 'ht'] = direct['V', 'ht']/Vsonic
+
+            z['area'] = -vals['area'][:, np.newaxis]*(z_rho/rho[:, np.newaxis] + z['V']/V[:, np.newaxis])
+            direct['area', 'W'] = 1/(rho*V)
+            direct['area', 'ht'] = -vals['area']/V*direct['V', 'ht']
+
+        if mode != 'Ps':
+            z['Ps'] = (z_h + V[:, np.newaxis]*z['V'])/ht[:, np.newaxis]
+            direct['Ps', 'ht'] = -(h + V**2/2.)/ht**2
+            for wrt in ('W', mode):
+                if ('V', wrt) in direct:
+                    direct['Ps', wrt] = V*direct['V', wrt]/ht
+
+        self._eng_unit_vals(inputs, Ps, vals, z, direct)
+        return vals, z, direct
+
+    def _eng_unit_vals(self, inputs, Ps, vals, z=None, direct=None):
+        """adds the flow station outputs in english units to vals, and their derivatives to z and direct"""
+        for out_name, (src, factor, offset) in self._eng_units.items():
+            if src != 'Ps' and src in vals:  # vals['Ps'] is the residual
+                val = vals[src]
+                d_z = None if z is None else z[src]
+            else:
+                # Ps, S or the W, MN or area inputs
+                val = Ps if src == 'Ps' else inputs[src]
+                if z is not None:
+                    d_z = np.zeros_like(z['T'])
+                    if src == 'Ps':
+                        d_z[:, 0] = 1.
+                    elif src == 'S':
+                        d_z[:, 1] = 1.
+                    else:
+                        direct[out_name, src] = factor*np.ones_like(val)
+
+            vals[out_name] = (val + offset)*factor
+            if z is not None:
+                z[out_name] = factor*d_z
+                for (name, wrt), d in list(direct.items()):
+                    if name == src != 'Ps':
+                        direct[out_name, wrt] = factor*d
+
+    def solve_nonlinear(self, inputs, outputs):
+        mode = self.options['mode']
+
+        n = self._n_guess
+        T = self._T_guess
+
+        if mode == 'Ps':
+            Ps = inputs['Ps']
+            n, T, b0 = self._equilibrate(inputs, Ps, n, T)
+            self._set_outputs(outputs, self._station(inputs, Ps, n, T, b0), b0)
+            return
+
+        # start from the last converged point, or from an ideal gas estimate of Ps
+        gamt = inputs['guess:gamt']
+        MN = inputs['MN'] if mode == 'MN' else inputs['guess:MN']
+        Ps_guess = inputs['guess:Pt'] * (1 + (gamt-1)/2 * MN**2)**(-gamt/(gamt-1))
+        if not self._converged:
+            Ps = Ps_guess
+        elif mode == 'area':
+            # guess:MN picks the subsonic or supersonic solution for the area
+            other_branch = (outputs['MN'].real > 1.) != (inputs['guess:MN'].real > 1.)
+            Ps = np.where(other_branch, Ps_guess, outputs['Ps'])
+        else:
+            Ps = outputs['Ps'].copy()
+
+        # under complex step the real part is already converged, but the imaginary
+        # part still needs one newton step
+        min_iter = 1 if outputs._under_complex_step else 0
+
+        ln_Ps = np.log(Ps)
+        ln_Ps_last = np.log(Ps_guess)
+        converged = np.zeros(ln_Ps.shape, dtype=bool)
+        for i in range(self.options['maxiter']):
+            Ps = np.exp(ln_Ps)
+            n, T, b0 = self._equilibrate(inputs, Ps, n, T)
+            vals, z, direct = self._station(inputs, Ps, n, T, b0, partials=True)
+
+            if mode == 'area':
+                # a step across the sonic point is halved, so the iteration stays on the branch
+                # guess:MN picked. A start on the wrong branch moves towards the ideal gas guess.
+                crossed = (vals['MN'].real > 1.) != (inputs['guess:MN'].real > 1.)
+                if np.any(crossed):
+                    ln_Ps = np.where(crossed, (ln_Ps + ln_Ps_last)/2, ln_Ps)
+                    converged &= ~crossed
+                    continue
+
+            dln_Ps = -vals['Ps']/(z['Ps'][:, 0]*Ps)
+            if not np.all(np.isfinite(dln_Ps)):
+                raise om.AnalysisError('Static pressure iteration diverged in {}'.format(self.pathname))
+            converged = np.abs(dln_Ps.real) < STATIC_TOL
+            if i >= min_iter and np.all(converged):
+                self._converged = True
+                break
+            # limit the size of the real step, the imaginary part is always taken in full
+            ln_Ps_last = ln_Ps
+            ln_Ps = ln_Ps + dln_Ps - (dln_Ps.real - np.clip(dln_Ps.real, -MAX_DLN_PS, MAX_DLN_PS))
+        else:
+            # the last point is not converged, so the next call restarts from the ideal gas guess
+            self._converged = False
+            check_converged(converged, self.pathname, self.options['err_on_non_converge'],
+                            iteration='Static pressure')
+
+        outputs['Ps'] = Ps
+        self._set_outputs(outputs, vals, b0)
+
+    def _set_outputs(self, outputs, vals, b0):
+        self._n_guess = vals['n'].real.copy()
+        self._T_guess = vals['T'].real.copy()
+        for name in self._explicit:
+            outputs[name] = vals[name].reshape(outputs[name].shape)
+        outputs['b0'] = b0.reshape(outputs['b0'].shape)
+
+    def apply_nonlinear(self, inputs, outputs, resids):
+        mode = self.options['mode']
+
+        Ps = inputs['Ps'] if mode == 'Ps' else outputs['Ps']
+        n, T, b0 = self._equilibrate(inputs, Ps, self._n_guess, self._T_guess)
+        vals = self._station(inputs, Ps, n, T, b0)
+
+        for name in self._explicit:
+            # an unchanged output is converged even if it is unbounded, e.g. the area without flow
+            val = vals[name].reshape(outputs[name].shape)
+            changed = val != outputs[name]
+            resid = np.zeros_like(val)
+            resid[changed] = val[changed] - outputs[name][changed]
+            resids[name] = resid
+        resids['b0'] = b0.reshape(outputs['b0'].shape) - outputs['b0']
+        if mode != 'Ps':
+            resids['Ps'] = vals['Ps']
+
+    def linearize(self, inputs, outputs, J):
+        thermo = self.options['thermo']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        Ps = inputs['Ps'] if mode == 'Ps' else outputs['Ps']
+        n, T, b0 = self._equilibrate(inputs, Ps, self._n_guess, self._T_guess)
+        vals, z, direct = self._station(inputs, Ps, n, T, b0, partials=True)
+
+        states = self._explicit if mode == 'Ps' else self._explicit + ['Ps']
+        for name in states:
+            d_z = z[name]
+            J[name, 'Ps'] = d_z[..., 0].ravel()
+            J[name, 'S'] = d_z[..., 1].ravel()
+            # b0 = init_prod_amounts . aij^T
+            J[name, 'init_prod_amounts'] = d_z[..., 2:].dot(thermo.aij).ravel()
+
+        for (name, wrt), val in direct.items():
+            J[name, wrt] = val
+
+        # only the Ps column couples the outputs, see solve_linear
+        self._dPs = {name: z[name][..., 0].reshape((nn, -1)) for name in self._explicit}
+        if mode != 'Ps':
+            self._dR_dPs = z['Ps'][:, 0]
+
+    def solve_linear(self, d_outputs, d_residuals, mode):
+        static_mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        if mode == 'fwd':
+            d_Ps = np.zeros((nn, 1))
+            if static_mode != 'Ps':
+                d_outputs['Ps'] = d_residuals['Ps']/self._dR_dPs
+                d_Ps[:, 0] = d_outputs['Ps']
+            for name in self._explicit:
+                d_outputs[name] = (self._dPs[name]*d_Ps).reshape(d_outputs[name].shape) - d_residuals[name]
+            d_outputs['b0'] = -d_residuals['b0']
+
+        else:  # rev
+            d_Ps = np.zeros(nn)
+            for name in self._explicit:
+                d_residuals[name] = -d_outputs[name]
+                d_Ps += np.sum(self._dPs[name]*d_outputs[name].reshape((nn, -1)), axis=1)
+            d_residuals['b0'] = -d_outputs['b0']
+            if static_mode != 'Ps':
+                d_residuals['Ps'] = (d_outputs['Ps'] + d_Ps)/self._dR_dPs
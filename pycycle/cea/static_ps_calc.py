@@ -9,38 +9,40 @@ class PsCalc(ExplicitComponent):
 
     def initialize(self):
         self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
 
     def setup(self):
-
-        self.add_input('P', val=.001, units="bar", desc="static pressure")
-        self.add_input('gamma', val=1.4)
-        self.add_input('n_moles', shape=1)
-        self.add_input('Ts', val=518., units="degK", desc="Static temp")
-        self.add_input('ht', val=0., units="J/kg", desc="Total enthalpy reference condition")
-        self.add_input('hs', val=0., units="J/kg", desc="Static enthalpy")
-        self.add_input('W', val=0.0, desc="mass flow rate", units="kg/s")
-        self.add_input('rho', val=1.0, desc="density", units="kg/m**3")
-
-        self.add_output('MN', val=1.0, desc="computed mach number")
-        self.add_output('V', val=1.0, units="m/s", desc="computed speed", res_ref=1e3)
-        self.add_output('Vsonic', val=1.0, units="m/s", desc="computed speed of sound", res_ref=1e3)
-        self.add_output('area', val=1.0, units="m**2", desc="computed area")
-
-        self.declare_partials('V', ['ht', 'hs'])
-        self.declare_partials('Vsonic', ['gamma', 'n_moles', 'Ts'])
-        self.declare_partials('MN', ['gamma', 'n_moles', 'Ts', 'hs', 'ht'])
-        self.declare_partials('area', ['rho', 'W', 'hs', 'ht'])
+        nn = self.options['num_nodes']
+
+        self.add_input('P', val=.001, shape=nn, units="bar", desc="static pressure")
+        self.add_input('gamma', val=1.4, shape=nn)
+        self.add_input('n_moles', shape=nn)
+        self.add_input('Ts', val=518., shape=nn, units="degK", desc="Static temp")
+        self.add_input('ht', val=0., shape=nn, units="J/kg", desc="Total enthalpy reference condition")
+        self.add_input('hs', val=0., shape=nn, units="J/kg", desc="Static enthalpy")
+        self.add_input('W', val=0.0, shape=nn, desc="mass flow rate", units="kg/s")
+        self.add_input('rho', val=1.0, shape=nn, desc="density", units="kg/m**3")
+
+        self.add_output('MN', val=1.0, shape=nn, desc="computed mach number")
+        self.add_output('V', val=1.0, shape=nn, units="m/s", desc="computed speed", res_ref=1e3)
+        self.add_output('Vsonic', val=1.0, shape=nn, units="m/s", desc="computed speed of sound", res_ref=1e3)
+        self.add_output('area', val=1.0, shape=nn, units="m**2", desc="computed area")
+
+        ar = np.arange(nn)
+        self.declare_partials('V', ['ht', 'hs'], rows=ar, cols=ar)
+        self.declare_partials('Vsonic', ['gamma', 'n_moles', 'Ts'], rows=ar, cols=ar)
+        self.declare_partials('MN', ['gamma', 'n_moles', 'Ts', 'hs', 'ht'], rows=ar, cols=ar)
+        self.declare_partials('area', ['rho', 'W', 'hs', 'ht'], rows=ar, cols=ar)
 
     def compute(self, inputs, outputs):
 
         outputs['Vsonic'] = Vsonic = np.sqrt(inputs['gamma'] * R_UNIVERSAL_SI * inputs['n_moles'] * inputs['Ts'])
 
         # If ht < hs then V will be imaginary, so use an inverse relationship to allow solution process to continue
-        if inputs['ht'] >= inputs['hs']:
-            outputs['V'] = V = np.sqrt(2.0 * (inputs['ht'] - inputs['hs']))
-        else:
-            # print('Warning: in', self.pathname, 'ht < hs, inverting relationship to get a real velocity, ht = ', inputs['ht'], 'hs = ', inputs['hs'])
-            outputs['V'] = V = np.sqrt(2.0 * (inputs['hs'] - inputs['ht']))
+        # print('Warning: in', self.pathname, 'ht < hs, inverting relationship to get a real velocity, ht = ', inputs['ht'], 'hs = ', inputs['hs'])
+        sign = np.where(inputs['ht'] >= inputs['hs'], 1.0, -1.0)
+        outputs['V'] = V = np.sqrt(2.0 * sign * (inputs['ht'] - inputs['hs']))
 
         outputs['MN'] = V / Vsonic
         outputs['area'] = inputs['W'] / (inputs['rho'] * V)
@@ -54,28 +56,19 @@ class PsCalc(ExplicitComponent):
         J['Vsonic','n_moles'] = Vsonic / (2.0 * inputs['n_moles'])
         J['Vsonic','Ts'] = Vsonic / (2.0 * inputs['Ts'])
 
-        if inputs['ht'] >= inputs['hs']:
-            V = np.sqrt(2.0 * (inputs['ht'] - inputs['hs']))
-            J['V','ht'] = 1.0 / V
-            J['V','hs'] = -1.0 / V
-        else:
-            V = np.sqrt(2.0 * (inputs['hs'] - inputs['ht']))
-            J['V','hs'] = 1.0 / V
-            J['V','ht'] = -1.0 / V
-
-        J['MN','ht'] = 1.0 / Vsonic * J['V','ht']
-        J['MN','hs'] = 1.0 / Vsonic * J['V','hs']
+        # sign flips when the relationship is inverted for ht < hs
+        sign = np.where(inputs['ht'] >= inputs['hs'], 1.0, -1.0)
+        V = np.sqrt(2.0 * sign * (inputs['ht'] - inputs['hs']))
+        J['V','ht'] = dV_dht = sign / V
+        J['V','hs'] = dV_dhs = -sign / V
+
+        J['MN','ht'] = 1.0 / Vsonic * dV_dht
+        J['MN','hs'] = 1.0 / Vsonic * dV_dhs
         J['MN','gamma'] = -V / Vsonic**2 * J['Vsonic','gamma']
         J['MN','n_moles'] = -V / Vsonic**2 * J['Vsonic','n_moles']
         J['MN','Ts'] = -V / Vsonic**2 * J['Vsonic','Ts']
 
         J['area','W'] = 1.0 / (inputs['rho'] * V)
         J['area','rho'] = -inputs['W'] / (inputs['rho']**2 * V)
-        J['area','ht'] = -inputs['W'] / (inputs['rho'] * V**2) * J['V','ht']
-        J['area','hs'] = -inputs['W'] / (inputs['rho'] * V**2) * J['V','hs']
-
-
-
-
-
-
+        J['area','ht'] = -inputs['W'] / (inputs['rho'] * V**2) * dV_dht
+        J['area','hs'] = -inputs['W'] / (inputs['rho'] * V**2) * dV_dhs
@@ -10,51 +10,56 @@ class PsResid(om.ImplicitComponent):
 
     def initialize(self):
         self.options.declare('mode', values=['MN', 'area'])
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
 
     def setup(self):
 
+        nn = self.options['num_nodes']
 
-        self.add_input('Ts', val=518., units="degK", desc="Static temp")
-        self.add_input('ht', val=1., units="J/kg", desc="Total enthalpy reference condition")
-        self.add_input('hs', val=1., units="J/kg", desc="Static enthalpy")
-        self.add_input('n_moles', shape=1)
-        self.add_input('gamma', val=1.4)
-        self.add_input('W', val=1., desc="mass flow rate", units="kg/s")
-        self.add_input('rho', val=1., desc="density", units="kg/m**3")
+        self.add_input('Ts', val=518., shape=nn, units="degK", desc="Static temp")
+        self.add_input('ht', val=1., shape=nn, units="J/kg", desc="Total enthalpy reference condition")
+        self.add_input('hs', val=1., shape=nn, units="J/kg", desc="Static enthalpy")
+        self.add_input('n_moles', shape=nn)
+        self.add_input('gamma', val=1.4, shape=nn)
+        self.add_input('W', val=1., shape=nn, desc="mass flow rate", units="kg/s")
+        self.add_input('rho', val=1., shape=nn, desc="density", units="kg/m**3")
 
         # used for computing initial guess
-        self.add_input('guess:gamt', val=1.4, desc="gamma computed from set total")
-        self.add_input('guess:Pt', val=1.0, units="bar", desc="total pressure")
+        self.add_input('guess:gamt', val=1.4, shape=nn, desc="gamma computed from set total")
+        self.add_input('guess:Pt', val=1.0, shape=nn, units="bar", desc="total pressure")
 
-        self.add_output('Ps', lower=1e-4, upper=5e4, val=.001, units="bar",
+        self.add_output('Ps', lower=1e-4, upper=5e4, val=.001, shape=nn, units="bar",
                         desc="static pressure state variable",
                         ref0=1e-3)
-        self.add_output('V', val=100.0, shape=1, desc="velocity", units="m/s",
+        self.add_output('V', val=100.0, shape=nn, desc="velocity", units="m/s",
                         res_ref=1e3)
-        self.add_output('Vsonic', val=330.0, shape=1, desc="computed speed of sound", units="m/s",
+        self.add_output('Vsonic', val=330.0, shape=nn, desc="computed speed of sound", units="m/s",
                         res_ref=1e3)
 
-        self.declare_partials('Ps', ['ht', 'hs'])
-        self.declare_partials('Vsonic', ['gamma', 'n_moles', 'Ts', 'Vsonic'])
-        self.declare_partials('V', 'V', val=-1.0)
+        # every node only depends on its own inputs, so all partials are diagonal
+        ar = np.arange(nn)
+        self.declare_partials('Ps', ['ht', 'hs'], rows=ar, cols=ar)
+        self.declare_partials('Vsonic', ['gamma', 'n_moles', 'Ts', 'Vsonic'], rows=ar, cols=ar)
+        self.declare_partials('V', 'V', val=-1.0, rows=ar, cols=ar)
 
         mode = self.options['mode']
         if mode == "MN":
-            self.add_input('MN', val=.5, desc="target mach number")
-            self.add_output('area', shape=1, desc="flow area", units="m**2", lower=1e-5)
+            self.add_input('MN', val=.5, shape=nn, desc="target mach number")
+            self.add_output('area', shape=nn, desc="flow area", units="m**2", lower=1e-5)
 
-            self.declare_partials('area', ['area', 'W', 'rho', 'gamma', 'n_moles', 'Ts', 'MN'])
-            self.declare_partials('Ps', ['MN', 'n_moles', 'gamma', 'Ts'])
-            self.declare_partials('V', ['MN', 'n_moles', 'gamma', 'Ts'])
+            self.declare_partials('area', ['area', 'W', 'rho', 'gamma', 'n_moles', 'Ts', 'MN'], rows=ar, cols=ar)
+            self.declare_partials('Ps', ['MN', 'n_moles', 'gamma', 'Ts'], rows=ar, cols=ar)
+            self.declare_partials('V', ['MN', 'n_moles', 'gamma', 'Ts'], rows=ar, cols=ar)
 
         elif mode == "area":
-            self.add_output('MN', val=.5, desc="target mach number", lower=1e-3)
-            self.add_input('guess:MN', val=0.5, desc="Guess for Mach number.")
-            self.add_input('area', val=np.inf, desc="flow area", units="m**2")
+            self.add_output('MN', val=.5, shape=nn, desc="target mach number", lower=1e-3)
+            self.add_input('guess:MN', val=0.5, shape=nn, desc="Guess for Mach number.")
+            self.add_input('area', val=np.inf, shape=nn, desc="flow area", units="m**2")
 
-            self.declare_partials('MN', ['MN', 'area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'])
-            self.declare_partials('Ps', ['area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'])
-            self.declare_partials('V', ['area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'])
+            self.declare_partials('MN', ['MN', 'area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'], rows=ar, cols=ar)
+            self.declare_partials('Ps', ['area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'], rows=ar, cols=ar)
+            self.declare_partials('V', ['area', 'Ts', 'n_moles', 'W', 'gamma', 'rho'], rows=ar, cols=ar)
 
         else:
             raise ValueError('mode must be either "MN" or "area", but "%s" was given' % mode)
@@ -74,33 +79,36 @@ class PsResid(om.ImplicitComponent):
         # only if a new guess isn't present. If a new guess is present,
         # its a safe bet that we've moved a lot and our old converged point isn't
         # as good as our new guess
-        self._ps_guess_cache = -1.
+        self._ps_guess_cache = -np.ones(nn)
 
     def guess_nonlinear(self, inputs, outputs, resids):
         gamt = inputs['guess:gamt']
         if self.options['mode'] == "MN":
             ps_guess = inputs['guess:Pt'] * (1 + (gamt-1)/2 * inputs['MN']**2)**(-gamt/(gamt-1))
-            if np.abs(ps_guess - self._ps_guess_cache) > 1e-10:
-                if self._ps_guess_cache == -1:
-                    outputs['Ps'] = ps_guess
-                    self._ps_guess_cache = ps_guess
+            new_guess = (np.abs(ps_guess - self._ps_guess_cache) > 1e-10) & (self._ps_guess_cache == -1)
+            if np.any(new_guess):
+                outputs['Ps'][new_guess] = ps_guess[new_guess]
+                self._ps_guess_cache[new_guess] = ps_guess[new_guess]
 
         else:
-            def equations(params):
-                ps, MN = params
-                f1 = ps - inputs['guess:Pt'] * (1 + (gamt-1)/2 * M_guess**2)**(-gamt/(gamt-1))
-                f2 = MN - inputs['W']*(R_UNIVERSAL_SI*inputs['Ts'])**0.5/(ps_guess*1.0e6*inputs['area']*gamt**0.5)
-                return (f1[0], f2[0])
-
-            M_guess = inputs['guess:MN']
-            ps_guess = inputs['guess:Pt'] * (1 + (gamt-1)/2 * M_guess**2)**(-gamt/(gamt-1))
-            ps_guess, M_guess = fsolve(equations, (ps_guess, M_guess))
-
-            if np.abs(ps_guess - self._ps_guess_cache) > 1e-10:
-                outputs['Ps'] = ps_guess
+            ps_guess = np.empty(self.options['num_nodes'])
+            for node in range(ps_guess.size):
+                def equations(params):
+                    ps, MN = params
+                    f1 = ps - inputs['guess:Pt'][node] * (1 + (gamt[node]-1)/2 * M_guess**2)**(-gamt[node]/(gamt[node]-1))
+                    f2 = MN - inputs['W'][node]*(R_UNIVERSAL_SI*inputs['Ts'][node])**0.5/(ps_node*1.0e6*inputs['area'][node]*gamt[node]**0.5)
+                    return (f1, f2)
+
+                M_guess = inputs['guess:MN'][node]
+                ps_node = inputs['guess:Pt'][node] * (1 + (gamt[node]-1)/2 * M_guess**2)**(-gamt[node]/(gamt[node]-1))
+                ps_guess[node], M_guess = fsolve(equations, (ps_node, M_guess))
+
+            new_guess = np.abs(ps_guess - self._ps_guess_cache) > 1e-10
+            if np.any(new_guess):
+                outputs['Ps'][new_guess] = ps_guess[new_guess]
                 if ('mixer.Fl_I1_calc' in self.pathname):
-                    outputs['Ps'] = 3.
-                self._ps_guess_cache = ps_guess
+                    outputs['Ps'][new_guess] = 3.
+                self._ps_guess_cache[new_guess] = ps_guess[new_guess]
 
     def _compute_outputs_MN(self, i):
 
@@ -114,10 +122,10 @@ class PsResid(om.ImplicitComponent):
             print(self.pathname, i['gamma'], i['n_moles'], i['Ts'])
 
         MN = i['MN']
-        if MN < 1e-16:
-            area = np.inf
-        else:
-            area = i['W']/(i['rho']*Vsonic*MN)
+        # no flow area is defined at zero Mach number
+        area = np.inf*np.ones_like(Vsonic)
+        flowing = MN >= 1e-16
+        area[flowing] = i['W'][flowing]/(i['rho'][flowing]*Vsonic[flowing]*MN[flowing])
 
         V = MN*Vsonic
         return Vsonic, V, area
@@ -125,20 +133,20 @@ class PsResid(om.ImplicitComponent):
     def _compute_outputs_area(self, i):
         Vsonic = (i['gamma']*R_UNIVERSAL_SI*i['n_moles']*i['Ts'])**0.5
         area = i['area']
-        if area == np.inf:
-            MN = 0.
-        else:
+        MN = np.zeros_like(Vsonic)
+        finite = area != np.inf
+        if np.any(finite):
             #MN = i['W']/(i['rho']*Vsonic*i['area'])
             #print("MN_calc", self.pathname, i['W'], i['rho'], Vsonic, i['area'])
 
             try:
                 np.seterr(all='raise')
-                MN = i['W']/(i['rho']*Vsonic*i['area'])
+                MN[finite] = i['W'][finite]/(i['rho'][finite]*Vsonic[finite]*area[finite])
                 np.seterr(all='warn')
             except:
                 np.seterr(all='warn')
                 print("MN_calc", self.pathname, i['W'], i['rho'], Vsonic, i['area'])
-                MN = 5.
+                MN[finite] = 5.
 
         V = MN*Vsonic
 
@@ -163,10 +171,7 @@ class PsResid(om.ImplicitComponent):
         # explicit vars
         if self.options['mode'] == "MN":
             Vsonic, V, area = self._compute_outputs_MN(inputs)
-            if area != np.inf:
-                resids['area'] = area - outputs['area']
-            else:
-                resids['area'] = 0.
+            resids['area'] = np.where(area != np.inf, area - outputs['area'], 0.)
             MN = inputs['MN']
         else:
             MN, Vsonic, V = self._compute_outputs_area(inputs)
@@ -240,20 +245,23 @@ class PsResid(om.ImplicitComponent):
             J['Ps', 'gamma'] = RT_q_MW*MN_squared_q2/ht
             J['Ps', 'Ts'] = MN_squared_q2*gamma*R_UNIVERSAL_SI*n_moles/ht
 
-            if MN >= 1e-16:
-                J['area', 'W'] = 1.0/(rho*Vsonic*MN)
-                J['area', 'rho'] = -W/(Vsonic*MN*rho**2)
+            # area (and its derivatives) are only defined where there is flow
+            flowing = MN >= 1e-16
+            MN_flow = np.where(flowing, MN, 1.)
+
+            J['area', 'W'] = np.where(flowing, 1.0/(rho*Vsonic*MN_flow), 0.)
+            J['area', 'rho'] = np.where(flowing, -W/(Vsonic*MN_flow*rho**2), 0.)
 
-                part = -W/(rho*Vsonic**2*MN) * 0.5*(R_UNIVERSAL_SI*gamma*n_moles*Ts)**-.5*R_UNIVERSAL_SI
-                J['area', 'gamma'] = part*n_moles*Ts
-                J['area', 'n_moles'] = part*gamma*Ts
-                J['area', 'Ts'] = part*gamma*n_moles
-                J['area', 'MN'] = -W/rho/Vsonic/MN**2
+            part = -W/(rho*Vsonic**2*MN_flow) * 0.5*(R_UNIVERSAL_SI*gamma*n_moles*Ts)**-.5*R_UNIVERSAL_SI
+            J['area', 'gamma'] = np.where(flowing, part*n_moles*Ts, 0.)
+            J['area', 'n_moles'] = np.where(flowing, part*gamma*Ts, 0.)
+            J['area', 'Ts'] = np.where(flowing, part*gamma*n_moles, 0.)
+            J['area', 'MN'] = np.where(flowing, -W/rho/Vsonic/MN_flow**2, 0.)
 
-                J['V', 'MN'] = Vsonic
-                J['V', 'Ts'] = MN * J['Vsonic', 'Ts']
-                J['V', 'n_moles'] = MN * J['Vsonic', 'n_moles']
-                J['V', 'gamma'] = MN * J['Vsonic', 'gamma']
+            J['V', 'MN'] = np.where(flowing, Vsonic, 0.)
+            J['V', 'Ts'] = np.where(flowing, MN * J['Vsonic', 'Ts'], 0.)
+            J['V', 'n_moles'] = np.where(flowing, MN * J['Vsonic', 'n_moles'], 0.)
+            J['V', 'gamma'] = np.where(flowing, MN * J['Vsonic', 'gamma'], 0.)
 
         else:
             MN, Vsonic, V = self._compute_outputs_area(inputs)
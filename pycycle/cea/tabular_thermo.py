@@ -0,0 +1,201 @@
+import numpy as np
+
+from openmdao.api import ExplicitComponent, AnalysisError
+
+from pycycle.constants import R_UNIVERSAL_SI
+from pycycle.cea.utils import node_shape, block_diag_pattern
+from pycycle.cea.unit_comps import EngUnitOutputs, FLOW_UNITS
+
+
+class TabularThermo(ExplicitComponent):
+    """equilibrium composition and properties interpolated from a ThermoTable,
+    replaces ChemEq and Properties in SetTotal(thermo_method='TABULAR')"""
+
+    def initialize(self):
+        self.options.declare('table', desc='ThermoTable of the flow mixture', recordable=False)
+        self.options.declare('thermo', desc='thermodynamic data object', recordable=False)
+        self.options.declare('mode', desc='the input variable that defines the total properties',
+                             default='T', values=('T', 'S', 'h'))
+        self.options.declare('num_nodes', default=1, types=int,
+                             desc='number of independent flow conditions evaluated at once')
+        self.options.declare('fl_name', default=None, allow_none=True,
+                             desc='flowstation name, when given the flow station variables are also output '
+                                  'in english units, see EngUnitOutputs')
+        self.options.declare('maxiter', default=50, types=int,
+                             desc='maximum newton iterations when inverting h or S for T')
+        self.options.declare('tol', default=1e-10,
+                             desc='relative tolerance when inverting h or S for T')
+        self.options.declare('composition_tol', default=1e-6,
+                             desc='relative difference allowed between the element amounts of the flow '
+                                  'and of the mixture the table was generated for')
+
+    def setup(self):
+        thermo = self.options['thermo']
+        table = self.options['table']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        num_prod = thermo.num_prod
+        num_element = thermo.num_element
+
+        if table.num_prod != num_prod:
+            raise ValueError('the thermo table has {} products, but the thermo data has {}'
+                             .format(table.num_prod, num_prod))
+
+        n_shape = node_shape(nn, num_prod)
+
+        self.add_input('init_prod_amounts', val=np.broadcast_to(thermo.init_prod_amounts, n_shape),
+                       desc="initial mass fractions of products, before equilibrating")
+        self.add_input('P', val=1.0, shape=nn, units="bar", desc="Pressure")
+
+        if mode == 'T':
+            self.add_input('T', val=400., shape=nn, units="degK", desc="Temperature")
+        else:
+            if mode == 'h':
+                self.add_input('h', val=0., shape=nn, units="cal/g", desc="Enthalpy")
+            else:
+                self.add_input('S', val=0., shape=nn, units="cal/(g*degK)", desc="Entropy")
+            self.add_output('T', val=400., shape=nn, units="degK", desc="Temperature", lower=1.)
+
+        self.add_output('n', val=np.ones(n_shape)/num_prod/10, desc="mole fractions of the mixture")
+        self.add_output('n_moles', val=0.034, shape=nn, desc="1/molecular weight of gas")
+        self.add_output('b0', shape=node_shape(nn, num_element),
+                        desc='assigned kg-atoms of element i per total kg of reactant '
+                             'for the initial prod amounts')
+
+        if mode != 'h':
+            self.add_output('h', val=1., shape=nn, units="cal/g", desc="enthalpy")
+        if mode != 'S':
+            self.add_output('S', val=1., shape=nn, units="cal/(g*degK)", desc="entropy")
+        self.add_output('gamma', val=1.4, shape=nn, lower=1.0, upper=2.0, desc="ratio of specific heats")
+        self.add_output('Cp', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant pressure")
+        self.add_output('Cv', val=1., shape=nn, units="cal/(g*degK)", desc="Specific heat at constant volume")
+        self.add_output('rho', val=0.0004, shape=nn, units="g/cm**3", desc="density")
+        self.add_output('R', val=1., shape=nn, units='(N*m)/(kg*degK)', desc='Specific gas constant')
+
+        # tabulated outputs, everything besides T, b0, rho and R
+        self._props = [name for name in ('n_moles', 'h', 'S', 'Cp', 'Cv', 'gamma') if name != mode]
+
+        # every node is independent, so all sub-jacobians are block diagonal
+        ar = np.arange(nn)
+        wrt = ('P', mode)
+        rows, cols = block_diag_pattern(nn, num_prod, 1)
+        self.declare_partials('n', wrt, rows=rows, cols=cols)
+        self.declare_partials(self._props + ['rho'], wrt, rows=ar, cols=ar)
+        if mode != 'T':
+            self.declare_partials('T', wrt, rows=ar, cols=ar)
+        self.declare_partials('R', wrt, rows=ar, cols=ar)
+
+        rows, cols = block_diag_pattern(nn, num_element, num_prod)
+        self.declare_partials('b0', 'init_prod_amounts', val=np.tile(np.ravel(thermo.aij), nn),
+                              rows=rows, cols=cols)
+
+        if self.options['fl_name'] is None:
+            self._eng_units = None
+        else:
+            self._eng_units = EngUnitOutputs(self, self.options['fl_name'], FLOW_UNITS)
+            self._eng_units.setup()
+
+    def _solve_T(self, inputs, T_guess):
+        """invert the tabulated h(P, T) or S(P, T) for T with a newton iteration per node"""
+        table = self.options['table']
+        mode = self.options['mode']
+        P = inputs['P']
+        target = inputs[mode]
+
+        T = np.clip(T_guess, table.T[0], table.T[-1])
+        for i in range(self.options['maxiter']):
+            f = table.evaluate(mode, P, T) - target
+            dT = -f/table.evaluate(mode, P, T, dT=1)
+            T = np.clip(T + dT, table.T[0], table.T[-1])
+            if np.all(np.abs(dT) <= self.options['tol']*T):
+                break
+        else:
+            # a newton step that stays clipped at the edge of the grid means T is outside of it
+            raise AnalysisError('{}: T could not be found from {} within the thermo table range '
+                                'of {} - {} degK'.format(self.pathname, mode, table.T[0], table.T[-1]))
+
+        if not np.all(np.isfinite(T)):
+            raise AnalysisError('{}: T could not be found from {}'.format(self.pathname, mode))
+
+        return T
+
+    def _check_range(self, name, val, grid, units):
+        """the table splines clamp points outside of the grid, so those points are rejected"""
+        val = np.real(val)
+        if np.any(val < grid[0]) or np.any(val > grid[-1]):
+            raise AnalysisError('{}: {} = {} {} is outside of the thermo table range of {} - {} {}'
+                                .format(self.pathname, name, val, units, grid[0], grid[-1], units))
+
+    def compute(self, inputs, outputs):
+        thermo = self.options['thermo']
+        table = self.options['table']
+        mode = self.options['mode']
+        nn = self.options['num_nodes']
+
+        # the equilibrium only depends on the element amounts, so any species mix with the
+        # same elements as the tabulated mixture (e.g. an upstream equilibrium composition) is valid
+        b0 = inputs['init_prod_amounts'].reshape((nn, thermo.num_prod)).dot(thermo.aij.T)
+        b0_table = thermo.aij.dot(table.init_prod_amounts)
+        if np.any(np.abs(b0 - b0_table) > self.options['composition_tol']*np.max(b0_table)):
+            raise AnalysisError('{}: the element amounts of init_prod_amounts differ from the mixture '
+                                'of the thermo table'.format(self.pathname))
+
+        outputs['b0'] = b0.reshape(outputs['b0'].shape)
+
+        P = inputs['P']
+        self._check_range('P', P, table.P, 'bar')
+        if mode == 'T':
+            T = inputs['T']
+            self._check_range('T', T, table.T, 'degK')
+        else:
+            T = outputs['T'] = self._solve_T(inputs, outputs['T'])
+
+        outputs['n'] = table.evaluate('n', P, T).reshape(outputs['n'].shape)
+        for name in self._props:
+            outputs[name] = table.evaluate(name, P, T)
+
+        n_moles = outputs['n_moles']
+        outputs['rho'] = P/(n_moles*R_UNIVERSAL_SI*T)*100  # 1 Bar is 100 Kpa
+        outputs['R'] = R_UNIVERSAL_SI*n_moles
+
+        if self._eng_units is not None:
+            self._eng_units.compute(inputs, outputs)
+
+    def compute_partials(self, inputs, J):
+        table = self.options['table']
+        mode = self.options['mode']
+
+        P = inputs['P']
+        if mode == 'T':
+            T = inputs['T']
+            dT_dP = np.zeros_like(P)
+            dT_dx = np.ones_like(P)
+        else:
+            T = self._solve_T(inputs, self._outputs['T'])
+            # implicit function theorem on f(P, T) = x
+            f_T = table.evaluate(mode, P, T, dT=1)
+            dT_dx = 1./f_T
+            dT_dP = -table.evaluate(mode, P, T, dlnP=1)/(P*f_T)
+            J['T', 'P'] = dT_dP
+            J['T', mode] = dT_dx
+
+        for name in self._props + ['n']:
+            q_P = table.evaluate(name, P, T, dlnP=1)
+            q_T = table.evaluate(name, P, T, dT=1)
+            if name == 'n':
+                J[name, 'P'] = (q_P/P[:, np.newaxis] + q_T*dT_dP[:, np.newaxis]).ravel()
+                J[name, mode] = (q_T*dT_dx[:, np.newaxis]).ravel()
+            else:
+                J[name, 'P'] = q_P/P + q_T*dT_dP
+                J[name, mode] = q_T*dT_dx
+
+        n_moles = table.evaluate('n_moles', P, T)
+        rho = P/(n_moles*R_UNIVERSAL_SI*T)*100
+        J['rho', 'P'] = rho/P - rho/n_moles*J['n_moles', 'P'] - rho/T*dT_dP
+        J['rho', mode] = -rho/n_moles*J['n_moles', mode] - rho/T*dT_dx
+        J['R', 'P'] = R_UNIVERSAL_SI*J['n_moles', 'P']
+        J['R', mode] = R_UNIVERSAL_SI*J['n_moles', mode]
+
+        if self._eng_units is not None:
+            self._eng_units.compute_partials(inputs, J)
@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.constants import AIR_MIX, AIR_FUEL_MIX, MIN_VALID_CONCENTRATION
+from pycycle.cea.test.util import run_chem_eq
+
+
+class ChemEqActiveSetTestCase(unittest.TestCase):
+
+    def check_parity(self, reacts, mode, val, P, units):
+        full = run_chem_eq(mode, val, P, units, init_reacts=reacts, active_set=False)
+        active = run_chem_eq(mode, val, P, units, init_reacts=reacts, active_set=True)
+
+        # both solves stop at the same residual tolerance, so only the major species are compared tightly
+        major = full['n'] > 1e-6
+        assert_rel_error(self, active['n'][major], full['n'][major], 1e-3)
+        assert_rel_error(self, active['n_moles'], full['n_moles'], 1e-6)
+        if mode != 'T':
+            assert_rel_error(self, active['T'], full['T'], 1e-6)
+
+        # the species left out of the Newton system are still full length and at the floor
+        self.assertEqual(active['n'].shape, full['n'].shape)
+        self.assertTrue(np.all(active['n'] >= MIN_VALID_CONCENTRATION))
+
+        active.model.run_apply_nonlinear()
+        self.assertLess(active.model.ceq._residuals.get_norm(), 1e-5)
+
+        return active
+
+    def test_air(self):
+        self.check_parity(AIR_MIX, 'T', np.array([300., 1500., 3000.]), np.array([10., 1.034210, 1.]), 'degK')
+        self.check_parity(AIR_MIX, 'h', np.array([-24., 300.]), np.array([1., 20.]), 'cal/g')
+        self.check_parity(AIR_MIX, 'S', np.array([1.6, 2.0]), np.array([1., .5]), 'cal/(g*degK)')
+
+    def test_air_fuel(self):
+        self.check_parity(AIR_FUEL_MIX, 'T', np.linspace(300., 3000., 5), np.linspace(1., 20., 5), 'degK')
+        self.check_parity(AIR_FUEL_MIX, 'h', np.array([-20., 400.]), np.array([1., 20.]), 'cal/g')
+
+    def test_restart(self):
+        # a rerun from the initial guess starts with stale element potentials, so trace species
+        # must not be dropped until the node is close to converged
+        p = run_chem_eq('T', np.linspace(300., 3000., 5), np.linspace(1., 20., 5), 'degK', init_reacts=AIR_FUEL_MIX,
+                        active_set=True)
+        n = p['n'].copy()
+
+        p.model.ceq._outputs['n'] = p.model.ceq.n_init
+        p.run_model()
+
+        major = n > 1e-6
+        assert_rel_error(self, p['n'][major], n[major], 1e-3)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
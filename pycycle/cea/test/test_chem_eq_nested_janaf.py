@@ -0,0 +1,58 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.chem_eq import ChemEq
+from pycycle.cea import species_data
+from pycycle.constants import AIR_MIX
+from pycycle.cea.test.util import run_chem_eq, assert_match
+
+
+class ChemEqNestedTestCase(unittest.TestCase):
+
+    def check_parity(self, mode, val, P, units):
+        nested = run_chem_eq(mode, val, P, units, nested_solver=True)
+        internal = run_chem_eq(mode, val, P, units, nested_solver=False)
+
+        assert_match(self, internal, nested, ('n', 'pi'), 1e-5)
+        assert_rel_error(self, internal['n_moles'], nested['n_moles'], 1e-6)
+        if mode != 'T':
+            assert_rel_error(self, internal['T'], nested['T'], 1e-6)
+
+    def test_tp(self):
+        self.check_parity('T', 1500., 1.034210, 'degK')
+        self.check_parity('T', 300., 10., 'degK')
+
+    def test_hp(self):
+        self.check_parity('h', -24., 1., 'cal/g')
+
+    def test_sp(self):
+        self.check_parity('S', 1.6, 1., 'cal/(g*degK)')
+
+    def test_vectorized(self):
+        # each node converges on its own, so it matches the scalar nested solve
+        T = np.array([300., 1500.])
+        P = np.array([10., 1.034210])
+        internal = run_chem_eq('T', T, P, 'degK', nested_solver=False)
+
+        for i in range(2):
+            nested = run_chem_eq('T', T[i], P[i], 'degK', nested_solver=True)
+            assert_rel_error(self, internal['n'][i], nested['n'], 1e-5)
+
+    def test_nested_formulation(self):
+        thermo = species_data.Thermo(species_data.janaf, AIR_MIX)
+
+        p = Problem()
+        p.model.add_subsystem('ceq', ChemEq(thermo=thermo, mode='T', nested_solver=True,
+                                            formulation='reduced'))
+        with self.assertRaises(ValueError):
+            p.setup(check=False)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
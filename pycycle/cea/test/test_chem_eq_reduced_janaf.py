@@ -0,0 +1,134 @@
+import unittest
+import warnings
+
+import numpy as np
+
+from openmdao.api import AnalysisError
+from openmdao.utils.om_warnings import SolverWarning
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.chem_eq import solve_reduced_equilibrium
+from pycycle.cea import species_data
+from pycycle.constants import AIR_MIX
+from pycycle.cea.test.util import run_chem_eq, assert_match
+
+
+class ChemEqReducedTestCase(unittest.TestCase):
+
+    def check_parity(self, mode, val, P, units):
+        full = run_chem_eq(mode, val, P, units, formulation='full')
+        reduced = run_chem_eq(mode, val, P, units, formulation='reduced')
+
+        # trace species sit at the concentration floor in both formulations
+        assert_match(self, reduced, full, ('n', 'pi'), 1e-5)
+        assert_rel_error(self, reduced['n_moles'], full['n_moles'], 1e-6)
+        if mode != 'T':
+            assert_rel_error(self, reduced['T'], full['T'], 1e-6)
+
+        # same residual equations, including the trace weighting
+        reduced.model.run_apply_nonlinear()
+        self.assertLess(reduced.model.ceq._residuals.get_norm(), 1e-8)
+
+    def test_tp(self):
+        self.check_parity('T', 1500., 1.034210, 'degK')
+        self.check_parity('T', 300., 10., 'degK')
+        self.check_parity('T', 3000., 1., 'degK')
+
+    def test_hp(self):
+        self.check_parity('h', -24., 1., 'cal/g')
+        self.check_parity('h', 300., 20., 'cal/g')
+
+    def test_sp(self):
+        self.check_parity('S', 1.6, 1., 'cal/(g*degK)')
+        self.check_parity('S', 2.0, .5, 'cal/(g*degK)')
+
+    def test_totals(self):
+        # checked right after run_model, with no run_apply_nonlinear in between
+        h = np.array([-24., 300.])
+        P = np.array([1., 20.])
+        full = run_chem_eq('h', h, P, 'cal/g', formulation='full')
+        reduced = run_chem_eq('h', h, P, 'cal/g', formulation='reduced')
+
+        of, wrt = ['n', 'T'], ['h', 'P']
+        expected = full.compute_totals(of=of, wrt=wrt)
+        totals = reduced.compute_totals(of=of, wrt=wrt)
+        for key, val in expected.items():
+            assert_rel_error(self, totals[key], val, 1e-6)
+
+        # the residuals evaluated at another point must not leak into the linearization
+        reduced.model.run_apply_nonlinear()
+        h_new = np.array([20., 150.])
+        for p in (full, reduced):
+            p['h'] = h_new
+            p.run_model()
+        expected = full.compute_totals(of=of, wrt=wrt)
+        totals = reduced.compute_totals(of=of, wrt=wrt)
+        for key, val in expected.items():
+            assert_rel_error(self, totals[key], val, 1e-6)
+
+    def test_vectorized(self):
+        T = np.array([300., 1500., 3000.])
+        P = np.array([10., 1.034210, 1.])
+        reduced = run_chem_eq('T', T, P, 'degK', formulation='reduced')
+
+        for i in range(3):
+            full = run_chem_eq('T', T[i], P[i], 'degK', formulation='full')
+            assert_rel_error(self, reduced['n'][i], full['n'], 1e-5)
+
+    def test_converged_per_node(self):
+        thermo = species_data.Thermo(species_data.janaf, AIR_MIX)
+        T = np.array([1500., 3000.])
+        P = np.array([1.034210, 1.])
+        b0 = np.tile(thermo.init_prod_amounts.dot(thermo.aij.T), (2, 1))
+        n_init = np.ones((2, thermo.num_prod)) / thermo.num_prod / 10
+
+        n, _, _, converged = solve_reduced_equilibrium(thermo, 'T', P, b0, n_init, T)
+        self.assertTrue(np.all(converged))
+
+        # one node restarts from its solution, the other one from the initial guess
+        n[1] = n_init[1]
+        _, _, _, converged = solve_reduced_equilibrium(thermo, 'T', P, b0, n, T, maxiter=2)
+        np.testing.assert_array_equal(converged, [True, False])
+
+    def test_restart_T(self):
+        h = np.array([-24., 300.])
+        P = np.array([1., 20.])
+        ref = run_chem_eq('h', h, P, 'cal/g', formulation='reduced')
+        n, T = ref['n'].copy(), ref['T'].copy()
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', SolverWarning)
+            p = run_chem_eq('h', h, P, 'cal/g', formulation='reduced', maxiter=1)
+
+        # node 0 has no valid composition, so it restarts from n_init and 1000 K whatever its
+        # stale T, node 1 keeps its converged state
+        n[0] = -1.
+        results = []
+        for T0 in (1000., 3000.):
+            T[0] = T0
+            p['n'] = n
+            p['T'] = T
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', SolverWarning)
+                p.run_model()
+            results.append((p['n'].copy(), p['T'].copy()))
+
+        assert_rel_error(self, results[1][0], results[0][0], 1e-12)
+        assert_rel_error(self, results[1][1], results[0][1], 1e-12)
+        assert_rel_error(self, results[1][1][1], ref['T'][1], 1e-12)
+
+    def test_not_converged(self):
+        T = np.array([1500., 3000.])
+        P = np.array([1.034210, 1.])
+        for formulation in ('full', 'reduced'):
+            with self.assertWarnsRegex(SolverWarning, r'ceq: .*did not converge'):
+                run_chem_eq('T', T, P, 'degK', formulation=formulation, maxiter=2)
+
+            with self.assertRaisesRegex(AnalysisError, r'did not converge .* in ceq'):
+                run_chem_eq('T', T, P, 'degK', formulation=formulation, maxiter=2,
+                            err_on_non_converge=True)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, Group, IndepVarComp, DirectSolver, LinearRunOnce
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.chem_eq import ChemEq
+from pycycle.cea import species_data
+from pycycle.constants import AIR_MIX
+
+
+def run_totals(linear_solver, deriv_mode, mode, val, P, units, num_nodes=1):
+    thermo = species_data.Thermo(species_data.janaf, AIR_MIX)
+
+    p = Problem(model=Group())
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output(mode, val, units=units)
+    indeps.add_output('P', P, units='bar')
+    p.model.add_subsystem('ceq', ChemEq(thermo=thermo, mode=mode, num_nodes=num_nodes), promotes=['*'])
+    p.model.linear_solver = linear_solver
+    p.set_solver_print(level=-1)
+    p.setup(mode=deriv_mode, check=False)
+    p.run_model()
+
+    of = ['n', 'pi', 'n_moles']
+    if mode != 'T':
+        of.append('T')
+    return p.compute_totals(of=of, wrt=[mode, 'P'])
+
+
+class ChemEqSolveLinearTestCase(unittest.TestCase):
+
+    def check_totals(self, mode, val, P, units, num_nodes=1):
+        # the assembled DirectSolver never calls ChemEq.solve_linear, LinearRunOnce always does
+        ref = run_totals(DirectSolver(), 'fwd', mode, val, P, units, num_nodes)
+        for deriv_mode in ('fwd', 'rev'):
+            totals = run_totals(LinearRunOnce(), deriv_mode, mode, val, P, units, num_nodes)
+            for key, deriv in ref.items():
+                if np.linalg.norm(deriv) > 1e-10:
+                    assert_rel_error(self, totals[key], deriv, 1e-8)
+                else:  # derivatives that are zero up to roundoff
+                    self.assertLess(np.linalg.norm(totals[key]), 1e-10)
+
+    def test_tp(self):
+        # 1500K has trace species sitting at the concentration floor
+        self.check_totals('T', 1500., 1.034210, 'degK')
+
+    def test_hp(self):
+        self.check_totals('h', -24., 1., 'cal/g')
+
+    def test_sp(self):
+        self.check_totals('S', 1.6, 1., 'cal/(g*degK)')
+
+    def test_vectorized(self):
+        self.check_totals('T', np.array([300., 1500.]), np.array([10., 1.034210]), 'degK', num_nodes=2)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,112 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, Group, IndepVarComp
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.chem_eq import ChemEq
+from pycycle.cea import species_data
+from pycycle.cea.warm_start import WarmStartCache, get_warm_start_cache
+from pycycle.constants import AIR_FUEL_MIX
+
+
+def build_chem_eq(thermo, mode, units, warm_start_size):
+    p = Problem(model=Group())
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output(mode, 1000., units=units)
+    indeps.add_output('P', 5., units='bar')
+    p.model.add_subsystem('ceq', ChemEq(thermo=thermo, mode=mode, warm_start_size=warm_start_size),
+                          promotes=['*'])
+    p.set_solver_print(level=-1)
+    p.setup(check=False)
+    p.final_setup()
+
+    return p
+
+
+def sweep(p, mode, vals):
+    """ runs the points out of order, so consecutive points are far apart, and counts the
+    residual evaluations """
+    comp = p.model.ceq
+    apply_nonlinear = comp.apply_nonlinear
+    count = [0]
+
+    def counted(*args):
+        count[0] += 1
+        apply_nonlinear(*args)
+
+    comp.apply_nonlinear = counted
+
+    n = []
+    for val in vals:
+        p[mode] = val
+        p.run_model()
+        n.append(p['n'].copy())
+
+    comp.apply_nonlinear = apply_nonlinear
+    return np.array(n), count[0]
+
+
+class WarmStartCacheTestCase(unittest.TestCase):
+
+    def test_nearest(self):
+        cache = WarmStartCache(3)
+        self.assertIsNone(cache.lookup(np.zeros((1, 2))))
+
+        cache.store(np.array([[0., 0.], [1., 1.]]), np.array([[10.], [11.]]))
+        assert_rel_error(self, cache.lookup(np.array([[.2, .1], [.9, 2.]])), np.array([[10.], [11.]]), 1e-15)
+
+        # the same inputs replace the old entry
+        cache.store(np.array([[1., 1.]]), np.array([[12.]]))
+        self.assertEqual(cache.count, 2)
+        assert_rel_error(self, cache.lookup(np.array([[1., 1.]])), np.array([[12.]]), 1e-15)
+
+    def test_lru(self):
+        cache = WarmStartCache(2)
+        cache.store(np.array([[0.], [1.]]), np.array([[10.], [11.]]))
+        cache.lookup(np.array([[0.]]))
+
+        # [1.] is the least recently used, so it is evicted
+        cache.store(np.array([[2.]]), np.array([[12.]]))
+        self.assertEqual(cache.count, 2)
+        assert_rel_error(self, cache.lookup(np.array([[1.1]])), np.array([[12.]]), 1e-15)
+        assert_rel_error(self, cache.lookup(np.array([[.1]])), np.array([[10.]]), 1e-15)
+
+    def test_shared(self):
+        thermo = species_data.Thermo(species_data.janaf, AIR_FUEL_MIX)
+        cache = get_warm_start_cache(thermo, 'T', 10)
+
+        self.assertIs(get_warm_start_cache(thermo, 'T', 5), cache)
+        self.assertIsNot(get_warm_start_cache(thermo, 'h', 10), cache)
+        self.assertEqual(get_warm_start_cache(thermo, 'T', 20).size, 20)
+
+
+class ChemEqWarmStartTestCase(unittest.TestCase):
+
+    def check_sweep(self, mode, vals, units):
+        vals = np.random.RandomState(0).permutation(vals)
+
+        thermo = species_data.Thermo(species_data.janaf, AIR_FUEL_MIX)
+        n, count = sweep(build_chem_eq(thermo, mode, units, 0), mode, vals)
+
+        thermo = species_data.Thermo(species_data.janaf, AIR_FUEL_MIX)
+        sweep(build_chem_eq(thermo, mode, units, 50), mode, vals)
+        # a second model with the same mixture starts from the states the first one stored
+        n_warm, count_warm = sweep(build_chem_eq(thermo, mode, units, 50), mode, vals)
+
+        major = n > 1e-6
+        assert_rel_error(self, n_warm[major], n[major], 1e-4)
+        self.assertLess(count_warm, count / 2)
+
+    def test_tp(self):
+        self.check_sweep('T', np.linspace(300., 3000., 20), 'degK')
+
+    def test_hp(self):
+        self.check_sweep('h', np.linspace(-20., 400., 20), 'cal/g')
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,65 @@
+import unittest
+
+import numpy as np
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea.unit_comps import FLOW_UNITS, STATIC_FLOW_UNITS
+from pycycle.cea.test.util import run_set_total, run_set_static, assert_match
+
+
+class EngUnitsTestCase(unittest.TestCase):
+
+    def check_set_total(self, thermo_method, mode, val, units):
+        P = np.linspace(1., 10., np.size(val))
+        comp = run_set_total(mode, val, P, units, thermo_method=thermo_method, units_method='COMP')
+        direct = run_set_total(mode, val, P, units, thermo_method=thermo_method, units_method='DIRECT')
+
+        self.assertIn('flow', comp.model.set_total._subsystems_allprocs)
+        self.assertNotIn('flow', direct.model.set_total._subsystems_allprocs)
+
+        # h or S come from the property calculation, not the input, so they match to the
+        # tolerance of the equilibrium solve
+        assert_match(self, direct, comp, ['flow:' + name for name in FLOW_UNITS], 1e-8)
+
+        of = ['flow:' + name for name in ('T', 'h', 'S', 'gamma', 'rho')]
+        totals = direct.compute_totals(of=of, wrt=[mode, 'P'])
+        expected = comp.compute_totals(of=of, wrt=[mode, 'P'])
+        for key, val in expected.items():
+            assert_rel_error(self, totals[key], val, 1e-6)
+
+    def test_set_total_cea(self):
+        self.check_set_total('CEA', 'T', np.array([400., 1500., 2800.]), 'degK')
+        self.check_set_total('CEA', 'h', np.array([20., 300.]), 'cal/g')
+        self.check_set_total('CEA', 'S', np.array([1.6, 2.0]), 'cal/(g*degK)')
+
+    def test_set_total_frozen(self):
+        self.check_set_total('FROZEN', 'T', np.array([300., 800.]), 'degK')
+        self.check_set_total('FROZEN', 'h', np.array([20., 100.]), 'cal/g')
+
+    def check_set_static(self, mode, val, units):
+        comp = run_set_static(mode, val, units, units_method='COMP')
+        direct = run_set_static(mode, val, units, units_method='DIRECT')
+
+        self.assertNotIn('flow', direct.model.set_static._subsystems_allprocs)
+        self.assertNotIn('flow_static', direct.model.set_static._subsystems_allprocs)
+
+        names = [name for name in list(FLOW_UNITS) + list(STATIC_FLOW_UNITS) if name != 'R']
+        assert_match(self, direct, comp, ['set_static.flow:' + name for name in names], 1e-12)
+
+        of = ['set_static.flow:' + name for name in ('P', 'T', 'V', 'area', 'MN', 'W')]
+        wrt = [mode, 'W', 'T']
+        totals = direct.compute_totals(of=of, wrt=wrt)
+        expected = comp.compute_totals(of=of, wrt=wrt)
+        for key, val in expected.items():
+            assert_rel_error(self, totals[key], val, 1e-8)
+
+    def test_set_static(self):
+        self.check_set_static('MN', np.array([.5, 1.5]), None)
+        self.check_set_static('area', np.array([.5, .1]), 'm**2')
+        self.check_set_static('Ps', np.array([8., 1.2]), 'bar')
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, IndepVarComp
+
+from pycycle.cea import species_data
+from pycycle.cea.set_total import SetTotal
+
+
+def run_set_total(mode, val, units):
+    nn = np.size(val)
+
+    p = Problem()
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output(mode, val, units=units)
+    indeps.add_output('P', np.array([10., 1.5]), units='bar')
+    p.model.add_subsystem('set_total', SetTotal(thermo_data=species_data.janaf, mode=mode, num_nodes=nn,
+                                                props_method='GROUP'),
+                          promotes=['*'])
+    p.set_solver_print(level=-1)
+    p.setup(check=False, force_alloc_complex=True)
+    p.run_model()
+
+    return p
+
+
+class PartialsSparsityTestCase(unittest.TestCase):
+
+    def check_pattern(self, p, path, exact):
+        # check_partials raises if complex step finds a nonzero outside the declared rows/cols
+        data = p.check_partials(method='cs', includes=[path], out_stream=None)
+
+        comp = p.model._get_subsystem(path)
+        for (of, wrt), vals in data[path].items():
+            info = comp._subjacs_info[path + '.' + of, path + '.' + wrt]
+            if info['rows'] is None:
+                num_declared = info['shape'][0]*info['shape'][1]
+            else:
+                num_declared = info['rows'].size
+
+            # the explicit components declare exactly the entries that can be nonzero
+            if exact:
+                self.assertEqual(num_declared, np.count_nonzero(vals['J_fd']), msg=(of, wrt))
+
+    def test_tp(self):
+        p = run_set_total('T', np.array([1500., 400.]), 'degK')
+
+        self.check_pattern(p, 'set_total.chem_eq', exact=False)
+        self.check_pattern(p, 'set_total.props.TP2ls', exact=True)
+        self.check_pattern(p, 'set_total.props.tp2props', exact=True)
+
+    def test_sp(self):
+        p = run_set_total('S', np.array([1.8, 1.6]), 'cal/(g*degK)')
+
+        self.check_pattern(p, 'set_total.chem_eq', exact=False)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
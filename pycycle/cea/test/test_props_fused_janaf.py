@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from openmdao.utils.assert_utils import assert_check_partials
+
+from pycycle.cea.test.util import run_set_total, assert_match
+
+
+class PropsFusedTestCase(unittest.TestCase):
+
+    def check_parity(self, mode, val, P, units):
+        group = run_set_total(mode, val, P, units, props_method='GROUP')
+        fused = run_set_total(mode, val, P, units, props_method='FUSED')
+
+        assert_match(self, fused, group, ('T', 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'R'), 1e-10)
+
+        return fused
+
+    def test_tp(self):
+        self.check_parity('T', np.array([300., 1500., 3000.]), np.array([10., 1.034210, 1.]), 'degK')
+
+    def test_hp(self):
+        self.check_parity('h', np.array([20., 300.]), np.array([1., 20.]), 'cal/g')
+
+    def test_sp(self):
+        self.check_parity('S', np.array([1.6, 2.0]), np.array([1., .5]), 'cal/(g*degK)')
+
+    def test_partials(self):
+        p = run_set_total('T', np.array([400., 1500., 2800.]), np.array([1., 10., 3.]), 'degK', props_method='FUSED')
+        data = p.check_partials(method='cs', includes=['*props'], out_stream=None)
+
+        # dS/dn is zeroed for trace species on purpose, the same as in PropsCalcs
+        del data['set_total.props'][('S', 'n')]
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -4,7 +4,7 @@ import numpy as np
 
 from openmdao.api import Problem, Group, IndepVarComp
 
-from openmdao.utils.assert_utils import assert_rel_error
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
 
 from pycycle.cea.props_rhs import PropsRHS
 from pycycle.cea.props_calcs import PropsCalcs
@@ -54,6 +54,35 @@ class PropsRHSTestCase(unittest.TestCase):
 
         # p.check_partial_derivatives()
 
+    def test_vectorized(self):
+
+        p = self.prob
+        p.run_model()
+
+        nn = 3
+        n = np.array([[0.02040741, 0.0023147, 0.0102037],
+                      [0.01, 0.01, 0.005],
+                      [0.005, 0.02, 0.012]])
+
+        vec = Problem()
+        indeps = vec.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+        indeps.add_output('T', np.array([4000., 3000., 2000.]), units='degK')
+        indeps.add_output('n', n)
+        indeps.add_output('b0', np.tile([0.02272211, 0.04544422], (nn, 1)))
+        indeps.add_output('n_moles', np.full(nn, 0.03292581))
+        vec.model.add_subsystem('props_rhs', PropsRHS(thermo=self.thermo, num_nodes=nn), promotes=['*'])
+        vec.setup(check=False, force_alloc_complex=True)
+        vec.run_model()
+
+        # the first node matches the scalar case, every node gets sum_k aij[i, k]*aij[j, k]*n[k]
+        assert_rel_error(self, vec['lhs_TP'][0], p['lhs_TP'], 1e-12)
+        aij = self.thermo.aij
+        for i in range(nn):
+            assert_rel_error(self, vec['lhs_TP'][i, :2, :2], (aij * n[i]).dot(aij.T), 1e-12)
+
+        data = vec.check_partials(out_stream=None, method='cs')
+        assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
 
 class PropsCalcsTestCase(unittest.TestCase):
 
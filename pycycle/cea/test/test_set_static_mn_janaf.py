@@ -108,6 +108,48 @@ class TestSetStaticMN(unittest.TestCase):
             #     p.model.list_states()
             # p.check_partials(comps=('set_static_MN.statics.ps_resid',))
 
+    def test_case_MN_vectorized(self):
+
+        nn = ref_data.shape[0]
+
+        p = Problem()
+
+        indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+        indeps.add_output('T', val=518.*np.ones(nn), units='degR')
+        indeps.add_output('P', val=14.7*np.ones(nn), units='psi')
+        indeps.add_output('W', val=1.5*np.ones(nn), units='lbm/s')
+        indeps.add_output('MN', val=1.5*np.ones(nn), units=None)
+
+        p.model.add_subsystem('set_total_TP', SetTotal(thermo_data=janaf, num_nodes=nn))
+        p.model.add_subsystem('set_static_MN', SetStatic(mode='MN', thermo_data=janaf, num_nodes=nn))
+
+        p.model.connect('T', 'set_total_TP.T')
+        p.model.connect('P', ['set_total_TP.P', 'set_static_MN.guess:Pt'])
+
+        p.model.connect('set_total_TP.flow:S', 'set_static_MN.S')
+        p.model.connect('set_total_TP.flow:h', 'set_static_MN.ht')
+        p.model.connect('set_total_TP.flow:gamma', 'set_static_MN.guess:gamt')
+        p.model.connect('W', 'set_static_MN.W')
+        p.model.connect('MN', 'set_static_MN.MN')
+
+        p.set_solver_print(level=-1)
+        p.setup(check=False)
+
+        # every reference case is solved at once, one per node
+        p['T'] = ref_data[:, h_map['Tt']]
+        p['P'] = ref_data[:, h_map['Pt']]
+        p['MN'] = ref_data[:, h_map['MN']]
+        p['W'] = ref_data[:, h_map['W']]
+
+        p.run_model()
+
+        tol = np.where(ref_data[:, h_map['MN']] < 2, 1e-4, 1e-2)
+        for v_name, out_name in (('Ps', 'P'), ('Ts', 'T'), ('hs', 'h'), ('rhos', 'rho'),
+                                 ('gams', 'gamma'), ('V', 'V'), ('A', 'area'), ('MN', 'MN')):
+            computed = p['set_static_MN.flow:{}'.format(out_name)]
+            for i in range(nn):
+                assert_rel_error(self, computed[i], ref_data[i, h_map[v_name]], tol[i])
+
 
 if __name__ == "__main__":
     import scipy
@@ -99,7 +99,7 @@ class TestSetStaticPs(unittest.TestCase):
             assert_rel_error(self, V_computed, V, tol)
             assert_rel_error(self, A_computed, A, tol)
 
-        p.check_partials(includes=['set_static_Ps.statics.ps_calc'], compact_print=True)
+        p.check_partials(includes=['set_static_Ps.statics'], compact_print=True)
 
 
 if __name__ == "__main__":
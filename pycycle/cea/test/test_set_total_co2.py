@@ -200,6 +200,35 @@ class SetTotalTestCase(unittest.TestCase):
 
         # check = p.check_partial_derivatives()
 
+    def test_set_total_tp_vectorized(self):
+
+        thermo = species_data.Thermo(species_data.co2_co_o2)
+
+        # 4000K and 1500K cases from test_set_total_tp, solved together
+        p = Problem()
+        p.model = SetTotal(thermo_data=species_data.co2_co_o2, mode="T", num_nodes=2)
+        r = p.model
+        r.add_subsystem(
+            'n_init',
+            IndepVarComp(
+                'init_prod_amounts',
+                np.tile(thermo.init_prod_amounts, (2, 1))),
+            promotes=["*"])
+        r.add_subsystem('T_init', IndepVarComp('T', np.array([4000., 1500.]), units='degK'), promotes=["*"])
+        r.add_subsystem('P_init', IndepVarComp('P', 1.034210*np.ones(2), units="bar"), promotes=["*"])
+
+        p.set_solver_print(level=-1)
+        p.setup(check=False)
+        p.run_model()
+
+        expected_concentrations = np.array([[0.62003271, 0.06995092, 0.31001638],
+                                            [3.58768646e-04, 9.99461847e-01, 1.79384323e-04]])
+        concentrations = p['n'] / p['n_moles'][:, np.newaxis]
+
+        assert_rel_error(self, concentrations[0], expected_concentrations[0], 1e-4)
+        assert_rel_error(self, p['n_moles'], np.array([0.0329313730421, 0.022726185333]), 1e-4)
+        assert_rel_error(self, p['gamma'], np.array([1.19054696779, 1.16380]), 1e-4)
+
 
 if __name__ == "__main__":
 
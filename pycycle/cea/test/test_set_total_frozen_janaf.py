@@ -0,0 +1,100 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, IndepVarComp, AnalysisError
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
+
+from pycycle.cea import species_data
+from pycycle.cea.set_total import SetTotal
+from pycycle.cea.set_static import SetStatic
+from pycycle.constants import MIN_VALID_CONCENTRATION
+from pycycle.cea.test.util import run_set_total, assert_match
+
+
+class SetTotalFrozenTestCase(unittest.TestCase):
+
+    def check_vs_cea(self, mode, val, P, units, tol=1e-3):
+        cea = run_set_total(mode, val, P, units, thermo_method='CEA')
+        frozen = run_set_total(mode, val, P, units, thermo_method='FROZEN')
+
+        # dissociation is negligible in cold flows, so only the reaction part of Cp is missing
+        assert_match(self, frozen, cea, ('T', 'h', 'S', 'rho', 'R', 'n_moles'), tol)
+        assert_match(self, frozen, cea, ('gamma', 'Cp', 'Cv'), 5e-3)
+
+        return frozen
+
+    def test_tp(self):
+        p = self.check_vs_cea('T', np.array([300., 811.1, 1200.]), np.array([1.034210, 10., 3.]), 'degK')
+
+        # the composition is carried through, floored like the equilibrium solve
+        init = p['init_prod_amounts']
+        assert_rel_error(self, p['n'], np.maximum(init, MIN_VALID_CONCENTRATION), 1e-15)
+
+    def test_hp(self):
+        self.check_vs_cea('h', np.array([-10., 50., 150.]), np.array([1., 10., 3.]), 'cal/g')
+
+    def test_sp(self):
+        self.check_vs_cea('S', np.array([1.6, 1.7]), np.array([1., 10.]), 'cal/(g*degK)')
+
+    def test_modes(self):
+        # T is inverted exactly from h and S of the same frozen mixture
+        T = np.array([300., 811.1, 1200.])
+        P = np.array([1.034210, 10., 3.])
+        tp = run_set_total('T', T, P, 'degK', thermo_method='FROZEN')
+        hp = run_set_total('h', tp['h'], P, 'cal/g', thermo_method='FROZEN')
+        sp = run_set_total('S', tp['S'], P, 'cal/(g*degK)', thermo_method='FROZEN')
+
+        assert_rel_error(self, hp['T'], T, 1e-10)
+        assert_rel_error(self, sp['T'], T, 1e-10)
+
+    def test_not_converged(self):
+        p = run_set_total('h', np.array([-10., 150.]), np.array([1., 3.]), 'cal/g', thermo_method='FROZEN')
+        p.model.set_total.frozen_thermo.options['maxiter'] = 2
+
+        # node 0 restarts from its converged T, node 1 is far from it
+        p['h'] = np.array([-10., 500.])
+        with self.assertRaisesRegex(AnalysisError, r'did not converge for nodes \[1\]'):
+            p.run_model()
+
+    def test_partials(self):
+        for mode, val, units in (('T', [400., 1300.], 'degK'),
+                                 ('h', [20., 200.], 'cal/g'),
+                                 ('S', [1.6, 1.8], 'cal/(g*degK)')):
+            p = run_set_total(mode, np.array(val), np.array([1., 10.]), units, thermo_method='FROZEN')
+            data = p.check_partials(method='cs', out_stream=None)
+            assert_check_partials(data, atol=1e-8, rtol=1e-8)
+
+    def test_statics(self):
+        p = Problem()
+        indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+        indeps.add_output('T', np.array([500.]), units='degK')
+        indeps.add_output('P', np.array([3.]), units='bar')
+        indeps.add_output('W', np.array([50.]), units='kg/s')
+        indeps.add_output('MN', np.array([.6]))
+
+        p.model.add_subsystem('set_total', SetTotal(thermo_data=species_data.janaf, thermo_method='FROZEN'))
+        p.model.add_subsystem('set_static', SetStatic(thermo_data=species_data.janaf, mode='MN',
+                                                      thermo_method='FROZEN'))
+        p.model.connect('T', 'set_total.T')
+        p.model.connect('P', ['set_total.P', 'set_static.guess:Pt'])
+        p.model.connect('set_total.flow:S', 'set_static.S')
+        p.model.connect('set_total.flow:h', 'set_static.ht')
+        p.model.connect('set_total.flow:gamma', 'set_static.guess:gamt')
+        p.model.connect('W', 'set_static.W')
+        p.model.connect('MN', 'set_static.MN')
+
+        p.set_solver_print(level=-1)
+        p.setup(check=False)
+        p.run_model()
+
+        # isentropic relations of the frozen gas at the static point
+        gam = p['set_static.flow:gamma']
+        Tt, Ts = p['set_total.flow:T'], p['set_static.flow:T']
+        assert_rel_error(self, p['set_static.flow:MN'], .6, 1e-8)
+        assert_rel_error(self, Tt/Ts, 1 + (gam - 1)/2*.6**2, 2e-3)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,149 @@
+import os
+import shutil
+import tempfile
+import unittest
+from collections import OrderedDict
+from types import SimpleNamespace
+
+import numpy as np
+
+from openmdao.api import AnalysisError
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
+
+from pycycle.cea import species_data
+from pycycle.cea import thermo_table
+from pycycle.cea.thermo_table import generate_thermo_table, get_thermo_table, table_key, ThermoTable
+from pycycle.constants import AIR_MIX
+from pycycle.cea.test.util import run_set_total, assert_match
+
+# a small grid keeps the table generation quick
+P_grid = np.geomspace(0.5, 20., 9)
+T_grid = np.linspace(250., 2000., 36)
+
+
+class SetTotalTabularTestCase(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.table = generate_thermo_table(species_data.janaf, AIR_MIX, P=P_grid, T=T_grid)
+
+    def check_vs_cea(self, mode, val, P, units, tol=1e-4):
+        cea = run_set_total(mode, val, P, units, thermo_method='CEA')
+        tab = run_set_total(mode, val, P, units, thermo_method='TABULAR', thermo_table=self.table)
+
+        assert_match(self, tab, cea, ('T', 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'R', 'n_moles'), tol)
+
+        return tab
+
+    def test_tp(self):
+        self.check_vs_cea('T', np.array([300., 811.1, 1500.]), np.array([1.034210, 10., 3.]), 'degK')
+
+    def test_hp(self):
+        self.check_vs_cea('h', np.array([20., 100., 300.]), np.array([1., 10., 3.]), 'cal/g')
+
+    def test_sp(self):
+        self.check_vs_cea('S', np.array([1.6, 1.8]), np.array([1., 10.]), 'cal/(g*degK)')
+
+    def test_partials(self):
+        for mode, val, units in (('T', [400., 1700.], 'degK'),
+                                 ('h', [20., 300.], 'cal/g'),
+                                 ('S', [1.6, 1.8], 'cal/(g*degK)')):
+            p = run_set_total(mode, np.array(val), np.array([1., 10.]), units, thermo_method='TABULAR',
+                              thermo_table=self.table)
+            data = p.check_partials(method='cs', out_stream=None)
+            assert_check_partials(data, atol=1e-8, rtol=1e-6)
+
+    def test_composition(self):
+        p = run_set_total('T', np.array([400., 1700.]), np.array([1., 10.]), 'degK', thermo_method='TABULAR',
+                          thermo_table=self.table)
+
+        # an equilibrium composition of the same mixture has the same element amounts
+        p['init_prod_amounts'] = p['n']
+        p.run_model()
+
+        p['init_prod_amounts'] = 2*p['n']
+        with self.assertRaises(AnalysisError):
+            p.run_model()
+
+    def test_range(self):
+        p = run_set_total('T', np.array([400., 1700.]), np.array([1., 10.]), 'degK', thermo_method='TABULAR',
+                          thermo_table=self.table)
+
+        p['T'] = np.array([400., 2100.])
+        with self.assertRaises(AnalysisError):
+            p.run_model()
+
+        p['T'] = np.array([400., 1700.])
+        p['P'] = np.array([1., 30.])
+        with self.assertRaises(AnalysisError):
+            p.run_model()
+
+        p = run_set_total('h', np.array([20., 300.]), np.array([1., 10.]), 'cal/g', thermo_method='TABULAR',
+                          thermo_table=self.table)
+
+        # far above the enthalpy at the top of the grid
+        p['h'] = np.array([20., 3000.])
+        with self.assertRaises(AnalysisError):
+            p.run_model()
+
+    def test_save_load(self):
+        fd, filename = tempfile.mkstemp(suffix='.npz')
+        os.close(fd)
+        try:
+            self.table.save(filename)
+            table = ThermoTable.load(filename)
+        finally:
+            os.remove(filename)
+
+        P = np.array([1., 10.])
+        T = np.array([400., 1700.])
+        for name in ('n', 'n_moles', 'h', 'S', 'Cp', 'Cv', 'gamma'):
+            assert_rel_error(self, table.evaluate(name, P, T), self.table.evaluate(name, P, T), 1e-15)
+
+
+class ThermoTableCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        thermo_table._tables.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+        thermo_table._tables.clear()
+
+    def test_disk_cache(self):
+        P, T = P_grid[:4], T_grid[:6]
+        table = get_thermo_table(species_data.janaf, AIR_MIX, P, T, cache_dir=self.cache_dir)
+        self.assertEqual(os.listdir(self.cache_dir), [table_key(species_data.janaf, AIR_MIX, P, T)])
+
+        # a new process only has the disk cache
+        thermo_table._tables.clear()
+        cached = get_thermo_table(species_data.janaf, AIR_MIX, P, T, cache_dir=self.cache_dir)
+        self.assertIsInstance(cached.data['n'], np.memmap)
+        assert_rel_error(self, np.array(cached.data['h']), table.data['h'], 1e-15)
+
+        # and the in-process table is reused after that
+        self.assertIs(get_thermo_table(species_data.janaf, AIR_MIX, P, T, cache_dir=self.cache_dir), cached)
+
+    def test_key(self):
+        key = table_key(species_data.janaf, AIR_MIX, P_grid, T_grid)
+
+        self.assertNotEqual(key, table_key(species_data.janaf, AIR_MIX, P_grid, T_grid[1:]))
+        self.assertNotEqual(key, table_key(species_data.janaf, {'N': 1, 'O': 1}, P_grid, T_grid))
+        self.assertNotEqual(key, table_key(species_data.co2_co_o2, AIR_MIX, P_grid, T_grid))
+
+        # changing a coefficient invalidates the cached tables
+        ThermoData = SimpleNamespace(
+            __name__=species_data.janaf.__name__, element_wts=species_data.janaf.element_wts,
+            products=OrderedDict((name, dict(prod)) for name, prod in species_data.janaf.products.items()))
+
+        self.assertEqual(key, table_key(ThermoData, AIR_MIX, P_grid, T_grid))
+        coeffs = np.array(ThermoData.products['N2']['coeffs'], dtype=float)
+        coeffs[0, 0] *= 1.0001
+        ThermoData.products['N2']['coeffs'] = coeffs
+        self.assertNotEqual(key, table_key(ThermoData, AIR_MIX, P_grid, T_grid))
+
+
+if __name__ == "__main__":
+
+    unittest.main()
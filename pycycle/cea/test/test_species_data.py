@@ -0,0 +1,134 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, IndepVarComp
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea import species_data
+from pycycle.cea.chem_eq import ChemEq
+from pycycle.constants import AIR_MIX
+
+
+class ThermoBatchTestCase(unittest.TestCase):
+
+    def test_batch_vs_scalar(self):
+        # temperatures on both sides of the janaf range bounds
+        T = np.array([150., 300., 999.9, 1000., 1000.1, 2500., 7000.])
+
+        for data in (species_data.janaf, species_data.co2_co_o2):
+            thermo = species_data.Thermo(data)
+            for batch, scalar, args in (('H0_array', 'H0', ()),
+                                        ('S0_array', 'S0', ()),
+                                        ('Cp0_array', 'Cp0', ()),
+                                        ('dH0_dT_array', 'H0_applyJ', (1.,)),
+                                        ('dS0_dT_array', 'S0_applyJ', (1.,)),
+                                        ('dCp0_dT_array', 'Cp0_applyJ', (1.,))):
+                vals = getattr(thermo, batch)(T)
+                self.assertEqual(vals.shape, (T.size, thermo.num_prod))
+                for i in range(T.size):
+                    assert_rel_error(self, vals[i], getattr(thermo, scalar)(T[i:i+1], *args), 1e-14)
+
+    def test_batch_derivs(self):
+        thermo = species_data.Thermo(species_data.janaf)
+        T = np.array([300., 1500., 2500.])
+        T_cs = T + 1e-30j
+
+        for func, deriv in (('H0_array', 'dH0_dT_array'),
+                            ('S0_array', 'dS0_dT_array'),
+                            ('Cp0_array', 'dCp0_dT_array')):
+            assert_rel_error(self, getattr(thermo, func)(T_cs).imag/1e-30, getattr(thermo, deriv)(T), 1e-10)
+
+
+class ThermoRegistryTestCase(unittest.TestCase):
+
+    def test_shared(self):
+        thermo = species_data.get_thermo(species_data.janaf, AIR_MIX)
+
+        self.assertIs(species_data.get_thermo(species_data.janaf, dict(AIR_MIX)), thermo)
+        self.assertIs(species_data.get_thermo(species_data.janaf), species_data.get_thermo(species_data.janaf, None))
+        self.assertIsNot(species_data.get_thermo(species_data.co2_co_o2), thermo)
+        self.assertIsInstance(species_data.get_thermo(species_data.janaf, AIR_MIX, species_data.ThermoSpline),
+                              species_data.ThermoSpline)
+
+        # proportional mixtures, and zero amounts, are the same mixture
+        self.assertIs(species_data.get_thermo(species_data.janaf, {k: 2*v for k, v in AIR_MIX.items()}), thermo)
+        self.assertIs(species_data.get_thermo(species_data.janaf, {k: v/3. for k, v in AIR_MIX.items()}), thermo)
+        self.assertIs(species_data.get_thermo(species_data.janaf, dict(AIR_MIX, H2O=0.)), thermo)
+        self.assertIsNot(species_data.get_thermo(species_data.janaf, dict(AIR_MIX, H2O=0.1)), thermo)
+
+    def test_valid_temp_range(self):
+        thermo = species_data.get_thermo(species_data.janaf, AIR_MIX)
+
+        self.assertEqual(thermo.valid_temp_range(500.), (200., 1000.))
+        self.assertEqual(thermo.valid_temp_range(np.array([1500., 3000.])), (1000., 6000.))
+
+        # evaluating the shared instance elsewhere does not change the result
+        thermo.H0_array(np.array([500.]))
+        self.assertEqual(thermo.valid_temp_range(1500.), (1000., 6000.))
+
+    def test_read_only(self):
+        thermo = species_data.get_thermo(species_data.janaf, AIR_MIX)
+
+        with self.assertRaises(ValueError):
+            thermo.aij[0, 0] = 2
+        with self.assertRaises(ValueError):
+            thermo.init_prod_amounts[0] = 1.
+
+        # evaluating does not change the object
+        H0 = thermo.H0(np.array([500.]))
+        thermo.H0(np.array([2500.]))
+        thermo.H0_array(np.array([1500., 3000.]))
+        assert_rel_error(self, thermo.H0(np.array([500.])), H0, 1e-15)
+
+
+class ThermoSplineTestCase(unittest.TestCase):
+
+    def test_vs_thermo(self):
+        thermo = species_data.Thermo(species_data.janaf)
+        spline = species_data.ThermoSpline(species_data.janaf)
+        self.assertEqual(spline.products, thermo.products)
+
+        # the fit smooths the polynomials where they switch ranges, so stay away from 1000K
+        T = np.concatenate((np.linspace(210., 950., 30), np.linspace(1050., 5900., 30)))
+        for func in ('H0_array', 'S0_array', 'Cp0_array', 'dH0_dT_array', 'dS0_dT_array'):
+            assert_rel_error(self, getattr(spline, func)(T), getattr(thermo, func)(T), 1e-4)
+
+        assert_rel_error(self, spline.H0(T[:1]), spline.H0_array(T)[0], 1e-14)
+        assert_rel_error(self, spline.S0_applyJ(T[:1], 1.), spline.dS0_dT_array(T)[0], 1e-14)
+
+    def test_smooth_derivs(self):
+        spline = species_data.ThermoSpline(species_data.janaf)
+
+        # no jump in dCp/dT across the 1000K range switch
+        T = np.array([1000. - 1e-6, 1000. + 1e-6])
+        dCp = spline.dCp0_dT_array(T)
+        assert_rel_error(self, dCp[0], dCp[1], 1e-6)
+
+        # complex step through the fits
+        T = np.array([300., 1500.])
+        for func, deriv in (('H0_array', 'dH0_dT_array'),
+                            ('S0_array', 'dS0_dT_array'),
+                            ('Cp0_array', 'dCp0_dT_array')):
+            assert_rel_error(self, getattr(spline, func)(T + 1e-30j).imag/1e-30, getattr(spline, deriv)(T), 1e-10)
+
+    def test_chem_eq(self):
+        results = []
+        for thermo_class in (species_data.Thermo, species_data.ThermoSpline):
+            p = Problem()
+            indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+            indeps.add_output('T', 1500., units='degK')
+            indeps.add_output('P', 1.034210, units='bar')
+            p.model.add_subsystem('ceq', ChemEq(thermo=thermo_class(species_data.janaf, AIR_MIX), mode='T'),
+                                  promotes=['*'])
+            p.set_solver_print(level=-1)
+            p.setup(check=False)
+            p.run_model()
+            results.append(p['n_moles'].copy())
+
+        assert_rel_error(self, results[1], results[0], 1e-6)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+
+from openmdao.api import AnalysisError
+
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
+
+from pycycle.cea.test.util import run_set_static, assert_match
+
+
+class StaticFlowStationTestCase(unittest.TestCase):
+
+    def check_parity(self, mode, val, units, tol=1e-9):
+        group = run_set_static(mode, val, units, statics_method='GROUP')
+        station = run_set_static(mode, val, units, statics_method='STATION')
+
+        names = ('P', 'T', 'h', 'S', 'gamma', 'Cp', 'Cv', 'rho', 'V', 'Vsonic', 'MN', 'area')
+        assert_match(self, station, group, ['set_static.flow:' + name for name in names], tol)
+
+        return station
+
+    def check_partials(self, p):
+        data = p.check_partials(method='cs', includes=['*statics'], out_stream=None)
+        # the derivatives w.r.t. init_prod_amounts are up to 1e6 in size
+        assert_check_partials(data, atol=1e-4, rtol=1e-8)
+
+    def test_mn(self):
+        p = self.check_parity('MN', np.array([.6, 1.5]), None)
+
+        self.check_partials(p)
+
+    def test_area(self):
+        p = self.check_parity('area', np.array([.2, .1]), 'm**2')
+
+        self.check_partials(p)
+
+    def test_ps(self):
+        # V is found from ht - h, which magnifies the tolerances of the two equilibrium solves
+        p = self.check_parity('Ps', np.array([7., 1.2]), 'bar', tol=1e-7)
+
+        self.check_partials(p)
+
+    def test_totals(self):
+        # the station is the only implicit part of the static calculation, so its solve_linear
+        # has to give the derivatives of the converged static state
+        p = run_set_static('MN', np.array([.6]), None, T=[1500.], P=[10.], W=[100.], statics_method='STATION')
+        data = p.check_totals(of=['set_static.flow:T', 'set_static.flow:P', 'set_static.flow:area'],
+                              wrt=['MN'], method='cs', out_stream=None)
+        for key, val in data.items():
+            assert_rel_error(self, val['J_fwd'], val['J_fd'], 1e-8)
+
+    def test_non_converge(self):
+        p = run_set_static('area', np.array([.2]), 'm**2', T=[1500.], P=[10.], W=[100.], statics_method='STATION')
+        station = p.model.set_static.statics
+        station.options['maxiter'] = 1
+        station.options['err_on_non_converge'] = True
+
+        p['area'] = .25
+        with self.assertRaises(AnalysisError):
+            p.run_model()
+        # the next call restarts from the ideal gas guess
+        self.assertFalse(station._converged)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,163 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.api import Problem, IndepVarComp
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea import species_data
+from pycycle.cea.set_total import SetTotal
+from pycycle.cea.thermo_db import ThermoDatabase, load_thermo_db, read_thermo_inp
+from pycycle.constants import AIR_MIX, AIR_FUEL_MIX
+
+
+# janaf Ar, N2 and O2 in the NASA Glenn format, with a comment, a condensed species and a reactant
+THERMO_INP = """\
+! janaf data in the thermo.inp layout
+thermo
+    200.000  1000.000  6000.000 20000.000   9/09/04
+Ar                Ref-Elm. Moore,1971. Gordon,1999.
+ 3 g 3/98 AR  1.00    0.00    0.00    0.00    0.00 0   39.9480000          0.000
+    200.000   1000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         6197.428
+ 0.000000000D+00 0.000000000D+00 2.500000000D+00 0.000000000D+00 0.000000000D+00
+ 0.000000000D+00 0.000000000D+00                -7.453750000D+02 4.379674910D+00
+   1000.000   6000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         6197.428
+ 2.010538475D+01-5.992661070D-02 2.500069401D+00-3.992141160D-08 1.205272140D-11
+-1.819015576D-15 1.078576636D-19                -7.449939610D+02 4.379180110D+00
+   6000.000  20000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         6197.428
+-9.951265080D+08 6.458887260D+05-1.675894697D+02 2.319933363D-02-1.721080911D-06
+ 6.531938460D-11-9.740147729D-16                -5.078300340D+06 1.465298484D+03
+N2                Ref-Elm. Gurvich,1978 pt1 p280 pt2 p207.
+ 3 tpis78 N   2.00    0.00    0.00    0.00    0.00 0   28.0134800          0.000
+    200.000   1000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8670.104
+ 2.210371497D+04-3.818461820D+02 6.082738360D+00-8.530914410D-03 1.384646189D-05
+-9.625793620D-09 2.519705809D-12                 7.108460860D+02-1.076003316D+01
+   1000.000   6000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8670.104
+ 5.877124060D+05-2.239249073D+03 6.066949220D+00-6.139685500D-04 1.491806679D-07
+-1.923105485D-11 1.061954386D-15                 1.283210415D+04-1.586639599D+01
+   6000.000  20000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8670.104
+ 8.310139160D+08-6.420733540D+05 2.020264635D+02-3.065092046D-02 2.486903333D-06
+-9.705954110D-11 1.437538881D-15                 4.938707040D+06-1.672099736D+03
+O2                Ref-Elm. Gurvich,1989 pt1 p94 pt2 p9.
+ 3 tpis89 O   2.00    0.00    0.00    0.00    0.00 0   31.9988000          0.000
+    200.000   1000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8680.104
+-3.425563420D+04 4.847000970D+02 1.119010961D+00 4.293889240D-03-6.836300520D-07
+-2.023372700D-09 1.039040018D-12                -3.391454870D+03 1.849699470D+01
+   1000.000   6000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8680.104
+-1.037939022D+06 2.344830282D+03 1.819732036D+00 1.267847582D-03-2.188067988D-07
+ 2.053719572D-11-8.193467050D-16                -1.689010929D+04 1.738716506D+01
+   6000.000  20000.0007 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0         8680.104
+ 4.975294300D+08-2.866106874D+05 6.690352250D+01-6.169959020D-03 3.016396027D-07
+-7.421416600D-12 7.278175770D-17                 2.293554027D+06-5.530621610D+02
+N2(L)             Liquid. Kirillin,1962. Strobridge,1962.
+ 1 tpis78 N   2.00    0.00    0.00    0.00    0.00 1   28.0134800     -61860.000
+     63.150     77.3557 -2.0 -1.0  0.0  1.0  2.0  3.0  4.0  0.0            0.000
+ 0.000000000D+00 0.000000000D+00 6.938734900D+00 0.000000000D+00 0.000000000D+00
+ 0.000000000D+00 0.000000000D+00                -1.063250000D+03-1.942720000D+01
+END PRODUCTS
+Air               Mole%:N2 78.084,O2 20.9476,Ar .9365,CO2 .0319.Gordon,1982.Reac
+ 0 g 9/95 N   1.5617O    0.4196AR    .0094C     .0003      0.00 0   28.9651159       -125.530
+    298.150      0.0000  0.0  0.0  0.0  0.0  0.0  0.0  0.0  0.0            0.000
+END REACTANTS
+"""
+
+
+class ThermoDatabaseTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def check_thermo(self, thermo, expected):
+        self.assertEqual(thermo.products, expected.products)
+        self.assertEqual(thermo.elements, expected.elements)
+        assert_rel_error(self, thermo.aij, expected.aij, 1e-15)
+        assert_rel_error(self, thermo.element_wt, expected.element_wt, 1e-15)
+        assert_rel_error(self, thermo.wt_mole, expected.wt_mole, 1e-15)
+        assert_rel_error(self, thermo.init_prod_amounts, expected.init_prod_amounts, 1e-15)
+
+        T = np.array([150., 300., 999.9, 1000.1, 2500., 7000.])
+        for func in ('H0_array', 'S0_array', 'Cp0_array'):
+            assert_rel_error(self, getattr(thermo, func)(T), getattr(expected, func)(T), 1e-15)
+
+    def test_janaf_round_trip(self):
+        path = os.path.join(self.tempdir, 'janaf')
+        ThermoDatabase.from_module(species_data.janaf).save(path)
+        db = load_thermo_db(path)
+
+        self.assertIs(load_thermo_db(path), db)
+        self.assertIsInstance(db.coeffs, np.memmap)
+        self.assertEqual(db.reactants, species_data.janaf.reactants)
+
+        for init_reacts in (None, AIR_MIX, AIR_FUEL_MIX):
+            self.check_thermo(species_data.Thermo(db, init_reacts), species_data.Thermo(species_data.janaf, init_reacts))
+
+    def test_lazy(self):
+        db = ThermoDatabase.from_module(species_data.janaf)
+        thermo = species_data.Thermo(db, AIR_MIX)
+
+        # only the species with no hydrogen are built
+        self.assertNotIn('H2O', thermo.products)
+        self.assertEqual(sorted(db.products._loaded), sorted(thermo.products))
+
+    def test_thermo_inp(self):
+        filename = os.path.join(self.tempdir, 'thermo.inp')
+        with open(filename, 'w') as f:
+            f.write(THERMO_INP)
+
+        db = read_thermo_inp(filename)
+        self.assertEqual(db.names, ['Ar', 'N2', 'O2'])
+        self.assertEqual(db.elements, ['Ar', 'N', 'O'])
+        self.assertEqual(dict(db.init_prod_amounts), {'N2': 78.084, 'O2': 20.9476, 'Ar': .9365})
+        # the atomic weights are solved for from the molecular weights
+        for e in db.elements:
+            assert_rel_error(self, db.element_wts[e], species_data.janaf.element_wts[e], 1e-12)
+
+        init_reacts = {'N2': 78.084, 'O2': 20.9476, 'Ar': .9365}
+        thermo = species_data.Thermo(db, init_reacts)
+        expected = species_data.Thermo(species_data.janaf, init_reacts)
+        idx = [expected.products.index(name) for name in thermo.products]
+
+        T = np.array([150., 300., 999.9, 1000.1, 2500., 7000.])
+        for func in ('H0_array', 'S0_array', 'Cp0_array'):
+            assert_rel_error(self, getattr(thermo, func)(T), getattr(expected, func)(T)[:, idx], 1e-15)
+
+        db = read_thermo_inp(filename, species=['N2', 'O2'], init_prod_amounts={'N2': 1., 'O2': 1.})
+        self.assertEqual(db.names, ['N2', 'O2'])
+        with self.assertRaises(ValueError):
+            read_thermo_inp(filename, species=['CO2'])
+
+        # names fill up to 24 columns, e.g. C8H18,isooctane
+        with open(filename, 'w') as f:
+            f.write(THERMO_INP.replace('Ar                Ref-Elm.', '{:<24}Ref-Elm.'.format('Ar,argon-with-long-name')))
+        db = read_thermo_inp(filename, init_prod_amounts={'N2': 1., 'O2': 1.})
+        self.assertEqual(db.names, ['Ar,argon-with-long-name', 'N2', 'O2'])
+
+    def test_set_total(self):
+        db = ThermoDatabase.from_module(species_data.janaf)
+
+        def run(thermo_data):
+            p = Problem()
+            indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+            indeps.add_output('T', np.array([500., 2500.]), units='degK')
+            indeps.add_output('P', np.array([1., 10.]), units='bar')
+            p.model.add_subsystem('set_total', SetTotal(thermo_data=thermo_data, init_reacts=AIR_FUEL_MIX, num_nodes=2),
+                                  promotes=['*'])
+            p.set_solver_print(level=-1)
+            p.setup(check=False)
+            p.run_model()
+            return p
+
+        p, expected = run(db), run(species_data.janaf)
+        for name in ('n', 'h', 'S', 'gamma', 'Cp', 'rho'):
+            assert_rel_error(self, p[name], expected[name], 1e-10)
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,83 @@
+import numpy as np
+
+from openmdao.api import Problem, Group, IndepVarComp
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.cea import species_data
+from pycycle.cea.chem_eq import ChemEq
+from pycycle.cea.set_total import SetTotal
+from pycycle.cea.set_static import SetStatic
+from pycycle.constants import AIR_MIX
+
+
+def run_chem_eq(mode, val, P, units, init_reacts=AIR_MIX, **options):
+    """runs a ChemEq of the janaf data with one node per value of val, options are passed to ChemEq"""
+    thermo = species_data.Thermo(species_data.janaf, init_reacts)
+
+    p = Problem(model=Group())
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output(mode, val, units=units)
+    indeps.add_output('P', P, units='bar')
+    p.model.add_subsystem('ceq', ChemEq(thermo=thermo, mode=mode, num_nodes=np.size(val), **options),
+                          promotes=['*'])
+    p.set_solver_print(level=-1)
+    p.setup(check=False)
+    p.run_model()
+
+    return p
+
+
+def run_set_total(mode, val, P, units, **options):
+    """runs a SetTotal of the janaf data with one node per value of val, options are passed to SetTotal"""
+    p = Problem()
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output(mode, val, units=units)
+    indeps.add_output('P', P, units='bar')
+    p.model.add_subsystem('set_total', SetTotal(thermo_data=species_data.janaf, mode=mode,
+                                                num_nodes=np.size(val), **options),
+                          promotes=['*'])
+    p.set_solver_print(level=-1)
+    p.setup(check=False, force_alloc_complex=True)
+    p.run_model()
+
+    return p
+
+
+def run_set_static(mode, val, units, T=(1500., 400.), P=(10., 1.5), W=(100., 20.), **options):
+    """runs a SetStatic of the janaf data fed by a SetTotal at T and P, options are passed to SetStatic"""
+    nn = np.size(val)
+
+    p = Problem()
+    indeps = p.model.add_subsystem('indeps', IndepVarComp(), promotes=['*'])
+    indeps.add_output('T', np.array(T), units='degK')
+    indeps.add_output('P', np.array(P), units='bar')
+    indeps.add_output('W', np.array(W), units='kg/s')
+    indeps.add_output(mode, val, units=units)
+
+    p.model.add_subsystem('set_total', SetTotal(thermo_data=species_data.janaf, num_nodes=nn))
+    set_static = p.model.add_subsystem('set_static', SetStatic(thermo_data=species_data.janaf, mode=mode,
+                                                               num_nodes=nn, **options))
+    if mode == 'area':
+        set_static.set_input_defaults('area', units=units)
+
+    p.model.connect('T', 'set_total.T')
+    p.model.connect('P', 'set_total.P')
+    p.model.connect('set_total.flow:S', 'set_static.S')
+    p.model.connect('set_total.flow:h', 'set_static.ht')
+    p.model.connect('W', 'set_static.W')
+    p.model.connect(mode, 'set_static.{}'.format(mode))
+    if mode != 'Ps':
+        p.model.connect('P', 'set_static.guess:Pt')
+        p.model.connect('set_total.flow:gamma', 'set_static.guess:gamt')
+
+    p.set_solver_print(level=-1)
+    p.setup(check=False, force_alloc_complex=True)
+    p.run_model()
+
+    return p
+
+
+def assert_match(testcase, actual, desired, names, tol):
+    """compares the named variables of two problems"""
+    for name in names:
+        assert_rel_error(testcase, actual[name], desired[name], tol)
@@ -0,0 +1,300 @@
+"""Thermo data sets stored as precompiled binary databases.
+
+A thermo data module like janaf is a python literal that is parsed and turned into dicts on import,
+which gets slow for large species sets. A ThermoDatabase holds the same data as a few flat arrays
+(fit coefficients, range bounds, molecular weights and the element matrix), stored as a directory
+of .npy files that are memory-mapped when loaded. It can be passed anywhere a thermo data module
+is used, and only the species a given mixture needs are ever turned into dicts.
+
+Databases are written from a thermo data module or from a NASA Glenn thermo.inp file, e.g.::
+
+    python -m pycycle.cea.thermo_db janaf janaf_db
+    python -m pycycle.cea.thermo_db thermo.inp nasa_glenn_db --species Ar CO CO2 N2 NO O O2
+"""
+import argparse
+import json
+import os
+
+from collections import OrderedDict
+from collections.abc import Mapping
+
+import numpy as np
+
+from pycycle import constants
+from pycycle.cea import species_data
+
+
+# stored with each database, bump it when the file layout changes
+DB_VERSION = 1
+
+# the NASA 9 coefficient fits are Cp0/R = sum(a_i*T**e_i), with these exponents
+FIT_EXPONENTS = (-2., -1., 0., 1., 2., 3., 4.)
+
+_databases = {}
+
+
+class Products(Mapping):
+    """read-only mapping of species name to product data, in the same layout as the products of
+    a thermo data module. The data of a species is only built the first time it is accessed."""
+
+    def __init__(self, db):
+        self._db = db
+        self._index = {name: i for i, name in enumerate(db.names)}
+        self._loaded = {}
+
+    def __getitem__(self, name):
+        if name not in self._loaded:
+            db = self._db
+            i = self._index[name]
+            nr = db.num_ranges[i]
+            self._loaded[name] = {
+                'coeffs': np.array(db.coeffs[i, :nr]),
+                'ranges': np.array(db.ranges[i, :nr+1]),
+                'wt': float(db.wt[i]),
+                'elements': OrderedDict((e, float(c)) for e, c in zip(db.elements, db.element_counts[i]) if c != 0),
+            }
+        return self._loaded[name]
+
+    def __contains__(self, name):
+        return name in self._index
+
+    def __iter__(self):
+        return iter(self._db.names)
+
+    def __len__(self):
+        return len(self._db.names)
+
+    def with_elements(self, elements):
+        """names of the species made up only of the given elements, in database order,
+        found from the element matrix without building the data of every species"""
+
+        other = [j for j, e in enumerate(self._db.elements) if e not in elements]
+        allowed = np.all(np.asarray(self._db.element_counts)[:, other] == 0, axis=1)
+        return [self._db.names[i] for i in np.nonzero(allowed)[0]]
+
+
+class ThermoDatabase(object):
+    """thermo data set held in flat arrays, with the same interface as a thermo data module
+    (products, element_wts, init_prod_amounts and reactants)"""
+
+    def __init__(self, name, names, coeffs, ranges, num_ranges, wt, elements, element_counts, element_wts,
+                 init_prod_amounts, reactants=None):
+
+        self.__name__ = name
+        self.names = [str(n) for n in names]
+        self.coeffs = coeffs  # num_species x max_ranges x 9, padded with zeros
+        self.ranges = ranges  # num_species x max_ranges+1, padded with inf
+        self.num_ranges = np.asarray(num_ranges)
+        self.wt = wt
+        self.elements = [str(e) for e in elements]
+        self.element_counts = element_counts  # num_species x num_elements
+        self.element_wts = {str(e): float(w) for e, w in dict(element_wts).items()}
+        self.init_prod_amounts = OrderedDict(init_prod_amounts)
+        self.reactants = {} if reactants is None else reactants
+
+        self.products = Products(self)
+
+    def __repr__(self):
+        return '<ThermoDatabase {} ({} species)>'.format(self.__name__, len(self.names))
+
+    @classmethod
+    def from_module(cls, thermo_data_module, name=None):
+        """pack the products of a thermo data module, e.g. janaf"""
+
+        prod_data = thermo_data_module.products
+        names = list(prod_data)
+        bounds, num_ranges, coeffs = species_data.pack_coeffs(prod_data, names)
+
+        elements = sorted(set().union(*(prod_data[p]['elements'] for p in names)))
+        element_counts = np.array([[prod_data[p]['elements'].get(e, 0) for e in elements] for p in names],
+                                  dtype=float)
+
+        return cls(thermo_data_module.__name__ if name is None else name, names, coeffs[:, :, :9], bounds,
+                   num_ranges, np.array([prod_data[p]['wt'] for p in names], dtype=float), elements,
+                   element_counts, {e: thermo_data_module.element_wts[e] for e in elements},
+                   thermo_data_module.init_prod_amounts, getattr(thermo_data_module, 'reactants', None))
+
+    def save(self, dirname):
+        """one .npy file per array, so the database can be memory-mapped by load"""
+
+        os.makedirs(dirname, exist_ok=True)
+        arrays = {
+            'names': np.array(self.names),
+            'coeffs': np.asarray(self.coeffs, dtype=float),
+            'ranges': np.asarray(self.ranges, dtype=float),
+            'num_ranges': np.asarray(self.num_ranges, dtype=int),
+            'wt': np.asarray(self.wt, dtype=float),
+            'elements': np.array(self.elements),
+            'element_counts': np.asarray(self.element_counts, dtype=float),
+            'element_wts': np.array([self.element_wts[e] for e in self.elements], dtype=float),
+        }
+        for name, val in arrays.items():
+            np.save(os.path.join(dirname, name + '.npy'), val)
+
+        meta = {'version': DB_VERSION, 'name': self.__name__,
+                'init_prod_amounts': list(self.init_prod_amounts.items()),
+                'reactants': {name: list(amounts.items()) for name, amounts in self.reactants.items()}}
+        with open(os.path.join(dirname, 'meta.json'), 'w') as f:
+            json.dump(meta, f, indent=1)
+
+    @classmethod
+    def load(cls, dirname, mmap_mode='r'):
+        with open(os.path.join(dirname, 'meta.json')) as f:
+            meta = json.load(f)
+        if meta['version'] != DB_VERSION:
+            raise ValueError('{} is a version {} thermo database, expected version {}'
+                             .format(dirname, meta['version'], DB_VERSION))
+
+        def load(name):
+            return np.load(os.path.join(dirname, name + '.npy'), mmap_mode=mmap_mode)
+
+        elements = load('elements')
+        return cls(meta['name'], load('names'), load('coeffs'), load('ranges'), load('num_ranges'), load('wt'),
+                   elements, load('element_counts'), zip(elements, load('element_wts')),
+                   meta['init_prod_amounts'],
+                   {name: OrderedDict(amounts) for name, amounts in meta['reactants'].items()})
+
+
+def load_thermo_db(dirname):
+    """database stored in dirname, loaded once per process so every Thermo built from it is shared
+    through species_data.get_thermo"""
+
+    key = os.path.realpath(dirname)
+    if key not in _databases:
+        _databases[key] = ThermoDatabase.load(dirname)
+    return _databases[key]
+
+
+def _fortran_floats(line, width, count):
+    """fixed width fields of a record, blank fields are zero"""
+    fields = [line[i*width:(i+1)*width].strip().replace('D', 'E').replace('d', 'e') for i in range(count)]
+    return [float(f) if f else 0. for f in fields]
+
+
+def read_thermo_inp(filename, species=None, element_wts=None, init_prod_amounts=None, name=None):
+    """ThermoDatabase from the gas phase products of a NASA Glenn thermo.inp file
+    (McBride, Zehe and Gordon, NASA TP-2002-211556, appendix A).
+
+    Condensed species, and species only given at a single temperature, are skipped since the
+    equilibrium solve is gas phase only. species limits the database to the named products.
+    The file does not contain atomic weights, so unless element_wts is given they are solved
+    for from the molecular weights of the species. The default init_prod_amounts is AIR_MIX."""
+
+    with open(filename) as f:
+        lines = [line.rstrip('\n') for line in f if line.strip() and line[0] not in '!#']
+
+    names, coeffs, ranges, wt, counts = [], [], [], [], []
+
+    i = 0
+    while i < len(lines):
+        line = lines[i]
+        keyword = line.strip().lower()
+        if keyword == 'thermo':
+            i += 2  # the next record holds the default temperature ranges
+            continue
+        if keyword.startswith('end'):  # reactants follow the products, they are not used
+            break
+
+        # record 1 has the name in columns 1-24 and comments after it,
+        # record 2 is (I2, 1X, A6, 1X, 5(A2, F6.2), I2, F13.5, F15.3)
+        species_name = line[:24].split()[0]
+        num_intervals = int(lines[i+1][:2])
+        formula = lines[i+1][10:50]
+        phase = int(lines[i+1][50:52].strip() or 0)
+        mol_wt = float(lines[i+1][52:65])
+
+        if num_intervals == 0:  # one temperature record, no fit
+            i += 3
+            continue
+        records = lines[i+2:i+2+3*num_intervals]
+        i += 2 + 3*num_intervals
+
+        if phase != 0 or (species is not None and species_name not in species):
+            continue
+
+        elements = OrderedDict()
+        for k in range(5):
+            symbol = formula[8*k:8*k+2].strip()
+            count = formula[8*k+2:8*k+8].strip()
+            if symbol and count and float(count) != 0:
+                elements[symbol.capitalize()] = float(count)
+
+        bounds, fits = [], []
+        for k in range(num_intervals):
+            # records 3 to 5 are (2F11.3, I1, 8F5.1, 2X, F15.3), (5D16.8) and (2D16.8, 16X, 2D16.8)
+            T_range, fit_1, fit_2 = records[3*k:3*k+3]
+            T_low, T_high = _fortran_floats(T_range, 11, 2)
+            num_coeffs = int(T_range[22])
+            exponents = tuple(_fortran_floats(T_range[23:63], 5, 8))
+            if num_coeffs != 7 or exponents[:7] != FIT_EXPONENTS:
+                raise ValueError('{}: species {} uses an unsupported fit, only the standard 7 coefficient '
+                                 'NASA polynomials are supported'.format(filename, species_name))
+            if bounds and bounds[-1] != T_low:
+                raise ValueError('{}: the temperature ranges of species {} are not contiguous'
+                                 .format(filename, species_name))
+
+            a = _fortran_floats(fit_1, 16, 5) + _fortran_floats(fit_2, 16, 2)
+            b = _fortran_floats(fit_2[48:], 16, 2)
+            bounds = (bounds or [T_low]) + [T_high]
+            fits.append(a + b)
+
+        names.append(species_name)
+        ranges.append(bounds)
+        coeffs.append(fits)
+        wt.append(mol_wt)
+        counts.append(elements)
+
+    if species is not None:
+        missing = set(species).difference(names)
+        if missing:
+            raise ValueError('{}: species {} not found'.format(filename, sorted(missing)))
+
+    elements = sorted(set().union(*counts))
+    element_counts = np.array([[c.get(e, 0.) for e in elements] for c in counts])
+    wt = np.array(wt)
+
+    if element_wts is None:
+        # molecular weights are the sum of the atomic weights
+        if np.linalg.matrix_rank(element_counts) < len(elements):
+            raise ValueError('{}: the atomic weights can not be found from the species, '
+                             'element_wts must be given'.format(filename))
+        element_wts = dict(zip(elements, np.linalg.lstsq(element_counts, wt, rcond=None)[0]))
+
+    max_ranges = max(len(fits) for fits in coeffs)
+    packed_coeffs = np.zeros((len(names), max_ranges, 9))
+    packed_ranges = np.full((len(names), max_ranges + 1), np.inf)
+    for k, (fits, bounds) in enumerate(zip(coeffs, ranges)):
+        packed_coeffs[k, :len(fits)] = fits
+        packed_ranges[k, :len(bounds)] = bounds
+
+    if init_prod_amounts is None:
+        init_prod_amounts = OrderedDict((p, amount) for p, amount in constants.AIR_MIX.items() if p in names)
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(filename))[0]
+
+    return ThermoDatabase(name, names, packed_coeffs, packed_ranges, [len(fits) for fits in coeffs], wt,
+                          elements, element_counts, element_wts, init_prod_amounts)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='precompile a thermo data set into a binary thermo database')
+    parser.add_argument('source', help='NASA Glenn thermo.inp file, or thermo data set in '
+                                       'pycycle.cea.species_data, e.g. janaf')
+    parser.add_argument('output', help='directory to write the database to')
+    parser.add_argument('--species', nargs='+', help='only keep these products of a thermo.inp file')
+    options = parser.parse_args(args)
+
+    if os.path.isfile(options.source):
+        db = read_thermo_inp(options.source, species=options.species)
+    else:
+        if options.species is not None:
+            parser.error('--species is only supported for thermo.inp files')
+        db = ThermoDatabase.from_module(getattr(species_data, options.source))
+
+    db.save(options.output)
+    print('wrote {} species to {}'.format(len(db.names), options.output))
+
+
+if __name__ == '__main__':
+    main()
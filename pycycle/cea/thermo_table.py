@@ -0,0 +1,251 @@
+"""Tabulated equilibrium properties of a fixed mixture, generated from the CEA path (ChemEq + Properties).
+
+Tables are stored on a (P, T) grid and interpolated with bicubic splines in (ln(P), T),
+which gives smooth values and analytic derivatives for the TABULAR thermo method of SetTotal.
+They can be generated from the command line, e.g.::
+
+    python -m pycycle.cea.thermo_table janaf AIR_MIX -o air_mix.npz --report
+
+Generated tables are cached on disk (in $PYCYCLE_CACHE_DIR, ~/.cache/pycycle by default) under a
+hash of the thermo data, the mixture and the grid, and are memory-mapped when loaded again.
+Changing any of those gives a new hash, so stale tables are never picked up.
+"""
+import argparse
+import hashlib
+import os
+import shutil
+import sys
+import tempfile
+
+import numpy as np
+from scipy.interpolate import RectBivariateSpline
+
+import openmdao.api as om
+
+from pycycle import constants
+from pycycle.utils import default_cache_dir
+from pycycle.cea import species_data
+
+
+# default grid, covers the inlet to turbine exit conditions of the example cycles
+DEFAULT_P = np.geomspace(0.01, 100., 41)  # bar
+DEFAULT_T = np.linspace(150., 2550., 97)  # degK
+
+# scalar properties held in a table, besides the species concentrations n
+TABLE_PROPS = ('n_moles', 'h', 'S', 'Cp', 'Cv', 'gamma')
+
+# part of the cache key, bump it when the way tables are generated changes
+TABLE_VERSION = 1
+
+_tables = {}
+
+
+class ThermoTable(object):
+    """equilibrium properties of one mixture on a (P, T) grid"""
+
+    def __init__(self, P, T, data, init_prod_amounts):
+
+        self.P = np.asarray(P, dtype=float)
+        self.T = np.asarray(T, dtype=float)
+        self.data = data
+        self.init_prod_amounts = np.asarray(init_prod_amounts, dtype=float)
+        self.num_prod = data['n'].shape[-1]
+
+        if self.P.size < 4 or self.T.size < 4:
+            raise ValueError('a thermo table needs at least 4 pressures and 4 temperatures for cubic splines')
+
+        lnP = np.log(self.P)
+        self._splines = {name: RectBivariateSpline(lnP, self.T, data[name]) for name in TABLE_PROPS}
+        self._splines['n'] = [RectBivariateSpline(lnP, self.T, data['n'][:, :, j])
+                              for j in range(self.num_prod)]
+
+    def evaluate(self, name, P, T, dlnP=0, dT=0):
+        """value (or derivative w.r.t. ln(P) and T) of a property at the given pressures [bar]
+        and temperatures [degK]. Points outside the grid are clamped to its edges,
+        TabularThermo rejects them before evaluating.
+        Complex inputs are evaluated to first order in their imaginary part, for complex step."""
+
+        lnP = np.log(P)
+        if np.iscomplexobj(lnP) or np.iscomplexobj(T):
+            lnP, T = np.broadcast_arrays(lnP, T)
+            val = self.evaluate(name, np.exp(lnP.real), T.real, dlnP, dT)
+            val_P = self.evaluate(name, np.exp(lnP.real), T.real, dlnP+1, dT)
+            val_T = self.evaluate(name, np.exp(lnP.real), T.real, dlnP, dT+1)
+            if name == 'n':
+                return val + 1j*(val_P*lnP.imag[:, np.newaxis] + val_T*T.imag[:, np.newaxis])
+            return val + 1j*(val_P*lnP.imag + val_T*T.imag)
+
+        if name == 'n':
+            return np.array([s.ev(lnP, T, dx=dlnP, dy=dT) for s in self._splines['n']]).T
+        return self._splines[name].ev(lnP, T, dx=dlnP, dy=dT)
+
+    def save(self, filename):
+        np.savez(filename, P=self.P, T=self.T, init_prod_amounts=self.init_prod_amounts, **self.data)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as f:
+            data = {name: f[name] for name in TABLE_PROPS + ('n',)}
+            return cls(f['P'], f['T'], data, f['init_prod_amounts'])
+
+    def save_npy(self, dirname):
+        """one .npy file per array, so the table can be memory-mapped by load_npy"""
+        arrays = dict(self.data, P=self.P, T=self.T, init_prod_amounts=self.init_prod_amounts)
+        for name, val in arrays.items():
+            np.save(os.path.join(dirname, name + '.npy'), val)
+
+    @classmethod
+    def load_npy(cls, dirname, mmap_mode='r'):
+        def load(name):
+            return np.load(os.path.join(dirname, name + '.npy'), mmap_mode=mmap_mode)
+
+        data = {name: load(name) for name in TABLE_PROPS + ('n',)}
+        return cls(load('P'), load('T'), data, load('init_prod_amounts'))
+
+
+def run_cea(thermo_data, init_reacts, P, T):
+    """equilibrium properties from the CEA path at every (P, T) pair, one SetTotal node per point"""
+    from pycycle.cea.set_total import SetTotal
+
+    P, T = np.broadcast_arrays(np.asarray(P, dtype=float), np.asarray(T, dtype=float))
+    nn = P.size
+
+    p = om.Problem()
+    p.model = SetTotal(thermo_data=thermo_data, init_reacts=init_reacts, mode='T', num_nodes=nn)
+    indeps = p.model.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
+    indeps.add_output('T', T.ravel(), units='degK')
+    indeps.add_output('P', P.ravel(), units='bar')
+
+    p.set_solver_print(level=-1)
+    p.setup(check=False)
+    p.run_model()
+
+    data = {name: p.get_val(name).reshape(P.shape).copy() for name in TABLE_PROPS}
+    data['n'] = p.get_val('n').reshape(P.shape + (-1,)).copy()
+    return data, p.get_val('init_prod_amounts').reshape((nn, -1))[0]
+
+
+def generate_thermo_table(thermo_data, init_reacts=constants.AIR_MIX, P=DEFAULT_P, T=DEFAULT_T):
+    """run the CEA path over the grid, one pressure at a time"""
+
+    rows = [run_cea(thermo_data, init_reacts, P_i, T) for P_i in P]
+
+    data = {name: np.array([r[0][name] for r in rows]) for name in TABLE_PROPS + ('n',)}
+    return ThermoTable(P, T, data, rows[0][1])
+
+
+def table_key(thermo_data, init_reacts, P, T):
+    """hash of everything a generated table depends on"""
+
+    products = [(name, np.asarray(prod['coeffs'], dtype=float).tolist(),
+                 np.asarray(prod['ranges'], dtype=float).tolist(), float(prod['wt']),
+                 sorted(prod['elements'].items()))
+                for name, prod in thermo_data.products.items()]
+    content = repr((TABLE_VERSION, thermo_data.__name__, products, sorted(thermo_data.element_wts.items()),
+                    sorted(init_reacts.items()),
+                    np.asarray(P, dtype=float).tolist(), np.asarray(T, dtype=float).tolist()))
+
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get_thermo_table(thermo_data, init_reacts=constants.AIR_MIX, P=DEFAULT_P, T=DEFAULT_T, cache_dir=None):
+    """generate a table once per process for each thermo data set, mixture and grid,
+    and once per cache directory when cache_dir is not False"""
+
+    key = table_key(thermo_data, init_reacts, P, T)
+    if key in _tables:
+        return _tables[key]
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir('thermo_tables')
+
+    table = None
+    if cache_dir:
+        path = os.path.join(cache_dir, key)
+        if os.path.isdir(path):
+            try:
+                table = ThermoTable.load_npy(path)
+            except (OSError, ValueError):  # incomplete or corrupted entry, regenerate it
+                shutil.rmtree(path, ignore_errors=True)
+
+    if table is None:
+        table = generate_thermo_table(thermo_data, init_reacts, P, T)
+
+        if cache_dir:
+            # write to a temporary directory first, so other processes never see a partial entry
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                tmp_path = tempfile.mkdtemp(dir=cache_dir, prefix='.tmp')
+                table.save_npy(tmp_path)
+                try:
+                    os.rename(tmp_path, path)
+                except OSError:  # another process stored the same table first
+                    shutil.rmtree(tmp_path, ignore_errors=True)
+            except OSError:  # caching is optional, e.g. on a read-only file system
+                pass
+
+    _tables[key] = table
+    return table
+
+
+def accuracy_report(table, thermo_data, init_reacts=constants.AIR_MIX, file=sys.stdout):
+    """compares the table against the CEA path at the center of every grid cell,
+    and returns the largest relative error of each property"""
+
+    P_mid = np.sqrt(table.P[1:]*table.P[:-1])
+    T_mid = .5*(table.T[1:] + table.T[:-1])
+    P, T = np.meshgrid(P_mid, T_mid, indexing='ij')
+
+    cea = run_cea(thermo_data, init_reacts, P, T)[0]
+
+    errors = {}
+    for name in TABLE_PROPS:
+        tab = table.evaluate(name, P.ravel(), T.ravel()).reshape(P.shape)
+        errors[name] = np.max(np.abs(tab - cea[name])/np.abs(cea[name]))
+
+    # trace species are meaningless in a relative sense, so compare mole fractions instead
+    tab = table.evaluate('n', P.ravel(), T.ravel()) / table.evaluate('n_moles', P.ravel(), T.ravel())[:, np.newaxis]
+    ref = cea['n'].reshape((-1, table.num_prod)) / cea['n_moles'].reshape((-1, 1))
+    errors['mole fractions'] = np.max(np.abs(tab - ref))
+
+    print('thermo table accuracy vs CEA at %d cell centers' % P.size, file=file)
+    print('  P: %g - %g bar, T: %g - %g degK' % (table.P[0], table.P[-1], table.T[0], table.T[-1]), file=file)
+    for name, err in errors.items():
+        kind = 'max abs error' if name == 'mole fractions' else 'max rel error'
+        print('  {:<16}{}: {:.3e}'.format(name, kind, err), file=file)
+
+    return errors
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description='generate an equilibrium thermo table for SetTotal(thermo_method="TABULAR")')
+    parser.add_argument('thermo_data', help='thermo data set in pycycle.cea.species_data, e.g. janaf')
+    parser.add_argument('init_reacts', help='mixture in pycycle.constants, e.g. AIR_MIX')
+    parser.add_argument('-o', '--output', help='.npz file to write')
+    parser.add_argument('--cache', action='store_true',
+                        help='store the table in the on-disk cache used by SetTotal, '
+                             'so later processes load it instead of generating it')
+    parser.add_argument('--P', nargs=3, type=float, metavar=('MIN', 'MAX', 'NUM'),
+                        help='pressure grid in bar (geometric spacing)')
+    parser.add_argument('--T', nargs=3, type=float, metavar=('MIN', 'MAX', 'NUM'),
+                        help='temperature grid in degK (linear spacing)')
+    parser.add_argument('--report', action='store_true', help='print the accuracy against the CEA path')
+    options = parser.parse_args(args)
+    if options.output is None and not options.cache:
+        parser.error('at least one of --output or --cache is required')
+
+    thermo_data = getattr(species_data, options.thermo_data)
+    init_reacts = getattr(constants, options.init_reacts)
+    P = DEFAULT_P if options.P is None else np.geomspace(options.P[0], options.P[1], int(options.P[2]))
+    T = DEFAULT_T if options.T is None else np.linspace(options.T[0], options.T[1], int(options.T[2]))
+
+    table = get_thermo_table(thermo_data, init_reacts, P, T, cache_dir=None if options.cache else False)
+    if options.output is not None:
+        table.save(options.output)
+
+    if options.report:
+        accuracy_report(table, thermo_data, init_reacts)
+
+
+if __name__ == '__main__':
+    main()
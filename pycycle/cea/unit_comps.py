@@ -1,7 +1,12 @@
 import inspect
+from collections import OrderedDict
+
 import numpy as np
 
 from openmdao.api import ExplicitComponent
+from openmdao.utils.units import unit_conversion
+
+from pycycle.cea.utils import node_shape
 
 _full_out_args = inspect.getfullargspec(ExplicitComponent.add_output)
 _allowed_out_args = set(_full_out_args.args[3:] + _full_out_args.kwonlyargs)
@@ -9,12 +14,13 @@ _allowed_out_args = set(_full_out_args.args[3:] + _full_out_args.kwonlyargs)
 
 class UnitCompBase(ExplicitComponent):
 
-    def __init__(self, thermo, fl_name):
+    def __init__(self, thermo, fl_name, num_nodes=1):
 
         super(UnitCompBase, self).__init__()
 
         self.thermo = thermo
         self.fl_name = fl_name
+        self.num_nodes = num_nodes
 
     def setup(self):
         rel2meta = self._var_rel2meta
@@ -54,18 +60,19 @@ class EngUnitProps(UnitCompBase):
     def setup(self):
 
         thermo = self.thermo
-
-        self.add_input('T', val=284., units="degR", desc="Temperature")
-        self.add_input('P', val=1., units='lbf/inch**2', desc="Pressure")
-        self.add_input('h', val=1., units="Btu/lbm", desc="enthalpy")
-        self.add_input('S', val=1., units="Btu/(lbm*degR)", desc="entropy")
-        self.add_input('gamma', val=1.4, desc="ratio of specific heats")
-        self.add_input('Cp', val=1., units="Btu/(lbm*degR)", desc="Specific heat at constant pressure")
-        self.add_input('Cv', val=1., units="Btu/(lbm*degR)", desc="Specific heat at constant volume")
-        self.add_input('rho', val=1., units="lbm/ft**3", desc="density")
-        self.add_input('n', val=np.ones(thermo.num_prod))
-        self.add_input('n_moles', val=1.)
-        self.add_input('R', val=1.0, units="Btu/(lbm*degR)", desc='Total specific gas constant')
+        nn = self.num_nodes
+
+        self.add_input('T', val=284., shape=nn, units="degR", desc="Temperature")
+        self.add_input('P', val=1., shape=nn, units='lbf/inch**2', desc="Pressure")
+        self.add_input('h', val=1., shape=nn, units="Btu/lbm", desc="enthalpy")
+        self.add_input('S', val=1., shape=nn, units="Btu/(lbm*degR)", desc="entropy")
+        self.add_input('gamma', val=1.4, shape=nn, desc="ratio of specific heats")
+        self.add_input('Cp', val=1., shape=nn, units="Btu/(lbm*degR)", desc="Specific heat at constant pressure")
+        self.add_input('Cv', val=1., shape=nn, units="Btu/(lbm*degR)", desc="Specific heat at constant volume")
+        self.add_input('rho', val=1., shape=nn, units="lbm/ft**3", desc="density")
+        self.add_input('n', val=np.ones(node_shape(nn, thermo.num_prod)))
+        self.add_input('n_moles', val=1., shape=nn)
+        self.add_input('R', val=1.0, shape=nn, units="Btu/(lbm*degR)", desc='Total specific gas constant')
 
         super(EngUnitProps, self).setup()
 
@@ -73,16 +80,90 @@ class EngUnitProps(UnitCompBase):
 class EngUnitStaticProps(UnitCompBase):
 
     def setup(self):
+        nn = self.num_nodes
 
-        self.add_input('area', val=1.0, units="inch**2")
-        self.add_input('W', val=1.0, units="lbm/s")
-        self.add_input('V', val=1.0, units="ft/s")
-        self.add_input('Vsonic', val=1.0, units="ft/s")
-        self.add_input('MN', val=0.5)
+        self.add_input('area', val=1.0, shape=nn, units="inch**2")
+        self.add_input('W', val=1.0, shape=nn, units="lbm/s")
+        self.add_input('V', val=1.0, shape=nn, units="ft/s")
+        self.add_input('Vsonic', val=1.0, shape=nn, units="ft/s")
+        self.add_input('MN', val=0.5, shape=nn)
 
         super(EngUnitStaticProps, self).setup()
 
 
+# units of the flow station variables, None for dimensionless ones
+FLOW_UNITS = OrderedDict([('T', 'degR'), ('P', 'lbf/inch**2'), ('h', 'Btu/lbm'), ('S', 'Btu/(lbm*degR)'),
+                          ('gamma', None), ('Cp', 'Btu/(lbm*degR)'), ('Cv', 'Btu/(lbm*degR)'), ('rho', 'lbm/ft**3'),
+                          ('n', None), ('n_moles', None), ('R', 'Btu/(lbm*degR)')])
+STATIC_FLOW_UNITS = OrderedDict([('area', 'inch**2'), ('W', 'lbm/s'), ('V', 'ft/s'), ('Vsonic', 'ft/s'),
+                                 ('MN', None)])
+
+
+def unit_scale(units, eng_units):
+    """factor and offset from units to eng_units, eng = (val + offset)*factor"""
+    if units is None or eng_units is None:
+        return 1., 0.
+    return unit_conversion(units, eng_units)
+
+
+class EngUnitOutputs(object):
+    """publishes variables of an ExplicitComponent as '<fl_name>:<name>' outputs in english units,
+    so the component does the job of EngUnitProps without an extra component and its connections.
+
+    setup must be called at the end of the component's setup, after its partials are declared, and
+    compute and compute_partials at the end of the component's. The partials of a published output
+    are those of its source scaled by the unit conversion factor, a published input gets a constant
+    diagonal partial."""
+
+    def __init__(self, comp, fl_name, units, sources=None):
+        self.comp = comp
+        self.fl_name = fl_name
+        self.units = units
+        self.sources = {} if sources is None else sources  # variables that are published under another name
+        self._scales = OrderedDict()
+        self._chained = []
+
+    def setup(self):
+        comp = self.comp
+        meta = comp._var_rel2meta
+
+        for name, eng_units in self.units.items():
+            src = self.sources.get(name, name)
+            src_meta = meta[src]
+            factor, offset = unit_scale(src_meta['units'], eng_units)
+            out_name = '{0}:{1}'.format(self.fl_name, name)
+            self._scales[out_name] = (src, factor, offset)
+
+            comp.add_output(out_name, val=(src_meta['val'] + offset)*factor, shape=src_meta['shape'],
+                            units=eng_units, desc=src_meta['desc'])
+            if src in comp._var_rel_names['input']:
+                ar = np.arange(np.prod(src_meta['shape']))
+                comp.declare_partials(out_name, src, val=factor, rows=ar, cols=ar)
+
+        # published outputs depend on whatever their sources depend on, with the same sparsity
+        for (of, wrt), dec in list(comp._declared_partials.items()):
+            if not dec.get('dependent', True):
+                continue
+            for src in (of,) if isinstance(of, str) else of:
+                for out_name, (out_src, factor, offset) in self._scales.items():
+                    if out_src != src or out_name == src:
+                        continue
+                    val = dec.get('val')
+                    for w in (wrt,) if isinstance(wrt, str) else wrt:
+                        comp.declare_partials(out_name, w, val=None if val is None else factor*val,
+                                              rows=dec.get('rows'), cols=dec.get('cols'))
+                        self._chained.append((out_name, w, src, factor))
+
+    def compute(self, inputs, outputs):
+        for out_name, (src, factor, offset) in self._scales.items():
+            val = outputs[src] if src in outputs else inputs[src]
+            outputs[out_name] = (val + offset)*factor
+
+    def compute_partials(self, inputs, J):
+        for out_name, wrt, src, factor in self._chained:
+            J[out_name, wrt] = factor*J[src, wrt]
+
+
 if __name__ == "__main__":
 
     from openmdao.api import Problem, Group, IndepVarComp
@@ -0,0 +1,18 @@
+import numpy as np
+
+
+def node_shape(num_nodes, size):
+    """shape of a vector variable that carries a leading node dimension when num_nodes > 1"""
+    if num_nodes > 1:
+        return (num_nodes, size)
+    return (size,)
+
+
+def block_diag_pattern(num_nodes, num_rows, num_cols):
+    """rows/cols of a block diagonal sub-jacobian made of dense (num_rows x num_cols) node blocks.
+    Values are ordered like an array of shape (num_nodes, num_rows, num_cols)"""
+    node, row, col = np.indices((num_nodes, num_rows, num_cols))
+    rows = (node * num_rows + row).ravel()
+    cols = (node * num_cols + col).ravel()
+    return rows, cols
+
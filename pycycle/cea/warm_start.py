@@ -0,0 +1,89 @@
+"""
+Warm start memory for the chemical equilibrium solve.
+
+ChemEq restarts a node from the uniform n_init whenever its residual is large, which throws
+away every converged state it has seen. A WarmStartCache keeps a bounded number of converged
+states (n, pi and T) per thermo mixture and ChemEq mode, keyed on the thermodynamic inputs of
+the node, and hands back the nearest one instead. In off-design sweeps consecutive points are
+close together, so the nearest stored state is usually only a few Newton steps away.
+
+The caches are shared by every ChemEq in the process that uses the same Thermo object, and are
+dropped along with it. Entries are evicted least recently used first.
+"""
+import weakref
+
+import numpy as np
+
+
+_warm_start_caches = weakref.WeakKeyDictionary()
+
+
+class WarmStartCache(object):
+    """ bounded least recently used store of converged equilibrium states, looked up by the
+    nearest neighbour of a feature vector """
+
+    def __init__(self, size):
+        self.size = size
+        self.count = 0
+        self._clock = 0
+        self._x = None
+        self._states = None
+        self._stamp = np.zeros(size, dtype=int)
+
+    def lookup(self, x):
+        """ nearest stored state for each row of x, or None if nothing is stored yet """
+        if self.count == 0:
+            return None
+
+        x = np.atleast_2d(x.real)
+        dist = np.sum((x[:, np.newaxis, :] - self._x[np.newaxis, :self.count])**2, axis=-1)
+        idx = np.argmin(dist, axis=1)
+
+        self._clock += 1
+        self._stamp[idx] = self._clock
+        return self._states[idx].copy()
+
+    def store(self, x, states):
+        """ adds each row of states under the matching row of x, replacing an entry stored for the
+        same inputs or, once the cache is full, the least recently used one """
+        x = np.atleast_2d(x.real)
+        states = np.atleast_2d(states.real)
+
+        if self._x is None:
+            self._x = np.empty((self.size, x.shape[1]))
+            self._states = np.empty((self.size, states.shape[1]))
+
+        for xi, si in zip(x, states):
+            self._clock += 1
+
+            j = None
+            if self.count > 0:
+                dist = np.sum((self._x[:self.count] - xi)**2, axis=1)
+                j = np.argmin(dist)
+                if dist[j] > 1e-20:
+                    j = None
+            if j is None:
+                if self.count < self.size:
+                    j = self.count
+                    self.count += 1
+                else:
+                    j = np.argmin(self._stamp[:self.count])
+
+            self._x[j] = xi
+            self._states[j] = si
+            self._stamp[j] = self._clock
+
+    def clear(self):
+        self.count = 0
+
+
+def get_warm_start_cache(thermo, mode, size):
+    """WarmStartCache for a Thermo object and ChemEq mode, shared by every caller in the process.
+    A request for a larger size than the existing cache replaces it."""
+
+    caches = _warm_start_caches.setdefault(thermo, {})
+    cache = caches.get(mode)
+    if cache is None or cache.size < size:
+        cache = caches[mode] = WarmStartCache(size)
+
+    return cache
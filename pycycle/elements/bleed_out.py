@@ -1,7 +1,7 @@
 """ Class definition for a BleedOut."""
 
 import numpy as np
-from collections import Iterable
+from collections.abc import Iterable
 
 import openmdao.api as om 
 
@@ -101,7 +101,7 @@ class BleedOut(om.Group):
         design = self.options['design']
         bleeds = self.options['bleed_names']
 
-        gas_thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        gas_thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         gas_prods = gas_thermo.products
         num_prod = len(gas_prods)
 
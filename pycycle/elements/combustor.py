@@ -6,7 +6,7 @@ import openmdao.api as om
 
 from pycycle.cea.set_total import SetTotal
 from pycycle.cea.set_static import SetStatic
-from pycycle.cea.species_data import Thermo, janaf
+from pycycle.cea.species_data import get_thermo, janaf
 from pycycle.constants import AIR_FUEL_MIX, AIR_MIX
 from pycycle.elements.duct import PressureLoss
 from pycycle.flow_in import FlowIn
@@ -34,18 +34,20 @@ class MixFuel(om.ExplicitComponent):
         self.mixed_elements = inflow_elements.copy()
         self.mixed_elements.update(janaf.reactants[fuel_type])
 
-        inflow_thermo = Thermo(thermo_data, init_reacts=inflow_elements)
+        inflow_thermo = get_thermo(thermo_data, init_reacts=inflow_elements)
         self.inflow_prods = inflow_thermo.products
         self.inflow_num_prods = len(self.inflow_prods)
         self.inflow_wt_mole = inflow_thermo.wt_mole
 
-        air_fuel_thermo = Thermo(thermo_data, init_reacts=self.mixed_elements)
+        air_fuel_thermo = get_thermo(thermo_data, init_reacts=self.mixed_elements)
         self.air_fuel_prods = air_fuel_thermo.products
         self.air_fuel_wt_mole = air_fuel_thermo.wt_mole
 
         self.num_prod = n_prods = len(self.air_fuel_prods)
 
-        self.init_air_amounts = np.zeros(n_prods)
+        # real and complex workspaces, compute switches between them by reference
+        self._init_air_amounts_real = self.init_air_amounts = np.zeros(n_prods)
+        self._init_air_amounts_complex = np.zeros(n_prods, dtype=complex)
         self.init_fuel_amounts = np.zeros(n_prods)
         self.init_fuel_amounts_base = np.zeros(n_prods)
 
@@ -83,9 +85,9 @@ class MixFuel(om.ExplicitComponent):
         Fl_I_tot_n = inputs['Fl_I:tot:n']
 
         if inputs._under_complex_step:
-            self.init_air_amounts = self.init_air_amounts.astype(np.complex)
+            self.init_air_amounts = self._init_air_amounts_complex
         else:
-            self.init_air_amounts = self.init_air_amounts.real
+            self.init_air_amounts = self._init_air_amounts_real
 
         # copy the incoming flow into a correctly sized array for the outflow composition
         for i, j in enumerate(self.in_out_flow_idx_map):
@@ -210,10 +212,10 @@ class Combustor(om.Group):
         statics = self.options['statics']
         fuel_type = self.options['fuel_type']
 
-        air_fuel_thermo = Thermo(thermo_data, init_reacts=air_fuel_elements)
+        air_fuel_thermo = get_thermo(thermo_data, init_reacts=air_fuel_elements)
         self.air_fuel_prods = air_fuel_thermo.products
 
-        air_thermo = Thermo(thermo_data, init_reacts=inflow_elements)
+        air_thermo = get_thermo(thermo_data, init_reacts=inflow_elements)
         self.air_prods = air_thermo.products
 
         self.num_air_fuel_prod = len(self.air_fuel_prods)
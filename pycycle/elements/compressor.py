@@ -401,6 +401,11 @@ class Compressor(om.Group):
                               desc='Method to use for map interpolation. \
                               Options are `slinear`, `cubic`, `quintic`.')
         self.options.declare('map_extrap', default=False, desc='Switch to allow extrapoloation off map')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
 
 
 
@@ -423,8 +428,10 @@ class Compressor(om.Group):
         thermo_data = self.options['thermo_data']
         elements = self.options['elements']
         statics = self.options['statics']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
 
-        thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         num_prod = thermo.num_prod
 
         # Create inlet flow station
@@ -450,7 +457,8 @@ class Compressor(om.Group):
         # Calculate ideal flow station properties
         self.add_subsystem('ideal_flow', SetTotal(thermo_data=thermo_data,
                                                   mode='S',
-                                                  init_reacts=elements),
+                                                  init_reacts=elements,
+                                                  thermo_method=thermo_method, units_method=units_method),
                            promotes_inputs=[('S', 'Fl_I:tot:S'),
                                             ('init_prod_amounts',
                                              'Fl_I:tot:n')])
@@ -463,7 +471,8 @@ class Compressor(om.Group):
 
         # Calculate real flow station properties
         real_flow = SetTotal(thermo_data=thermo_data, mode='h',
-                             init_reacts=elements, fl_name="Fl_O:tot")
+                             init_reacts=elements, fl_name="Fl_O:tot",
+                             thermo_method=thermo_method, units_method=units_method)
         self.add_subsystem('real_flow', real_flow,
                            promotes_inputs=[
                                ('init_prod_amounts', 'Fl_I:tot:n')],
@@ -500,7 +509,8 @@ class Compressor(om.Group):
 
             bleed_names.append(BN + '_flow')
             bleed_flow = SetTotal(thermo_data=thermo_data, mode='h',
-                                  init_reacts=elements, fl_name=BN + ":tot")
+                                  init_reacts=elements, fl_name=BN + ":tot",
+                                  thermo_method=thermo_method, units_method=units_method)
             self.add_subsystem(BN + '_flow', bleed_flow,
                                promotes_inputs=[
                                    ('init_prod_amounts', 'Fl_I:tot:n')],
@@ -516,7 +526,7 @@ class Compressor(om.Group):
                 #   Calculate static properties
                 out_stat = SetStatic(
                     mode='MN', thermo_data=thermo_data, init_reacts=elements,
-                    fl_name="Fl_O:stat")
+                    fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method)
                 self.add_subsystem('out_stat', out_stat,
                                    promotes_inputs=[
                                        'MN', ('init_prod_amounts',
@@ -531,7 +541,7 @@ class Compressor(om.Group):
             else:  # Calculate static properties
                 out_stat = SetStatic(
                     mode='area', thermo_data=thermo_data, init_reacts=elements,
-                    fl_name="Fl_O:stat")
+                    fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method)
                 self.add_subsystem('out_stat', out_stat,
                                    promotes_inputs=[
                                        'area', ('init_prod_amounts', 'Fl_I:tot:n')],
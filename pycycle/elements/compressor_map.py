@@ -1,4 +1,5 @@
 import openmdao.api as om
+from openmdao.components.interp_util.outofbounds_error import OutOfBoundsError
 
 from pycycle.maps.ncp01 import NCP01
 
@@ -154,6 +155,205 @@ class ScaledMapValues(om.ExplicitComponent):
         J['Nc', 's_Nc'] = inputs['NcMap']
 
 
+
+class CompressorMapEval(om.ExplicitComponent):
+    """Evaluates the map at the operating point and at the constant speed stall point (SMN) in a
+    single vectorized lookup of the map interpolant, which is fit once per process and shared
+    by every compressor using the map. The constant flow stall point (SMW) comes from StallLine.
+
+    Outputs for the operating point use the table names (e.g. PRmap), the stall point outputs
+    are suffixed with _SMN."""
+
+    # input names giving (alphaMap, NcMap, RlineMap) of each point
+    POINTS = (('', ('alphaMap', 'NcMap', 'RlineMap')),
+              ('_SMN', ('alphaMap', 'NcMap', 'RlineStall')))
+
+    def initialize(self):
+        self.options.declare('map_data', default=NCP01, desc='data container for raw compressor map data')
+        self.options.declare('interp_method', default='slinear', desc='method used for map interpolation')
+        self.options.declare('extrap', default=False, desc='switch to allow extrapolation off map')
+
+    def setup(self):
+        map_data = self.options['map_data']
+        method = self.options['interp_method']
+        extrap = self.options['extrap']
+
+        params = map_data.param_data
+        self._pnames = [p['name'] for p in params]
+        if self._pnames != ['alphaMap', 'NcMap', 'RlineMap']:
+            raise ValueError('{}: CompressorMapEval expects a map of (alphaMap, NcMap, RlineMap), '
+                             'got {}'.format(self.msginfo, self._pnames))
+
+        for p in params:
+            self.add_input(p['name'], val=p['default'], units=p['units'])
+        self.add_input('RlineStall', val=map_data.RlineStall, units=params[2]['units'],
+                       desc='Rline of the stall line')
+
+        self._interp = map_data.interpolant(method, extrap)
+        for o in map_data.output_data:
+            for suffix, in_names in self.POINTS:
+                self.add_output(o['name'] + suffix, val=o['default'], units=o['units'])
+                self.declare_partials(o['name'] + suffix, in_names)
+
+        self._x = None
+
+        # Exactly on a grid point the interpolant uses the bin ahead of it, so the derivative check
+        # has to step forward too. This also keeps it on the map at the lower grid bounds, e.g.
+        # the design alphaMap=0
+        if method == 'slinear':
+            self.set_check_partial_options('*', form='forward')
+
+    def _interpolate(self, inputs):
+        """values and derivatives of every table at the two points, each (2,) and (2, 3)"""
+
+        x = np.array([[inputs[name][0] for name in in_names] for _, in_names in self.POINTS])
+        if self._x is not None and np.array_equal(x, self._x):
+            return self._vals
+
+        try:
+            vals = self._interp.interpolate(x)
+        except OutOfBoundsError as err:
+            varname = '.'.join((self.pathname, self._pnames[err.idx]))
+            raise om.AnalysisError("{}: Error interpolating the map because input '{}' was out of "
+                                   "bounds ('{}', '{}') with value '{}'"
+                                   .format(self.msginfo, varname, err.lower, err.upper, err.value))
+        self._x, self._vals = x, vals
+        return vals
+
+    def compute(self, inputs, outputs):
+        for out_name, (val, d_dx) in self._interpolate(inputs).items():
+            for i, (suffix, _) in enumerate(self.POINTS):
+                outputs[out_name + suffix] = val[i]
+
+    def compute_partials(self, inputs, J):
+        for out_name, (val, d_dx) in self._interpolate(inputs).items():
+            for i, (suffix, in_names) in enumerate(self.POINTS):
+                for j, in_name in enumerate(in_names):
+                    J[out_name + suffix, in_name] = d_dx[i, j]
+
+
+
+_stall_lines = {}
+
+
+def stall_line(map_data, interp_method='slinear'):
+    """WcMap, NcMap and PRmap along the stall line (RlineMap = map_data.RlineStall) of a compressor
+    map, one row per alphaMap grid value, as (alphaMap, NcMap, WcMap, PRmap). Computed once per map
+    and method. WcMap must increase with NcMap on every row so the line can be inverted.
+
+    For slinear maps the line is piecewise linear between the NcMap grid values, so the table is
+    exact. For the higher order methods the line is sampled at 4 points per NcMap interval."""
+
+    key = (map_data, interp_method)
+    if key not in _stall_lines:
+        params = map_data.param_data
+        alpha, Nc = params[0]['values'], params[1]['values']
+        if interp_method != 'slinear':
+            Nc = np.concatenate([np.linspace(Nc[i], Nc[i+1], 4, endpoint=False) for i in range(Nc.size - 1)]
+                                + [Nc[-1:]])
+
+        x = np.empty((alpha.size, Nc.size, 3))
+        x[:, :, 0] = alpha[:, np.newaxis]
+        x[:, :, 1] = Nc
+        x[:, :, 2] = map_data.RlineStall
+        x = x.reshape((-1, 3))
+
+        vals = map_data.interpolant(interp_method).interpolate(x)
+        tables = {name: vals[name][0].reshape((alpha.size, Nc.size)) for name in ('WcMap', 'PRmap')}
+
+        if np.any(np.diff(tables['WcMap'], axis=1) <= 0):
+            raise ValueError('WcMap does not increase with NcMap along the stall line of the map, '
+                             'so it can not be inverted for the constant flow stall margin')
+
+        line = (np.array(alpha), Nc, tables['WcMap'], tables['PRmap'])
+        for arr in line:
+            arr.flags.writeable = False
+        _stall_lines[key] = line
+
+    return _stall_lines[key]
+
+
+class StallLine(om.ExplicitComponent):
+    """Finds the constant flow stall point (SMW) directly, by inverting the precomputed stall line
+    of the map for the NcMap and PRmap at which it passes through the operating WcMap"""
+
+    def initialize(self):
+        self.options.declare('map_data', default=NCP01, desc='data container for raw compressor map data')
+        self.options.declare('interp_method', default='slinear', desc='method used for map interpolation')
+        self.options.declare('extrap', default=False, desc='switch to allow extrapolation off the stall line')
+
+    def setup(self):
+        map_data = self.options['map_data']
+        units = {v['name']: v['units'] for v in map_data.param_data + map_data.output_data}
+        defaults = {o['name']: o['default'] for o in map_data.output_data}
+
+        self.add_input('alphaMap', val=map_data.defaults['alphaMap'], units=units['alphaMap'], desc='Map alpha')
+        self.add_input('WcMap', val=1.0, units=units['WcMap'], desc='Corrected mass flow rate from unscaled map')
+
+        self.add_output('NcMap', val=map_data.defaults['NcMap'], units=units['NcMap'],
+                        desc='Corrected shaft speed on the stall line at WcMap')
+        self.add_output('PRmap', val=defaults['PRmap'], units=units['PRmap'],
+                        desc='Pressure ratio on the stall line at WcMap')
+
+        self.declare_partials('*', '*')
+
+        self._line = stall_line(map_data, self.options['interp_method'])
+
+    def _segment(self, inputs):
+        """ends of the stall line segment holding the operating WcMap, with their derivatives
+        w.r.t. alphaMap"""
+
+        alpha, Nc, Wc, PR = self._line
+        a = inputs['alphaMap'][0]
+        W = inputs['WcMap'][0]
+        extrap = self.options['extrap']
+
+        if not extrap and not (alpha[0] <= a.real <= alpha[-1]):
+            raise om.AnalysisError("{}: alphaMap was out of bounds ('{}', '{}') with value '{}'"
+                                   .format(self.msginfo, alpha[0], alpha[-1], a))
+
+        # stall line at the operating alphaMap, linear between the alphaMap grid values
+        if alpha.size == 1:
+            Wc_line, PR_line = Wc[0], PR[0]
+            dWc_line, dPR_line = np.zeros_like(Wc_line), np.zeros_like(PR_line)
+        else:
+            i = min(max(np.searchsorted(alpha, a.real) - 1, 0), alpha.size - 2)
+            da = alpha[i+1] - alpha[i]
+            t = (a - alpha[i]) / da
+            Wc_line = Wc[i] + t * (Wc[i+1] - Wc[i])
+            PR_line = PR[i] + t * (PR[i+1] - PR[i])
+            dWc_line = (Wc[i+1] - Wc[i]) / da
+            dPR_line = (PR[i+1] - PR[i]) / da
+
+        if not extrap and not (Wc_line[0].real <= W.real <= Wc_line[-1].real):
+            raise om.AnalysisError("{}: WcMap was out of bounds of the stall line ('{}', '{}') with value '{}'"
+                                   .format(self.msginfo, Wc_line[0].real, Wc_line[-1].real, W))
+
+        k = min(max(np.searchsorted(Wc_line.real, W.real) - 1, 0), Nc.size - 2)
+        seg = slice(k, k+2)
+        return W, Nc[seg], Wc_line[seg], PR_line[seg], dWc_line[seg], dPR_line[seg]
+
+    def compute(self, inputs, outputs):
+        W, Nc, Wc, PR, _, _ = self._segment(inputs)
+
+        u = (W - Wc[0]) / (Wc[1] - Wc[0])
+        outputs['NcMap'] = Nc[0] + u * (Nc[1] - Nc[0])
+        outputs['PRmap'] = PR[0] + u * (PR[1] - PR[0])
+
+    def compute_partials(self, inputs, J):
+        W, Nc, Wc, PR, dWc, dPR = self._segment(inputs)
+
+        dW = Wc[1] - Wc[0]
+        u = (W - Wc[0]) / dW
+        du_dW = 1. / dW
+        du_da = (-dWc[0] * dW - (W - Wc[0]) * (dWc[1] - dWc[0])) / dW**2
+
+        J['NcMap', 'WcMap'] = du_dW * (Nc[1] - Nc[0])
+        J['NcMap', 'alphaMap'] = du_da * (Nc[1] - Nc[0])
+        J['PRmap', 'WcMap'] = du_dW * (PR[1] - PR[0])
+        J['PRmap', 'alphaMap'] = dPR[0] + u * (dPR[1] - dPR[0]) + du_da * (PR[1] - PR[0])
+
+
 class CompressorMap(om.Group):
     """Runs design and off-design mode compressor map calculations"""
 
@@ -170,15 +370,14 @@ class CompressorMap(om.Group):
         method = self.options['interp_method']
         extrap = self.options['extrap']
 
-        params = map_data.param_data
-        outputs = map_data.output_data
+        # Define map which will be used, it is evaluated at the operating point and at the
+        # constant speed (SMN) stall point in one lookup
+        readmap = CompressorMapEval(map_data=map_data, interp_method=method, extrap=extrap)
 
-        # Define map which will be used
-        readmap = om.MetaModelStructuredComp(method=method, extrapolate=extrap)
-        for p in params:
-            readmap.add_input(p['name'], val=p['default'], units=p['units'], training_data=p['values'])
-        for o in outputs:
-            readmap.add_output(o['name'], val=o['default'], units=o['units'], training_data=o['values'])
+        # Define the Rline corresponding to stall
+        RlineStall = om.IndepVarComp()
+        RlineStall.add_output('RlineStall', val=map_data.RlineStall, units=None)
+        self.add_subsystem('stall_R', subsys=RlineStall)
 
         # Create instance of map for evaluating actual operating point
         if design:
@@ -218,46 +417,44 @@ class CompressorMap(om.Group):
             self.connect('scaledOutput.Nc','map_bal.rhs:NcMap')
             self.connect('scaledOutput.Wc','map_bal.rhs:RlineMap')
 
-        # Define the Rline corresponding to stall
-        RlineStall = om.IndepVarComp()
-        RlineStall.add_output('RlineStall', val=map_data.RlineStall, units=None)
-        self.add_subsystem('stall_R', subsys=RlineStall)
+        # the constant speed stall point (SMN) is at the operating NcMap on the stall line
+        self.connect('stall_R.RlineStall', 'map.RlineStall')
 
-        # Evaluate map for the constant speed stall margin (SMN)
-        SMN_map = om.MetaModelStructuredComp(method=method, extrapolate=extrap)
-        for p in params:
-            SMN_map.add_input(p['name'], val=p['default'], units=p['units'], training_data=p['values'])
-        for o in outputs:
-            SMN_map.add_output(o['name'], val=o['default'], units=o['units'], training_data=o['values'])
-
-        self.add_subsystem('SMN_map', SMN_map, promotes_inputs=['NcMap', 'alphaMap'])
-        self.connect('stall_R.RlineStall', 'SMN_map.RlineMap')
-
-        # Evaluate map for the constant speed stall margin (SMN)
-        SMW_map = om.MetaModelStructuredComp(method=method, extrapolate=extrap)
-        for p in params:
-            SMW_map.add_input(p['name'], val=p['default'], units=p['units'], training_data=p['values'])
-        for o in outputs:
-            SMW_map.add_output(o['name'], val=o['default'], units=o['units'], training_data=o['values'])
-        self.add_subsystem('SMW_map', SMW_map, promotes_inputs=['alphaMap'])
-        self.connect('stall_R.RlineStall', 'SMW_map.RlineMap')
-
-        # Use balance to vary NcMap on SMW map to hold corrected flow constant
-        SMW_bal = om.BalanceComp()
-        SMW_bal.add_balance('NcMap', val=map_data.defaults['NcMap'], units='rpm', eq_units='lbm/s')
-        self.add_subsystem(name='SMW_bal', subsys=SMW_bal)
-        self.connect('SMW_bal.NcMap', 'SMW_map.NcMap')
-        self.connect('WcMap','SMW_bal.lhs:NcMap')
-        self.connect('SMW_map.WcMap','SMW_bal.rhs:NcMap')
+        # The constant flow stall point (SMW) is where the stall line passes through the operating WcMap
+        self.add_subsystem('SMW_line', StallLine(map_data=map_data, interp_method=method, extrap=extrap),
+                           promotes_inputs=['alphaMap', 'WcMap'])
 
         # Compute the stall margins
         self.add_subsystem('stall_margins', StallCalcs(), 
                                 promotes_inputs=[('PR_actual','PRmap'),('Wc_actual','WcMap')],
                                 promotes_outputs=['SMN','SMW'])
-        self.connect('SMN_map.PRmap', 'stall_margins.PR_SMN')
-        self.connect('SMW_map.PRmap', 'stall_margins.PR_SMW')
-        self.connect('SMN_map.WcMap', 'stall_margins.Wc_SMN')
-
+        self.connect('map.PRmap_SMN', 'stall_margins.PR_SMN')
+        self.connect('SMW_line.PRmap', 'stall_margins.PR_SMW')
+        self.connect('map.WcMap_SMN', 'stall_margins.Wc_SMN')
+
+    def guess_nonlinear(self, inputs, outputs, residuals):
+        if self.options['design']:
+            return
+
+        # the inputs are not computed yet at the start of a cycle run, there is nothing to seed from
+        Nc, Wc, s_Nc, s_Wc = (inputs[name][0] for name in ('Nc', 'Wc', 's_Nc', 's_Wc'))
+        if not np.all(np.isfinite([Nc, Wc, s_Nc, s_Wc])) or min(Nc, Wc, s_Nc, s_Wc) <= 0.:
+            return
+
+        # seed the map balance from the inverse map, unless it is already close to converged
+        norm = max(abs(residuals['NcMap'][0] / Nc), abs(residuals['RlineMap'][0] / Wc))
+        if norm > 1e-2 or norm == 0.0:
+            map_data = self.options['map_data']
+            alpha = inputs['map.alphaMap'][0]
+            inverse = map_data.inverse('WcMap')
+
+            # keep the solver's values when the inputs are off the map, e.g. stale initial values
+            if not inverse.on_map(alpha, Nc, Wc, s_Nc, s_Wc):
+                return
+
+            RlineMap, NcMap = inverse(alpha, Nc, Wc, s_Nc, s_Wc)
+            outputs['NcMap'] = min(max(NcMap, inverse.speed[0]), inverse.speed[-1])
+            outputs['RlineMap'] = min(max(RlineMap, map_data.RlineStall), inverse.line[-1])
 
 
 
@@ -253,7 +253,7 @@ class TurbineCooling(om.Group):
             indeps = self.add_subsystem('indeps', om.IndepVarComp(), promotes=['*'])
             indeps.add_output('x_factor', val=1.0)
 
-        primary_thermo = species_data.Thermo(thermo_data, init_reacts=self.options['primary_elements'])
+        primary_thermo = species_data.get_thermo(thermo_data, init_reacts=self.options['primary_elements'])
 
         in_flow = FlowIn(fl_name='Fl_turb_I', num_prods=len(primary_thermo.products))
         self.add_subsystem('turb_in_flow', in_flow, promotes_inputs=['Fl_turb_I:tot:*', 'Fl_turb_I:stat:*'])
@@ -261,7 +261,7 @@ class TurbineCooling(om.Group):
         in_flow = FlowIn(fl_name='Fl_turb_O', num_prods=len(primary_thermo.products))
         self.add_subsystem('turb_out_flow', in_flow, promotes_inputs=['Fl_turb_O:tot:*', 'Fl_turb_O:stat:*'])
 
-        cool_thermo = species_data.Thermo(thermo_data, init_reacts=self.options['cool_elements'])
+        cool_thermo = species_data.get_thermo(thermo_data, init_reacts=self.options['cool_elements'])
         in_flow = FlowIn(fl_name='Fl_cool', num_prods=len(cool_thermo.products))
         self.add_subsystem('cool_in_flow', in_flow, promotes_inputs=['Fl_cool:tot:*', 'Fl_cool:stat:*'])
 
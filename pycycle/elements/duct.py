@@ -156,6 +156,11 @@ class Duct(om.Group):
                               desc='If True, calculate static properties.')
         self.options.declare('design', default=True,
                               desc='Switch between on-design and off-design calculation.')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
         self.options.declare('expMN', default=0.0,
                               desc='Mach number exponent for dPqP_MN calculations.'
                                    '0 means it has no effect. Only has impact in off-design')
@@ -165,9 +170,11 @@ class Duct(om.Group):
         elements = self.options['elements']
         statics = self.options['statics']
         design = self.options['design']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
         expMN = self.options['expMN']
 
-        gas_thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        gas_thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         gas_prods = gas_thermo.products
         num_prod = len(gas_prods)
 
@@ -195,7 +202,7 @@ class Duct(om.Group):
 
         # Total Calc
         real_flow = SetTotal(thermo_data=thermo_data, mode='h',
-                             init_reacts=elements, fl_name="Fl_O:tot")
+                             init_reacts=elements, fl_name="Fl_O:tot", thermo_method=thermo_method, units_method=units_method)
         prom_in = [('init_prod_amounts', 'Fl_I:tot:n')]
         self.add_subsystem('real_flow', real_flow, promotes_inputs=prom_in,
                            promotes_outputs=['Fl_O:*'])
@@ -205,7 +212,7 @@ class Duct(om.Group):
         if statics:
             if design:
             #   Calculate static properties
-                out_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat")
+                out_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('W', 'Fl_I:stat:W'),
                            'MN']
@@ -220,7 +227,7 @@ class Duct(om.Group):
 
             else:
                 # Calculate static properties
-                out_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat")
+                out_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('W', 'Fl_I:stat:W'),
                            'area']
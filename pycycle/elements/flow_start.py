@@ -22,7 +22,7 @@ class FlowStart(Group):
         thermo_data = self.options['thermo_data']
         elements = self.options['elements']
 
-        thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         self.air_prods = thermo.products
         self.num_prod = len(self.air_prods)
 
@@ -85,14 +85,21 @@ class Inlet(om.Group):
                               desc='If True, calculate static properties.')
         self.options.declare('design', default=True,
                               desc='Switch between on-design and off-design calculation.')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
 
     def setup(self):
         thermo_data = self.options['thermo_data']
         elements = self.options['elements']
         statics = self.options['statics']
         design = self.options['design']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
 
-        gas_thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        gas_thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         gas_prods = gas_thermo.products
         num_prod = len(gas_prods)
 
@@ -107,7 +114,7 @@ class Inlet(om.Group):
                            promotes_outputs=['F_ram'])
 
         # Calculate real flow station properties
-        real_flow = SetTotal(thermo_data=thermo_data, mode="T", init_reacts=elements, fl_name="Fl_O:tot")
+        real_flow = SetTotal(thermo_data=thermo_data, mode="T", init_reacts=elements, fl_name="Fl_O:tot", thermo_method=thermo_method, units_method=units_method)
 
         self.add_subsystem('real_flow', real_flow,
                            promotes_inputs=[('T', 'Fl_I:tot:T'), ('init_prod_amounts', 'Fl_I:tot:n')],
@@ -119,7 +126,7 @@ class Inlet(om.Group):
         if statics:
             if design:
                 #   Calculate static properties
-                self.add_subsystem('out_stat', SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat"),
+                self.add_subsystem('out_stat', SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method),
                                    promotes_inputs=[('init_prod_amounts', 'Fl_I:tot:n'), ('W', 'Fl_I:stat:W'), 'MN'],
                                    promotes_outputs=['Fl_O:stat:*'])
 
@@ -131,7 +138,7 @@ class Inlet(om.Group):
             else:
                 # Calculate static properties
                 out_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements,
-                                         fl_name="Fl_O:stat")
+                                         fl_name="Fl_O:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('W', 'Fl_I:stat:W'),
                            'area']
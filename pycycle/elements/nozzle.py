@@ -312,14 +312,23 @@ class Nozzle(om.Group):
         self.options.declare('elements', default=AIR_FUEL_MIX,
                               desc='set of elements present in the flow')
         self.options.declare('internal_solver', default=False)
+        # the composition of the flow changes with the burner FAR, which a TABULAR table of
+        # one fixed mixture can not follow
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
 
     def setup(self):
         thermo_data = self.options['thermo_data']
         elements = self.options['elements']
         nozzType = self.options['nozzType']
         lossCoef = self.options['lossCoef']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
 
-        gas_thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        gas_thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         self.gas_prods = gas_thermo.products
 
         num_prod = len(self.gas_prods)
@@ -346,7 +355,7 @@ class Nozzle(om.Group):
 
         # Calculate throat total flow properties
         throat_total = SetTotal(thermo_data=thermo_data, mode="h", init_reacts=elements,
-                                fl_name="Fl_O:tot")
+                                fl_name="Fl_O:tot", thermo_method=thermo_method, units_method=units_method)
         prom_in = [('h', 'Fl_I:tot:h'),
                    ('init_prod_amounts', 'Fl_I:tot:n')]
         self.add_subsystem('throat_total', throat_total, promotes_inputs=prom_in,
@@ -357,7 +366,8 @@ class Nozzle(om.Group):
         prom_in = [('ht', 'Fl_I:tot:h'),
                    ('W', 'Fl_I:stat:W'),
                    ('init_prod_amounts', 'Fl_I:tot:n')]
-        self.add_subsystem('staticMN', SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements),
+        self.add_subsystem('staticMN', SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements,
+                                                 thermo_method=thermo_method, units_method=units_method),
                            promotes_inputs=prom_in)
         self.connect('throat_total.S', 'staticMN.S')
         self.connect('mach_choked.MN', 'staticMN.MN')
@@ -370,7 +380,8 @@ class Nozzle(om.Group):
                    ('W', 'Fl_I:stat:W'),
                    ('Ps', 'Ps_calc'),
                    ('init_prod_amounts', 'Fl_I:tot:n')]
-        self.add_subsystem('staticPs', SetStatic(mode="Ps", thermo_data=thermo_data, init_reacts=elements),
+        self.add_subsystem('staticPs', SetStatic(mode="Ps", thermo_data=thermo_data, init_reacts=elements,
+                                                 thermo_method=thermo_method, units_method=units_method),
                            promotes_inputs=prom_in)
         self.connect('throat_total.S', 'staticPs.S')
         # self.connect('press_calcs.Ps_calc', 'staticPs.Ps')
@@ -382,7 +393,8 @@ class Nozzle(om.Group):
                    ('W', 'Fl_I:stat:W'),
                    ('Ps', 'Ps_calc'),
                    ('init_prod_amounts', 'Fl_I:tot:n')]
-        self.add_subsystem('ideal_flow', SetStatic(mode="Ps", thermo_data=thermo_data, init_reacts=elements),
+        self.add_subsystem('ideal_flow', SetStatic(mode="Ps", thermo_data=thermo_data, init_reacts=elements,
+                                                 thermo_method=thermo_method, units_method=units_method),
                            promotes_inputs=prom_in)
         # self.connect('press_calcs.Ps_calc', 'ideal_flow.Ps')
         # self.connect('Fl_I.flow:flow_products','ideal_flow.init_prod_amounts')
@@ -450,11 +462,13 @@ class Nozzle(om.Group):
             self.linear_solver = om.DirectSolver(assemble_jac=True)
 
     def configure(self):
-        newton = self.staticMN.statics.chem_eq.nonlinear_solver
-        # newton.options['atol'] = 1e-6
-        # newton.options['rtol'] = 1e-6
+        # the default StaticFlowStation has no chem_eq subsolver
+        if self.options['thermo_method'] == 'CEA' and hasattr(self.staticMN.statics, 'chem_eq'):
+            newton = self.staticMN.statics.chem_eq.nonlinear_solver
+            # newton.options['atol'] = 1e-6
+            # newton.options['rtol'] = 1e-6
 
-        # newton.options['maxiter'] = 25
+            # newton.options['maxiter'] = 25
 
 
 
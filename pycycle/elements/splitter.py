@@ -84,6 +84,11 @@ class Splitter(om.Group):
                               desc='If True, calculate static properties.')
         self.options.declare('design', default=True,
                               desc='Switch between on-design and off-design calculation.')
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'TABULAR', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
 
     def setup(self):
 
@@ -91,8 +96,10 @@ class Splitter(om.Group):
         elements = self.options['elements']
         statics = self.options['statics']
         design = self.options['design']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
 
-        num_prod = species_data.Thermo(thermo_data, init_reacts=elements).num_prod
+        num_prod = species_data.get_thermo(thermo_data, init_reacts=elements).num_prod
 
         # Create inlet flowstation
         flow_in = FlowIn(fl_name='Fl_I', num_prods=num_prod)
@@ -103,7 +110,7 @@ class Splitter(om.Group):
 
         # Set Fl_out1 totals based on T, P
         real_flow1 = SetTotal(thermo_data=thermo_data, mode='T',
-                             init_reacts=elements, fl_name="Fl_O1:tot")
+                             init_reacts=elements, fl_name="Fl_O1:tot", thermo_method=thermo_method, units_method=units_method)
         self.add_subsystem('real_flow1', real_flow1,
                            promotes_inputs=(('init_prod_amounts', 'Fl_I:tot:n'),
                                             ('P', 'Fl_I:tot:P'),
@@ -112,7 +119,7 @@ class Splitter(om.Group):
 
         # Set Fl_out2 totals based on T, P
         real_flow2 = SetTotal(thermo_data=thermo_data, mode='T',
-                             init_reacts=elements, fl_name="Fl_O2:tot")
+                             init_reacts=elements, fl_name="Fl_O2:tot", thermo_method=thermo_method, units_method=units_method)
         self.add_subsystem('real_flow2', real_flow2, promotes_inputs=(('init_prod_amounts', 'Fl_I:tot:n'),
                                             ('P', 'Fl_I:tot:P'),
                                             ('T', 'Fl_I:tot:T')),
@@ -121,7 +128,7 @@ class Splitter(om.Group):
         if statics:
             if design:
             #   Calculate static properties
-                out1_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O1:stat")
+                out1_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O1:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('MN','MN1')]
                 prom_out = ['Fl_O1:stat:*']
@@ -133,7 +140,7 @@ class Splitter(om.Group):
                 self.connect('Fl_O1:tot:gamma', 'out1_stat.guess:gamt')
                 self.connect('split_calc.W1', 'out1_stat.W')
 
-                out2_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O2:stat")
+                out2_stat = SetStatic(mode="MN", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O2:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('MN','MN2')]
                 prom_out = ['Fl_O2:stat:*']
@@ -147,7 +154,7 @@ class Splitter(om.Group):
 
             else:
                 # Calculate static properties
-                out1_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O1:stat")
+                out1_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O1:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('area','area1')]
                 prom_out = ['Fl_O1:stat:*']
@@ -159,7 +166,7 @@ class Splitter(om.Group):
                 self.connect('Fl_O1:tot:gamma', 'out1_stat.guess:gamt')
                 self.connect('split_calc.W1', 'out1_stat.W')
 
-                out2_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O2:stat")
+                out2_stat = SetStatic(mode="area", thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O2:stat", thermo_method=thermo_method, units_method=units_method)
                 prom_in = [('init_prod_amounts', 'Fl_I:tot:n'),
                            ('area','area2')]
                 prom_out = ['Fl_O2:stat:*']
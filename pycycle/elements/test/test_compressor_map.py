@@ -2,12 +2,12 @@ import numpy as np
 import unittest
 import os
 
-from openmdao.api import Problem, IndepVarComp
+from openmdao.api import Problem, IndepVarComp, MetaModelStructuredComp
 from openmdao.api import DirectSolver, BoundsEnforceLS, NewtonSolver
 
-from openmdao.utils.assert_utils import assert_rel_error
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
 
-from pycycle.elements.compressor_map import CompressorMap
+from pycycle.elements.compressor_map import CompressorMap, CompressorMapEval, StallLine
 from pycycle.maps.axi5 import AXI5
 
 
@@ -175,6 +175,129 @@ class CompressorMapTestCase(unittest.TestCase):
             print('Wc:', data[h_map['comp.Wc']], self.prob['Wc'][0], self.prob['scaledOutput.Wc'][0])
             print()
 
+    def test_guess(self):
+        # a poor starting point is replaced by the inverse map guess
+        data = ref_data[1]
+        self.prob['Wc'] = data[h_map['comp.Wc']]
+        self.prob['Nc'] = data[h_map['comp.Nc']]
+        self.prob['alphaMap'] = 0.
+        self.prob['s_Nc'] = data[h_map['comp.s_NcDes']]
+        self.prob['s_PR'] = data[h_map['comp.s_PRdes']]
+        self.prob['s_Wc'] = data[h_map['comp.s_WcDes']]
+        self.prob['s_eff'] = data[h_map['comp.s_effDes']]
+
+        self.prob['RlineMap'] = 2.5
+        self.prob['NcMap'] = 0.5
+
+        self.prob.model.nonlinear_solver.options['maxiter'] = 3
+        self.prob.run_model()
+
+        tol = 0.3e-2
+        assert_rel_error(self, self.prob['NcMap'][0], data[h_map['comp.NcMap']], tol)
+        assert_rel_error(self, self.prob['RlineMap'][0], data[h_map['comp.RlineMap']], tol)
+        assert_rel_error(self, self.prob['PR'][0], data[h_map['comp.PR']], tol)
+
+    def test_guess_off_map(self):
+        # in a cycle the inputs are still at their initial values when the guess first runs,
+        # the starting point must be kept rather than replaced by a guess off the map
+        data = ref_data[1]
+        self.prob['alphaMap'] = 0.
+        self.prob['s_Nc'] = data[h_map['comp.s_NcDes']]
+        self.prob['s_PR'] = data[h_map['comp.s_PRdes']]
+        self.prob['s_Wc'] = data[h_map['comp.s_WcDes']]
+        self.prob['s_eff'] = data[h_map['comp.s_effDes']]
+        self.prob.model.nonlinear_solver.options['maxiter'] = 0
+
+        for Nc, Wc in ((100., 30.), (0., 0.), (data[h_map['comp.Nc']], 1e5)):
+            self.prob['Nc'] = Nc
+            self.prob['Wc'] = Wc
+            self.prob['NcMap'] = data[h_map['comp.NcMap']]
+            self.prob['RlineMap'] = data[h_map['comp.RlineMap']]
+
+            with np.errstate(divide='raise', invalid='raise'):
+                self.prob.run_model()
+
+            self.assertEqual(self.prob['NcMap'][0], data[h_map['comp.NcMap']])
+            self.assertEqual(self.prob['RlineMap'][0], data[h_map['comp.RlineMap']])
+
+
+class CompressorMapEvalTestCase(unittest.TestCase):
+
+    def test_points(self):
+        # operating and constant speed stall points
+        points = {'': (30., 0.93, 1.7), '_SMN': (30., 0.93, 1.1)}
+
+        p = Problem()
+        des_vars = p.model.add_subsystem('des_vars', IndepVarComp(), promotes=['*'])
+        des_vars.add_output('alphaMap', 30.)
+        des_vars.add_output('NcMap', 0.93, units='rpm')
+        des_vars.add_output('RlineMap', 1.7)
+        des_vars.add_output('RlineStall', 1.1)
+        p.model.add_subsystem('map', CompressorMapEval(map_data=AXI5, interp_method='slinear'), promotes=['*'])
+
+        for suffix, pt in points.items():
+            readmap = p.model.add_subsystem('readmap' + suffix, MetaModelStructuredComp(method='slinear'))
+            for param, val in zip(AXI5.param_data, pt):
+                readmap.add_input(param['name'], val=val, units=param['units'], training_data=param['values'])
+            for o in AXI5.output_data:
+                readmap.add_output(o['name'], val=o['default'], units=o['units'], training_data=o['values'])
+
+        p.setup(check=False, force_alloc_complex=True)
+        p.run_model()
+
+        for suffix in points:
+            for o in AXI5.output_data:
+                assert_rel_error(self, p[o['name'] + suffix], p['readmap{}.{}'.format(suffix, o['name'])], 1e-14)
+
+        # slinear partials are checked with forward fd, the side the interpolant takes on the grid
+        data = p.check_partials(out_stream=None, includes=['map'])
+        assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+    def test_partials_lower_bounds(self):
+        # at the lower end of the grid, e.g. the design alphaMap=0, the check stays on the map
+        p = Problem()
+        p.model.add_subsystem('map', CompressorMapEval(map_data=AXI5, interp_method='slinear'))
+        p.setup(check=False)
+        p['map.alphaMap'] = AXI5.alphaMap[0]
+        p['map.NcMap'] = AXI5.NcMap[0]
+        p['map.RlineMap'] = AXI5.RlineMap[0]
+        p['map.RlineStall'] = AXI5.RlineMap[0]
+        p.run_model()
+
+        data = p.check_partials(out_stream=None)
+        assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
+    def test_stall_line(self):
+        p = Problem()
+        des_vars = p.model.add_subsystem('des_vars', IndepVarComp(), promotes=['*'])
+        des_vars.add_output('alphaMap', 30.)
+        des_vars.add_output('WcMap', 12.3, units='lbm/s')
+        p.model.add_subsystem('stall_line', StallLine(map_data=AXI5), promotes=['*'])
+
+        readmap = p.model.add_subsystem('readmap', MetaModelStructuredComp(method='slinear'))
+        for param in AXI5.param_data:
+            readmap.add_input(param['name'], val=param['default'], units=param['units'], training_data=param['values'])
+        for o in AXI5.output_data:
+            readmap.add_output(o['name'], val=o['default'], units=o['units'], training_data=o['values'])
+        p.model.connect('alphaMap', 'readmap.alphaMap')
+        p.model.connect('NcMap', 'readmap.NcMap')
+
+        p.setup(check=False, force_alloc_complex=True)
+        p['readmap.RlineMap'] = AXI5.RlineStall
+
+        for alpha, Wc in ((0., 12.3), (30., 12.3), (90., 9.), (45., 20.)):
+            p['alphaMap'] = alpha
+            p['WcMap'] = Wc
+            p.run_model()
+
+            # the stall line passes through WcMap at the NcMap and PRmap found
+            assert_rel_error(self, p['readmap.WcMap'], Wc, 1e-12)
+            assert_rel_error(self, p['readmap.PRmap'], p['PRmap'], 1e-12)
+
+            data = p.check_partials(out_stream=None, method='cs', includes=['stall_line'])
+            assert_check_partials(data, atol=1e-10, rtol=1e-10)
+
+
 if __name__ == "__main__":
     np.seterr(divide='warn')
     unittest.main()
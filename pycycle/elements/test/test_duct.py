@@ -5,7 +5,7 @@ import os
 
 import numpy as np
 
-from openmdao.api import Problem, Group, IndepVarComp
+from openmdao.api import Problem, Group, IndepVarComp, NewtonSolver, DirectSolver
 from openmdao.utils.assert_utils import assert_rel_error
 
 from pycycle.cea.species_data import janaf
@@ -182,5 +182,45 @@ class DuctTestCase(unittest.TestCase):
 
         check_element_partials(self, self.prob)
 
+    def test_case_od_no_area_newton(self):
+        # an off-design duct without a flow area, like the inlet duct of the mixed flow turbofan,
+        # inside the newton solver of a cycle
+
+        self.prob = Problem()
+        self.prob.model = Group()
+        cycle = self.prob.model.add_subsystem('cycle', Group(), promotes=['*'])
+        cycle.add_subsystem('flow_start', FlowStart(thermo_data=janaf, elements=AIR_MIX))
+        cycle.add_subsystem('duct', Duct(elements=AIR_MIX, design=False))
+
+        connect_flow(cycle, 'flow_start.Fl_O', 'duct.Fl_I')
+
+        des_vars = self.prob.model.add_subsystem('des_vars', IndepVarComp(), promotes=['*'])
+        des_vars.add_output('P', 17., units='psi')
+        des_vars.add_output('T', 500., units='degR')
+        des_vars.add_output('W', 500., units='lbm/s')
+        des_vars.add_output('MN', 0.5)
+        des_vars.add_output('dPqP', 0.02)
+
+        self.prob.model.connect("P", "flow_start.P")
+        self.prob.model.connect("T", "flow_start.T")
+        self.prob.model.connect("W", "flow_start.W")
+        self.prob.model.connect("MN", "flow_start.MN")
+        self.prob.model.connect("dPqP", "duct.dPqP")
+
+        newton = cycle.nonlinear_solver = NewtonSolver()
+        newton.options['maxiter'] = 10
+        newton.options['solve_subsystems'] = True
+        newton.options['err_on_non_converge'] = True
+        cycle.linear_solver = DirectSolver(assemble_jac=True)
+
+        self.prob.setup(check=False)
+        self.prob.set_solver_print(level=-1)
+
+        self.prob.run_model()
+
+        self.assertEqual(self.prob['duct.Fl_O:stat:area'][0], np.inf)
+        self.assertTrue(np.isfinite(cycle._residuals.get_norm()))
+        assert_rel_error(self, self.prob['duct.Fl_O:tot:P'], 17.*0.98, 1e-6)
+
 if __name__ == "__main__":
     unittest.main()
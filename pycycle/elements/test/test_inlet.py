@@ -176,16 +176,11 @@ class TestInletGenerated(unittest.TestCase):
                                              1.0000000000000000e-10, 7.2319938237413537e-03])
         prob['real_flow.flow.n_moles'] = np.array([0.034524213388366])
         prob['FAR_passthru.Fl_I:FAR'] = np.array([0.])
-        prob['out_stat.statics.ps_resid.Ts'] = np.array([270.4606098605202078])
-        prob['out_stat.statics.ps_resid.ht'] = np.array([-18545.9396573178637482])
-        prob['out_stat.statics.ps_resid.hs'] = np.array([-32137.5489635905178147])
-        prob['out_stat.statics.ps_resid.n_moles'] = np.array([0.034524213388366])
-        prob['out_stat.statics.ps_resid.gamma'] = np.array([1.4005512841014192])
-        prob['out_stat.statics.ps_resid.W'] = np.array([1.])
-        prob['out_stat.statics.ps_resid.rho'] = np.array([0.3743153852344497])
-        prob['out_stat.statics.ps_resid.guess:gamt'] = np.array([1.4002877621616485])
-        prob['out_stat.statics.ps_resid.guess:Pt'] = np.array([0.3447378650257302])
-        prob['out_stat.statics.ps_resid.MN'] = np.array([0.5])
+        prob['out_stat.statics.ht'] = np.array([-18545.9396573178637482])
+        prob['out_stat.statics.W'] = np.array([1.])
+        prob['out_stat.statics.guess:gamt'] = np.array([1.4002877621616485])
+        prob['out_stat.statics.guess:Pt'] = np.array([0.3447378650257302])
+        prob['out_stat.statics.MN'] = np.array([0.5])
         prob['out_stat.flow.T'] = np.array([486.8290977489364195])
         prob['out_stat.flow.P'] = np.array([4.2148347084158546])
         prob['out_stat.flow.h'] = np.array([-13.8166590557138917])
@@ -254,17 +249,17 @@ class TestInletGenerated(unittest.TestCase):
         assert_rel_error(self, prob['FAR_passthru.Fl_O:FAR'], np.array([0.]), tol)
         assert_rel_error(
             self,
-            prob['out_stat.statics.ps_resid.Ps'],
+            prob['out_stat.statics.Ps'],
             np.array(
                 [0.2906026237631253]),
             tol)
-        assert_rel_error(self, prob['out_stat.statics.ps_resid.V'],
+        assert_rel_error(self, prob['out_stat.statics.V'],
                          np.array([164.8733411214357432]), tol)
-        assert_rel_error(self, prob['out_stat.statics.ps_resid.Vsonic'],
+        assert_rel_error(self, prob['out_stat.statics.Vsonic'],
                          np.array([329.7466822428714863]), tol)
         assert_rel_error(
             self,
-            prob['out_stat.statics.ps_resid.area'],
+            prob['out_stat.statics.area'],
             np.array(
                 [0.0162036137819986]),
             tol)
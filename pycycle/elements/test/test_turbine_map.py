@@ -4,9 +4,9 @@ import os
 
 from openmdao.api import Problem, IndepVarComp
 from openmdao.api import DirectSolver, BoundsEnforceLS, NewtonSolver
-from openmdao.utils.assert_utils import assert_rel_error
+from openmdao.utils.assert_utils import assert_rel_error, assert_check_partials
 
-from pycycle.elements.turbine_map import TurbineMap
+from pycycle.elements.turbine_map import TurbineMap, TurbineMapEval
 from pycycle.maps.lpt2269 import LPT2269
 
 
@@ -242,6 +242,80 @@ class TurbineMapODTestCase(unittest.TestCase):
             print('Wp balance:',self.prob['Wp'][0], self.prob['scaledOutput.Wp'][0])
             print()
 
+    def test_guess(self):
+        # a poor starting point is replaced by the inverse map guess
+        newton = self.prob.model.nonlinear_solver = NewtonSolver()
+        newton.options['atol'] = 1e-8
+        newton.options['rtol'] = 1e-8
+        newton.options['maxiter'] = 3
+        newton.options['solve_subsystems'] = True
+        newton.linesearch = BoundsEnforceLS()
+        self.prob.model.linear_solver = DirectSolver()
+        self.prob.setup(check=False)
+
+        # case 1 is on the choked part of the map, where PRmap is not defined by Wp
+        data = ref_data[2]
+        self.prob['Wp'] = data[h_map['turb.Wp']]
+        self.prob['Np'] = data[h_map['turb.Np']]
+        self.prob['alphaMap'] = 1.
+        self.prob['s_Np'] = data[h_map['turb.s_NpDes']]
+        self.prob['s_PR'] = data[h_map['turb.s_PRdes']]
+        self.prob['s_Wp'] = data[h_map['turb.s_WpDes']]
+        self.prob['s_eff'] = data[h_map['turb.s_effDes']]
+
+        self.prob['PRmap'] = 7.5
+        self.prob['NpMap'] = 65.
+
+        self.prob.run_model()
+
+        tol = 3e-3
+        assert_rel_error(self, self.prob['PRmap'][0], data[h_map['turb.PRmap']], tol)
+        assert_rel_error(self, self.prob['NpMap'][0], data[h_map['turb.NpMap']], tol)
+        assert_rel_error(self, self.prob['PR'][0], data[h_map['turb.PR']], tol)
+
+    def test_guess_off_map(self):
+        # inputs at their initial values or off the map keep the starting point
+        newton = self.prob.model.nonlinear_solver = NewtonSolver()
+        newton.options['maxiter'] = 0
+        newton.options['solve_subsystems'] = False
+        self.prob.model.linear_solver = DirectSolver()
+        self.prob.setup(check=False)
+
+        data = ref_data[2]
+        self.prob['alphaMap'] = 1.
+        self.prob['s_Np'] = data[h_map['turb.s_NpDes']]
+        self.prob['s_PR'] = data[h_map['turb.s_PRdes']]
+        self.prob['s_Wp'] = data[h_map['turb.s_WpDes']]
+        self.prob['s_eff'] = data[h_map['turb.s_effDes']]
+
+        for Np, Wp in ((1e4, 30.), (0., 0.), (data[h_map['turb.Np']], 1e5)):
+            self.prob['Np'] = Np
+            self.prob['Wp'] = Wp
+            self.prob['PRmap'] = data[h_map['turb.PRmap']]
+            self.prob['NpMap'] = data[h_map['turb.NpMap']]
+
+            with np.errstate(divide='raise', invalid='raise'):
+                self.prob.run_model()
+
+            self.assertEqual(self.prob['PRmap'][0], data[h_map['turb.PRmap']])
+            self.assertEqual(self.prob['NpMap'][0], data[h_map['turb.NpMap']])
+
+
+class TurbineMapEvalTestCase(unittest.TestCase):
+
+    def test_partials_lower_bounds(self):
+        # at the lower end of the grid the derivative check stays on the map
+        p = Problem()
+        p.model.add_subsystem('map', TurbineMapEval(map_data=LPT2269, interp_method='slinear'))
+        p.setup(check=False)
+        p['map.alphaMap'] = LPT2269.alphaMap[0]
+        p['map.NpMap'] = LPT2269.NpMap[0]
+        p['map.PRmap'] = LPT2269.PRmap[0]
+        p.run_model()
+
+        data = p.check_partials(out_stream=None)
+        assert_check_partials(data, atol=1e-5, rtol=1e-5)
+
 if __name__ == "__main__":
     np.seterr(divide='warn')
     unittest.main()
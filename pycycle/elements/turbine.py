@@ -186,13 +186,13 @@ class Bleeds(om.ExplicitComponent):
         self.mixed_elements = self.main_flow_elements.copy()
         self.mixed_elements.update(self.options['bld_flow_elements'])
 
-        main_flow_thermo = species_data.Thermo(
+        main_flow_thermo = species_data.get_thermo(
             thermo_data, init_reacts=self.mixed_elements)
         self.main_flow_prods = main_flow_thermo.products
         self.main_flow_wt_mole = main_flow_thermo.wt_mole
         self.n_main_flow_prods = len(self.main_flow_prods)
 
-        bld_flow_thermo = species_data.Thermo(
+        bld_flow_thermo = species_data.get_thermo(
             thermo_data, init_reacts=self.options['bld_flow_elements'])
         self.bld_flow_prods = bld_flow_thermo.products
         self.bld_flow_wt_mole = bld_flow_thermo.wt_mole
@@ -259,7 +259,7 @@ class Bleeds(om.ExplicitComponent):
         # calculate W_out, bleed total pressure and composition based on
         # primary flow
         W_bld = 0.0
-        n_bld_tot = np.zeros(self.n_bld_flow_prods, dtype=inputs._data.dtype)
+        n_bld_tot = np.zeros(self.n_bld_flow_prods, dtype=inputs['n_in'].dtype)
 
         bleeds = self.options['bleed_names']
         for BN in bleeds:
@@ -299,7 +299,7 @@ class Bleeds(om.ExplicitComponent):
         exit_total_mass = 0.0
         exit_total_mass += W_in
         W_bld = 0.0
-        n_bld_tot = np.zeros(self.n_bld_flow_prods, dtype=inputs._data.dtype)
+        n_bld_tot = np.zeros(self.n_bld_flow_prods, dtype=inputs['n_in'].dtype)
 
         for BN in bleeds:
             W_bld += inputs[BN + ':W']
@@ -507,6 +507,13 @@ class Turbine(om.Group):
                               desc='Method to use for map interpolation. \
                               Options are `slinear`, `cubic`, `quintic`.')
         self.options.declare('map_extrap', default=False, desc='Switch to allow extrapoloation off map')
+        # the composition of the flow changes with the burner FAR, which a TABULAR table of
+        # one fixed mixture can not follow
+        self.options.declare('thermo_method', default='CEA', values=('CEA', 'FROZEN'),
+                              desc='method used to compute the thermodynamic properties, see SetTotal')
+        self.options.declare('units_method', default='COMP', values=('DIRECT', 'COMP'),
+                              desc='method used to output the flow station variables in english units, '
+                                   'see SetTotal')
 
     def setup(self):
 
@@ -519,12 +526,14 @@ class Turbine(om.Group):
         statics = self.options['statics']
         interp_method = self.options['map_interp_method']
         map_extrap = self.options['map_extrap']
+        thermo_method = self.options['thermo_method']
+        units_method = self.options['units_method']
 
-        gas_thermo = species_data.Thermo(thermo_data, init_reacts=elements)
+        gas_thermo = species_data.get_thermo(thermo_data, init_reacts=elements)
         self.gas_prods = gas_thermo.products
         self.num_prod = len(self.gas_prods)
 
-        bld_thermo = species_data.Thermo(
+        bld_thermo = species_data.get_thermo(
             thermo_data, init_reacts=bleed_elements)
         self.bld_prods = bld_thermo.products
         self.num_bld_prod = len(self.bld_prods)
@@ -554,7 +563,8 @@ class Turbine(om.Group):
                            'PR', ('Pt_in', 'Fl_I:tot:P')])
 
         # Calculate ideal flow station properties
-        self.add_subsystem('ideal_flow', SetTotal(thermo_data=thermo_data, mode='S', init_reacts=elements),
+        self.add_subsystem('ideal_flow', SetTotal(thermo_data=thermo_data, mode='S', init_reacts=elements,
+                                                  thermo_method=thermo_method, units_method=units_method),
                            promotes_inputs=[('S', 'Fl_I:tot:S'), ('init_prod_amounts', 'Fl_I:tot:n')])
         self.connect("press_drop.Pt_out", "ideal_flow.P")
 
@@ -588,13 +598,15 @@ class Turbine(om.Group):
 
             # Determine bleed inflow properties
             bleed_names2.append(BN + '_inflow')
-            self.add_subsystem(BN + '_inflow', SetTotal(thermo_data=thermo_data, mode='h', init_reacts=bleed_elements),
+            self.add_subsystem(BN + '_inflow', SetTotal(thermo_data=thermo_data, mode='h', init_reacts=bleed_elements,
+                                                        thermo_method=thermo_method, units_method=units_method),
                                promotes_inputs=[('init_prod_amounts', BN + ":tot:n"), ('h', BN + ':tot:h')])
             self.connect('blds.' + BN + ':Pt', BN + "_inflow.P")
 
             # Ideally expand bleeds to exit pressure
             bleed_names2.append(BN + '_ideal')
-            self.add_subsystem(BN + '_ideal', SetTotal(thermo_data=thermo_data, mode='S', init_reacts=bleed_elements),
+            self.add_subsystem(BN + '_ideal', SetTotal(thermo_data=thermo_data, mode='S', init_reacts=bleed_elements,
+                                                        thermo_method=thermo_method, units_method=units_method),
                                promotes_inputs=[('init_prod_amounts', BN + ":tot:n")])
             self.connect(BN + "_inflow.flow:S", BN + "_ideal.S")
             self.connect("press_drop.Pt_out", BN + "_ideal.P")
@@ -611,7 +623,8 @@ class Turbine(om.Group):
 
         # Calculate real flow station properties before bleed air is added
         real_flow_b4bld = SetTotal(thermo_data=thermo_data, mode='h',
-                     init_reacts=elements, fl_name="Fl_O_b4bld:tot")
+                     init_reacts=elements, fl_name="Fl_O_b4bld:tot",
+                     thermo_method=thermo_method, units_method=units_method)
         self.add_subsystem('real_flow_b4bld', real_flow_b4bld,
                            promotes_inputs=[('init_prod_amounts', 'Fl_I:tot:n')])
         self.connect('ht_out_b4bld', 'real_flow_b4bld.h')
@@ -625,7 +638,8 @@ class Turbine(om.Group):
 
         # Calculate real flow station properties
         real_flow = SetTotal(thermo_data=thermo_data, mode='h',
-                             init_reacts=elements, fl_name="Fl_O:tot")
+                             init_reacts=elements, fl_name="Fl_O:tot",
+                             thermo_method=thermo_method, units_method=units_method)
         self.add_subsystem('real_flow', real_flow,
                            promotes_outputs=['Fl_O:tot:*'])
         self.connect("pwr_turb.ht_out", "real_flow.h")
@@ -640,7 +654,8 @@ class Turbine(om.Group):
             if designFlag:
                 #   SetStaticMN
                 out_stat = SetStatic(
-                    mode='MN', thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat")
+                    mode='MN', thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat",
+                    thermo_method=thermo_method, units_method=units_method)
                 self.add_subsystem('out_stat', out_stat,
                                    promotes_inputs=['MN'],
                                    promotes_outputs=['Fl_O:stat:*'])
@@ -654,7 +669,8 @@ class Turbine(om.Group):
             else:
                 #   SetStaticArea
                 out_stat = SetStatic(
-                    mode='area', thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat")
+                    mode='area', thermo_data=thermo_data, init_reacts=elements, fl_name="Fl_O:stat",
+                    thermo_method=thermo_method, units_method=units_method)
                 self.add_subsystem('out_stat', out_stat,
                                    promotes_inputs=['area'],
                                    promotes_outputs=['Fl_O:stat:*'])
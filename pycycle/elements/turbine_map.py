@@ -1,4 +1,7 @@
+import numpy as np
+
 import openmdao.api as om
+from openmdao.components.interp_util.outofbounds_error import OutOfBoundsError
 
 from pycycle.maps.lpt2269 import LPT2269
 
@@ -97,6 +100,54 @@ class ScaledMapValues(om.ExplicitComponent):
         J['Wp', 's_Wp'] = inputs['WpMap']
 
 
+class TurbineMapEval(om.ExplicitComponent):
+    """Evaluates the map at the operating point, from the map interpolant that is fit once per
+    process and shared by every turbine using the map"""
+
+    def initialize(self):
+        self.options.declare('map_data', default=LPT2269, desc='data container for raw turbine map data')
+        self.options.declare('interp_method', default='slinear', desc='method used for map interpolation')
+        self.options.declare('extrap', default=False, desc='switch to allow extrapolation off map')
+
+    def setup(self):
+        map_data = self.options['map_data']
+        method = self.options['interp_method']
+
+        self._pnames = [p['name'] for p in map_data.param_data]
+        for p in map_data.param_data:
+            self.add_input(p['name'], val=p['default'], units=p['units'])
+        for o in map_data.output_data:
+            self.add_output(o['name'], val=o['default'], units=o['units'])
+            self.declare_partials(o['name'], self._pnames)
+
+        self._interp = map_data.interpolant(method, self.options['extrap'])
+
+        # Exactly on a grid point the interpolant uses the bin ahead of it, so the derivative check
+        # has to step forward too. This also keeps it on the map at the lower grid bounds, e.g.
+        # the design alphaMap=0
+        if method == 'slinear':
+            self.set_check_partial_options('*', form='forward')
+
+    def _interpolate(self, inputs):
+        x = np.array([[inputs[name][0] for name in self._pnames]])
+        try:
+            return self._interp.interpolate(x)
+        except OutOfBoundsError as err:
+            varname = '.'.join((self.pathname, self._pnames[err.idx]))
+            raise om.AnalysisError("{}: Error interpolating the map because input '{}' was out of "
+                                   "bounds ('{}', '{}') with value '{}'"
+                                   .format(self.msginfo, varname, err.lower, err.upper, err.value))
+
+    def compute(self, inputs, outputs):
+        for out_name, (val, d_dx) in self._interpolate(inputs).items():
+            outputs[out_name] = val
+
+    def compute_partials(self, inputs, J):
+        for out_name, (val, d_dx) in self._interpolate(inputs).items():
+            for j, in_name in enumerate(self._pnames):
+                J[out_name, in_name] = d_dx[:, j]
+
+
 class TurbineMap(om.Group):
     """runs design and off-design mode Turbine map calculations"""
 
@@ -113,17 +164,8 @@ class TurbineMap(om.Group):
         method = self.options['interp_method']
         extrap = self.options['extrap']
 
-        params = map_data.param_data
-        outputs = map_data.output_data
-
         # Define map which will be used
-        readmap = om.MetaModelStructuredComp(method=method, extrapolate=extrap)
-        for p in params:
-            readmap.add_input(p['name'], val=p['default'], units=p['units'],
-                        training_data=p['values'])
-        for o in outputs:
-            readmap.add_output(o['name'], val=o['default'], units=o['units'],
-                        training_data=o['values'])
+        readmap = TurbineMapEval(map_data=map_data, interp_method=method, extrap=extrap)
 
         if design:
             # In design mode, operating point specified by default values for RlineMap, NcMap and alphaMap
@@ -162,6 +204,30 @@ class TurbineMap(om.Group):
             self.connect('scaledOutput.Np','map_bal.rhs:NpMap')
             self.connect('scaledOutput.Wp','map_bal.rhs:PRmap')
 
+    def guess_nonlinear(self, inputs, outputs, residuals):
+        if self.options['design']:
+            return
+
+        # the inputs are not computed yet at the start of a cycle run, there is nothing to seed from
+        Np, Wp, s_Np, s_Wp = (inputs[name][0] for name in ('Np', 'Wp', 's_Np', 's_Wp'))
+        if not np.all(np.isfinite([Np, Wp, s_Np, s_Wp])) or min(Np, Wp, s_Np, s_Wp) <= 0.:
+            return
+
+        # seed the map balance from the inverse map, unless it is already close to converged
+        norm = max(abs(residuals['NpMap'][0] / Np), abs(residuals['PRmap'][0] / Wp))
+        if norm > 1e-2 or norm == 0.0:
+            alpha = inputs['alphaMap'][0]
+            inverse = self.options['map_data'].inverse('WpMap')
+
+            # keep the solver's values when the inputs are off the map, e.g. stale initial values
+            if not inverse.on_map(alpha, Np, Wp, s_Np, s_Wp):
+                return
+
+            PRmap, NpMap = inverse(alpha, Np, Wp, s_Np, s_Wp)
+            # within the map grid and the balance bounds
+            outputs['NpMap'] = min(max(NpMap, inverse.speed[0], 1.), inverse.speed[-1], 200.)
+            outputs['PRmap'] = min(max(PRmap, inverse.line[0], 1.01), inverse.line[-1])
+
 
 if __name__ == "__main__":
     from pycycle.maps.lpt2269 import LPT2269
@@ -1,4 +1,253 @@
 # stupid hack so I can create data containers in python
 
+import hashlib
+import itertools
+import os
+import tempfile
+
+import numpy as np
+
+from openmdao.components.interp_util.interp import InterpND
+from openmdao.components.interp_util.outofbounds_error import OutOfBoundsError
+
+from pycycle.utils import default_cache_dir
+
+
+# stored with each cached interpolant, bump it when the file layout changes
+INTERPOLANT_VERSION = 1
+
+_interpolants = {}
+
+
 class MapData(object):
-    pass
\ No newline at end of file
+
+    def interpolant(self, method='slinear', extrap=False, cache_dir=False):
+        """MapInterpolant of all the output tables of the map, shared by every component that uses
+        this map with the same method, see get_map_interpolant"""
+        return get_map_interpolant(self, method, extrap, cache_dir)
+
+    def inverse(self, flow_name=None):
+        """InverseMap of the flow table of the map (WcMap for compressors, WpMap for turbines),
+        built the first time it is asked for"""
+
+        if flow_name is None:
+            flow_name = [o['name'] for o in self.output_data if o['name'] in ('WcMap', 'WpMap')][0]
+
+        cache = self.__dict__.setdefault('_inverse_maps', {})
+        if flow_name not in cache:
+            cache[flow_name] = InverseMap(self, flow_name)
+        return cache[flow_name]
+
+
+class InverseMap(object):
+    """Inverse lookup of a map of (alphaMap, speed, line) for the line value that gives a flow,
+    e.g. (WcMap, NcMap) -> RlineMap for a compressor and (WpMap, NpMap) -> PRmap for a turbine.
+
+    The flow is interpolated linearly in alphaMap and speed (clipped to the grid) and the first
+    line segment that brackets it is inverted. If no segment does, the closest grid value of the
+    line is returned, on_map tells the two apart. It is meant for initial guesses, not as an exact
+    inverse of the map."""
+
+    def __init__(self, map_data, flow_name):
+        params = map_data.param_data
+        self.param_names = [p['name'] for p in params]
+        self.alpha, self.speed, self.line = [np.array(p['values'], dtype=float) for p in params]
+        self.flow_name = flow_name
+        self.flow = np.array([o['values'] for o in map_data.output_data if o['name'] == flow_name][0], dtype=float)
+
+        for arr in (self.alpha, self.speed, self.line, self.flow):
+            arr.flags.writeable = False
+
+    @staticmethod
+    def _weights(grid, x):
+        """index and weight of linear interpolation in grid, clipped to its ends"""
+        if grid.size == 1:
+            return 0, 0, 0.
+        i = min(max(np.searchsorted(grid, x) - 1, 0), grid.size - 2)
+        t = min(max((x - grid[i]) / (grid[i+1] - grid[i]), 0.), 1.)
+        return i, i + 1, t
+
+    def flow_line(self, alpha, speed):
+        """flow at every line grid value for the given alphaMap and speed"""
+        i0, i1, s = self._weights(self.alpha, alpha)
+        j0, j1, t = self._weights(self.speed, speed)
+
+        flow = self.flow
+        return ((1 - s) * ((1 - t) * flow[i0, j0] + t * flow[i0, j1]) +
+                s * ((1 - t) * flow[i1, j0] + t * flow[i1, j1]))
+
+    def __call__(self, alpha, speed, flow, s_speed=1., s_flow=1.):
+        """(line, speed) on the unscaled map for the scaled speed and flow, e.g.
+        (RlineMap, NcMap) for Nc and Wc with the map scalars s_Nc and s_Wc"""
+
+        speed = speed / s_speed
+        flow = flow / s_flow
+        f = self.flow_line(alpha, speed) - flow
+
+        brackets = np.nonzero(f[:-1] * f[1:] <= 0)[0]
+        if brackets.size:
+            k = brackets[0]
+            if f[k] == f[k+1]:
+                return self.line[k], speed
+            return self.line[k] + f[k] / (f[k] - f[k+1]) * (self.line[k+1] - self.line[k]), speed
+
+        return self.line[np.argmin(np.abs(f))], speed
+
+    def on_map(self, alpha, speed, flow, s_speed=1., s_flow=1.):
+        """True if the scaled speed is within the speed grid and the flow is bracketed by the
+        line grid at that speed, so the inverse is an actual point of the map"""
+
+        if not np.all(np.isfinite([speed, flow, s_speed, s_flow])) or s_speed <= 0. or s_flow <= 0.:
+            return False
+
+        speed = speed / s_speed
+        flow = flow / s_flow
+        if not self.speed[0] <= speed <= self.speed[-1]:
+            return False
+
+        f = self.flow_line(alpha, speed) - flow
+        return bool(np.any(f[:-1] * f[1:] <= 0))
+
+
+class MapInterpolant(object):
+    """Interpolant of all the output tables of a map over its parameter grid, fit once and
+    evaluated for every table at once.
+
+    For slinear, the values at the corners of every grid cell are gathered up front, so a lookup
+    is one gather and a weighted sum per point. The other methods use an InterpND per table,
+    whose coefficient caches are then shared by every component using the interpolant."""
+
+    def __init__(self, grid, tables, method='slinear', extrap=False, corners=None):
+        self.grid = [np.array(g, dtype=float) for g in grid]
+        self.names = list(tables)
+        self.method = method
+        self.extrap = extrap
+        self.values = np.array([tables[name] for name in self.names], dtype=float)
+
+        if method == 'slinear':
+            self.corners = self._fit(self.values) if corners is None else np.asarray(corners)
+            self._offsets = np.array(list(itertools.product((False, True), repeat=len(self.grid))))
+            self._interps = None
+        else:
+            self.corners = None
+            self._interps = [InterpND(method=method, points=self.grid, values=vals, extrapolate=extrap)
+                             for vals in self.values]
+
+        for arr in self.grid + [self.values, self.corners]:
+            if arr is not None:
+                arr.flags.writeable = False
+
+    def _fit(self, values):
+        """corner values of every cell, num_cells... x num_tables x 2**num_params"""
+        sizes = values.shape[1:]
+        corners = [values[(slice(None),) + tuple(slice(o, n - 1 + o) for o, n in zip(offset, sizes))]
+                   for offset in itertools.product((0, 1), repeat=len(sizes))]
+        return np.moveaxis(np.stack(corners, axis=-1), 0, -2).copy()
+
+    def interpolate(self, x):
+        """values and derivatives of every table at the points x (num_points x num_params),
+        as a dict of table name to ((num_points,), (num_points, num_params))"""
+
+        x = np.atleast_2d(x)
+        if self._interps is not None:
+            return {name: interp.interpolate(x, compute_derivative=True)
+                    for name, interp in zip(self.names, self._interps)}
+
+        npts, ndim = x.shape
+        cell = np.empty((ndim, npts), dtype=int)
+        t = np.empty((npts, ndim), dtype=x.dtype)
+        dt = np.empty((npts, ndim))
+        for k, g in enumerate(self.grid):
+            xk = x[:, k]
+            if not self.extrap:
+                # the same round-off allowance at the ends of the grid as InterpND
+                eps = 1e-14 * g[-1]
+                out = np.isnan(xk.real) | (xk.real < g[0] - eps) | (xk.real > g[-1] + eps)
+                if np.any(out):
+                    raise OutOfBoundsError('One of the requested xi is out of bounds', k, xk[out][0], g[0], g[-1])
+            # a point exactly on a grid value uses the bin ahead of it, like InterpND
+            i = np.clip(np.searchsorted(g, xk.real, side='right') - 1, 0, g.size - 2)
+            cell[k] = i
+            dt[:, k] = 1. / (g[i+1] - g[i])
+            t[:, k] = (xk - g[i]) * dt[:, k]
+
+        # factors of the weight of each corner of the cell, and their derivatives
+        offsets = self._offsets
+        f = np.where(offsets, t[:, np.newaxis, :], 1 - t[:, np.newaxis, :])
+        df = np.where(offsets, dt[:, np.newaxis, :], -dt[:, np.newaxis, :])
+        w = np.prod(f, axis=2)
+        dw = np.empty((npts, 2**ndim, ndim), dtype=x.dtype)
+        for k in range(ndim):
+            dw[:, :, k] = df[:, :, k] * np.prod(np.delete(f, k, axis=2), axis=2)
+
+        corners = self.corners[tuple(cell)]
+        vals = np.einsum('pnc,pc->np', corners, w)
+        d_dx = np.einsum('pnc,pck->npk', corners, dw)
+        return {name: (vals[n], d_dx[n]) for n, name in enumerate(self.names)}
+
+    def save(self, filename):
+        arrays = {'grid_{}'.format(k): g for k, g in enumerate(self.grid)}
+        if self.corners is not None:
+            arrays['corners'] = self.corners
+        np.savez(filename, version=INTERPOLANT_VERSION, method=self.method, extrap=self.extrap,
+                 names=np.array(self.names), values=self.values, **arrays)
+
+    @classmethod
+    def load(cls, filename):
+        with np.load(filename) as data:
+            if data['version'] != INTERPOLANT_VERSION:
+                raise ValueError('{} is a version {} map interpolant, expected version {}'
+                                 .format(filename, data['version'], INTERPOLANT_VERSION))
+            grid = [data['grid_{}'.format(k)] for k in range(data['values'].ndim - 1)]
+            tables = dict(zip((str(n) for n in data['names']), data['values']))
+            return cls(grid, tables, str(data['method']), bool(data['extrap']),
+                       data['corners'] if 'corners' in data else None)
+
+
+def interpolant_key(grid, tables, method, extrap):
+    """hash of everything an interpolant depends on"""
+    content = repr((INTERPOLANT_VERSION, method, extrap, [np.asarray(g, dtype=float).tolist() for g in grid],
+                    [(name, np.asarray(vals, dtype=float).tolist()) for name, vals in tables.items()]))
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def get_map_interpolant(map_data, method='slinear', extrap=False, cache_dir=False):
+    """fit the interpolant of a map once per process for each method, shared read-only by all
+    the map components. With a cache_dir (None for $PYCYCLE_CACHE_DIR, ~/.cache/pycycle by
+    default) the fit is also stored on disk and loaded by later processes."""
+
+    key = (map_data, method, extrap)
+    if key in _interpolants:
+        return _interpolants[key]
+
+    grid = [p['values'] for p in map_data.param_data]
+    tables = {o['name']: o['values'] for o in map_data.output_data}
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir('map_interpolants')
+
+    interp = None
+    if cache_dir:
+        path = os.path.join(cache_dir, interpolant_key(grid, tables, method, extrap) + '.npz')
+        if os.path.isfile(path):
+            try:
+                interp = MapInterpolant.load(path)
+            except (OSError, ValueError, KeyError):  # incomplete or corrupted entry, fit it again
+                interp = None
+
+    if interp is None:
+        interp = MapInterpolant(grid, tables, method, extrap)
+
+        if cache_dir:
+            # write to a temporary file first, so other processes never see a partial entry
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp', suffix='.npz')
+                with os.fdopen(fd, 'wb') as f:
+                    interp.save(f)
+                os.replace(tmp_path, path)
+            except OSError:  # caching is optional, e.g. on a read-only file system
+                pass
+
+    _interpolants[key] = interp
+    return interp
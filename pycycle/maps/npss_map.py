@@ -0,0 +1,402 @@
+"""Reads turbomachinery maps stored in the NPSS table format into MapData objects.
+
+A map file holds one table per map output, all over the same grid, e.g.::
+
+    RlineStall = 1.0;
+
+    Table TB_Wc(real alphaMap, real NcMap, real RlineMap) {
+        alphaMap = 0.0 {
+            NcMap = 0.5 {
+                RlineMap = { 1.0, 1.2, 1.4 }
+                WcMap = { 1129.08, 1258.85, 1382.19 }
+            }
+            NcMap = 0.6 {
+                ...
+            }
+        }
+        alphaMap = 90.0 {
+            ...
+        }
+    }
+    Table TB_eff(real alphaMap, real NcMap, real RlineMap) {
+        ...
+    }
+
+Numeric assignments outside of the tables (RlineStall, or design point values named after the
+map parameters) are kept, table attributes like interp or extrap are ignored, and enclosing
+element and subelement blocks are skipped. The grids must be rectangular and strictly increasing.
+
+Parsed maps are cached as .npz files, keyed by the file contents, in $PYCYCLE_CACHE_DIR/maps
+(~/.cache/pycycle/maps by default), so later reads of the same file skip the parsing.
+"""
+import hashlib
+import json
+import os
+import re
+import tempfile
+
+from collections import OrderedDict
+
+import numpy as np
+
+from pycycle.utils import default_cache_dir
+from pycycle.maps.map_data import MapData
+
+
+# stored with each cached map, bump it when the file layout changes
+MAP_CACHE_VERSION = 1
+
+DEFAULT_UNITS = {'NcMap': 'rpm', 'NpMap': 'rpm', 'WcMap': 'lbm/s', 'WpMap': 'lbm/s'}
+
+_TOKENS = re.compile(r'''
+    (?P<comment>//[^\n]*|/\*.*?\*/)
+  | (?P<number>[-+]?(?:\d+\.?\d*|\.\d+)(?:[eEdD][-+]?\d+)?)
+  | (?P<string>"[^"]*")
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<symbol>[{}(),;=])
+  | (?P<space>\s+)
+''', re.VERBOSE | re.DOTALL)
+
+
+class _Tokens(object):
+    """tokens of a map file, as (kind, text, line number)"""
+
+    def __init__(self, text, filename):
+        self.filename = filename
+        self.tokens = []
+        pos, line = 0, 1
+        while pos < len(text):
+            match = _TOKENS.match(text, pos)
+            if match is None:
+                self.error(line, 'unexpected character {!r}'.format(text[pos]))
+            kind = match.lastgroup
+            if kind not in ('comment', 'space'):
+                self.tokens.append((kind, match.group(), line))
+            line += match.group().count('\n')
+            pos = match.end()
+        self.pos = 0
+
+    def error(self, line, msg):
+        raise ValueError('{}, line {}: {}'.format(self.filename, line, msg))
+
+    def peek(self, offset=0):
+        if self.pos + offset < len(self.tokens):
+            return self.tokens[self.pos + offset]
+        return (None, None, self.tokens[-1][2] if self.tokens else 1)
+
+    def next(self):
+        token = self.peek()
+        if token[0] is None:
+            self.error(token[2], 'unexpected end of file')
+        self.pos += 1
+        return token
+
+    def expect(self, text):
+        kind, got, line = self.next()
+        if got != text:
+            self.error(line, 'expected {!r}, got {!r}'.format(text, got))
+        return line
+
+    def number(self):
+        kind, text, line = self.next()
+        if kind != 'number':
+            self.error(line, 'expected a number, got {!r}'.format(text))
+        return float(text.replace('d', 'e').replace('D', 'E'))
+
+    def name(self):
+        kind, text, line = self.next()
+        if kind != 'name':
+            self.error(line, 'expected a name, got {!r}'.format(text))
+        return text
+
+    def at_assignment(self):
+        return self.peek()[0] == 'name' and self.peek(1)[1] == '='
+
+
+def _increasing(tokens, line, name, values):
+    if np.any(np.diff(values) <= 0):
+        tokens.error(line, 'the values of {} are not strictly increasing: {}'.format(name, list(values)))
+
+
+def _parse_values(tokens):
+    """{ v1, v2, ... }"""
+    tokens.expect('{')
+    values = []
+    while tokens.peek()[1] != '}':
+        values.append(tokens.number())
+        if tokens.peek()[1] == ',':
+            tokens.next()
+    tokens.next()
+    return np.array(values)
+
+
+def _skip_attribute(tokens):
+    """table attributes like interp = "linear"; or printExtrap = 0;"""
+    tokens.next()
+    tokens.expect('=')
+    tokens.next()
+    if tokens.peek()[1] == ';':
+        tokens.next()
+
+
+def _parse_block(tokens, args, level):
+    """grids (one per remaining argument), dependent name and values of a table block"""
+
+    if level == len(args) - 1:
+        line = tokens.peek()[2]
+        values = {}
+        while tokens.peek()[1] != '}':
+            if tokens.peek(2)[1] != '{':
+                _skip_attribute(tokens)
+                continue
+            name = tokens.name()
+            tokens.expect('=')
+            values[name] = _parse_values(tokens)
+
+        arg = args[level]
+        deps = [name for name in values if name != arg]
+        if arg not in values or len(deps) != 1:
+            tokens.error(line, 'expected the values of {} and of one dependent, got {}'.format(arg, list(values)))
+        x, y = values[arg], values[deps[0]]
+        if x.size != y.size:
+            tokens.error(line, '{} has {} values but {} has {}'.format(arg, x.size, deps[0], y.size))
+        _increasing(tokens, line, arg, x)
+        return [x], deps[0], y
+
+    arg = args[level]
+    line = tokens.peek()[2]
+    grid, blocks = [], []
+    while tokens.peek()[1] != '}':
+        if tokens.peek(2)[0] != 'number' or tokens.peek(3)[1] != '{':
+            _skip_attribute(tokens)
+            continue
+        block_line = tokens.peek()[2]
+        name = tokens.name()
+        if name != arg:
+            tokens.error(block_line, 'expected a block of {}, got {}'.format(arg, name))
+        tokens.expect('=')
+        grid.append(tokens.number())
+        tokens.expect('{')
+        blocks.append((block_line, _parse_block(tokens, args, level + 1)))
+        tokens.expect('}')
+
+    if not blocks:
+        tokens.error(line, 'table has no blocks of {}'.format(arg))
+    grid = np.array(grid)
+    _increasing(tokens, line, arg, grid)
+
+    sub_grids, dep, _ = blocks[0][1]
+    for block_line, (grids, name, _) in blocks:
+        if name != dep:
+            tokens.error(block_line, 'expected values of {}, got {}'.format(dep, name))
+        for sub_arg, g0, g in zip(args[level+1:], sub_grids, grids):
+            if g.shape != g0.shape or np.any(g != g0):
+                tokens.error(block_line, 'the grid is not rectangular, the values of {} differ from the '
+                                         'first {} block'.format(sub_arg, arg))
+
+    return [grid] + sub_grids, dep, np.array([values for _, (_, _, values) in blocks])
+
+
+def _parse_table(tokens):
+    line = tokens.expect('Table')
+    table_name = tokens.name()
+    tokens.expect('(')
+    args = []
+    while tokens.peek()[1] != ')':
+        names = []
+        while tokens.peek()[0] == 'name':
+            names.append(tokens.name())
+        if not names:
+            tokens.error(tokens.peek()[2], 'expected an argument name in table {}'.format(table_name))
+        args.append(names[-1])  # the type (real) comes first
+        if tokens.peek()[1] == ',':
+            tokens.next()
+    tokens.next()
+    tokens.expect('{')
+    grids, dep, values = _parse_block(tokens, args, 0)
+    tokens.expect('}')
+    return line, table_name, args, grids, dep, values
+
+
+def parse_npss_map(text, filename='<string>'):
+    """parameter grids, output tables and scalar assignments of a map file, as
+    (OrderedDict of param name to grid, OrderedDict of output name to values, dict of scalars)"""
+
+    tokens = _Tokens(text, filename)
+    params, outputs, scalars = None, OrderedDict(), {}
+
+    while tokens.peek()[0] is not None:
+        kind, text, line = tokens.peek()
+        if text == 'Table':
+            line, table_name, args, grids, dep, values = _parse_table(tokens)
+            if params is None:
+                params = OrderedDict(zip(args, grids))
+            elif list(params) != args:
+                tokens.error(line, 'table {} is a function of {}, the other tables of {}'
+                                   .format(table_name, args, list(params)))
+            elif any(g.shape != p.shape or np.any(g != p) for g, p in zip(grids, params.values())):
+                tokens.error(line, 'table {} is not on the same grid as the other tables'.format(table_name))
+            if dep in outputs:
+                tokens.error(line, 'the values of {} are given by more than one table'.format(dep))
+            outputs[dep] = values
+        elif tokens.at_assignment():
+            name = tokens.name().split('.')[-1]
+            tokens.expect('=')
+            kind, value, line = tokens.next()
+            if kind == 'number':
+                scalars[name] = float(value.replace('d', 'e').replace('D', 'E'))
+        else:
+            # element and subelement declarations around the tables, and their braces
+            tokens.next()
+
+    if params is None:
+        raise ValueError('{}: no tables found'.format(filename))
+
+    return params, outputs, scalars
+
+
+def map_key(content):
+    """hash of a map file's contents"""
+    return hashlib.sha256(repr(MAP_CACHE_VERSION).encode() + content).hexdigest()
+
+
+def _save_npz(f, params, outputs, scalars):
+    arrays = {'param_{}'.format(k): g for k, g in enumerate(params.values())}
+    arrays.update(('output_{}'.format(k), v) for k, v in enumerate(outputs.values()))
+    np.savez(f, version=MAP_CACHE_VERSION, param_names=np.array(list(params)),
+             output_names=np.array(list(outputs)), scalars=json.dumps(scalars), **arrays)
+
+
+def _load_npz(filename):
+    with np.load(filename) as data:
+        if data['version'] != MAP_CACHE_VERSION:
+            raise ValueError('{} is a version {} cached map, expected version {}'
+                             .format(filename, data['version'], MAP_CACHE_VERSION))
+        params = OrderedDict((str(name), data['param_{}'.format(k)]) for k, name in enumerate(data['param_names']))
+        outputs = OrderedDict((str(name), data['output_{}'.format(k)]) for k, name in enumerate(data['output_names']))
+        return params, outputs, json.loads(str(data['scalars']))
+
+
+def map_data_from_tables(params, outputs, scalars=None, units=None, defaults=None):
+    """MapData with the same attributes as the map modules in pycycle.maps.
+
+    defaults are the design point values of the map parameters, which come from defaults, then
+    from scalars named after the parameters, and are otherwise the first alphaMap and the middle
+    of the other grids. Outputs with a scalar or a value in defaults (e.g. the design PRmap of a
+    compressor) get it as their default too. RlineStall defaults to the lowest RlineMap."""
+
+    scalars = {} if scalars is None else scalars
+    all_units = dict(DEFAULT_UNITS)
+    all_units.update({} if units is None else units)
+
+    map_data = MapData()
+    map_data.defaults = {}
+    map_data.param_data = []
+    map_data.output_data = []
+    map_data.units = {}
+
+    for name, grid in params.items():
+        default = grid[0] if name == 'alphaMap' else grid[grid.size // 2]
+        default = float(scalars.get(name, default))
+        if defaults is not None:
+            default = defaults.get(name, default)
+        map_data.defaults[name] = default
+        setattr(map_data, name, grid)
+        map_data.param_data.append({'name': name, 'values': grid, 'default': default,
+                                    'units': all_units.get(name)})
+
+    for name, values in outputs.items():
+        setattr(map_data, name, values)
+        default = np.mean(values)
+        if name in scalars:
+            default = map_data.defaults[name] = float(scalars[name])
+        if defaults is not None and name in defaults:
+            default = map_data.defaults[name] = defaults[name]
+        map_data.output_data.append({'name': name, 'values': values, 'default': default,
+                                     'units': all_units.get(name)})
+
+    for name in list(params) + list(outputs):
+        if all_units.get(name) is not None:
+            map_data.units[name] = all_units[name]
+
+    if len(params) > 1:
+        map_data.Npts = list(params.values())[1].size
+
+    if 'RlineMap' in params:
+        map_data.RlineStall = float(scalars.get('RlineStall', params['RlineMap'][0]))
+
+    return map_data
+
+
+def read_npss_map(filename, units=None, defaults=None, cache_dir=None):
+    """MapData read from an NPSS map file. units override DEFAULT_UNITS for the named parameters
+    and outputs. The parsed tables are cached on disk unless cache_dir is False."""
+
+    with open(filename, 'rb') as f:
+        content = f.read()
+
+    if cache_dir is None:
+        cache_dir = default_cache_dir('maps')
+
+    tables = None
+    if cache_dir:
+        path = os.path.join(cache_dir, map_key(content) + '.npz')
+        if os.path.isfile(path):
+            try:
+                tables = _load_npz(path)
+            except (OSError, ValueError, KeyError):  # incomplete or corrupted entry, parse the file again
+                tables = None
+
+    if tables is None:
+        tables = parse_npss_map(content.decode(), filename)
+
+        if cache_dir:
+            # write to a temporary file first, so other processes never see a partial entry
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+                fd, tmp_path = tempfile.mkstemp(dir=cache_dir, prefix='.tmp', suffix='.npz')
+                with os.fdopen(fd, 'wb') as f:
+                    _save_npz(f, *tables)
+                os.replace(tmp_path, path)
+            except OSError:  # caching is optional, e.g. on a read-only file system
+                pass
+
+    return map_data_from_tables(*tables, units=units, defaults=defaults)
+
+
+def write_npss_map(map_data, filename, table_names=None):
+    """writes a map data object, e.g. from one of the map modules, in the NPSS table format"""
+
+    params = [(p['name'], np.asarray(p['values'])) for p in map_data.param_data]
+    args = ', '.join('real ' + name for name, _ in params)
+
+    def fmt(values):
+        return '{ ' + ', '.join(repr(float(v)) for v in values) + ' }'
+
+    def block(lines, values, level, indent):
+        name, grid = params[level]
+        if level == len(params) - 1:
+            lines.append('{}{} = {}'.format(indent, name, fmt(grid)))
+            lines.append('{}{} = {}'.format(indent, dep, fmt(values)))
+            return
+        for x, sub in zip(grid, values):
+            lines.append('{}{} = {} {{'.format(indent, name, repr(float(x))))
+            block(lines, sub, level + 1, indent + '    ')
+            lines.append(indent + '}')
+
+    lines = []
+    if hasattr(map_data, 'RlineStall'):
+        lines.append('RlineStall = {};'.format(repr(float(map_data.RlineStall))))
+    for name, value in getattr(map_data, 'defaults', {}).items():
+        lines.append('{} = {};'.format(name, repr(float(value))))
+
+    for o in map_data.output_data:
+        dep = o['name']
+        table_name = 'TB_' + dep if table_names is None else table_names[dep]
+        lines.append('')
+        lines.append('Table {}({}) {{'.format(table_name, args))
+        block(lines, np.asarray(o['values']), 0, '    ')
+        lines.append('}')
+
+    with open(filename, 'w') as f:
+        f.write('\n'.join(lines) + '\n')
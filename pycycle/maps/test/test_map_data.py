@@ -0,0 +1,129 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.components.interp_util.interp import InterpND
+from openmdao.components.interp_util.outofbounds_error import OutOfBoundsError
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.maps import map_data
+from pycycle.maps.axi5 import AXI5
+from pycycle.maps.lpt2269 import LPT2269
+
+
+def map_value(map_data, name, point):
+    params = map_data.param_data
+    values = [o['values'] for o in map_data.output_data if o['name'] == name][0]
+    interp = InterpND(method='slinear', points=[p['values'] for p in params], values=values)
+    return interp.interpolate(np.array(point))[0]
+
+
+class InverseMapTestCase(unittest.TestCase):
+
+    def test_cached(self):
+        self.assertIs(AXI5.inverse(), AXI5.inverse('WcMap'))
+        self.assertIs(LPT2269.inverse(), LPT2269.inverse('WpMap'))
+        self.assertEqual(LPT2269.inverse().flow_name, 'WpMap')
+
+    def test_compressor(self):
+        inverse = AXI5.inverse('WcMap')
+        s_Nc, s_Wc = 9000., 20.
+
+        for point in ((0., 0.93, 1.7), (30., 0.75, 2.3), (90., 1.03, 1.1)):
+            WcMap = map_value(AXI5, 'WcMap', point)
+            RlineMap, NcMap = inverse(point[0], point[1] * s_Nc, WcMap * s_Wc, s_Nc, s_Wc)
+
+            assert_rel_error(self, NcMap, point[1], 1e-14)
+            assert_rel_error(self, RlineMap, point[2], 1e-12)
+
+    def test_turbine(self):
+        inverse = LPT2269.inverse('WpMap')
+
+        for point in ((1., 100., 4.1), (1.5, 75., 3.3)):
+            WpMap = map_value(LPT2269, 'WpMap', point)
+            PRmap, NpMap = inverse(point[0], point[1], WpMap)
+
+            assert_rel_error(self, NpMap, point[1], 1e-14)
+            # PRmap gives back the same flow, the choked part of the map is flat
+            assert_rel_error(self, map_value(LPT2269, 'WpMap', (point[0], NpMap, PRmap)), WpMap, 1e-12)
+
+        # a flow past choke gives the closest point on the map
+        PRmap, NpMap = inverse(1., 100., 1e3)
+        self.assertIn(PRmap, LPT2269.PRmap)
+
+    def test_on_map(self):
+        inverse = LPT2269.inverse('WpMap')
+        WpMap = map_value(LPT2269, 'WpMap', (1., 100., 4.1))
+
+        self.assertTrue(inverse.on_map(1., 100., WpMap))
+        self.assertTrue(inverse.on_map(1., 200., 2 * WpMap, 2., 2.))
+        # past choke, off the speed grid and unset inputs
+        self.assertFalse(inverse.on_map(1., 100., 1e3))
+        self.assertFalse(inverse.on_map(1., 1e4, WpMap))
+        self.assertFalse(inverse.on_map(1., 100., WpMap, 0., 0.))
+
+
+class MapInterpolantTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.cache_dir)
+
+    def check_interpolant(self, interp, mdata, x, extrap=False, derivs=True):
+        points = [p['values'] for p in mdata.param_data]
+        vals = interp.interpolate(x)
+        for o in mdata.output_data:
+            expected = InterpND(method='slinear', points=points, values=o['values'], extrapolate=extrap)
+            val, d_dx = expected.interpolate(x, compute_derivative=True)
+            assert_rel_error(self, vals[o['name']][0], val, 1e-13)
+            if derivs:
+                assert_rel_error(self, vals[o['name']][1], d_dx, 1e-12)
+
+    def test_slinear(self):
+        for mdata in (AXI5, LPT2269):
+            interp = mdata.interpolant()
+            self.assertIs(mdata.interpolant(), interp)
+            self.assertFalse(interp.corners.flags.writeable)
+
+            grid = [p['values'] for p in mdata.param_data]
+            rng = np.random.RandomState(0)
+            self.check_interpolant(interp, mdata, np.array([rng.uniform(g[0], g[-1], 20) for g in grid]).T)
+
+            # on the grid the derivatives are one sided, and InterpND picks the side from its
+            # previous lookup, so only the values are compared
+            x = np.array([[g[0] for g in grid], [g[-1] for g in grid], [g[1] for g in grid]])
+            self.check_interpolant(interp, mdata, x, derivs=False)
+
+            with self.assertRaises(OutOfBoundsError):
+                interp.interpolate(np.array([[g[-1] + 1. for g in grid]]))
+
+            # round-off below the grid is allowed, like in InterpND
+            x = np.array([[g[0] - 1e-16 for g in grid]])
+            self.check_interpolant(interp, mdata, x, derivs=False)
+
+            self.check_interpolant(mdata.interpolant(extrap=True), mdata,
+                                   np.array([[g[0] - .1 for g in grid], [g[-1] + .1 for g in grid]]), extrap=True)
+
+    def test_disk_cache(self):
+        key = (AXI5, 'slinear', False)
+        map_data._interpolants.pop(key, None)
+        interp = AXI5.interpolant(cache_dir=self.cache_dir)
+        self.assertEqual(len(os.listdir(self.cache_dir)), 1)
+
+        # a new process loads the fit from disk
+        map_data._interpolants.pop(key)
+        loaded = AXI5.interpolant(cache_dir=self.cache_dir)
+        self.assertIsNot(loaded, interp)
+        self.assertEqual(loaded.names, interp.names)
+        assert_rel_error(self, loaded.corners, interp.corners, 0.)
+        self.check_interpolant(loaded, AXI5, np.array([[30., 0.93, 1.7]]))
+
+
+if __name__ == "__main__":
+
+    unittest.main()
@@ -0,0 +1,175 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+from openmdao.utils.assert_utils import assert_rel_error
+
+from pycycle.maps import npss_map
+from pycycle.maps.axi5 import AXI5
+from pycycle.maps.lpt2269 import LPT2269
+
+
+MAP_FILE = """// two speed lines of a compressor map
+Subelement CompressorRlineMap S_map {
+    S_map.RlineStall = 1.2;
+    NcMap = 0.6;
+
+    Table TB_Wc(real alphaMap, real NcMap, real RlineMap) {
+        interp = "linear";
+        alphaMap = 0.0 {
+            NcMap = 0.5 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                WcMap = { 10.0, 11.0, 11.5 }
+            }
+            NcMap = 0.7 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                WcMap = { 14.0, 15.0, 15.5 }
+            }
+        }
+        alphaMap = 90.0 {
+            NcMap = 0.5 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                WcMap = { 10.0, 11.0, 11.5 }
+            }
+            NcMap = 0.7 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                WcMap = { 14.0, 15.0, 15.5 }
+            }
+        }
+    }
+    /* efficiency, on the same grid */
+    Table TB_eff(real alphaMap, real NcMap, real RlineMap) {
+        alphaMap = 0.0 {
+            NcMap = 0.5 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                effMap = { .80, .84, .82 }
+            }
+            NcMap = 0.7 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                effMap = { .81, .85, .83 }
+            }
+        }
+        alphaMap = 90.0 {
+            NcMap = 0.5 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                effMap = { .80, .84, .82 }
+            }
+            NcMap = 0.7 {
+                RlineMap = { 1.0, 1.5, 2.0 }
+                effMap = { .81, .85, .83 }
+            }
+        }
+    }
+}
+"""
+
+
+class NPSSMapTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.tempdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tempdir)
+
+    def write(self, text):
+        filename = os.path.join(self.tempdir, 'test.map')
+        with open(filename, 'w') as f:
+            f.write(text)
+        return filename
+
+    def test_read(self):
+        data = npss_map.read_npss_map(self.write(MAP_FILE), cache_dir=False)
+
+        self.assertEqual([p['name'] for p in data.param_data], ['alphaMap', 'NcMap', 'RlineMap'])
+        self.assertEqual([o['name'] for o in data.output_data], ['WcMap', 'effMap'])
+        assert_rel_error(self, data.NcMap, np.array([.5, .7]), 1e-15)
+        assert_rel_error(self, data.RlineMap, np.array([1., 1.5, 2.]), 1e-15)
+        self.assertEqual(data.WcMap.shape, (2, 2, 3))
+        assert_rel_error(self, data.effMap[1, 1], np.array([.81, .85, .83]), 1e-15)
+
+        self.assertEqual(data.RlineStall, 1.2)
+        self.assertEqual(data.defaults, {'alphaMap': 0., 'NcMap': .6, 'RlineMap': 1.5})
+        self.assertEqual(data.units, {'NcMap': 'rpm', 'WcMap': 'lbm/s'})
+        self.assertEqual(data.param_data[1]['units'], 'rpm')
+        self.assertEqual(data.Npts, 2)
+
+    def test_round_trip(self):
+        for ref in (AXI5, LPT2269):
+            filename = os.path.join(self.tempdir, 'map.map')
+            npss_map.write_npss_map(ref, filename)
+            data = npss_map.read_npss_map(filename, cache_dir=False)
+
+            for p, p_ref in zip(data.param_data, ref.param_data):
+                self.assertEqual(p['name'], p_ref['name'])
+                self.assertEqual(p['units'], p_ref['units'])
+                assert_rel_error(self, p['values'], p_ref['values'], 1e-15)
+                self.assertEqual(p['default'], p_ref['default'])
+            for o, o_ref in zip(data.output_data, ref.output_data):
+                self.assertEqual(o['name'], o_ref['name'])
+                self.assertEqual(o['units'], o_ref['units'])
+                assert_rel_error(self, o['values'], o_ref['values'], 1e-15)
+                assert_rel_error(self, o['default'], o_ref['default'], 1e-15)
+
+        self.assertEqual(data.defaults, LPT2269.defaults)
+
+    def test_not_increasing(self):
+        filename = self.write(MAP_FILE.replace('NcMap = 0.7', 'NcMap = 0.4', 1))
+        with self.assertRaises(ValueError) as cm:
+            npss_map.read_npss_map(filename, cache_dir=False)
+        self.assertIn('line 9', str(cm.exception))
+        self.assertIn('NcMap are not strictly increasing', str(cm.exception))
+
+        filename = self.write(MAP_FILE.replace('{ 1.0, 1.5, 2.0 }', '{ 1.0, 2.5, 2.0 }', 1))
+        with self.assertRaises(ValueError) as cm:
+            npss_map.read_npss_map(filename, cache_dir=False)
+        self.assertIn('RlineMap are not strictly increasing', str(cm.exception))
+
+    def test_not_rectangular(self):
+        filename = self.write(MAP_FILE.replace('{ 1.0, 1.5, 2.0 }', '{ 1.0, 1.6, 2.0 }', 1))
+        with self.assertRaises(ValueError) as cm:
+            npss_map.read_npss_map(filename, cache_dir=False)
+        self.assertIn('the grid is not rectangular, the values of RlineMap differ', str(cm.exception))
+
+        # tables on different grids
+        filename = self.write(MAP_FILE.replace('alphaMap = 90.0', 'alphaMap = 80.0', 1))
+        with self.assertRaises(ValueError) as cm:
+            npss_map.read_npss_map(filename, cache_dir=False)
+        self.assertIn('table TB_eff is not on the same grid', str(cm.exception))
+
+    def test_cache(self):
+        filename = self.write(MAP_FILE)
+        cache_dir = os.path.join(self.tempdir, 'cache')
+
+        data = npss_map.read_npss_map(filename, cache_dir=cache_dir)
+        files = os.listdir(cache_dir)
+        self.assertEqual(len(files), 1)
+        self.assertTrue(files[0].endswith('.npz'))
+
+        # a cache hit doesn't parse the file again
+        parse = npss_map.parse_npss_map
+        npss_map.parse_npss_map = None
+        try:
+            cached = npss_map.read_npss_map(filename, cache_dir=cache_dir, units={'WcMap': 'kg/s'})
+        finally:
+            npss_map.parse_npss_map = parse
+
+        self.assertEqual([p['name'] for p in cached.param_data], ['alphaMap', 'NcMap', 'RlineMap'])
+        assert_rel_error(self, cached.WcMap, data.WcMap, 1e-15)
+        self.assertEqual(cached.RlineStall, 1.2)
+        self.assertEqual(cached.output_data[0]['units'], 'kg/s')
+
+        # a corrupted entry is replaced
+        path = os.path.join(cache_dir, files[0])
+        with open(path, 'wb') as f:
+            f.write(b'not a map')
+        data = npss_map.read_npss_map(filename, cache_dir=cache_dir)
+        assert_rel_error(self, data.effMap, cached.effMap, 1e-15)
+        self.assertEqual(npss_map._load_npz(path)[1]['WcMap'].shape, (2, 2, 3))
+
+
+if __name__ == "__main__":
+    unittest.main()
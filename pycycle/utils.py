@@ -0,0 +1,8 @@
+import os
+
+
+def default_cache_dir(subdir):
+    """directory of the on-disk cache for one kind of data, subdir of $PYCYCLE_CACHE_DIR
+    (~/.cache/pycycle by default)"""
+    root = os.environ.get('PYCYCLE_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'pycycle'))
+    return os.path.join(root, subdir)